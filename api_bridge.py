@@ -7,6 +7,7 @@ import os
 import sys
 import logging
 from datetime import datetime
+from urllib.parse import urlparse, parse_qs
 
 # Setup logging
 logging.basicConfig(
@@ -93,6 +94,16 @@ class PipelineManager:
 # Global manager instance
 manager = PipelineManager()
 
+# Storage backend for read endpoints (created on first use)
+_db = None
+
+def get_db():
+    global _db
+    if _db is None:
+        from logic.storage import get_storage
+        _db = get_storage()
+    return _db
+
 class PipelineHandler(http.server.BaseHTTPRequestHandler):
     def _set_headers(self, status=200):
         self.send_response(status)
@@ -106,10 +117,13 @@ class PipelineHandler(http.server.BaseHTTPRequestHandler):
         self._set_headers()
 
     def do_GET(self):
-        if self.path == '/status':
+        url = urlparse(self.path)
+        if url.path == '/status':
             self.get_full_status()
-        elif self.path == '/enrichment/stats':
+        elif url.path == '/enrichment/stats':
             self.get_enrichment_stats()
+        elif url.path == '/audits':
+            self.get_audits({k: v[-1] for k, v in parse_qs(url.query).items()})
         else:
             self._set_headers(404)
             self.wfile.write(json.dumps({"error": "Not found"}).encode())
@@ -170,11 +184,27 @@ class PipelineHandler(http.server.BaseHTTPRequestHandler):
             self._set_headers(500)
             self.wfile.write(json.dumps({"error": str(e)}).encode())
 
+    def get_audits(self, params):
+        """One page of the audit feed (keyset cursor, server-side filters and projection)."""
+        from logic.audit_feed import fetch_audit_page
+        try:
+            page = fetch_audit_page(get_db(), params)
+            self._set_headers()
+            self.wfile.write(json.dumps(page, default=str).encode())
+        except ValueError as e:
+            self._set_headers(400)
+            self.wfile.write(json.dumps({"error": str(e)}).encode())
+        except Exception as e:
+            logger.error(f"Error fetching audits: {e}")
+            self._set_headers(500)
+            self.wfile.write(json.dumps({"error": str(e)}).encode())
+
 def run():
     logger.info(f"🛰️  BPP API Bridge active on port {PORT}")
     logger.info("📡 Available Endpoints:")
     logger.info(f"  GET  /status           - Get full pipeline & progress status")
     logger.info(f"  GET  /enrichment/stats - Get quick metrics")
+    logger.info(f"  GET  /audits           - Paginated audit feed (?view=&risk_level=&brand=&seller=&cursor=...)")
     logger.info(f"  POST /pipeline/run    - Start full main pipeline")
     logger.info(f"  POST /pipeline/stop   - Stop current pipeline")
     logger.info(f"  POST /audit/refresh    - Trigger manual audit recalculation")
@@ -1,14 +1,20 @@
 import os
 import json
+import threading
 import requests
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add project root to path
 sys.path.append(os.getcwd())
 
 from datetime import datetime
-from logic.supabase_lite import SupabaseLite
-import time
+from logic.storage import get_storage
+from logic.delta_sync import DeltaSync
+from logic.projections import projection
+from logic.checkpoints import Checkpoint
+from logic.seller_cache import SellerCache
+from scrapers.rate_limiter import RateLimiter
 
 # Ensure UTF-8 output on Windows
 if sys.stdout.encoding != 'utf-8':
@@ -17,16 +23,104 @@ if sys.stdout.encoding != 'utf-8':
     except:
         pass
 
+API_BASE = "https://api.mercadolibre.com"
+# Largest number of ids /items?ids= accepts per call
+MULTIGET_SIZE = 20
+# Only the fields the enricher reads (smaller multiget bodies)
+ITEM_FIELDS = "id,seller_id,available_quantity,sold_quantity,attributes,variations,catalog_product_id,official_store_id"
+
+
+def clean_item_id(meli_id):
+    """'mla-123' / '123' -> 'MLA123' (the form the API expects)."""
+    clean_id = str(meli_id).upper().replace("-", "")
+    return clean_id if clean_id.startswith("MLA") else f"MLA{clean_id}"
+
+
+def multiget_url(ids, fields=ITEM_FIELDS):
+    return f"{API_BASE}/items?ids={','.join(ids)}" + (f"&attributes={fields}" if fields else "")
+
+
+def parse_item(data):
+    """
+    Enrichment fields of one item (multiget body) or catalog product (/products/{id}) payload:
+    EAN, brand, seller id, stock (summed over variations), sold quantity and all attributes.
+    """
+    stock = data.get("available_quantity", 0)
+    variations = data.get("variations") or []
+    if variations:
+        stock = sum(v.get("available_quantity", 0) for v in variations)
+    details = {
+        "ean": None,
+        "brand": None,
+        "seller_id": data.get("seller_id"),
+        "seller_name": None,
+        "seller_reputation": None,
+        "is_official_store": bool(data.get("official_store_id")),
+        "available_quantity": stock,
+        "sold_quantity": data.get("sold_quantity", 0),
+        "attributes": {}
+    }
+
+    attributes = data.get("attributes") or []
+    # For catalog products, attributes might be in a different structure
+    if not attributes and "main_features" in data:
+        attributes = [
+            {"id": f["key"], "name": f["key"], "value_name": f["value"]}
+            for f in data.get("main_features", [])
+        ]
+
+    for attr in attributes:
+        attr_id = str(attr.get("id", "")).lower()
+        attr_name = str(attr.get("name", "")).lower()
+        value = attr.get("value_name") or (attr.get("value_struct") or {}).get("number")
+
+        # EAN / GTIN
+        if attr_id in ["gtin", "ean"] or "ean" in attr_name or "gtin" in attr_name:
+            details["ean"] = str(value) if value else None
+
+        # Brand
+        if attr_id == "brand" or "marca" in attr_name or attr_id == "marca":
+            details["brand"] = value
+
+        # Store all attributes
+        if value:
+            details["attributes"][attr.get("name", attr_id)] = value
+
+    # Also check top-level fields for catalog products
+    if not details["brand"] and "brand" in data:
+        details["brand"] = data["brand"]
+    if not details["ean"] and "gtin" in data:
+        details["ean"] = data["gtin"]
+
+    return details
+
 class MeliAPIEnricher:
     """
     Enricher that uses MercadoLibre's official API to get product details.
     Much more reliable than scraping and doesn't get blocked.
+
+    Listings are fetched with the multiget endpoint (/items?ids=, MULTIGET_SIZE ids per call,
+    'workers' calls in flight) and every field is parsed from the batch body, instead of up
+    to four sequential calls per listing. Ids the multiget does not know are tried once as
+    catalog products (/products/{id}). Seller nickname and reputation come from the shared
+    seller cache (logic/seller_cache.py): one batched /users?ids= call per multiget batch at
+    most, none for sellers seen within the TTL.
+    Requests are paced by the shared adaptive rate limiter (scrapers/rate_limiter.py, target
+    'api'); database writes, status and checkpoints stay on the calling thread.
     """
     
-    def __init__(self, batch_size=50, delay_between_requests=0.5):
-        self.db = SupabaseLite()
-        self.batch_size = batch_size
-        self.delay = delay_between_requests
+    def __init__(self, batch_size=MULTIGET_SIZE, workers=4, delta=False, db=None, limiter=None, sellers=None):
+        self.db = db or get_storage()
+        # Delta mode: only consider listings scraped since the last delta run
+        self.sync = DeltaSync(self.db, "meli_api_enricher", columns=("last_scraped_at",)) if delta else None
+        self.batch_size = max(1, min(batch_size, MULTIGET_SIZE))
+        self.workers = max(1, workers)
+        self.limiter = limiter or RateLimiter("meli_api_enricher")
+        self.session = requests.Session()
+        self.session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=self.workers))
+        self.sellers = sellers or SellerCache(db=self.db, get=self.api_get)
+        self.lock = threading.Lock()  # worker threads share the request counter
+        self.requests = 0
         self.status_file = "enricher_status.json"
         self.access_token = os.getenv("MELI_ACCESS_TOKEN")
         self.progress = {
@@ -65,15 +159,21 @@ class MeliAPIEnricher:
         if len(self.progress["history"]) > 100:
             self.progress["history"] = self.progress["history"][-100:]
     
-    def enrich_products(self, limit=None):
+    def enrich_products(self, limit=None, resume=None):
         """
         Enrich products using MercadoLibre API.
         
         Args:
             limit: Maximum number of products to enrich (None = all)
+            resume: run id (or 'last') of a checkpointed run to continue
         """
         # Get products needing enrichment
-        products = self.get_products_to_enrich(limit)
+        if resume:
+            checkpoint = Checkpoint.open("meli_api_enricher", resume=resume)
+            products = checkpoint.remaining(self.get_products_to_enrich())
+        else:
+            products = self.get_products_to_enrich(limit)
+            checkpoint = Checkpoint.open("meli_api_enricher", params={"ids": [p["id"] for p in products]})
         
         # Initialize status
         self.update_status(
@@ -91,262 +191,235 @@ class MeliAPIEnricher:
         if not products:
             print("[OK] No products need enrichment")
             self.update_status(running=False)
+            checkpoint.finish()
             return
         
-        for i, product in enumerate(products):
-            try:
+        batches = [products[i:i + self.batch_size] for i in range(0, len(products), self.batch_size)]
+        print(f"BATCHES: {len(batches)} multiget call(s) of up to {self.batch_size} ids, {self.workers} in flight")
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.fetch_batch, [p["meli_id"] for p in batch]): batch for batch in batches}
+            for n, future in enumerate(as_completed(futures), start=1):
+                batch = futures[future]
                 timestamp = datetime.now().strftime("%H:%M:%S")
-                meli_id = product['meli_id']
-                
-                # Update current status
-                self.update_status(
-                    current_product={
-                        "meli_id": meli_id,
-                        "title": product['title'][:50],
-                        "timestamp": timestamp
-                    },
-                    processed=i
-                )
-                
-                print(f"\n[{timestamp}] [{i+1}/{len(products)}] {meli_id}")
-                print(f"  📄 {product['title'][:60]}...")
+                print(f"\n[{timestamp}] Batch {n}/{len(batches)} ({len(batch)} listings)")
+                try:
+                    found = future.result()
+                except Exception as e:
+                    # The whole batch stays unmarked: a resumed run retries it
+                    print(f"  [FAIL] Batch error: {e}")
+                    for product in batch:
+                        self.log_product(product["meli_id"], "failed", error=str(e))
+                    self.progress["failed"] += len(batch)
+                    self.progress["processed"] += len(batch)
+                    self.update_status()
+                    continue
                 
-                # Get details from API
-                details = self.get_item_details(meli_id)
-                
-                # Update database and log
-                if details:
-                    self.update_product(product['id'], details)
-                    ean = details.get('ean', 'N/A')
-                    brand = details.get('brand', 'N/A')
-                    seller = details.get('seller_name', 'N/A')
-                    stock = details.get('available_quantity', 0)
-                    
-                    print(f"  [OK] Enriched - EAN: {ean}, Brand: {brand}, Seller: {seller}, Stock: {stock}")
-                    
-                    self.log_product(meli_id, "enriched", ean=ean)
-                    self.progress["enriched"] += 1
-                else:
-                    print(f"  [WARN] No EAN found in API response")
-                    self.log_product(meli_id, "no_data")
-                
-                # Rate limiting
-                time.sleep(self.delay)
-                    
-            except Exception as e:
-                print(f"  [FAIL] Error: {e}")
-                self.log_product(meli_id, "failed", error=str(e))
-                self.progress["failed"] += 1
-                continue
-            finally:
-                self.progress["processed"] = i + 1
-                self.update_status()
+                for product in batch:
+                    self.process_product(product, found.get(clean_item_id(product["meli_id"])), checkpoint)
+                self.update_status(current_product={
+                    "meli_id": batch[-1]["meli_id"],
+                    "title": batch[-1]["title"][:50],
+                    "timestamp": timestamp
+                })
         
         # Final status update
         self.update_status(
             running=False,
             current_product=None
         )
+        checkpoint.finish("completed" if not self.progress["failed"] else "partial")
+        if self.sync:
+            if self.progress["failed"]:
+                # The watermark would move past the failed listings: the next --delta run retries them
+                print(f"[DELTA] {self.progress['failed']} listing(s) failed, watermark not advanced")
+            else:
+                self.sync.commit()
+        rates = self.limiter.summary()
+        self.limiter.close()
+        self.sellers.close()
         
         print("\n" + "=" * 80)
-        print(f"[OK] Enrichment complete:")
+        print(f"[OK] Enrichment complete (run {checkpoint.run_id}):")
         print(f"  - Total processed: {self.progress['processed']}/{len(products)}")
         print(f"  - Enriched: {self.progress['enriched']}")
         print(f"  - Failed: {self.progress['failed']}")
         print(f"  - No data: {self.progress['processed'] - self.progress['enriched'] - self.progress['failed']}")
+        print(f"  - API requests: {self.requests} ({self.requests / len(products):.2f} per listing)")
+        print(f"  - Seller profiles: {self.sellers.stats}")
+        print(f"  - Request rate: {rates}")
         print("=" * 80)
     
-    def get_products_to_enrich(self, limit=None):
-        """Get products that need enrichment and are NOT noise."""
+    def process_product(self, product, details, checkpoint):
+        """Writes one listing's details (None = the API had nothing for it) and checkpoints it."""
+        meli_id = product['meli_id']
         try:
-            # Using SupabaseLite's requests-based fetching
-            endpoint = f"{self.db.url}/rest/v1/meli_listings?select=*&item_status=neq.noise&item_status=neq.noise_manual"
-            # We want those where ean or brand or seller is missing
-            # PostgREST syntax for OR logic: or=(ean_published.is.null,brand_detected.is.null,seller_name.is.null)
-            endpoint += "&or=(ean_published.is.null,brand_detected.is.null,seller_name.is.null)"
-            
-            if limit:
-                endpoint += f"&limit={limit}"
+            if details:
+                self.update_product(product['id'], details)
+                ean = details.get('ean', 'N/A')
+                brand = details.get('brand', 'N/A')
+                seller = details.get('seller_name', 'N/A')
+                stock = details.get('available_quantity', 0)
                 
-            response = requests.get(endpoint, headers=self.db.headers)
-            response.raise_for_status()
-            return response.json()
+                print(f"  [OK] {meli_id} - EAN: {ean}, Brand: {brand}, Seller: {seller}, Stock: {stock}")
+                
+                self.log_product(meli_id, "enriched", ean=ean)
+                self.progress["enriched"] += 1
+            else:
+                print(f"  [WARN] {meli_id} - No data in API response")
+                self.log_product(meli_id, "no_data")
+            checkpoint.mark(product['id'])
+            if self.sync:
+                self.sync.observe((product,))
         except Exception as e:
-            print(f"Error fetching products: {e}")
-            return []
+            print(f"  [FAIL] {meli_id} - Error: {e}")
+            self.log_product(meli_id, "failed", error=str(e))
+            self.progress["failed"] += 1
+        finally:
+            self.progress["processed"] += 1
+    
+    def get_products_to_enrich(self, limit=None):
+        """Get products that need enrichment and are NOT noise."""
+        try:
+            filters = {
+                "item_status": ["neq.noise", "neq.noise_manual"],
+                # We want those where ean or brand or seller is missing
+                "or": "(ean_published.is.null,brand_detected.is.null,seller_name.is.null)"
+            }
+            select = projection("enrichment_queue")
+            if self.sync:
+                # Only listings that get processed move the watermark (see process_product)
+                return self.sync.fetch(select=select, filters=filters, limit=limit, observe=False)
+            return self.db.get_meli_listings(select=select, filters=filters, limit=limit)
         except Exception as e:
             print(f"Error fetching products: {e}")
             return []
     
-    def get_item_details(self, meli_id):
+    def api_get(self, url, token=True, timeout=10):
+        """One paced API call (token optional); the limiter adapts to its status."""
+        headers = {"Authorization": f"Bearer {self.access_token}"} if token and self.access_token else {}
+        self.limiter.wait("api")
+        response = self.session.get(url, headers=headers, timeout=timeout)
+        self.limiter.feedback("api", response.status_code)
+        with self.lock:
+            self.requests += 1
+        return response
+    
+    def multiget(self, ids, token=True):
+        """{id: (code, body)} for one /items?ids= call. Raises on a failed call."""
+        response = self.api_get(multiget_url(ids), token=token)
+        if response.status_code in (401, 403) and token and self.access_token:
+            print(f"    [INFO] Auth issue on multiget ({response.status_code}). Retrying without token...")
+            return self.multiget(ids, token=False)
+        response.raise_for_status()
+        return {
+            (entry.get("body") or {}).get("id") or ids[i]: (entry.get("code"), entry.get("body") or {})
+            for i, entry in enumerate(response.json())
+        }
+    
+    def fetch_batch(self, meli_ids):
         """
-        Get item details from MercadoLibre API.
-        Prioritizes /items/ endpoint as it is more likely to be public.
+        Details of up to MULTIGET_SIZE listings: {clean id: details}. Runs in a worker thread.
+        Items refused with the token are asked again without it (one call); ids the items
+        endpoint does not know are tried as catalog products.
         """
-        # Always use cleaned ID for API calls (handle MLA prefix)
-        clean_id = meli_id.upper()
-        if not clean_id.startswith("MLA"):
-            clean_id = f"MLA{clean_id}"
-
+        ids = list(dict.fromkeys(clean_item_id(m) for m in meli_ids))
+        results = self.multiget(ids)
+        refused = [i for i, (code, _) in results.items() if code in (401, 403)]
+        if refused and self.access_token:
+            results.update(self.multiget(refused, token=False))
+        
+        found = {}
+        for item_id in ids:
+            code, body = results.get(item_id, (None, {}))
+            if code == 200 and body:
+                found[item_id] = parse_item(body)
+            elif code == 404:
+                catalog = self.get_catalog_product(item_id)
+                if catalog:
+                    found[item_id] = parse_item(catalog)
+        
+        profiles = self.sellers.get_many(d["seller_id"] for d in found.values())
+        for details in found.values():
+            profile = profiles.get(str(details["seller_id"]))
+            if profile:
+                details["seller_name"] = profile.get("nickname") or "N/A"
+                details["seller_reputation"] = profile.get("reputation_level")
+                details["is_official_store"] = details["is_official_store"] or profile.get("is_official_store")
+        return found
+    
+    def get_catalog_product(self, product_id):
         try:
-            # 1. Prepare endpoints (Priority: /items/ for stock/seller name)
-            endpoints = [
-                f"https://api.mercadolibre.com/items/{clean_id}",
-                f"https://api.mercadolibre.com/products/{clean_id}"
-            ]
-            
-            data = None
-            for url in endpoints:
-                headers = {}
-                if self.access_token:
-                    headers["Authorization"] = f"Bearer {self.access_token}"
-                
-                response = requests.get(url, headers=headers, timeout=10)
-                
-                # If 401 or 403, try WITHOUT token
-                if response.status_code in [401, 403]:
-                    print(f"    [INFO] Auth issue on {url.split('/')[-2]}. Retrying without token...")
-                    response = requests.get(url, timeout=10)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    break # Success!
-                elif response.status_code == 404:
-                    continue # Try next endpoint
-                else:
-                    print(f"    [DEBUG] {url.split('/')[-2]} failed with {response.status_code}")
-
-            if not data:
-                return None
-            
-            # Extract relevant info
-            details = {
-                "ean": None,
-                "brand": None,
-                "seller_id": data.get("seller_id"),
-                "seller_name": None,
-                "available_quantity": data.get("available_quantity", 0),
-                "sold_quantity": data.get("sold_quantity", 0),
-                "attributes": {}
-            }
-            
-            # 2. Get Seller Name if seller_id is found
-            if details["seller_id"]:
-                details["seller_name"] = self.get_seller_name(details["seller_id"])
-            
-            # 3. Parse attributes (works for both catalog and items)
-            attributes = data.get("attributes", [])
-            
-            # For catalog products, attributes might be in a different structure
-            if not attributes and "main_features" in data:
-                # Convert main_features to attributes format
-                attributes = [
-                    {"id": f["key"], "name": f["key"], "value_name": f["value"]}
-                    for f in data.get("main_features", [])
-                ]
-            
-            for attr in attributes:
-                attr_id = str(attr.get("id", "")).lower()
-                attr_name = str(attr.get("name", "")).lower()
-                value = attr.get("value_name") or attr.get("value_struct", {}).get("number")
-                
-                # EAN / GTIN
-                if attr_id in ["gtin", "ean"] or "ean" in attr_name or "gtin" in attr_name:
-                    details["ean"] = str(value) if value else None
-                
-                # Brand
-                if attr_id == "brand" or "marca" in attr_name or attr_id == "marca":
-                    details["brand"] = value
-                
-                # Store all attributes
-                if value:
-                    details["attributes"][attr.get("name", attr_id)] = value
-            
-            # Also check top-level fields for catalog products
-            if not details["brand"] and "brand" in data:
-                details["brand"] = data["brand"]
-            
-            if not details["ean"] and "gtin" in data:
-                details["ean"] = data["gtin"]
-            
-            return details
-            
+            response = self.api_get(f"{API_BASE}/products/{product_id}")
+            return response.json() if response.status_code == 200 else None
         except requests.exceptions.RequestException as e:
             print(f"    API Error: {e}")
             return None
 
-    def get_seller_name(self, seller_id):
-        """Fetch seller name from /users/{id} endpoint."""
-        try:
-            url = f"https://api.mercadolibre.com/users/{seller_id}"
-            headers = {}
-            if self.access_token:
-                headers["Authorization"] = f"Bearer {self.access_token}"
-            
-            response = requests.get(url, headers=headers, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("nickname") or data.get("permalink", "").split("/")[-1]
-            return "N/A"
-        except Exception:
-            return "N/A"
-    
     def update_product(self, product_id, details):
-        """Update product with enriched data using SupabaseLite (requests)."""
-        try:
-            update_data = {}
-            
-            if details.get('ean'):
-                update_data['ean_published'] = details['ean']
-            
-            if details.get('brand'):
-                update_data['brand_detected'] = details['brand']
-            
-            if details.get('seller_name') and details['seller_name'] != 'N/A':
-                update_data['seller_name'] = details['seller_name']
-                
-            if details.get('seller_id'):
-                update_data['seller_id'] = str(details['seller_id'])
-                
-            if details.get('available_quantity') is not None:
-                update_data['available_quantity'] = details['available_quantity']
-                
-            if details.get('sold_quantity'):
-                update_data['sold_quantity_str'] = str(details['sold_quantity'])
+        """Update product with enriched data through the storage backend (errors propagate)."""
+        update_data = {}
+        
+        if details.get('ean'):
+            update_data['ean_published'] = details['ean']
+        
+        if details.get('brand'):
+            update_data['brand_detected'] = details['brand']
+        
+        if details.get('seller_name') and details['seller_name'] != 'N/A':
+            update_data['seller_name'] = details['seller_name']
             
-            # Update attributes (skipping complex merge for now in Lite version to keep it simple)
-            # update_data['attributes'] = ... 
+        if details.get('seller_id'):
+            update_data['seller_id'] = str(details['seller_id'])
+        
+        if details.get('seller_reputation'):
+            update_data['seller_reputation'] = details['seller_reputation']
+        
+        if details.get('is_official_store'):
+            update_data['is_official_store'] = True
             
-            # Mark as enriched
-            update_data['enriched_at'] = datetime.now().isoformat()
+        if details.get('available_quantity') is not None:
+            update_data['available_quantity'] = details['available_quantity']
             
-            if update_data:
-                endpoint = f"{self.db.url}/rest/v1/meli_listings?id=eq.{product_id}"
-                response = requests.patch(endpoint, json=update_data, headers=self.db.headers)
-                response.raise_for_status()
-                
-        except Exception as e:
-            print(f"    Error updating product: {e}")
-                
-        except Exception as e:
-            print(f"    Error updating product: {e}")
+        if details.get('sold_quantity'):
+            update_data['sold_quantity_str'] = str(details['sold_quantity'])
+        
+        # Mark as enriched
+        update_data['last_enriched_at'] = datetime.now().isoformat()
+        
+        self.db.update_meli_listing(product_id, update_data)
 
 if __name__ == "__main__":
     import sys
     
-    # Parse command line arguments
-    limit = int(sys.argv[1]) if len(sys.argv) > 1 else None
-    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 50
-    delay = float(sys.argv[3]) if len(sys.argv) > 3 else 0.5
+    # Parse command line arguments ('--delta', '--resume <run_id>' and '--workers <n>' may appear anywhere)
+    delta = "--delta" in sys.argv
+    argv = [a for a in sys.argv if a != "--delta"]
+    resume = None
+    if "--resume" in argv:
+        at = argv.index("--resume")
+        resume = argv[at + 1] if at + 1 < len(argv) else "last"
+        del argv[at:at + 2]
+    workers = 4
+    if "--workers" in argv:
+        at = argv.index("--workers")
+        workers = int(argv[at + 1])
+        del argv[at:at + 2]
+    limit = int(argv[1]) if len(argv) > 1 else None
+    batch_size = min(int(argv[2]), MULTIGET_SIZE) if len(argv) > 2 else MULTIGET_SIZE
     
     print("=" * 60)
     print("MELI API ENRICHER - Using Official API")
     print("=" * 60)
-    print(f"Batch size: {batch_size}")
-    print(f"Delay between requests: {delay}s")
+    print(f"Multiget batch: {batch_size} ids | In flight: {workers}")
+    print("Request rate: adaptive (scrapers/rate_limiter.py, shared with other runs)")
     if limit:
         print(f"Limit: {limit} products")
+    if delta:
+        print("Mode: DELTA (listings scraped since last run)")
+    if resume:
+        print(f"Resuming run: {resume}")
     print("=" * 60)
     
-    enricher = MeliAPIEnricher(batch_size=batch_size, delay_between_requests=delay)
-    enricher.enrich_products(limit=limit)
+    enricher = MeliAPIEnricher(batch_size=batch_size, workers=workers, delta=delta)
+    enricher.enrich_products(limit=limit, resume=resume)
@@ -17,12 +17,15 @@ if sys.stdout.encoding != 'utf-8':
 project_root = str(Path(__file__).resolve().parent.parent)
 if project_root not in sys.path:
     sys.path.append(project_root)
-import time
-import random
 import re
 import requests
-from playwright.async_api import async_playwright
-from logic.supabase_lite import SupabaseLite
+from logic.storage import get_storage
+from logic.projections import projection
+from logic.checkpoints import Checkpoint
+from logic.seller_cache import SellerCache
+from scrapers.browser_pool import BrowserPool, profile_dir
+from scrapers.page_readiness import goto_ready, item_signals, ReadinessStats
+from scrapers.rate_limiter import RateLimiter
 
 # Setup logging
 logging.basicConfig(
@@ -35,14 +38,18 @@ logger = logging.getLogger("ProductEnricher")
 class ProductEnricher:
     """
     Background enricher that scrapes product detail pages to extract EAN and specifications.
-    Runs in batches with rate limiting to avoid blocking.
+    Runs serially; item pages and API calls are paced by the shared adaptive rate limiter
+    (scrapers/rate_limiter.py, targets 'web_item' and 'api') instead of fixed 7-14 s waits.
     """
     
     def __init__(self, batch_size=1, delay_between_requests=5):
-        self.db = SupabaseLite()
+        self.db = get_storage()
         self.batch_size = batch_size
         self.delay = delay_between_requests
         self.status_file = "enricher_status.json"
+        self.readiness = ReadinessStats()
+        self.limiter = RateLimiter("product_enricher")
+        self.sellers = SellerCache(db=self.db, limiter=self.limiter)
         self.progress = {
             "running": False,
             "started_at": None,
@@ -82,13 +89,20 @@ class ProductEnricher:
         if len(self.progress["history"]) > 100:
             self.progress["history"] = self.progress["history"][-100:]
         
-    async def enrich_products(self, limit=None):
+    async def enrich_products(self, limit=None, resume=None):
         """
         Enrich products missing EAN or detailed specs.
+        Each processed listing is checkpointed; resume=<run_id> (or 'last') continues that run
+        with the listings it had not processed yet.
         """
         logger.info("ENRICHER VERSION: 2.2 (Robustness + Logging)")
         # Get products needing enrichment
-        products = self.get_products_to_enrich(limit)
+        if resume:
+            checkpoint = Checkpoint.open("product_enricher", resume=resume)
+            products = checkpoint.remaining(self.get_products_to_enrich())
+        else:
+            products = self.get_products_to_enrich(limit)
+            checkpoint = Checkpoint.open("product_enricher", params={"ids": [p["id"] for p in products]})
         
         # Initialize status
         self.update_status(
@@ -105,21 +119,14 @@ class ProductEnricher:
         if not products:
             print("No products need enrichment")
             self.update_status(running=False)
+            checkpoint.finish()
             return
         
-        user_data_dir = os.path.join(os.getcwd(), "user_data", f"temp_enrich_{int(time.time())}")
-        os.makedirs(user_data_dir, exist_ok=True)
-        
-        async with async_playwright() as p:
-            logger.info(f"Launching persistent context in {user_data_dir}...")
-            context = await p.chromium.launch_persistent_context(
-                user_data_dir=user_data_dir,
-                headless=False,
-                viewport={'width': 1280, 'height': 720},
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-                ignore_default_args=["--enable-automation"],
-                args=["--disable-blink-features=AutomationControlled"]
-            )
+        # One warm profile reused across runs (user_data/profiles/enricher) instead of a new
+        # temp_enrich_<ts> directory per run; the pool recycles it after N navigations
+        async with BrowserPool(headless=False, channel="chromium") as pool, \
+                pool.lease(profile="enricher", viewport={'width': 1280, 'height': 720}, blocking="enricher") as lease:
+            logger.info(f"Using persistent profile {profile_dir('enricher')}...")
             semaphore = asyncio.Semaphore(1) # STRICT SERIAL PROCESSING for stability
             
             async def enriched_task(i, product, page_for_task):
@@ -145,7 +152,8 @@ class ProductEnricher:
                         
                         # Update database and log
                         if details and (details.get('ean') or details.get('specs') or details.get('available_quantity') is not None or details.get('item_status')):
-                            self.update_product(product['id'], details)
+                            if not self.update_product(product['id'], details):
+                                raise RuntimeError("listing update was not stored")
                             
                             ean = details.get('ean', 'N/A')
                             stock = details.get('available_quantity', 0)
@@ -174,6 +182,8 @@ class ProductEnricher:
                             print(f"  |- ! {meli_id} - No extra data found")
                             self.log_product(meli_id, url, "no_data")
                         
+                        # Failed listings are not marked: a resumed run retries them
+                        checkpoint.mark(product['id'])
                         self.progress["processed"] += 1
                         self.update_status()
                         
@@ -183,73 +193,41 @@ class ProductEnricher:
                         self.log_product(meli_id, url, "failed", error=str(e))
                         self.progress["failed"] += 1
 
-            # Create a single page for serial processing
-            page = await context.new_page()
-            
+            # A single page for serial processing (re-fetched: the pool may have recycled it)
             for i, product in enumerate(products):
-                await enriched_task(i, product, page)
-                if i < len(products) - 1:
-                    # Randomized wait between 7-14 seconds
-                    wait_time = random.uniform(7, 14)
-                    print(f"  Waiting {wait_time:.1f}s to avoid detection...")
-                    await asyncio.sleep(wait_time)
-            
-            await page.close()
-            await context.close()
+                await enriched_task(i, product, await lease.page())
         
         # Final status update
         self.update_status(
             running=False,
             current_product=None
         )
+        checkpoint.finish("completed" if not self.progress["failed"] else "partial")
+        rates = self.limiter.summary()
+        self.limiter.close()
+        self.sellers.close()
         
         print("\n" + "=" * 80)
-        print(f"✓ Enrichment complete:")
+        print(f"✓ Enrichment complete (run {checkpoint.run_id}):")
         print(f"  - Total processed: {self.progress['processed']}/{len(products)}")
         print(f"  - Enriched: {self.progress['enriched']}")
         print(f"  - Failed: {self.progress['failed']}")
         print(f"  - No data: {self.progress['processed'] - self.progress['enriched'] - self.progress['failed']}")
+        print(f"  - Page readiness: {self.readiness.summary()}")
+        print(f"  - Seller profiles: {self.sellers.stats}")
+        print(f"  - Request rate: {rates}")
         print("=" * 80)
     
     def get_products_to_enrich(self, limit=None):
-        """Get products that need enrichment using SupabaseLite (requests)."""
+        """Get products that need enrichment through the storage backend."""
         try:
-            # Fetch all listings that have been MATCHED to a master product (exclude Noise)
-            # We want to re-verify stock for EVERY matched product in the browser for maximum accuracy,
-            # so we remove the filter that checks for missing data.
-            endpoint = f"{self.db.url}/rest/v1/compliance_audit?select=master_product_id,meli_listings!inner(*)&master_product_id=not.is.null"
-            
-            # Additional filter to ensure we only look at active listings
-            endpoint += "&meli_listings.item_status=eq.active"
-            
-            if limit:
-                endpoint += f"&limit={limit}"
-                
-            response = requests.get(endpoint, headers=self.db.headers)
-            response.raise_for_status()
-            audit_data = response.json()
-            
-            # Flatten the results: from { master_product_id, meli_listings: { ... } } to { ...listing }
-            all_products = []
-            seen_ids = set()
-            for entry in audit_data:
-                listing = entry.get("meli_listings")
-                if listing and listing.get("id") not in seen_ids:
-                    # Inject master_product_id back into the listing for reference if needed
-                    listing["master_product_id"] = entry.get("master_product_id")
-                    all_products.append(listing)
-                    seen_ids.add(listing.get("id"))
-            
-            # Sort locally by last_enriched_at (nulls first -> oldest enriched first)
-            all_products.sort(key=lambda x: x.get("last_enriched_at") or "1970-01-01T00:00:00")
-            
-            return all_products
+            # Fetch all listings that have been MATCHED to a master product (exclude Noise).
+            # We want to re-verify stock for EVERY matched, active product in the browser for maximum
+            # accuracy, sorted by last_enriched_at (nulls first -> oldest enriched first).
+            return self.db.get_matched_listings(limit=limit, select=projection("enrichment_browser"))
         except Exception as e:
             logger.error(f"Error fetching products: {e}")
             return []
-        except Exception as e:
-            print(f"Error fetching products: {e}")
-            return []
     
     def clean_url(self, url):
         """
@@ -326,11 +304,12 @@ class ProductEnricher:
         }
         
         try:
-            # Try to navigate with a reasonable timeout
-            response = await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+            # Navigate until the item state/content (or the not-found page) is in the DOM
+            response, ready = await goto_ready(page, url, item_signals(), self.readiness, attempts=1, timeout=30000,
+                                             limiter=self.limiter.target("web_item"))
             
             # Check for 404 or page-not-found markers
-            if not response or response.status == 404:
+            if not response or response.status == 404 or ready == "not_found":
                 return {"is_error": True, "status": 404}
             
             if await page.locator("text=Parece que esta página no existe").count() > 0:
@@ -453,15 +432,20 @@ class ProductEnricher:
                     headers = {"Authorization": f"Bearer {self.access_token}"} if self.access_token else {}
                     
                     # Try with token
+                    await self.limiter.acquire("api")
                     resp = requests.get(api_url, headers=headers, timeout=10)
+                    self.limiter.feedback("api", resp.status_code)
                     
                     # Fallback to public if failed/unauthorized
                     if not resp.ok:
+                        await self.limiter.acquire("api")
                         resp = requests.get(api_url, timeout=10)
+                        self.limiter.feedback("api", resp.status_code)
                         
                     if resp.ok:
                         api_data = resp.json()
                         details['available_quantity'] = self._parse_stock_from_data(api_data, details)
+                        await self._resolve_seller(details['metadata'])
                 except Exception as e:
                     logger.debug(f"API Fallback failed for {meli_id}: {e}")
             
@@ -471,6 +455,17 @@ class ProductEnricher:
             print(f"    Error in scrape_product_details: {e}")
             return details # Return what we have
 
+    async def _resolve_seller(self, meta):
+        """Nickname, reputation and official flag from the shared seller cache (logic/seller_cache.py)."""
+        if not meta.get('seller_id'):
+            return
+        profile = await asyncio.to_thread(self.sellers.get, meta['seller_id'])
+        if not profile:
+            return
+        meta['seller_name'] = profile.get('nickname') or meta['seller_name']
+        meta['seller_reputation'] = profile.get('reputation_level')
+        meta['is_official_store'] = meta.get('is_official_store') or profile.get('is_official_store')
+
     def _parse_stock_from_data(self, data, details):
         """Helper to parse available_quantity and metadata from API response."""
         if not data:
@@ -496,7 +491,7 @@ class ProductEnricher:
         s_id = data.get('seller_id')
         details['metadata'] = {
             'seller_id': s_id,
-            'seller_name': f"ID: {s_id}" if s_id else "API_UNKNOWN", # Nickname usually requires /users call
+            'seller_name': f"ID: {s_id}" if s_id else "API_UNKNOWN", # Replaced by the cached nickname (_resolve_seller)
             'is_official_store': data.get('official_store_id') is not None and data.get('official_store_id') > 0,
             'sold_quantity': data.get('sold_quantity', 0),
             'condition': data.get('condition', 'new'),
@@ -513,9 +508,11 @@ class ProductEnricher:
         Args:
             product_id: UUID of product in database
             details: dict with 'ean' and 'specs' keys
+
+        Returns True once the write is confirmed, False if it failed.
         """
         if not details:
-            return
+            return False
             
         try:
             update_data = {}
@@ -550,19 +547,17 @@ class ProductEnricher:
                 update_data['sold_quantity'] = meta['sold_quantity']
             if meta.get('condition'):
                 update_data['condition'] = meta['condition']
+            if meta.get('seller_reputation'):
+                update_data['seller_reputation'] = meta['seller_reputation']
             
             update_data['last_enriched_at'] = datetime.now().isoformat()
                 
             # Update attributes with all specs, description, variations, and advanced metadata
             if details.get('specs') or details.get('description') or details.get('variations_data') or details.get('metadata'):
-                # Fetch current attributes using requests
-                endpoint_select = f"{self.db.url}/rest/v1/meli_listings?select=attributes&id=eq.{product_id}"
+                # Fetch current attributes through the storage backend
                 try:
-                    res_get = requests.get(endpoint_select, headers=self.db.headers)
-                    if res_get.ok and res_get.json():
-                        current_attrs = res_get.json()[0].get('attributes') or {}
-                    else:
-                        current_attrs = {}
+                    rows = self.db.get_meli_listings(select="attributes", filters={"id": f"eq.{product_id}"})
+                    current_attrs = (rows[0].get('attributes') or {}) if rows else {}
                 except Exception:
                     current_attrs = {}
                 
@@ -587,28 +582,36 @@ class ProductEnricher:
                 update_data['attributes'] = current_attrs
             
             if update_data:
-                endpoint = f"{self.db.url}/rest/v1/meli_listings?id=eq.{product_id}"
-                response = requests.patch(endpoint, json=update_data, headers=self.db.headers)
-                response.raise_for_status()
+                self.db.update_meli_listing(product_id, update_data)
+            return True
                 
         except Exception as e:
             print(f"    Error updating product: {e}")
+            return False
 
 if __name__ == "__main__":
     import sys
     
-    # Parse command line arguments
-    limit = int(sys.argv[1]) if len(sys.argv) > 1 else None
-    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1
-    delay = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    # Parse command line arguments ('--resume <run_id>' may appear anywhere)
+    argv = list(sys.argv)
+    resume = None
+    if "--resume" in argv:
+        at = argv.index("--resume")
+        resume = argv[at + 1] if at + 1 < len(argv) else "last"
+        del argv[at:at + 2]
+    limit = int(argv[1]) if len(argv) > 1 else None
+    batch_size = int(argv[2]) if len(argv) > 2 else 1
+    delay = int(argv[3]) if len(argv) > 3 else 3
     
     print("=" * 60)
     print("PRODUCT ENRICHER - Background Deep Scraping")
     print("=" * 60)
     print("Batch size:", batch_size)
-    print("Delay: Randomized (7-14s) for speed")
+    print("Delay: adaptive (scrapers/rate_limiter.py, shared with other runs)")
     print("Limit:", limit, "products")
+    if resume:
+        print("Resuming run:", resume)
     print("=" * 60)
     
     enricher = ProductEnricher(batch_size=batch_size, delay_between_requests=delay)
-    asyncio.run(enricher.enrich_products(limit=limit))
+    asyncio.run(enricher.enrich_products(limit=limit, resume=resume))
@@ -6,8 +6,9 @@ import StatCard from './StatCard';
 import ProductListView from './ProductListView';
 
 const BrandDashboard: React.FC = () => {
-    const { products, stats, loading, fetchData, discardProduct, restoreProduct } = useBrandData();
     const [activeTab, setActiveTab] = useState<'products' | 'noise'>('products');
+    const { products, stats, loading, loadingMore, hasMore, loadMore, fetchData, discardProduct, restoreProduct } =
+        useBrandData(activeTab === 'noise' ? 'noise' : 'active');
 
     const handleExport = () => {
         const cleanFormat = products.map(p => ({
@@ -130,26 +131,23 @@ const BrandDashboard: React.FC = () => {
                     {/* Lista de Productos */}
                     <div className="space-y-6">
                         <ProductListView 
-                            products={
-                                (activeTab === 'noise' 
-                                    ? products.filter(p => p.match_level === 0 || (p.item_status || '').startsWith('noise'))
-                                    : products.filter(p => 
-                                        p.match_level > 0 && 
-                                        !(p.item_status || '').startsWith('noise') &&
-                                        // Filtro de Exclusión Radical (v7.1 - The Last Stand)
-                                        !['MLA2791020032', 'MLA1664941841', 'MLA709996945', 'MLA2798450386',
-                                          'MLA1511036271', 'MLA607731878', 'MLA1972292002', 'MLA1925230734', 
-                                          'MLA1486771347', 'MLA2042714502', 'MLA2042714502', 'MLA2042714504', 
-                                          'MLA2208639672'
-                                         ].includes(p.meli_id)
-                                    )
-                                )
-                            } 
+                            products={products}
                             loading={loading} 
                             onDiscard={discardProduct}
                             onRestore={restoreProduct}
                             viewMode={activeTab === 'noise' ? 'NOISE' : 'ACTIVE'}
                         />
+                        {hasMore && !loading && (
+                            <div className="flex justify-center">
+                                <button
+                                    onClick={loadMore}
+                                    disabled={loadingMore}
+                                    className="px-6 py-3 text-[10px] font-black uppercase tracking-widest rounded-xl bg-white/5 border border-white/10 text-slate-300 hover:bg-white/10 transition-all disabled:opacity-50"
+                                >
+                                    {loadingMore ? 'Cargando...' : 'Cargar más'}
+                                </button>
+                            </div>
+                        )}
                     </div>
             </main>
 
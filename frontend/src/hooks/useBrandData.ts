@@ -2,6 +2,60 @@ import { useState, useEffect, useCallback } from 'react';
 import { supabase } from '../supabaseClient';
 import { ProductAudit, DashboardStats, FieldStatus } from '../types';
 
+const API_URL = 'http://localhost:8000';
+const PAGE_SIZE = 100;
+
+export type FeedView = 'active' | 'noise';
+
+/**
+ * Las filas de GET /audits vienen planas (vista audit_feed): columnas de la auditoría,
+ * de la publicación y del producto maestro con prefijo master_
+ */
+function masterFromRow(row: any) {
+    if (!row.master_product_id) return null;
+    return {
+        id: row.master_product_id,
+        product_name: row.master_product_name,
+        brand: row.master_brand,
+        ean: row.master_ean,
+        list_price: row.master_list_price,
+        fc_net: row.master_fc_net,
+        units_per_pack: row.master_units_per_pack
+    };
+}
+
+function toProductAudit(row: any): ProductAudit {
+    const master = masterFromRow(row);
+    return {
+        id: row.id,
+        meli_id: row.meli_id || 'N/A',
+        title: row.title || 'Publicación Desconocida',
+        seller: row.seller_name || 'Vendedor Desconocido',
+        seller_location: row.seller_location || 'N/A',
+        price: row.price || 0,
+        thumbnail: row.thumbnail,
+        url: row.url || '#',
+        match_level: row.match_level || 0,
+        fraud_score: row.fraud_score || 0,
+        risk_level: row.risk_level || 'Bajo',
+        status: row.status || 'PENDING',
+        fields: parseFieldStatus(row, row, master),
+        master_product: master,
+        available_stock: row.available_quantity,
+        search_keyword: row.search_keyword || 'N/A',
+        item_status: row.item_status || 'active',
+
+        // Super Scraper Augmented Data
+        category_id: row.category_id,
+        category_name: row.category_name,
+        is_official_store: row.is_official_store,
+        sold_quantity_str: row.sold_quantity_str,
+        is_full: row.is_full,
+        processed_at: row.processed_at,
+        noise_reason: row.noise_reason
+    } as ProductAudit;
+}
+
 /**
  * Parsea violation_details JSONB a una comparación estructurada a nivel de campo
  */
@@ -94,8 +148,11 @@ function parseFieldStatus(audit: any, listing: any, master: any): ProductAudit['
     };
 }
 
-export const useBrandData = () => {
+export const useBrandData = (view: FeedView = 'active') => {
     const [products, setProducts] = useState<ProductAudit[]>([]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+    const [blacklisted, setBlacklisted] = useState(0);
     const [stats, setStats] = useState<DashboardStats>({
         scanned: 0,
         active: 0,
@@ -114,7 +171,7 @@ export const useBrandData = () => {
 
     const fetchEnrichmentStats = useCallback(async () => {
         try {
-            const res = await fetch('http://localhost:8000/status');
+            const res = await fetch(`${API_URL}/status`);
             const data = await res.json();
             setEnrichmentStats({
                 total: data.total_products || 0,
@@ -129,7 +186,7 @@ export const useBrandData = () => {
 
     const runPipeline = async () => {
         try {
-            await fetch('http://localhost:8000/pipeline/run', { method: 'POST' });
+            await fetch(`${API_URL}/pipeline/run`, { method: 'POST' });
             fetchEnrichmentStats();
         } catch (err) {
             alert('Error iniciando pipeline. ¿Está corriendo api_bridge.py?');
@@ -138,120 +195,55 @@ export const useBrandData = () => {
 
     const refreshScores = async () => {
         try {
-            await fetch('http://localhost:8000/audit/refresh', { method: 'POST' });
+            await fetch(`${API_URL}/audit/refresh`, { method: 'POST' });
             setTimeout(fetchData, 2000); // Give it a moment to start
         } catch (err) {
             alert('Error actualizando puntajes. ¿Está corriendo api_bridge.py?');
         }
     };
 
+    const fetchPage = async (cursor: string | null) => {
+        const params = new URLSearchParams({ view, limit: String(PAGE_SIZE) });
+        if (cursor) params.set('cursor', cursor);
+        const res = await fetch(`${API_URL}/audits?${params}`);
+        if (!res.ok) throw new Error(`GET /audits ${res.status}`);
+        return res.json();
+    };
+
     const fetchData = useCallback(async () => {
         setLoading(true);
         try {
-            // Cutoff for Stale Records (v6.8 - Safe 48h Window)
-            // We have manually deactivated zombies to match_level 0, so any record
-            // in this window with match_level > 0 is legitimate (467 items).
-            const cutoff = new Date(Date.now() - 48 * 3600000).toISOString(); 
-            // In fact, since we cleaned the DB, we could even remove this, but we keep it for health.
-
-            // Obtener datos de cumplimiento con paginación
-            let allAuditData: any[] = [];
-            let offset = 0;
-            const batchSize = 1000;
+            // Primera página del feed: filtros, blacklist y proyección se resuelven en el servidor
+            const page = await fetchPage(null);
+            const firstPage: ProductAudit[] = (page.items || []).map(toProductAudit);
+            setProducts(firstPage);
+            setNextCursor(page.next_cursor || null);
 
-            while (true) {
-                const { data: auditBatch, error: aError } = await supabase
-                    .from('compliance_audit')
-                    .select(`
-                        *,
-                        meli_listings(*),
-                        master_products(*)
-                    `)
-                    .gte('processed_at', cutoff) // FORCE REFRESH FILTER
-                    .order('processed_at', { ascending: false })
-                    .range(offset, offset + batchSize - 1);
-
-                if (aError) throw aError;
-                if (!auditBatch || auditBatch.length === 0) break;
-
-                allAuditData = [...allAuditData, ...auditBatch];
-                if (auditBatch.length < batchSize) break;
-                offset += batchSize;
-            }
+            // Estadísticas precalculadas (tabla dashboard_stats, mantenida por triggers):
+            // una sola fila reemplaza los cinco conteos count=exact por carga
+            const { data: dashStats, error: sError } = await supabase
+                .from('dashboard_stats')
+                .select('total_listings, noise_listings, noise_manual_listings, identified, unidentified, high_risk, medium_risk, last_audit_at')
+                .eq('id', 1)
+                .maybeSingle();
+            if (sError) throw sError;
 
-            // Conteos de estadísticas orientados a Identificación (Applying cutoff)
-            const { count: listingCount } = await supabase.from('meli_listings').select('*', { count: 'exact', head: true });
-            const { count: identifiedCount } = await supabase.from('compliance_audit').select('*', { count: 'exact', head: true })
-                .gt('match_level', 0)
-                .gte('processed_at', cutoff);
-                
-            const { count: unidentifiedCount } = await supabase.from('compliance_audit').select('*', { count: 'exact', head: true })
-                .eq('match_level', 0)
-                .gte('processed_at', cutoff);
-            const { count: autoNoiseCount } = await supabase.from('meli_listings').select('*', { count: 'exact', head: true }).eq('item_status', 'noise');
-            const { count: manualNoiseCount } = await supabase.from('meli_listings').select('*', { count: 'exact', head: true }).eq('item_status', 'noise_manual');
-
-            // Filtro de Exclusión Radical en Estadísticas (v7.1 - The Last Stand)
-            const STRICT_NOISE_IDS = [
-                'MLA2791020032', 'MLA1664941841', 'MLA709996945', 'MLA2798450386',
-                'MLA1511036271', 'MLA607731878', 'MLA1972292002', 'MLA1925230734', 
-                'MLA1486771347', 'MLA2042714502', 'MLA2042714504', 'MLA2208639672'
-            ];
-
-            const uniqueProducts: ProductAudit[] = [];
-            const seenIds = new Set();
-            if (allAuditData) {
-                const fetchedProducts: ProductAudit[] = allAuditData.map((a: any) => ({
-                    id: a.id,
-                    meli_id: a.meli_listings?.meli_id || 'N/A',
-                    title: a.meli_listings?.title || 'Publicación Desconocida',
-                    seller: a.meli_listings?.seller_name || 'Vendedor Desconocido',
-                    seller_location: a.meli_listings?.seller_location || 'N/A',
-                    price: a.meli_listings?.price || 0,
-                    thumbnail: a.meli_listings?.thumbnail,
-                    url: a.meli_listings?.url || '#',
-                    match_level: a.match_level || 0,
-                    fraud_score: a.fraud_score || 0,
-                    risk_level: a.risk_level || 'Bajo',
-                    status: a.status || 'PENDING',
-                    fields: parseFieldStatus(a, a.meli_listings, a.master_products),
-                    master_product: a.master_products,
-                    available_stock: a.meli_listings?.available_quantity,
-                    search_keyword: a.meli_listings?.search_keyword || 'N/A',
-                    item_status: a.meli_listings?.item_status || 'active',
-                    
-                    // Super Scraper Augmented Data
-                    category_id: a.meli_listings?.category_id,
-                    category_name: a.meli_listings?.category_name,
-                    is_official_store: a.meli_listings?.is_official_store,
-                    sold_quantity_str: a.meli_listings?.sold_quantity_str,
-                    is_full: a.meli_listings?.is_full,
-                    processed_at: a.processed_at,
-                    noise_reason: a.noise_reason
-                }));
-
-                for (const p of fetchedProducts) {
-                    if (!seenIds.has(p.meli_id)) {
-                        seenIds.add(p.meli_id);
-                        uniqueProducts.push(p);
-                    }
-                }
-                setProducts(uniqueProducts);
+            // Los IDs de la blacklist (STRICT_NOISE_IDS en logic/constants.py) se descuentan
+            // del total de identificados; /audits informa cuántos ocultó en la vista activa
+            if (typeof page.hidden_by_blacklist === 'number') {
+                setBlacklisted(page.hidden_by_blacklist);
             }
-
-            // Calculamos el conteo real basado en la vista (match > 0 y no blacklisted)
-            const pureActiveCount = uniqueProducts.filter(p => 
-                p.match_level > 0 && !STRICT_NOISE_IDS.includes(p.meli_id)
-            ).length;
+            const blacklistedActive = typeof page.hidden_by_blacklist === 'number' ? page.hidden_by_blacklist : blacklisted;
+            const identifiedCount = dashStats?.identified || 0;
 
             setStats({
-                scanned: listingCount || 0,
-                active: pureActiveCount, 
-                cleaned: (autoNoiseCount || 0) + (uniqueProducts.length - pureActiveCount), // Sumamos los ocultados por blacklist
-                high_risk: 0,
-                medium_risk: 0,
-                low_risk: manualNoiseCount || 0,
-                last_audit: uniqueProducts?.[0]?.processed_at
+                scanned: dashStats?.total_listings || 0,
+                active: Math.max(identifiedCount - blacklistedActive, 0),
+                cleaned: (dashStats?.noise_listings || 0) + (dashStats?.unidentified || 0) + blacklistedActive,
+                high_risk: dashStats?.high_risk || 0,
+                medium_risk: dashStats?.medium_risk || 0,
+                low_risk: dashStats?.noise_manual_listings || 0,
+                last_audit: dashStats?.last_audit_at || firstPage?.[0]?.processed_at
             });
 
             await fetchEnrichmentStats();
@@ -260,7 +252,26 @@ export const useBrandData = () => {
         } finally {
             setLoading(false);
         }
-    }, [fetchEnrichmentStats]);
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [fetchEnrichmentStats, view]);
+
+    const loadMore = async () => {
+        if (!nextCursor || loadingMore) return;
+        setLoadingMore(true);
+        try {
+            const page = await fetchPage(nextCursor);
+            const more: ProductAudit[] = (page.items || []).map(toProductAudit);
+            setProducts(prev => {
+                const seen = new Set(prev.map(p => p.meli_id));
+                return [...prev, ...more.filter(p => !seen.has(p.meli_id))];
+            });
+            setNextCursor(page.next_cursor || null);
+        } catch (err) {
+            console.error('Error cargando más auditorías:', err);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
 
     useEffect(() => {
         fetchData();
@@ -314,5 +325,5 @@ export const useBrandData = () => {
         }
     };
 
-    return { products, stats, enrichmentStats, loading, fetchData, runPipeline, refreshScores, discardProduct, restoreProduct };
+    return { products, stats, enrichmentStats, loading, loadingMore, hasMore: !!nextCursor, loadMore, fetchData, runPipeline, refreshScores, discardProduct, restoreProduct };
 };
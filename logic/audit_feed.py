@@ -0,0 +1,165 @@
+import json
+import base64
+
+from logic.constants import STRICT_NOISE_IDS
+
+# Columns of the 'audit_feed' view (supabase/migrations/20240717_audit_feed_view.sql)
+FEED_COLUMNS = [
+    "id", "listing_id", "master_product_id", "match_level", "fraud_score", "risk_level", "status",
+    "processed_at", "noise_reason", "violation_details", "is_price_ok", "is_brand_correct", "is_publishable_ok",
+    "meli_id", "title", "seller_name", "seller_location", "price", "thumbnail", "url", "available_quantity",
+    "search_keyword", "item_status", "category_id", "category_name", "is_official_store", "sold_quantity_str",
+    "is_full", "ean_published", "brand_detected", "status_publicacion",
+    "master_product_name", "master_brand", "master_ean", "master_list_price", "master_fc_net", "master_units_per_pack",
+]
+
+# Default projection: what the dashboard table and detail panel render
+DEFAULT_FIELDS = [c for c in FEED_COLUMNS if c not in ("listing_id", "is_publishable_ok")]
+
+SORT_COLUMNS = ("processed_at", "fraud_score")
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+
+def encode_cursor(row, sort):
+    payload = json.dumps({"v": row.get(sort), "id": row["id"]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return data["v"], data["id"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def _quoted(value):
+    """Quotes a value for a PostgREST logic tree (timestamps contain ':' and '+')."""
+    return '"' + str(value).replace('"', '\\"') + '"'
+
+
+def _after_cursor(sort, direction, value, last_id):
+    """
+    Keyset condition for the rows after (value, last_id). NULL sort values come first in desc
+    and last in asc order, and never go through eq/lt/gt: they get their own is.null branches.
+    """
+    op = "lt" if direction == "desc" else "gt"
+    same = f"id.{op}.{_quoted(last_id)}"
+    if value is None:
+        if direction == "desc":
+            return f"or(and({sort}.is.null,{same}),{sort}.not.is.null)"
+        return f"and({sort}.is.null,{same})"
+    after = f"{sort}.{op}.{_quoted(value)},and({sort}.eq.{_quoted(value)},{same})"
+    if direction == "asc":
+        after += f",{sort}.is.null"
+    return f"or({after})"
+
+
+def _flag(value, name):
+    if value in ("true", "1", "yes"):
+        return True
+    if value in ("false", "0", "no"):
+        return False
+    raise ValueError(f"'{name}' must be true or false")
+
+
+def build_feed_query(params):
+    """
+    Translates /audits query parameters into a storage query on the 'audit_feed' view.
+
+    view            active | noise | all (default)
+    risk_level      Alto | Medio | Bajo
+    brand           master product brand (exact)
+    match_level     one level or a comma list, e.g. 1,2
+    seller          seller name (exact)
+    price_violation true -> only is_price_ok = false
+    sort / order    processed_at | fraud_score, desc (default) | asc
+    limit           page size (max 500)
+    cursor          opaque next_cursor returned by the previous page
+    fields          comma-separated projection (id and the sort column are always included)
+    """
+    sort = params.get("sort", "processed_at")
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"'sort' must be one of {', '.join(SORT_COLUMNS)}")
+    direction = params.get("order", "desc")
+    if direction not in ("asc", "desc"):
+        raise ValueError("'order' must be asc or desc")
+
+    try:
+        limit = min(max(int(params.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        raise ValueError("'limit' must be an integer")
+
+    fields = [f.strip() for f in params["fields"].split(",") if f.strip()] if params.get("fields") else list(DEFAULT_FIELDS)
+    unknown = [f for f in fields if f not in FEED_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    for required in ("id", sort):
+        if required not in fields:
+            fields.append(required)
+
+    filters, logic = {}, []
+    view = params.get("view", "all")
+    if view == "active":
+        filters["match_level"] = ["gt.0"]
+        logic.append("or(item_status.is.null,item_status.not.like.noise*)")
+        filters["meli_id"] = f"not.in.({','.join(STRICT_NOISE_IDS)})"
+    elif view == "noise":
+        logic.append("or(match_level.is.null,match_level.eq.0,item_status.like.noise*)")
+    elif view != "all":
+        raise ValueError("'view' must be active, noise or all")
+
+    if params.get("risk_level"):
+        filters["risk_level"] = f"eq.{params['risk_level']}"
+    if params.get("brand"):
+        filters["master_brand"] = f"eq.{params['brand']}"
+    if params.get("seller"):
+        filters["seller_name"] = f"eq.{params['seller']}"
+    if params.get("match_level"):
+        levels = [l.strip() for l in params["match_level"].split(",") if l.strip()]
+        if not all(l.isdigit() for l in levels):
+            raise ValueError("'match_level' must be a comma list of integers")
+        filters.setdefault("match_level", []).append(f"in.({','.join(levels)})")
+    if params.get("price_violation") and _flag(params["price_violation"], "price_violation"):
+        filters["is_price_ok"] = "eq.false"
+
+    if params.get("cursor"):
+        value, last_id = decode_cursor(params["cursor"])
+        logic.append(_after_cursor(sort, direction, value, last_id))
+
+    if logic:
+        filters["and"] = f"({','.join(logic)})"
+
+    return {
+        "select": ",".join(fields),
+        "filters": filters,
+        # NULL sorts as the largest value in both directions (Postgres' default, which the
+        # (column DESC, id DESC) indexes serve); spelled out so every backend pages alike
+        "order": f"{sort}.{direction}.{'nullsfirst' if direction == 'desc' else 'nullslast'},id.{direction}",
+        "limit": limit,
+        "sort": sort,
+    }
+
+
+def fetch_audit_page(db, params):
+    """Returns {'items', 'next_cursor', 'limit'} for one page of the feed."""
+    query = build_feed_query(params)
+    rows = db.get_audit_feed(
+        select=query["select"], filters=query["filters"], order=query["order"], limit=query["limit"] + 1
+    )
+    has_more = len(rows) > query["limit"]
+    items = rows[:query["limit"]]
+    page = {
+        "items": items,
+        "next_cursor": encode_cursor(items[-1], query["sort"]) if has_more else None,
+        "limit": query["limit"],
+    }
+    if params.get("view") == "active" and not params.get("cursor"):
+        # Matched listings hidden by the blacklist, so the dashboard can adjust its headline count
+        hidden = db.get_audit_feed(select="id", filters={
+            "match_level": "gt.0", "meli_id": f"in.({','.join(STRICT_NOISE_IDS)})"
+        })
+        page["hidden_by_blacklist"] = len(hidden)
+    return page
@@ -0,0 +1,128 @@
+import os
+import json
+import uuid
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+DEFAULT_PATH = os.path.join("user_data", "checkpoints.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoint_runs (
+    run_id TEXT PRIMARY KEY,
+    flow TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'running',
+    params TEXT,
+    started_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_checkpoint_runs_flow ON checkpoint_runs(flow, started_at DESC);
+
+CREATE TABLE IF NOT EXISTS checkpoint_items (
+    run_id TEXT NOT NULL REFERENCES checkpoint_runs(run_id) ON DELETE CASCADE,
+    item TEXT NOT NULL,
+    value TEXT,
+    done_at TEXT NOT NULL,
+    PRIMARY KEY (run_id, item)
+);
+"""
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Checkpoint:
+    """
+    Durable progress of one run of a long flow (discovery, enrichers), kept in a local SQLite
+    file so a crashed, blocked or stopped run can be resumed with --resume <run_id>.
+
+    Each completed unit of work (a discovery (query, page), an enriched listing id) is committed
+    in its own transaction as soon as its result is stored, so a kill at any point loses at most
+    the unit in flight. 'params' keeps what the run needs to rebuild the same work list.
+
+        checkpoint = Checkpoint.open("product_enricher", resume=args.resume, params={...})
+        if not checkpoint.is_done(listing_id): ...
+        checkpoint.mark(listing_id)
+        checkpoint.finish()
+
+    resume='last' picks the most recent unfinished run of the flow.
+    """
+
+    def __init__(self, conn, run_id, flow, params=None, done=None, resumed=False):
+        self.conn = conn
+        self.run_id = run_id
+        self.flow = flow
+        self.params = params or {}
+        self.done = done or {}
+        self.resumed = resumed
+        # The connection is shared by executor threads (enricher workers): one writer at a time
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def connect(path=DEFAULT_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    @classmethod
+    def open(cls, flow, resume=None, params=None, path=DEFAULT_PATH, conn=None):
+        """Starts a new run, or reopens run 'resume' (ValueError if it does not exist for this flow)."""
+        conn = conn or cls.connect(path)
+        if resume:
+            if resume == "last":
+                row = conn.execute(
+                    "SELECT * FROM checkpoint_runs WHERE flow = ? AND status <> 'completed' ORDER BY started_at DESC LIMIT 1",
+                    (flow,)).fetchone()
+            else:
+                row = conn.execute("SELECT * FROM checkpoint_runs WHERE run_id = ? AND flow = ?", (resume, flow)).fetchone()
+            if row is None:
+                raise ValueError(f"No {flow} run '{resume}' to resume (see {path})")
+            done = {r["item"]: json.loads(r["value"]) if r["value"] else None
+                    for r in conn.execute("SELECT item, value FROM checkpoint_items WHERE run_id = ?", (row["run_id"],))}
+            with conn:
+                conn.execute("UPDATE checkpoint_runs SET status = 'running', updated_at = ? WHERE run_id = ?",
+                             (_now_iso(), row["run_id"]))
+            print(f"Resuming {flow} run {row['run_id']}: {len(done)} unit(s) already done")
+            return cls(conn, row["run_id"], flow, json.loads(row["params"] or "{}"), done, resumed=True)
+
+        run_id = f"{flow}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        now = _now_iso()
+        with conn:
+            conn.execute("INSERT INTO checkpoint_runs (run_id, flow, params, started_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                         (run_id, flow, json.dumps(params or {}), now, now))
+        print(f"Checkpoint run id: {run_id} (resume with --resume {run_id})")
+        return cls(conn, run_id, flow, params)
+
+    def is_done(self, item):
+        return str(item) in self.done
+
+    def mark(self, *items, value=None):
+        """Records items as done (one transaction). Marking an item again overwrites its value."""
+        if not items:
+            return
+        now = _now_iso()
+        encoded = json.dumps(value) if value is not None else None
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO checkpoint_items (run_id, item, value, done_at) VALUES (?, ?, ?, ?)",
+                [(self.run_id, str(item), encoded, now) for item in items])
+            self.conn.execute("UPDATE checkpoint_runs SET updated_at = ? WHERE run_id = ?", (now, self.run_id))
+            for item in items:
+                self.done[str(item)] = value
+
+    def remaining(self, rows, key="id"):
+        """Rows of the run's work list (params['ids'], when recorded) that are not done yet."""
+        planned = self.params.get("ids")
+        planned = set(planned) if planned is not None else None
+        return [r for r in rows if (planned is None or r[key] in planned) and not self.is_done(r[key])]
+
+    def finish(self, status="completed"):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE checkpoint_runs SET status = ?, updated_at = ? WHERE run_id = ?",
+                              (status, _now_iso(), self.run_id))
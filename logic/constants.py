@@ -53,3 +53,11 @@ EXCLUSION_KEYWORDS = [
 # --- Volumetric Config ---
 VOLUMETRIC_TOLERANCE = 0.15 # 15% allowance for weight mismatch
 LIQUID_DENSITY_MULTIPLIER = 1.085 # Standard formula density proxy
+
+# --- Dashboard Blacklist ---
+# Listings hidden from the active audit feed even when matched (manually reviewed false positives)
+STRICT_NOISE_IDS = [
+    "MLA2791020032", "MLA1664941841", "MLA709996945", "MLA2798450386",
+    "MLA1511036271", "MLA607731878", "MLA1972292002", "MLA1925230734",
+    "MLA1486771347", "MLA2042714502", "MLA2042714504", "MLA2208639672"
+]
@@ -0,0 +1,128 @@
+import re
+from datetime import datetime, timezone
+
+LISTING_WATERMARK_COLUMNS = ("last_scraped_at", "last_enriched_at")
+
+
+def _timestamp(value):
+    """
+    Comparable form of a watermark value: PostgREST returns '+00:00' offsets, older rows and
+    the SQLite backend may carry 'Z' or no offset at all (read as UTC). Unparseable values
+    compare as plain strings.
+    """
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        text = str(value).strip().replace(" ", "T", 1).replace("Z", "+00:00").replace("z", "+00:00")
+        # fromisoformat (before 3.11) wants exactly 3 or 6 fractional digits
+        text = re.sub(r"\.(\d+)", lambda m: "." + m.group(1)[:6].ljust(6, "0"), text, count=1)
+        try:
+            parsed = datetime.fromisoformat(text)
+        except ValueError:
+            return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _newer(value, than):
+    a, b = _timestamp(value), _timestamp(than)
+    if a is None or b is None:
+        return str(value) > str(than)
+    return a > b
+
+
+class DeltaSync:
+    """
+    Delta fetch of 'meli_listings' driven by per-consumer watermarks.
+
+    fetch() returns only rows whose watermark columns moved past the stored marks
+    (the first run, with no marks, is a full fetch). commit() advances the marks to the
+    highest values seen, and should only be called once the rows were processed.
+    Consumers that may skip or fail some fetched rows pass observe=False and call observe()
+    with the rows they actually processed.
+    """
+
+    def __init__(self, db, consumer, columns=LISTING_WATERMARK_COLUMNS):
+        self.db = db
+        self.consumer = consumer
+        self.columns = tuple(columns)
+        self.marks = {c: v for c, v in (db.get_watermark(consumer) or {}).items() if c in self.columns and v}
+        self._seen = dict(self.marks)
+        # Highest value each column had when a streaming scan started (see iter())
+        self._ceiling = None
+
+    def _filters(self, filters):
+        filters = dict(filters or {})
+        marked = [c for c in self.columns if c in self.marks]
+        if len(marked) == 1:
+            # Single column: plain range filter, combinable with any other filter
+            column = marked[0]
+            existing = filters.get(column, [])
+            filters[column] = (existing if isinstance(existing, list) else [existing]) + [f"gt.{self.marks[column]}"]
+        elif marked:
+            if "or" in filters:
+                raise ValueError("DeltaSync cannot combine a multi-column watermark with an existing 'or' filter")
+            filters["or"] = f"({','.join(f'{c}.gt.{self.marks[c]}' for c in marked)})"
+        return filters
+
+    def _select(self, select):
+        if select.strip() == "*":
+            return select
+        missing = [c for c in self.columns if c not in [s.strip() for s in select.split(",")]]
+        return ",".join([select] + missing) if missing else select
+
+    def fetch(self, select="*", filters=None, order=None, limit=None, observe=True):
+        if self.marks:
+            print(f"[DELTA] {self.consumer}: fetching rows changed since {self.marks}")
+        else:
+            print(f"[DELTA] {self.consumer}: no watermark yet, running a full fetch")
+        # Oldest changes first, so a 'limit' never skips rows below the new watermark
+        order = order or f"{self.columns[0]}.asc"
+        rows = self.db.get_meli_listings(select=self._select(select), filters=self._filters(filters), order=order, limit=limit)
+        if observe:
+            self.observe(rows)
+        return rows
+
+    def iter(self, select="*", filters=None, page_size=1000, observe=True):
+        """
+        Streaming variant of fetch(). Rows arrive in 'id' (keyset) order, not watermark order,
+        so a row another writer updates behind the cursor during the scan is not streamed;
+        if commit() then moved the mark to a later row of the same scan, that update would be
+        lost. The marks are therefore capped at the highest values that existed when the scan
+        started: rows written during the scan come back on the next run.
+        """
+        print(f"[DELTA] {self.consumer}: streaming rows changed since {self.marks or 'the beginning'}")
+        self._ceiling = {c: self._latest(c) for c in self.columns}
+        for row in self.db.iter_meli_listings(select=self._select(select), filters=self._filters(filters), page_size=page_size):
+            if observe:
+                self.observe((row,))
+            yield row
+
+    def _latest(self, column):
+        rows = self.db.get_meli_listings(select=column, filters={column: "not.is.null"}, order=f"{column}.desc", limit=1)
+        return rows[0][column] if rows else None
+
+    def observe(self, rows):
+        """Tracks the highest watermark values in 'rows' (compared as timestamps, not strings)."""
+        for row in rows:
+            for c in self.columns:
+                value = row.get(c)
+                if value and (c not in self._seen or _newer(value, self._seen[c])):
+                    self._seen[c] = value
+
+    def commit(self):
+        """Persists the highest values seen (capped as described in iter()) so the next run starts after them."""
+        if self._ceiling is not None:
+            for c, value in list(self._seen.items()):
+                ceiling = self._ceiling.get(c)
+                if ceiling is None:
+                    # The column was empty when the scan started: every value seen is newer
+                    if c in self.marks:
+                        self._seen[c] = self.marks[c]
+                    else:
+                        del self._seen[c]
+                elif _newer(value, ceiling):
+                    self._seen[c] = ceiling
+        if self._seen != self.marks:
+            self.db.set_watermark(self.consumer, self._seen)
+            self.marks = dict(self._seen)
+            print(f"[DELTA] {self.consumer}: watermark advanced to {self.marks}")
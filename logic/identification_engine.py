@@ -10,7 +10,7 @@ if sys.stdout.encoding != 'utf-8':
         pass
 
 from thefuzz import fuzz
-from logic.supabase_lite import SupabaseLite
+from logic.storage import get_storage
 from logic.constants import (
     NUTRICIA_BRANDS, EXTERNAL_MIMICS, NOISE_CATEGORIES, 
     EXCLUSION_KEYWORDS, VOLUMETRIC_TOLERANCE, LIQUID_DENSITY_MULTIPLIER
@@ -21,10 +21,15 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(level
 logger = logging.getLogger("IdentificationEngine")
 
 class IdentificationEngine:
-    def __init__(self):
-        self.db = SupabaseLite()
+    def __init__(self, db=None):
+        self.db = db or get_storage()
         # Cache master products for performance
         self.master_products = self.db.get_master_products()
+        # Master brands and their sub-brands (Nutrilon, Vital, etc.), longest first
+        search_brands = set(list(mp.get("brand", "") for mp in self.master_products if mp.get("brand")) + NUTRICIA_BRANDS)
+        self.brand_patterns = [
+            (b.lower(), re.compile(rf"\b{re.escape(b.lower())}\b")) for b in sorted(search_brands, key=len, reverse=True) if b
+        ]
         logger.info(f"Engine initialized with {len(self.master_products)} master products.")
 
     def extract_measures(self, text, substance_hint=None):
@@ -305,57 +310,67 @@ class IdentificationEngine:
 
         return max(0, score), matches, l_brand
 
-    def identify_product(self, listing):
-        """
-        [VERSION: ZeroTolerance_v4 - KeywordMandatory]
-        Identifies a master product based on the search keyword provided by the scraper.
-        1. REQUISITE: Search keyword must be literally present in the title.
-        2. ASSOCIATION: Only then, find the best matching master product for auditing.
-        """
-        listing_title_norm = self.normalize_text(listing.get("title", ""))
-        search_keyword = (listing.get("search_keyword") or "").lower()
-        
-        # 0. Early Noise Detection
+    def _early_noise(self, listing, listing_title_norm):
         listing_category = listing.get("category_name") or listing.get("category") or ""
         listing_category_id = listing.get("category_id")
         listing_attrs = listing.get("attributes") or {}
         is_noise, reason = self._check_hard_exclusions(listing_title_norm, listing_category, listing_category_id, listing_attrs)
-        if is_noise:
-            logger.info(f"  [REJECT] Early noise detection: {listing_title_norm} ({reason})")
-            return self.generate_audit_report(listing, None, 0)
-
-        # 1. BRAND DETECTION: Detect which brand(s) are in the title using whole-word matching
-        detected_brands = []
-        # Include both master brands and their sub-brands (Nutrilon, Vital, etc.)
-        search_brands = set(list(mp.get("brand", "") for mp in self.master_products if mp.get("brand")) + NUTRICIA_BRANDS)
-        unique_brands = sorted(list(search_brands), key=len, reverse=True)
-        
-        for brand in unique_brands:
-            brand_norm = brand.lower()
-            if re.search(rf"\b{re.escape(brand_norm)}\b", listing_title_norm):
-                detected_brands.append(brand_norm)
-                # Map detected sub-brands back to their master brands if possible
-                # (For now, just keeping them as detected_brands is enough for the filter)
-        
-        # 2. CANDIDATE SELECTION
-        candidates = []
-        listing_category = (listing.get("category_id") or "").upper()
+        return reason if is_noise else None
 
+    def _candidates(self, listing, listing_title_norm):
+        """Master products a listing may match: its detected brand(s), else the search keyword gate."""
+        # BRAND DETECTION: Detect which brand(s) are in the title using whole-word matching
+        detected_brands = [brand for brand, pattern in self.brand_patterns if pattern.search(listing_title_norm)]
         if detected_brands:
             # Priority 1: Match against the detected brand(s)
-            candidates = [
-                mp for mp in self.master_products 
+            return [
+                mp for mp in self.master_products
                 if mp.get("brand", "").lower() in detected_brands
             ]
-        elif search_keyword:
+
+        search_keyword = (listing.get("search_keyword") or "").lower()
+        if search_keyword:
             # Priority 2: Fallback to the search keyword gate if no brand was explicitly detected
             pattern = rf"\b{re.escape(search_keyword)}\b"
             if re.search(pattern, listing_title_norm):
-                candidates = [
-                    mp for mp in self.master_products 
-                    if search_keyword in self.normalize_text(mp.get("product_name", "")) or 
+                return [
+                    mp for mp in self.master_products
+                    if search_keyword in self.normalize_text(mp.get("product_name", "")) or
                        search_keyword in self.normalize_text(mp.get("brand", ""))
                 ]
+        return []
+
+    def classify_noise(self, listing):
+        """
+        Returns the reason a listing is noise before any matching (hard exclusions, or no master
+        product candidate), or None. identify_product() would mark these listings as noise too;
+        the scrapers call this to drop them before they are written.
+        """
+        listing_title_norm = self.normalize_text(listing.get("title", ""))
+        reason = self._early_noise(listing, listing_title_norm)
+        if reason:
+            return reason
+        if not self._candidates(listing, listing_title_norm):
+            return "no_candidate"
+        return None
+
+    def identify_product(self, listing):
+        """
+        [VERSION: ZeroTolerance_v4 - KeywordMandatory]
+        Identifies a master product based on the search keyword provided by the scraper.
+        1. REQUISITE: Search keyword must be literally present in the title.
+        2. ASSOCIATION: Only then, find the best matching master product for auditing.
+        """
+        listing_title_norm = self.normalize_text(listing.get("title", ""))
+        
+        # 0. Early Noise Detection
+        reason = self._early_noise(listing, listing_title_norm)
+        if reason:
+            logger.info(f"  [REJECT] Early noise detection: {listing_title_norm} ({reason})")
+            return self.generate_audit_report(listing, None, 0)
+
+        # 1-2. Brand detection and candidate selection
+        candidates = self._candidates(listing, listing_title_norm)
 
         # 2.1 CATEGORY FILTER: If we have a category, favor master products that might match it
         # (Medical/Infant Nutrition categories often start with MLA13xx or similar)
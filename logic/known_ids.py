@@ -0,0 +1,118 @@
+import os
+import json
+import math
+import hashlib
+
+DEFAULT_PATH = os.path.join("user_data", "known_ids.bloom")
+
+
+class BloomFilter:
+    """
+    Fixed-size set of strings with no false negatives and a bounded false-positive rate.
+    Sized for 'capacity' keys at 'error_rate'; 200k listing ids at 0.1% take ~350 KB.
+    """
+
+    def __init__(self, capacity=200000, error_rate=0.001, bits=None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        added = False
+        for pos in self._positions(key):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not self.bits[byte] & mask:
+                self.bits[byte] |= mask
+                added = True
+        self.count += added
+        return added
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+
+class KnownIds:
+    """
+    meli_ids already stored in 'meli_listings', kept as a Bloom filter in user_data/ so frequent
+    incremental discovery runs can tell known listings apart without querying the database.
+
+    load() reads the file and adds only the listings scraped after the newest 'last_scraped_at'
+    it had seen (a full scan the first time, or when the filter outgrew its capacity). A false
+    positive (1 in 1/error_rate new listings) is treated as known and skipped by incremental runs;
+    the next full discovery run still picks it up. Ids added with add() (noise tombstones) live
+    only in the file.
+    """
+
+    def __init__(self, db, path=DEFAULT_PATH, capacity=200000, error_rate=0.001):
+        self.db = db
+        self.path = path
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.filter = BloomFilter(capacity, error_rate)
+        self.since = None
+
+    def _read(self):
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "rb") as f:
+                header = json.loads(f.readline())
+                bits = bytearray(f.read())
+            bloom = BloomFilter(header["capacity"], header["error_rate"], bits=bits)
+            if len(bits) != (bloom.size + 7) // 8:
+                raise ValueError("size mismatch")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Known ids: ignoring unreadable {self.path} ({e})")
+            return False
+        bloom.count = header.get("count", 0)
+        self.filter, self.since = bloom, header.get("since")
+        return True
+
+    def load(self):
+        if not self._read() or self.filter.full:
+            self.filter, self.since = BloomFilter(max(self.capacity, self.filter.count * 2), self.error_rate), None
+        filters = {"last_scraped_at": f"gt.{self.since}"} if self.since else None
+        added = 0
+        for row in self.db.iter_meli_listings(select="meli_id,last_scraped_at", filters=filters):
+            if row.get("meli_id"):
+                added += self.filter.add(row["meli_id"])
+            scraped = row.get("last_scraped_at")
+            if scraped and (self.since is None or str(scraped) > str(self.since)):
+                self.since = str(scraped)
+        print(f"Known ids: {len(self.filter)} listing(s) ({added} added since the last run)")
+        return self
+
+    def __contains__(self, meli_id):
+        return meli_id in self.filter
+
+    def add(self, meli_ids):
+        """Marks ids as known without storing them (e.g. listings rejected as noise at scrape time)."""
+        for meli_id in meli_ids:
+            self.filter.add(meli_id)
+
+    def save(self):
+        """Writes the filter atomically (temp file + rename)."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        header = {"capacity": self.filter.capacity, "error_rate": self.filter.error_rate,
+                  "count": self.filter.count, "since": self.since}
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            f.write(self.filter.bits)
+        os.replace(tmp, self.path)
@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+
+class ListingSink:
+    """
+    Write-behind buffer for scraped listings.
+
+    Producers (discovery workers) call 'add' and continue immediately; rows are merged by
+    'meli_id' (later non-empty values win) and flushed with 'bulk_load' once 'flush_rows' are
+    pending or 'flush_seconds' have passed. Flushes run in a worker thread, one at a time, so
+    the event loop keeps scraping while the previous batch is being written.
+
+    'mark' values passed to add() (e.g. checkpoint keys of the page the rows came from) are
+    handed to on_flush(marks) once every row added with them is stored, never before.
+    """
+
+    def __init__(self, db, table="meli_listings", on_conflict="meli_id", flush_rows=500, flush_seconds=10.0, on_flush=None):
+        self.db = db
+        self.table = table
+        self.on_conflict = on_conflict
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.pending = {}
+        self.pending_marks = []
+        self.on_flush = on_flush
+        self.seen = set()
+        self.written = 0
+        self.failed = 0
+        self._last_flush = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    @staticmethod
+    def _merge(old, new):
+        merged = dict(old)
+        for key, value in new.items():
+            if value not in (None, "", "N/A") or key not in merged:
+                merged[key] = value
+        return merged
+
+    async def add(self, rows, mark=None):
+        """Buffers rows; returns how many were new to this sink (not seen earlier in the run)."""
+        if mark is not None:
+            self.pending_marks.append(mark)
+        new = 0
+        for row in rows:
+            key = row.get(self.on_conflict)
+            if not key:
+                continue
+            if key not in self.seen:
+                self.seen.add(key)
+                new += 1
+            self.pending[key] = self._merge(self.pending[key], row) if key in self.pending else row
+        due = len(self.pending) >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_seconds
+        if due and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self.flush())
+        return new
+
+    async def flush(self):
+        async with self._lock:
+            batch, self.pending = list(self.pending.values()), {}
+            marks, self.pending_marks = self.pending_marks, []
+            ok = True
+            if batch:
+                self._last_flush = time.monotonic()
+                ok = await asyncio.to_thread(self.db.bulk_load, self.table, batch, on_conflict=self.on_conflict)
+                if ok:
+                    self.written += len(batch)
+                else:
+                    self.failed += len(batch)
+                    print(f"    [SINK] FAILED to write {len(batch)} rows to '{self.table}'")
+            if ok and marks and self.on_flush:
+                self.on_flush(marks)
+            return ok
+
+    async def close(self):
+        if self._task:
+            await self._task
+        await self.flush()
+        return self.failed == 0
@@ -0,0 +1,62 @@
+"""
+Named column projections for every consumer of 'meli_listings'.
+
+Each profile is a PostgREST 'select' list holding only the columns that consumer reads, so the
+full 'attributes' JSONB (descriptions, specs, variations) is not shipped when it is not needed.
+Supported syntax (also understood by the SQLite backend):
+    column                      plain column
+    alias:column                renamed column
+    attributes->key             JSONB sub-path (returned under 'key')
+    attributes->>key            JSONB sub-path as text
+    attributes_slim             computed field: attributes minus the enrichment payload
+                                (supabase/migrations/20240715_attributes_slim_computed_field.sql)
+
+Keep a profile in sync with the fields its consumer reads; a missing column silently becomes None.
+"""
+
+PROJECTIONS = {
+    # IdentificationEngine.identify_product (refresh_audit.py). The engine scans every attribute
+    # key (bibliographic checks, volumetric/brand detection), so it gets the slim JSONB.
+    "audit_input": ",".join([
+        "id", "meli_id", "title", "price", "search_keyword",
+        "category", "category_id", "category_name",
+        "ean_published", "brand_detected", "is_official_store", "seller_reputation",
+        "last_scraped_at", "last_enriched_at",
+        "attributes:attributes_slim",
+    ]),
+
+    # MeliAPIEnricher queue: only identifiers are needed, details come from the API
+    "enrichment_queue": "id,meli_id,title,url,last_scraped_at",
+
+    # ProductEnricher (browser) queue over matched listings, oldest enrichment first
+    "enrichment_browser": "id,meli_id,title,url,last_enriched_at",
+
+    # scripts/update_stock.py: ids to query plus NOT NULL columns for the upsert back
+    "stock_sync": "id,meli_id,title,url,available_quantity",
+
+    # scripts/sync_seller_names.py: top-level seller columns + the meta_* keys saved by the enrichers
+    "seller_sync": ",".join([
+        "id", "meli_id", "title", "seller_name", "seller_id", "is_official_store", "seller_reputation",
+        "sold_quantity", "condition", "last_enriched_at",
+        "attributes->meta_seller_name", "attributes->meta_seller_id",
+        "attributes->meta_is_official_store", "attributes->meta_sold_quantity",
+        "attributes->meta_condition", "attributes->_last_enrichment_attempt",
+    ]),
+
+    # Dashboard table row (listing side); the same columns are exposed by the 'audit_feed' view
+    # and returned by default from GET /audits (logic/audit_feed.py)
+    "dashboard_row": ",".join([
+        "meli_id", "title", "seller_name", "seller_location", "price", "thumbnail", "url",
+        "available_quantity", "search_keyword", "item_status", "category_id", "category_name",
+        "is_official_store", "sold_quantity_str", "is_full", "ean_published", "brand_detected",
+        "status_publicacion",
+    ]),
+}
+
+
+def projection(name):
+    """Returns the select list of a named profile."""
+    try:
+        return PROJECTIONS[name]
+    except KeyError:
+        raise ValueError(f"Unknown projection '{name}'. Available: {', '.join(sorted(PROJECTIONS))}")
@@ -0,0 +1,159 @@
+import re
+from datetime import datetime, timezone
+
+# A query needs this many audited listings before its noise ratio is trusted
+MIN_SAMPLES = 20
+# A query subsumed by a broader one is still run if its last run brought this many listings
+# that no other query had found
+KEEP_NEW_LISTINGS = 3
+
+_SEPARATORS = re.compile(r"[\s'’`´\-_/.,]+")
+
+
+def normalize(query):
+    """'L'Serina ' -> 'l serina' (case, apostrophes and punctuation do not change a search)."""
+    return _SEPARATORS.sub(" ", (query or "").lower()).strip()
+
+
+def tokens(query):
+    return frozenset(normalize(query).split())
+
+
+class QueryPlanner:
+    """
+    Decides which discovery queries run, in which order and with how many result pages.
+
+    History comes from the storage backend: 'discovery_query_stats' (pages fetched and listings
+    first found by each query in earlier runs) and the 'discovery_query_yield' view (how many of
+    the listings a query brought were identified or turned out to be noise).
+
+    - Duplicates (case / apostrophes) collapse to one query.
+    - A query whose words include all the words of another planned query ('mct oil' vs 'mct',
+      'l'serina' vs 'serina') is pruned: the broader search already returns its results. It is
+      kept if its last run still brought KEEP_NEW_LISTINGS listings nobody else found. A
+      subsumed query that never ran is not pruned blind: it gets a one-page probe, after the
+      broader queries, so its first run measures what it adds.
+    - Queries are ordered by identified share, then new listings per page; noisy queries (enough
+      samples, nothing identified) go last with a single page. Running the productive queries
+      first makes redundant ones stop at their first page with nothing new.
+    - Page budget per query: base_pages without history; one more page (up to max_pages) when
+      every page of the last run still brought new listings; otherwise the number of pages that did.
+    """
+
+    def __init__(self, db, base_pages=2, max_pages=None):
+        self.db = db
+        self.base_pages = max(1, base_pages)
+        self.max_pages = max(self.base_pages, max_pages or self.base_pages + 2)
+        self.stats = {}
+        self.yields = {}
+
+    def load_history(self):
+        try:
+            self.stats = {r["query"]: r for r in self.db.get_query_stats()}
+            self.yields = {normalize(r["query"]): r for r in self.db.get_query_yield() if r.get("query")}
+        except Exception as e:
+            print(f"Query planner: no history available ({e}), using {self.base_pages} page(s) per query")
+            self.stats, self.yields = {}, {}
+
+    def _history(self, query):
+        key = normalize(query)
+        rows = [r for q, r in self.stats.items() if normalize(q) == key]
+        return max(rows, key=lambda r: r.get("runs") or 0) if rows else None
+
+    def _is_noisy(self, query):
+        # Listings dropped as noise at scrape time never reach the yield view: count them too
+        audited = self.yields.get(normalize(query)) or {}
+        rejected = (self._history(query) or {}).get("rejected_listings") or 0
+        return (audited.get("listings") or 0) + rejected >= MIN_SAMPLES and not audited.get("identified")
+
+    def _sort_key(self, query):
+        audited = self.yields.get(normalize(query)) or {}
+        history = self._history(query) or {}
+        listings = audited.get("listings") or 0
+        identified_share = (audited.get("identified") or 0) / listings if listings else 1.0
+        pages = history.get("pages_fetched") or 0
+        new_per_page = (history.get("new_listings") or 0) / pages if pages else float("inf")
+        return (self._is_noisy(query), -identified_share, -new_per_page, normalize(query))
+
+    def budget(self, query):
+        """(pages, reason) for one query."""
+        history = self._history(query)
+        if self._is_noisy(query):
+            audited = self.yields.get(normalize(query)) or {}
+            rejected = (history or {}).get("rejected_listings") or 0
+            noise, total = (audited.get("noise") or 0) + rejected, (audited.get("listings") or 0) + rejected
+            return 1, f"noisy ({noise}/{total} noise, none identified)"
+        if not history or not history.get("last_pages_budget"):
+            return self.base_pages, "no history"
+        last_budget = history["last_pages_budget"]
+        productive = history.get("last_productive_pages") or 0
+        if productive >= last_budget:
+            return min(self.max_pages, last_budget + 1), f"all {last_budget} page(s) brought new listings"
+        return max(1, productive), f"{productive} of {last_budget} page(s) brought new listings"
+
+    def plan(self, queries):
+        """
+        Returns (planned, pruned): planned is the ordered list of {'query', 'pages', 'reason'};
+        pruned lists {'query', 'by'} for the queries left out.
+        """
+        self.load_history()
+
+        # One spelling per word set; prefer the one with history
+        unique = {}
+        for query in sorted(q for q in queries if normalize(q)):
+            key = tokens(query)
+            if key not in unique or (self._history(query) and not self._history(unique[key])):
+                unique[key] = query
+
+        kept, pruned, probes = [], [], {}
+        # Broader queries (fewer words) first so they can subsume the specific ones
+        for key, query in sorted(unique.items(), key=lambda item: (len(item[0]), normalize(item[1]))):
+            broader = next((k for k in kept if tokens(k) < key and not self._is_noisy(k)), None)
+            history = self._history(query)
+            if broader and history is None:
+                probes[query] = broader
+                kept.append(query)
+            elif broader and (history.get("last_new_listings") or 0) < KEEP_NEW_LISTINGS:
+                pruned.append({"query": query, "by": broader})
+            else:
+                kept.append(query)
+
+        planned = []
+        # Probes run after the queries that cover them, so their 'new' listings are really new
+        for query in sorted(kept, key=lambda q: (self._is_noisy(q), q in probes, self._sort_key(q))):
+            if query in probes:
+                pages, reason = 1, f"probe: covered by '{probes[query]}', never run"
+            else:
+                pages, reason = self.budget(query)
+            planned.append({"query": query, "pages": pages, "reason": reason})
+        return planned, pruned
+
+    def record_run(self, runs):
+        """
+        Adds one run to the stats. runs: {query: {'budget', 'pages', 'seen', 'new', 'productive',
+        'rejected'}} ('productive' = highest page that brought listings new to the run, 'rejected'
+        = listings dropped as noise at scrape time). Queries whose pages all failed are not recorded.
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        rows = []
+        for query, run in runs.items():
+            if not run["pages"]:
+                continue
+            previous = self.stats.get(query) or {}
+            rows.append({
+                "query": query,
+                "runs": (previous.get("runs") or 0) + 1,
+                "pages_fetched": (previous.get("pages_fetched") or 0) + run["pages"],
+                "listings_seen": (previous.get("listings_seen") or 0) + run["seen"],
+                "new_listings": (previous.get("new_listings") or 0) + run["new"],
+                "last_pages_budget": run["budget"],
+                "last_pages_fetched": run["pages"],
+                "last_productive_pages": run["productive"],
+                "last_new_listings": run["new"],
+                "rejected_listings": (previous.get("rejected_listings") or 0) + run.get("rejected", 0),
+                "last_rejected_listings": run.get("rejected", 0),
+                "last_run_at": now,
+            })
+        if rows and self.db.upsert_query_stats(rows):
+            self.stats.update({r["query"]: r for r in rows})
+        return len(rows)
@@ -0,0 +1,183 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+DEFAULT_PATH = os.path.join("user_data", "seller_cache.db")
+# Nicknames and reputation move slowly; a week-old profile is good enough for the dashboard
+DEFAULT_TTL_DAYS = 7
+# Ids per /users?ids= call
+USERS_BATCH = 20
+USERS_URL = "https://api.mercadolibre.com/users"
+
+FIELDS = ("seller_id", "nickname", "reputation_level", "power_seller_status", "is_official_store", "fetched_at")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seller_profiles (
+    seller_id TEXT PRIMARY KEY,
+    nickname TEXT,
+    reputation_level TEXT,
+    power_seller_status TEXT,
+    is_official_store INTEGER NOT NULL DEFAULT 0,
+    fetched_at TEXT NOT NULL
+);
+"""
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def users_url(ids):
+    return f"{USERS_URL}?ids={','.join(str(i) for i in ids)}"
+
+
+def parse_user(body):
+    """Seller profile from a /users body (official stores are 'brand' users)."""
+    reputation = body.get("seller_reputation") or {}
+    return {
+        "seller_id": str(body.get("id")),
+        "nickname": body.get("nickname") or (body.get("permalink") or "").rstrip("/").split("/")[-1] or None,
+        "reputation_level": reputation.get("level_id"),
+        "power_seller_status": reputation.get("power_seller_status"),
+        "is_official_store": body.get("user_type") == "brand" or "brand" in (body.get("tags") or []),
+    }
+
+
+class SellerCache:
+    """
+    Seller profiles (nickname, reputation level, power seller status, official-store flag)
+    shared by the enrichers and scripts/sync_seller_names.py, so a seller with hundreds of
+    listings costs one lookup per TTL instead of one /users call per listing.
+
+    Lookups go local file (user_data/seller_cache.db) -> 'seller_profiles' table of the
+    storage backend, when given and migrated (20240723) -> batched /users?ids= calls for what
+    is still missing or older than the TTL. Profiles fetched from the API are written back to
+    both. When a refresh fails the stale profile is returned rather than nothing.
+
+    'get' is the HTTP call (url -> response); by default requests with MELI_ACCESS_TOKEN, paced
+    by 'limiter' (scrapers.rate_limiter.RateLimiter, target 'api') when given. The enrichers
+    pass their own paced getter.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, ttl_days=DEFAULT_TTL_DAYS, db=None, get=None, limiter=None):
+        self.ttl = timedelta(days=ttl_days)
+        self.db = db
+        self.http_get = get or self._get
+        self.limiter = limiter
+        self.access_token = os.getenv("MELI_ACCESS_TOKEN")
+        self.lock = threading.Lock()
+        self.stats = {"local": 0, "db": 0, "api": 0, "calls": 0, "failed": 0}
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def _get(self, url):
+        if self.limiter:
+            self.limiter.wait("api")
+        headers = {"Authorization": f"Bearer {self.access_token}"} if self.access_token else {}
+        response = requests.get(url, headers=headers, timeout=10)
+        if self.limiter:
+            self.limiter.feedback("api", response.status_code)
+        return response
+
+    def is_fresh(self, profile):
+        try:
+            fetched_at = datetime.fromisoformat(str(profile["fetched_at"]).replace("Z", "+00:00"))
+        except (KeyError, TypeError, ValueError):
+            return False
+        if fetched_at.tzinfo is None:
+            fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+        return _now() - fetched_at < self.ttl
+
+    def _read_local(self, ids):
+        rows = {}
+        with self.lock:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for row in self.conn.execute(f"SELECT * FROM seller_profiles WHERE seller_id IN ({placeholders})", chunk):
+                    rows[row["seller_id"]] = {**dict(row), "is_official_store": bool(row["is_official_store"])}
+        return rows
+
+    def _write_local(self, profiles):
+        with self.lock, self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO seller_profiles ({', '.join(FIELDS)}) VALUES ({', '.join('?' * len(FIELDS))})",
+                [tuple(int(p[f]) if f == "is_official_store" else p.get(f) for f in FIELDS) for p in profiles])
+
+    def _count(self, key, n=1):
+        with self.lock:
+            self.stats[key] += n
+
+    def _fetch(self, ids):
+        """Profiles from the API, USERS_BATCH ids per call."""
+        fetched = []
+        now = _now().isoformat()
+        for i in range(0, len(ids), USERS_BATCH):
+            batch = ids[i:i + USERS_BATCH]
+            try:
+                response = self.http_get(users_url(batch))
+                self._count("calls")
+                response.raise_for_status()
+                for entry in response.json():
+                    body = entry.get("body") or {}
+                    if entry.get("code") == 200 and body.get("id") is not None:
+                        fetched.append({**parse_user(body), "fetched_at": now})
+            except Exception as e:
+                print(f"    [SELLERS] Lookup of {len(batch)} seller(s) failed: {e}")
+                self._count("failed", len(batch))
+        return fetched
+
+    def get_many(self, seller_ids):
+        """{seller_id: profile} for the ids that could be resolved (ids are compared as strings)."""
+        ids = list(dict.fromkeys(str(s) for s in seller_ids if s not in (None, "", "N/A")))
+        if not ids:
+            return {}
+        # Only the SQLite calls hold the lock: enricher threads look sellers up concurrently
+        profiles = self._read_local(ids)
+        fresh = {i: p for i, p in profiles.items() if self.is_fresh(p)}
+        self._count("local", len(fresh))
+        missing = [i for i in ids if i not in fresh]
+
+        if missing and self.db is not None:
+            try:
+                shared = [p for p in self.db.get_seller_profiles(missing) if self.is_fresh(p)]
+            except Exception:
+                shared = []
+            if shared:
+                shared = [{**p, "seller_id": str(p["seller_id"]), "is_official_store": bool(p.get("is_official_store"))}
+                          for p in shared]
+                self._write_local(shared)
+                fresh.update({p["seller_id"]: p for p in shared})
+                self._count("db", len(shared))
+                missing = [i for i in missing if i not in fresh]
+
+        if missing:
+            fetched = self._fetch(missing)
+            if fetched:
+                self._write_local(fetched)
+                if self.db is not None:
+                    try:
+                        self.db.upsert_seller_profiles(fetched)
+                    except Exception as e:
+                        print(f"    [SELLERS] Could not share profiles through the database: {e}")
+                fresh.update({p["seller_id"]: p for p in fetched})
+                self._count("api", len(fetched))
+
+        # A stale profile beats none when the refresh failed
+        return {i: fresh.get(i) or profiles[i] for i in ids if i in fresh or i in profiles}
+
+    def get(self, seller_id):
+        return self.get_many([seller_id]).get(str(seller_id))
+
+    def nickname(self, seller_id, default=None):
+        profile = self.get(seller_id)
+        return (profile or {}).get("nickname") or default
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,420 @@
+import os
+import re
+import json
+import uuid
+import sqlite3
+from datetime import datetime, timezone
+
+from logic.storage import StorageBackend
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "supabase", "local", "sqlite_schema.sql")
+DEFAULT_DB_PATH = os.path.join("user_data", "bpp_local.db")
+
+# Columns stored as TEXT (JSON) or INTEGER (0/1) in SQLite that callers expect as dict / bool
+JSON_COLUMNS = {"attributes", "attributes_slim", "violation_details"}
+BOOL_COLUMNS = {
+    "is_publishable", "discount_allowed", "is_official_store", "is_full",
+    "is_brand_correct", "is_price_ok", "is_publishable_ok"
+}
+
+# SQL equivalents of the PostgREST computed fields used by logic/projections.py
+COMPUTED_FIELDS = {
+    "attributes_slim": "json_remove(attributes, '$.description_long', '$.variations_breakdown')"
+}
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_JSON_PATH = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*)->>?([A-Za-z_][A-Za-z0-9_]*)$")
+_COMPARATORS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _ident(name):
+    if not _IDENTIFIER.match(name or ""):
+        raise ValueError(f"Invalid column name: {name!r}")
+    return name
+
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1].replace('\\"', '"')
+    return value
+
+
+def _split_top_level(expr):
+    """Splits 'a.eq.1,and(b.eq.2,c.eq.3)' on commas that are not inside parentheses or quotes."""
+    parts, depth, quoted, current = [], 0, False, ""
+    for ch in expr:
+        if ch == '"':
+            quoted = not quoted
+        elif ch == "(" and not quoted:
+            depth += 1
+        elif ch == ")" and not quoted:
+            depth -= 1
+        if ch == "," and depth == 0 and not quoted:
+            parts.append(current)
+            current = ""
+        else:
+            current += ch
+    if current:
+        parts.append(current)
+    return parts
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    Embedded storage backend for offline runs, tests, benchmarks and large local backfills.
+    Uses the same tables/columns as supabase/migrations (see supabase/local/sqlite_schema.sql).
+    Bulk writes go through executemany in a single transaction, so inserts run at disk speed.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.environ.get("BPP_SQLITE_PATH") or DEFAULT_DB_PATH
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        # Writers such as ListingSink flush from a worker thread (one at a time)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        with open(SCHEMA_FILE, "r", encoding="utf-8") as f:
+            self.conn.executescript(f.read())
+        self._columns = {}
+
+    # --- Encoding helpers ---
+    def _table_columns(self, table):
+        if table not in self._columns:
+            rows = self.conn.execute(f"PRAGMA table_info({_ident(table)})").fetchall()
+            self._columns[table] = [r["name"] for r in rows]
+        return self._columns[table]
+
+    def _encode(self, column, value):
+        if column in JSON_COLUMNS and value is not None and not isinstance(value, str):
+            return json.dumps(value, ensure_ascii=False)
+        if isinstance(value, bool):
+            return int(value)
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, ensure_ascii=False)
+        return value
+
+    def _decode_row(self, row):
+        record = dict(row)
+        for key, value in record.items():
+            if value is None:
+                continue
+            if key in JSON_COLUMNS and isinstance(value, str):
+                try:
+                    record[key] = json.loads(value)
+                except ValueError:
+                    pass
+            elif key in BOOL_COLUMNS:
+                record[key] = bool(value)
+        return record
+
+    # --- Filter translation (PostgREST syntax -> SQL) ---
+    def _condition(self, column, expr):
+        column = _ident(column)
+        negate = False
+        if expr.startswith("not."):
+            negate, expr = True, expr[4:]
+
+        op, _, value = expr.partition(".")
+        if op == "is":
+            sql = {"null": f"{column} IS NULL", "true": f"{column} = 1", "false": f"{column} = 0"}[value]
+            params = []
+        elif op == "in":
+            items = [v.strip().strip('"') for v in value.strip("()").split(",") if v.strip()]
+            sql = f"{column} IN ({','.join('?' * len(items))})" if items else "0"
+            params = [self._filter_value(column, v) for v in items]
+        elif op in ("like", "ilike"):
+            sql = f"{column} LIKE ?"
+            params = [_unquote(value).replace("*", "%")]
+        elif op in _COMPARATORS:
+            sql = f"{column} {_COMPARATORS[op]} ?"
+            params = [self._filter_value(column, _unquote(value))]
+        else:
+            raise ValueError(f"Unsupported filter operator '{op}' on {column}")
+
+        return (f"NOT ({sql})" if negate else sql), params
+
+    def _filter_value(self, column, value):
+        if column in BOOL_COLUMNS and value in ("true", "false"):
+            return 1 if value == "true" else 0
+        return value
+
+    def _logic_group(self, expr, joiner):
+        """Translates a PostgREST logic tree: '(a.eq.1,or(b.is.null,c.gt.2))'."""
+        clauses, params = [], []
+        for part in _split_top_level(expr.strip()[1:-1]):
+            if part.startswith("or("):
+                sql, p = self._logic_group(part[2:], "OR")
+            elif part.startswith("and("):
+                sql, p = self._logic_group(part[3:], "AND")
+            else:
+                column, _, cond = part.partition(".")
+                sql, p = self._condition(column, cond)
+            clauses.append(sql)
+            params.extend(p)
+        return "(" + f" {joiner} ".join(clauses) + ")", params
+
+    def _where(self, filters):
+        clauses, params = [], []
+        for key, expr in (filters or {}).items():
+            for single in (expr if isinstance(expr, list) else [expr]):
+                if key in ("or", "and"):
+                    sql, p = self._logic_group(single, key.upper())
+                else:
+                    sql, p = self._condition(key, single)
+                clauses.append(sql)
+                params.extend(p)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _order(self, order):
+        if not order:
+            return ""
+        terms = []
+        for term in order.split(","):
+            # column[.asc|.desc][.nullsfirst|.nullslast]
+            column, *modifiers = term.split(".")
+            sql = f"{_ident(column)} {'DESC' if 'desc' in modifiers else 'ASC'}"
+            if "nullsfirst" in modifiers:
+                sql += " NULLS FIRST"
+            elif "nullslast" in modifiers:
+                sql += " NULLS LAST"
+            terms.append(sql)
+        return " ORDER BY " + ", ".join(terms)
+
+    def _select(self, select):
+        """Translates a PostgREST select list (aliases, JSONB sub-paths, computed fields)."""
+        if not select or select.strip() == "*":
+            return "*"
+        terms = []
+        for term in select.split(","):
+            alias, _, expr = term.strip().rpartition(":")
+            path = _JSON_PATH.match(expr)
+            if path:
+                sql = f"json_extract({_ident(path.group(1))}, '$.{path.group(2)}')"
+                alias = alias or path.group(2)
+            elif expr in COMPUTED_FIELDS:
+                sql = COMPUTED_FIELDS[expr]
+                alias = alias or expr
+            else:
+                sql = _ident(expr)
+            terms.append(f"{sql} AS {_ident(alias)}" if alias else sql)
+        return ", ".join(terms)
+
+    # --- Bulk write path ---
+    def bulk_insert(self, table, rows, on_conflict=None, chunk_size=10000):
+        """
+        Inserts/upserts rows with executemany inside one transaction.
+        Rows are grouped by key set so partial updates only touch the provided columns
+        (same semantics as PostgREST 'resolution=merge-duplicates').
+        """
+        with self.conn:
+            return self._write_rows(table, rows, on_conflict, chunk_size)
+
+    def bulk_load(self, table, rows, on_conflict=None, batch_size=5000, max_in_flight=4):
+        """executemany is already the fast path locally; concurrency does not apply to one file."""
+        try:
+            self.bulk_insert(table, list(rows), on_conflict=on_conflict, chunk_size=batch_size)
+            return True
+        except sqlite3.Error as e:
+            print(f"Bulk load into {table} failed (SQLite): {e}")
+            return False
+
+    def _write_rows(self, table, rows, on_conflict=None, chunk_size=10000):
+        """executemany body of bulk_insert; the caller owns the transaction."""
+        if not rows:
+            return 0
+
+        table = _ident(table)
+        known = set(self._table_columns(table))
+        has_uuid_pk = "id" in known
+
+        groups = {}
+        for row in rows:
+            row = {k: v for k, v in row.items() if k in known}
+            if has_uuid_pk and not row.get("id") and on_conflict != "id":
+                row["id"] = str(uuid.uuid4())
+            groups.setdefault(tuple(sorted(row.keys())), []).append(row)
+
+        written = 0
+        for columns, group in groups.items():
+            col_sql = ", ".join(columns)
+            sql = f"INSERT INTO {table} ({col_sql}) VALUES ({', '.join('?' * len(columns))})"
+            if on_conflict:
+                updates = [c for c in columns if c not in ("id", on_conflict)]
+                if updates:
+                    set_sql = ", ".join(f"{c} = excluded.{c}" for c in updates)
+                    sql += f" ON CONFLICT({_ident(on_conflict)}) DO UPDATE SET {set_sql}"
+                else:
+                    sql += f" ON CONFLICT({_ident(on_conflict)}) DO NOTHING"
+
+            for i in range(0, len(group), chunk_size):
+                chunk = group[i:i + chunk_size]
+                self.conn.executemany(sql, [[self._encode(c, r[c]) for c in columns] for r in chunk])
+                written += len(chunk)
+        return written
+
+    # --- Listings ---
+    def upsert_meli_listings(self, listings_data, on_conflict="meli_id"):
+        if not listings_data:
+            return True
+        try:
+            self.bulk_insert("meli_listings", listings_data, on_conflict=on_conflict)
+            return True
+        except sqlite3.Error as e:
+            print(f"Unexpected error in upsert (SQLite): {e}")
+            return False
+
+    def get_meli_listings(self, select="*", filters=None, order=None, limit=None):
+        where, params = self._where(filters)
+        sql = f"SELECT {self._select(select)} FROM meli_listings{where}{self._order(order)}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [self._decode_row(r) for r in self.conn.execute(sql, params)]
+
+    def iter_meli_listings(self, select="*", filters=None, page_size=1000):
+        where, params = self._where(filters)
+        cursor = self.conn.execute(f"SELECT {self._select(select)} FROM meli_listings{where} ORDER BY id ASC", params)
+        while True:
+            rows = cursor.fetchmany(page_size)
+            if not rows:
+                break
+            for row in rows:
+                yield self._decode_row(row)
+
+    def update_meli_listing(self, listing_id, update_data):
+        known = set(self._table_columns("meli_listings"))
+        data = {k: v for k, v in update_data.items() if k in known and k != "id"}
+        if not data:
+            return True
+        set_sql = ", ".join(f"{c} = ?" for c in data)
+        with self.conn:
+            self.conn.execute(
+                f"UPDATE meli_listings SET {set_sql} WHERE id = ?",
+                [self._encode(c, v) for c, v in data.items()] + [listing_id]
+            )
+        return True
+
+    def update_listings_status(self, listing_ids, status):
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE meli_listings SET item_status = ? WHERE id = ?",
+                [(status, listing_id) for listing_id in listing_ids]
+            )
+
+    def get_matched_listings(self, limit=None, select="*"):
+        sql = (
+            f"SELECT {self._select(select)}, master_product_id FROM ("
+            "SELECT l.*, a.master_product_id AS master_product_id FROM compliance_audit a "
+            "JOIN meli_listings l ON l.id = a.listing_id "
+            "WHERE a.master_product_id IS NOT NULL AND l.item_status = 'active'"
+            ") ORDER BY COALESCE(last_enriched_at, '1970-01-01T00:00:00')"
+        )
+        params = []
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [self._decode_row(r) for r in self.conn.execute(sql, params)]
+
+    # --- Master catalog ---
+    def get_master_products(self):
+        return [self._decode_row(r) for r in self.conn.execute("SELECT * FROM master_products")]
+
+    def upsert_master_products(self, products_data):
+        self.bulk_insert("master_products", products_data, on_conflict="ean")
+        return True
+
+    # --- Audits ---
+    def upsert_compliance_audit(self, audit_records):
+        if not audit_records:
+            return True
+        now = _now_iso()
+        rows = [{**r, "processed_at": r.get("processed_at") or now} for r in audit_records]
+        self.bulk_insert("compliance_audit", rows, on_conflict="listing_id")
+        return True
+
+    def apply_audit_batch(self, audit_records, batch_size=None):
+        """Local equivalent of the 'apply_audit_batch' RPC: audit upsert + status sync in one transaction."""
+        if not audit_records:
+            return True
+        now = _now_iso()
+        audit_rows = [
+            {**{k: v for k, v in r.items() if k != "item_status"}, "processed_at": now}
+            for r in audit_records
+        ]
+        statuses = [(r["item_status"], r["listing_id"]) for r in audit_records if r.get("item_status")]
+        with self.conn:
+            self._write_rows("compliance_audit", audit_rows, on_conflict="listing_id")
+            self.conn.executemany(
+                "UPDATE meli_listings SET item_status = ? WHERE id = ? AND item_status IS NOT ?",
+                [(status, listing_id, status) for status, listing_id in statuses]
+            )
+        return True
+
+    # --- Audit feed ---
+    def get_audit_feed(self, select="*", filters=None, order=None, limit=None):
+        where, params = self._where(filters)
+        sql = f"SELECT {self._select(select)} FROM audit_feed{where}{self._order(order)}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [self._decode_row(r) for r in self.conn.execute(sql, params)]
+
+    def get_audit_history(self, select="*", filters=None, order="recorded_at.desc", limit=None):
+        where, params = self._where(filters)
+        sql = f"SELECT {self._select(select)} FROM compliance_audit_history{where}{self._order(order)}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [self._decode_row(r) for r in self.conn.execute(sql, params)]
+
+    # --- Delta sync watermarks ---
+    def get_watermark(self, consumer):
+        row = self.conn.execute("SELECT * FROM sync_watermarks WHERE consumer = ?", (consumer,)).fetchone()
+        return dict(row) if row else {}
+
+    def set_watermark(self, consumer, marks):
+        self.bulk_insert("sync_watermarks", [{**marks, "consumer": consumer, "updated_at": _now_iso()}], on_conflict="consumer")
+        return True
+
+    # --- Discovery query planning ---
+    def get_query_stats(self):
+        return [dict(r) for r in self.conn.execute("SELECT * FROM discovery_query_stats")]
+
+    def upsert_query_stats(self, rows):
+        now = _now_iso()
+        self.bulk_insert("discovery_query_stats", [{**r, "updated_at": now} for r in rows], on_conflict="query")
+        return True
+
+    def get_query_yield(self):
+        return [dict(r) for r in self.conn.execute("SELECT * FROM discovery_query_yield")]
+
+    # --- Seller profiles ---
+    def get_seller_profiles(self, seller_ids):
+        rows = []
+        ids = [str(s) for s in seller_ids]
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            rows += [dict(r) for r in self.conn.execute(
+                f"SELECT * FROM seller_profiles WHERE seller_id IN ({','.join('?' * len(chunk))})", chunk)]
+        return rows
+
+    def upsert_seller_profiles(self, rows):
+        self.bulk_insert("seller_profiles", rows, on_conflict="seller_id")
+        return True
+
+    # --- Maintenance ---
+    def clear_all_data(self):
+        print("🧹 [PHASE 0] Starting local database reset...")
+        with self.conn:
+            self.conn.execute("DELETE FROM compliance_audit")
+            self.conn.execute("DELETE FROM meli_listings")
+        print("✅ Local database reset successful.")
+        return True
@@ -0,0 +1,148 @@
+import os
+from abc import ABC, abstractmethod
+
+# Selects the storage implementation used by the pipeline:
+#   supabase (default) -> SupabaseLite (PostgREST over HTTP)
+#   sqlite             -> SQLiteStorage (embedded file, same schema as supabase/migrations)
+STORAGE_BACKEND_ENV = "BPP_STORAGE_BACKEND"
+
+
+class StorageBackend(ABC):
+    """
+    Interface shared by every storage implementation.
+    Covers listings, master products, audits and listing status updates.
+
+    Filters use PostgREST operator syntax so callers stay backend-agnostic:
+        {"item_status": "neq.noise", "ean_published": "is.null"}
+        {"or": "(ean_published.is.null,seller_name.is.null)"}
+        {"and": "(or(a.is.null,a.gt.5),or(b.eq.1,c.eq.2))"}
+    A value may also be a list to repeat the same column (AND semantics).
+    'select' accepts the projection syntax documented in logic/projections.py.
+    Every method without a default body is abstract: a backend that misses one fails at
+    construction instead of in the middle of a run.
+    """
+
+    # --- Listings ---
+    @abstractmethod
+    def upsert_meli_listings(self, listings_data, on_conflict="meli_id"):
+        """Upserts listings on 'on_conflict' (merge-duplicates: only the provided columns change)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_meli_listings(self, select="*", filters=None, order=None, limit=None):
+        raise NotImplementedError
+
+    def iter_meli_listings(self, select="*", filters=None, page_size=1000):
+        """
+        Yields listings one by one in 'id' order without materializing the table.
+        Use it for full scans (audit refresh, backfills) so memory stays bounded.
+        """
+        yield from self.get_meli_listings(select=select, filters=filters, order="id.asc")
+
+    @abstractmethod
+    def update_meli_listing(self, listing_id, update_data):
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_listings_status(self, listing_ids, status):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_matched_listings(self, limit=None, select="*"):
+        """Active listings that the audit linked to a master product (plus 'master_product_id')."""
+        raise NotImplementedError
+
+    # --- Master catalog ---
+    @abstractmethod
+    def get_master_products(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def upsert_master_products(self, products_data):
+        raise NotImplementedError
+
+    # --- Audits ---
+    @abstractmethod
+    def upsert_compliance_audit(self, audit_records):
+        raise NotImplementedError
+
+    @abstractmethod
+    def apply_audit_batch(self, audit_records):
+        raise NotImplementedError
+
+    # --- Audit feed ---
+    @abstractmethod
+    def get_audit_feed(self, select="*", filters=None, order=None, limit=None):
+        """One page of the flattened 'audit_feed' view (audit + listing + master product columns)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_audit_history(self, select="*", filters=None, order="recorded_at.desc", limit=None):
+        """
+        Rows of the append-only 'compliance_audit_history' (one per new/changed outcome).
+        Filter on 'run_month' (e.g. {"run_month": "gte.2024-07-01"}) so Postgres prunes partitions.
+        """
+        raise NotImplementedError
+
+    # --- Bulk import ---
+    @abstractmethod
+    def bulk_load(self, table, rows, on_conflict=None, batch_size=5000, max_in_flight=4):
+        """Loads many rows into 'table' using the backend's fastest write path. Returns True if all rows landed."""
+        raise NotImplementedError
+
+    # --- Delta sync watermarks ---
+    @abstractmethod
+    def get_watermark(self, consumer):
+        """Returns {column: iso_timestamp} last processed by 'consumer' (empty dict if none)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_watermark(self, consumer, marks):
+        raise NotImplementedError
+
+    # --- Discovery query planning ---
+    @abstractmethod
+    def get_query_stats(self):
+        """Rows of 'discovery_query_stats' (one per search query run by discovery)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def upsert_query_stats(self, rows):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_query_yield(self):
+        """Rows of the 'discovery_query_yield' view: query, listings, identified, noise."""
+        raise NotImplementedError
+
+    # --- Seller profiles (logic/seller_cache.py) ---
+    @abstractmethod
+    def get_seller_profiles(self, seller_ids):
+        """Rows of 'seller_profiles' for the given seller ids (strings)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def upsert_seller_profiles(self, rows):
+        raise NotImplementedError
+
+    # --- Maintenance ---
+    @abstractmethod
+    def clear_all_data(self):
+        raise NotImplementedError
+
+
+def get_storage(backend=None):
+    """
+    Returns the storage backend selected by BPP_STORAGE_BACKEND (default: supabase).
+    Imports are lazy so the local backend works without the Supabase dependencies.
+    """
+    backend = (backend or os.environ.get(STORAGE_BACKEND_ENV) or "supabase").strip().lower()
+
+    if backend == "supabase":
+        from logic.supabase_lite import SupabaseLite
+        return SupabaseLite()
+    if backend == "sqlite":
+        from logic.sqlite_storage import SQLiteStorage
+        return SQLiteStorage()
+
+    raise ValueError(f"Unknown {STORAGE_BACKEND_ENV} '{backend}'. Use 'supabase' or 'sqlite'.")
@@ -1,11 +1,32 @@
 
+import io
 import os
+import csv
+import json
+import time
 import requests
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
 from dotenv import load_dotenv
+from logic.storage import StorageBackend
+
+# Optional fast decoders for large listing scans (see iter_meli_listings)
+try:
+    import ijson
+except ImportError:
+    ijson = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 load_dotenv()
 
-class SupabaseLite:
+class SupabaseLite(StorageBackend):
+    """
+    Supabase implementation of the storage interface (PostgREST over plain requests).
+    """
     def __init__(self):
         self.url = os.environ.get("SUPABASE_URL")
         self.key = os.environ.get("SUPABASE_KEY")
@@ -18,7 +39,18 @@ class SupabaseLite:
             "Content-Type": "application/json"
         }
 
-    def upsert_meli_listings(self, listings_data):
+    def _query_string(self, select="*", filters=None, order=None):
+        """Builds a PostgREST query string from a select list and operator filters."""
+        params = [f"select={select}"]
+        for key, expr in (filters or {}).items():
+            for single in (expr if isinstance(expr, list) else [expr]):
+                # Encode spaces, '+' in timestamp offsets, '&', etc.; keep PostgREST syntax readable
+                params.append(f"{key}={quote(str(single), safe='(),.*:')}")
+        if order:
+            params.append(f"order={order}")
+        return "&".join(params)
+
+    def upsert_meli_listings(self, listings_data, on_conflict="meli_id"):
         """
         Upserts scraped data into the 'meli_listings' table using requests.
         If a batch fails with a conflict error, it retries item by item 
@@ -27,7 +59,7 @@ class SupabaseLite:
         if not listings_data:
             return True
             
-        endpoint = f"{self.url}/rest/v1/meli_listings?on_conflict=meli_id"
+        endpoint = f"{self.url}/rest/v1/meli_listings?on_conflict={on_conflict}"
         headers = self.headers.copy()
         headers["Prefer"] = "resolution=merge-duplicates"
         
@@ -58,19 +90,157 @@ class SupabaseLite:
             print(f"Unexpected error in upsert: {e}")
             return False
 
-    def get_master_products(self):
+    def get_meli_listings(self, select="*", filters=None, order=None, limit=None, page_size=1000):
+        """
+        Retrieves listings with optional projection/filters, paginating past the 1000-row limit.
+        """
+        endpoint = f"{self.url}/rest/v1/meli_listings?{self._query_string(select, filters, order or 'id.asc')}"
+        listings = []
+        offset = 0
+        while True:
+            batch_limit = page_size if not limit else min(page_size, limit - len(listings))
+            try:
+                res = requests.get(f"{endpoint}&offset={offset}&limit={batch_limit}", headers=self.headers)
+                res.raise_for_status()
+                batch = res.json()
+            except Exception as e:
+                print(f"Error fetching listings: {e}")
+                break
+            listings.extend(batch)
+            if len(batch) < batch_limit or (limit and len(listings) >= limit):
+                break
+            offset += batch_limit
+        return listings
+
+    def iter_meli_listings(self, select="*", filters=None, page_size=1000):
+        """
+        Streams listings using keyset pagination on 'id' (id > last seen id), so pages stay
+        cheap at any depth and only one page is held at a time. With 'ijson' installed the
+        response body is decoded incrementally straight from the socket; otherwise each page
+        is decoded with orjson (or json) and released before the next one is requested.
+        Raises on HTTP errors so a partial scan is never mistaken for a complete one.
+        """
+        filters = dict(filters or {})
+        id_filters = filters.pop("id", [])
+        id_filters = id_filters if isinstance(id_filters, list) else [id_filters]
+
+        columns = [c.strip() for c in select.split(",")]
+        select_id = select.strip() != "*" and "id" not in columns
+        if select_id:
+            select = f"{select},id"
+
+        last_id = None
+        while True:
+            keyset = [f"gt.{last_id}"] if last_id else []
+            query = self._query_string(select, {**filters, "id": id_filters + keyset}, "id.asc")
+            endpoint = f"{self.url}/rest/v1/meli_listings?{query}&limit={page_size}"
+            count = 0
+            with requests.get(endpoint, headers=self.headers, stream=True) as response:
+                if not response.ok:
+                    print(f"Error streaming listings after id {last_id}: {response.status_code} {response.text[:200]}")
+                    response.raise_for_status()
+                for row in self._decode_rows(response):
+                    last_id = row["id"]
+                    count += 1
+                    if select_id:
+                        row.pop("id")
+                    yield row
+            if count < page_size:
+                break
+
+    def _decode_rows(self, response):
+        """Iterates the JSON array in a PostgREST response body."""
+        if ijson:
+            response.raw.decode_content = True
+            return ijson.items(response.raw, "item", use_float=True)
+        body = response.content
+        return iter(orjson.loads(body) if orjson else json.loads(body))
+
+    def update_meli_listing(self, listing_id, update_data):
+        """PATCHes a single listing by its UUID."""
+        endpoint = f"{self.url}/rest/v1/meli_listings?id=eq.{listing_id}"
+        response = requests.patch(endpoint, json=update_data, headers=self.headers)
+        response.raise_for_status()
+        return True
+
+    def get_matched_listings(self, limit=None, select="*", page_size=1000):
         """
-        Retrieves all master products (simplified).
+        Active listings linked to a master product by the audit, oldest-enriched first.
+        'select' is applied to the embedded listing (see logic/projections.py).
+        Audits are read in keyset pages on 'id' (past PostgREST's 1000-row cap) and sorted
+        before 'limit' is applied. A failed page returns [] rather than a partial list.
         """
-        endpoint = f"{self.url}/rest/v1/master_products?select=*"
+        endpoint = f"{self.url}/rest/v1/compliance_audit?select=id,master_product_id,meli_listings!inner({select})&master_product_id=not.is.null"
+        endpoint += "&meli_listings.item_status=eq.active&order=id.asc"
+        audit_data = []
+        last_id = None
         try:
-            response = requests.get(endpoint, headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+            while True:
+                keyset = f"&id=gt.{last_id}" if last_id is not None else ""
+                response = requests.get(f"{endpoint}{keyset}&limit={page_size}", headers=self.headers)
+                response.raise_for_status()
+                batch = response.json()
+                audit_data.extend(batch)
+                if len(batch) < page_size:
+                    break
+                last_id = batch[-1]["id"]
+        except Exception as e:
+            print(f"Error fetching matched listings: {e}")
+            return []
+
+        # Flatten { master_product_id, meli_listings: {...} } into the listing itself
+        listings = []
+        seen_ids = set()
+        for entry in audit_data:
+            listing = entry.get("meli_listings")
+            if listing and listing.get("id") not in seen_ids:
+                listing["master_product_id"] = entry.get("master_product_id")
+                listings.append(listing)
+                seen_ids.add(listing.get("id"))
+
+        listings.sort(key=lambda x: x.get("last_enriched_at") or "1970-01-01T00:00:00")
+        return listings[:limit] if limit else listings
+
+    def get_master_products(self, page_size=1000):
+        """
+        Retrieves all master products, paginating past PostgREST's 1000-row cap.
+        A failed page returns [] rather than a truncated catalog.
+        """
+        endpoint = f"{self.url}/rest/v1/master_products?select=*&order=id.asc"
+        products = []
+        offset = 0
+        try:
+            while True:
+                response = requests.get(f"{endpoint}&offset={offset}&limit={page_size}", headers=self.headers)
+                response.raise_for_status()
+                batch = response.json()
+                products.extend(batch)
+                if len(batch) < page_size:
+                    return products
+                offset += page_size
         except Exception as e:
             print(f"Error fetching master products (Lite): {e}")
             return []
 
+    def upsert_master_products(self, products_data, batch_size=100):
+        """
+        Upserts the master catalog on 'ean' in sequential batches.
+        """
+        endpoint = f"{self.url}/rest/v1/master_products?on_conflict=ean"
+        headers = self.headers.copy()
+        headers["Prefer"] = "resolution=merge-duplicates"
+        all_ok = True
+        for i in range(0, len(products_data), batch_size):
+            batch = products_data[i:i + batch_size]
+            try:
+                res_upsert = requests.post(endpoint, json=batch, headers=headers)
+                res_upsert.raise_for_status()
+                print(f"Upserted batch {i // batch_size + 1}")
+            except Exception as e:
+                print(f"Error inserting batch: {e}")
+                all_ok = False
+        return all_ok
+
     def upsert_compliance_audit(self, audit_records):
         """
         Upserts audit results into 'compliance_audit' table using 'listing_id' as the conflict key.
@@ -105,3 +275,288 @@ class SupabaseLite:
             
             print(f"Unexpected error in audit upsert: {e}")
             return False
+
+    def update_listings_status(self, listing_ids, status, batch_size=100):
+        """
+        Sets 'item_status' for the given listing ids using batched PATCH requests.
+        """
+        for i in range(0, len(listing_ids), batch_size):
+            batch = listing_ids[i:i + batch_size]
+            endpoint = f"{self.url}/rest/v1/meli_listings?id=in.({','.join([str(id) for id in batch])})"
+            try:
+                requests.patch(endpoint, json={"item_status": status}, headers=self.headers)
+            except Exception as e:
+                print(f"Error updating {status} items: {e}")
+
+    def apply_audit_batch(self, audit_records, batch_size=5000):
+        """
+        Applies audit results through the 'apply_audit_batch' Postgres RPC.
+        Each record may carry an 'item_status' key; the function upserts 'compliance_audit'
+        and syncs 'meli_listings.item_status' in a single transaction per batch.
+        Falls back to the legacy upsert + PATCH path for the remaining records only when the
+        function is not deployed (404 / PGRST202); any other error fails that batch.
+        """
+        if not audit_records:
+            return True
+
+        endpoint = f"{self.url}/rest/v1/rpc/apply_audit_batch"
+        all_ok = True
+        for i in range(0, len(audit_records), batch_size):
+            batch = audit_records[i:i + batch_size]
+            try:
+                response = requests.post(endpoint, json={"audits": batch}, headers=self.headers)
+                if response.status_code == 404 or "PGRST202" in response.text:
+                    print("  [WARN] RPC 'apply_audit_batch' not found. Using legacy upsert path...")
+                    return self._apply_audit_batch_legacy(audit_records[i:]) and all_ok
+                if not 200 <= response.status_code < 300:
+                    print(f"Error applying audit batch {i // batch_size + 1} via RPC: HTTP {response.status_code}: {response.text[:200]}")
+                    all_ok = False
+                    continue
+                result = response.json() or {}
+                print(f"  - RPC batch {i // batch_size + 1}: {result.get('audits', 0)} audits, {result.get('status_updates', 0)} status changes")
+            except Exception as e:
+                print(f"Error applying audit batch via RPC: {e}")
+                all_ok = False
+        return all_ok
+
+    def _apply_audit_batch_legacy(self, audit_records):
+        """Pre-RPC behaviour: status PATCHes followed by a separate audit upsert."""
+        by_status = {}
+        for record in audit_records:
+            if record.get("item_status"):
+                by_status.setdefault(record["item_status"], []).append(record["listing_id"])
+        for status, ids in by_status.items():
+            self.update_listings_status(ids, status)
+
+        audit_rows = [{k: v for k, v in r.items() if k != "item_status"} for r in audit_records]
+        return self.upsert_compliance_audit(audit_rows)
+
+    def get_audit_feed(self, select="*", filters=None, order=None, limit=None):
+        """
+        Reads one page of the 'audit_feed' view (see logic/audit_feed.py for the cursor logic).
+        Errors are raised so the API bridge can report them instead of returning an empty page.
+        """
+        endpoint = f"{self.url}/rest/v1/audit_feed?{self._query_string(select, filters, order)}"
+        if limit:
+            endpoint += f"&limit={limit}"
+        response = requests.get(endpoint, headers=self.headers)
+        response.raise_for_status()
+        return response.json()
+
+    def get_audit_history(self, select="*", filters=None, order="recorded_at.desc", limit=None):
+        """
+        Reads 'compliance_audit_history'. Include a 'run_month' filter whenever possible so only
+        the matching monthly partitions are scanned.
+        """
+        endpoint = f"{self.url}/rest/v1/compliance_audit_history?{self._query_string(select, filters, order)}"
+        if limit:
+            endpoint += f"&limit={limit}"
+        response = requests.get(endpoint, headers=self.headers)
+        response.raise_for_status()
+        return response.json()
+
+    def bulk_load(self, table, rows, on_conflict=None, batch_size=5000, max_in_flight=4):
+        """
+        High-throughput load for large imports (master catalog, listing backfills).
+        Flat rows are sent as 'text/csv' bodies, which PostgREST parses much faster than JSON;
+        rows carrying JSONB values fall back to JSON bodies. Batches are grouped by column set
+        and up to 'max_in_flight' requests run concurrently. 'rows' may be any iterable.
+        A batch that fails as CSV is retried once as JSON before being counted as failed.
+        With 'on_conflict', rows repeating a key already buffered replace the earlier row (last
+        row wins): Postgres rejects an upsert that would touch the same row twice.
+        """
+        endpoint = f"{self.url}/rest/v1/{table}"
+        if on_conflict:
+            endpoint += f"?on_conflict={on_conflict}"
+        prefer = "return=minimal" + (",resolution=merge-duplicates" if on_conflict else "")
+
+        stats = {"rows": 0, "csv_batches": 0, "json_batches": 0, "failed_rows": 0, "duplicates": 0}
+        key_columns = [c.strip() for c in on_conflict.split(",")] if on_conflict else []
+        started = time.perf_counter()
+        buffers = {}
+        in_flight = set()
+
+        def send(columns, batch):
+            headers = {**self.headers, "Prefer": prefer}
+            try:
+                # JSONB values (dict/list) cannot travel in a CSV body
+                if not any(isinstance(v, (dict, list)) for row in batch for v in row.values()):
+                    response = requests.post(
+                        endpoint, data=_to_csv(columns, batch).encode("utf-8"),
+                        headers={**headers, "Content-Type": "text/csv"}
+                    )
+                    if response.ok:
+                        return len(batch), "csv_batches", None
+                    print(f"  [WARN] CSV batch rejected ({response.status_code}): {response.text[:200]}. Retrying as JSON...")
+                response = requests.post(endpoint, json=batch, headers=headers)
+                if response.ok:
+                    return len(batch), "json_batches", None
+                return len(batch), None, f"{response.status_code} {response.text[:200]}"
+            except requests.RequestException as e:
+                return len(batch), None, str(e)
+
+        def collect(done):
+            for future in done:
+                count, kind, error = future.result()
+                stats["rows"] += count
+                if kind:
+                    stats[kind] += 1
+                else:
+                    stats["failed_rows"] += count
+                    print(f"  [ERROR] Bulk batch failed: {error}")
+
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            def submit(columns, batch):
+                # Bound memory: never queue more than 'max_in_flight' batches
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    in_flight.difference_update(done)
+                    collect(done)
+                in_flight.add(pool.submit(send, columns, batch))
+
+            for n, row in enumerate(rows):
+                columns = tuple(sorted(row.keys()))
+                buffer = buffers.setdefault(columns, {})
+                key = tuple(row.get(c) for c in key_columns)
+                if not key or None in key:
+                    key = n  # no conflict key: never merged
+                elif key in buffer:
+                    stats["duplicates"] += 1
+                buffer[key] = row
+                if len(buffer) >= batch_size:
+                    submit(columns, list(buffer.values()))
+                    buffers[columns] = {}
+            for columns, buffer in buffers.items():
+                if buffer:
+                    submit(columns, list(buffer.values()))
+            collect(in_flight)
+
+        elapsed = time.perf_counter() - started
+        rate = stats["rows"] / elapsed if elapsed else 0
+        print(f"  - Bulk load '{table}': {stats['rows']} rows in {elapsed:.1f}s ({rate:,.0f} rows/s) | "
+              f"{stats['csv_batches']} CSV / {stats['json_batches']} JSON batches, {stats['failed_rows']} failed"
+              + (f", {stats['duplicates']} duplicate key(s) merged" if stats["duplicates"] else ""))
+        return stats["failed_rows"] == 0
+
+    def get_watermark(self, consumer):
+        """Reads the delta-sync watermark row for a consumer."""
+        endpoint = f"{self.url}/rest/v1/sync_watermarks?select=*&consumer=eq.{consumer}"
+        try:
+            response = requests.get(endpoint, headers=self.headers)
+            response.raise_for_status()
+            rows = response.json()
+            return rows[0] if rows else {}
+        except Exception as e:
+            print(f"Error reading watermark for {consumer}: {e}")
+            return {}
+
+    def set_watermark(self, consumer, marks):
+        """Upserts the delta-sync watermark row for a consumer."""
+        endpoint = f"{self.url}/rest/v1/sync_watermarks?on_conflict=consumer"
+        headers = self.headers.copy()
+        headers["Prefer"] = "resolution=merge-duplicates"
+        payload = {**marks, "consumer": consumer, "updated_at": datetime.now(timezone.utc).isoformat()}
+        try:
+            response = requests.post(endpoint, json=payload, headers=headers)
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            print(f"Error saving watermark for {consumer}: {e}")
+            return False
+
+    def get_query_stats(self):
+        """Reads the per-query discovery counters (empty list on error: the planner then uses defaults)."""
+        return self._get_rows("discovery_query_stats")
+
+    def upsert_query_stats(self, rows):
+        """Upserts per-query discovery counters (one row per query)."""
+        if not rows:
+            return True
+        endpoint = f"{self.url}/rest/v1/discovery_query_stats?on_conflict=query"
+        headers = self.headers.copy()
+        headers["Prefer"] = "resolution=merge-duplicates"
+        now = datetime.now(timezone.utc).isoformat()
+        try:
+            response = requests.post(endpoint, json=[{**r, "updated_at": now} for r in rows], headers=headers)
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            print(f"Error saving discovery query stats: {e}")
+            return False
+
+    def get_query_yield(self):
+        """Reads the 'discovery_query_yield' view (identified / noise listings per query)."""
+        return self._get_rows("discovery_query_yield")
+
+    def get_seller_profiles(self, seller_ids):
+        """Reads cached seller profiles (empty list on error, e.g. before migration 20240723)."""
+        rows = []
+        ids = [str(s) for s in seller_ids]
+        for i in range(0, len(ids), 100):
+            chunk = ",".join(f'"{s}"' for s in ids[i:i + 100])
+            try:
+                response = requests.get(f"{self.url}/rest/v1/seller_profiles?select=*&seller_id=in.({chunk})", headers=self.headers)
+                response.raise_for_status()
+                rows += response.json()
+            except Exception as e:
+                print(f"Error reading seller_profiles: {e}")
+                return []
+        return rows
+
+    def upsert_seller_profiles(self, rows):
+        """Upserts seller profiles (one row per seller_id)."""
+        if not rows:
+            return True
+        endpoint = f"{self.url}/rest/v1/seller_profiles?on_conflict=seller_id"
+        headers = self.headers.copy()
+        headers["Prefer"] = "resolution=merge-duplicates"
+        try:
+            response = requests.post(endpoint, json=rows, headers=headers)
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            print(f"Error saving seller profiles: {e}")
+            return False
+
+    def _get_rows(self, relation):
+        try:
+            response = requests.get(f"{self.url}/rest/v1/{relation}?select=*", headers=self.headers)
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            print(f"Error reading {relation}: {e}")
+            return []
+
+    def clear_all_data(self):
+        """
+        Deletes all rows from 'compliance_audit' and 'meli_listings' (optional fresh start).
+        'compliance_audit_history' is kept: it has no FK to listings and is keyed by meli_id too.
+        """
+        try:
+            print("🧹 [PHASE 0] Starting deep database reset...")
+            print("  - Purging 'compliance_audit'...")
+            requests.delete(f"{self.url}/rest/v1/compliance_audit?id=not.is.null", headers=self.headers).raise_for_status()
+            print("  - Purging 'meli_listings'...")
+            requests.delete(f"{self.url}/rest/v1/meli_listings?id=not.is.null", headers=self.headers).raise_for_status()
+            print("✅ Database reset successful (Absolute Zero).")
+            return True
+        except Exception as e:
+            print(f"❌ Error during database reset: {e}")
+            return False
+
+
+def _csv_value(value):
+    if value is None:
+        return "NULL"  # PostgREST reads an unquoted NULL as SQL NULL; empty strings stay ''
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+
+def _to_csv(columns, rows):
+    """Serializes rows sharing the same column set as a CSV body with a header line."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    writer.writerows([_csv_value(row.get(c)) for c in columns] for row in rows)
+    return buffer.getvalue()
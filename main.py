@@ -2,9 +2,9 @@ import asyncio
 import os
 from scrapers.meli_api_scraper import MeliAPIScraper
 from logic.identification_engine import IdentificationEngine
-from logic.supabase_handler import SupabaseHandler
+from logic.storage import get_storage
 
-async def run_pipeline():
+async def run_pipeline(fresh_start=False):
     print("=" * 60)
     print("🚀 STARTING BRAND PROTECTION MASTER PIPELINE (MONTHLY MODE)")
     print("=" * 60)
@@ -13,11 +13,15 @@ async def run_pipeline():
     import sys
     
     # 0. INITIALIZATION & CLEANUP
-    db = SupabaseHandler()
+    db = get_storage()
     engine = IdentificationEngine()
 
-    print("\n🧹 PHASE 0: Fresh Start (Clearing Previous Results)")
-    db.clear_all_data() # Clears 'meli_listings' and 'compliance_audit'
+    if fresh_start:
+        print("\n🧹 PHASE 0: Fresh Start (Clearing Previous Results)")
+        db.clear_all_data() # Clears 'meli_listings' and 'compliance_audit' ('compliance_audit_history' is kept)
+    else:
+        # Listings and audits are upserted in place; outcome changes land in 'compliance_audit_history'
+        print("\n♻️  PHASE 0: Incremental run (keeping current listings and audits, use --fresh-start to wipe)")
     
     # Clear local temporary files/caches
     temp_files = ["user_data/raw_listings.json", "enricher_status.json", "data/raw_products.json", "tmp_products.txt"]
@@ -51,7 +55,12 @@ async def run_pipeline():
     scraper.save_results()
     
     print(f"\n   [Discovery 2/2] Browser Super-Discovery (Playwright)...")
-    subprocess.run([sys.executable, "scripts/discover_listings.py", "--pages", "2"])
+    # Concurrent browser contexts (BPP_DISCOVERY_WORKERS, default 3) sharing one politeness budget
+    # and the adaptive request rate (scrapers/rate_limiter.py).
+    # BPP_DISCOVERY_MODE=http fetches result pages without a browser (Playwright only for bot walls).
+    workers = os.environ.get("BPP_DISCOVERY_WORKERS", "3")
+    mode = os.environ.get("BPP_DISCOVERY_MODE", "browser")
+    subprocess.run([sys.executable, "scripts/discover_listings.py", "--pages", "2", "--workers", workers, "--mode", mode])
     
     # Syncing all discovered items to DB (already done within scrapers, but verified here)
     print("\n✅ Discovery phase complete.")
@@ -81,4 +90,9 @@ async def run_pipeline():
     print("=" * 60)
 
 if __name__ == "__main__":
-    asyncio.run(run_pipeline())
+    import argparse
+    parser = argparse.ArgumentParser(description="Brand protection master pipeline")
+    parser.add_argument("--fresh-start", action="store_true",
+                        help="Wipe meli_listings and compliance_audit before running (audit history is kept)")
+    args = parser.parse_args()
+    asyncio.run(run_pipeline(fresh_start=args.fresh_start))
@@ -1,5 +1,4 @@
 import asyncio
-import requests
 import sys
 
 # Ensure UTF-8 output on Windows
@@ -9,46 +8,23 @@ if sys.stdout.encoding != 'utf-8':
     except:
         pass
 
-from logic.supabase_lite import SupabaseLite
+from logic.storage import get_storage
+from logic.delta_sync import DeltaSync
+from logic.projections import projection
 from logic.identification_engine import IdentificationEngine
 
-async def refresh_audit():
-    print("Starting Audit Refresh...")
-    db = SupabaseLite()
-    engine = IdentificationEngine()
-    
-    # 1. Fetch all listings from DB (handling pagination for > 1000 rows)
-    print("Fetching active listings from 'meli_listings' via SupabaseLite...")
-    listings = []
-    batch_size = 1000
-    offset = 0
-    
-    while True:
-        # Use requests to fetch data through REST API
-        endpoint = f"{db.url}/rest/v1/meli_listings?select=*&offset={offset}&limit={batch_size}"
-        try:
-            res = requests.get(endpoint, headers=db.headers)
-            res.raise_for_status()
-            batch = res.json()
-            listings.extend(batch)
-            print(f"Loaded {len(listings)} listings...")
-            if len(batch) < batch_size:
-                break
-            offset += batch_size
-        except Exception as e:
-            print(f"Error fetching listings: {e}")
-            break
-    
-    print(f"Total listings loaded: {len(listings)}")
-    
-    # 2. Re-run identification for each
-    print("Re-calculating fraud scores with precision thresholds...")
-    audit_records = []
-    noise_ids = []
-    
+# Audit rows sent per RPC call; bounds memory during a full re-audit
+AUDIT_CHUNK_SIZE = 5000
+
+def build_audit_records(engine, listings, summary):
+    """
+    Yields one compliance_audit record per listing, counting match levels in 'summary'.
+    'listings' can be any iterable (a streamed scan is never materialized).
+    """
     for l in listings:
         audit = engine.identify_product(l)
-        audit_records.append({
+        summary[audit["match_level"]] = summary.get(audit["match_level"], 0) + 1
+        yield {
             "listing_id": l["id"],
             "master_product_id": audit["master_product_id"],
             "match_level": audit["match_level"],
@@ -57,49 +33,50 @@ async def refresh_audit():
             "is_publishable_ok": audit["is_publishable_ok"],
             "fraud_score": audit["fraud_score"],
             "risk_level": engine.get_risk_level(audit["fraud_score"]),
-            "violation_details": audit["violation_details"]
-        })
+            "violation_details": audit["violation_details"],
+            # Listing status is applied server-side together with the audit row
+            "item_status": "noise" if audit["match_level"] == 0 else "active"
+        }
 
-        # Track which listings should be marked as noise
-        if audit["match_level"] == 0:
-            noise_ids.append(l["id"])
+async def refresh_audit(delta=False):
+    print("Starting Audit Refresh...")
+    db = get_storage()
+    engine = IdentificationEngine()
     
-    # 3. Batch Update Listings (Status)
-    active_ids = [a["listing_id"] for a in audit_records if a["match_level"] > 0]
+    # 1. Stream listings from DB (keyset pages, decoded incrementally)
+    # In delta mode only rows scraped/enriched since the last successful run are re-audited.
+    print(f"Streaming listings from 'meli_listings' via {type(db).__name__}...")
+    sync = DeltaSync(db, "refresh_audit") if delta else None
+    select = projection("audit_input")
+    listings = sync.iter(select=select) if sync else db.iter_meli_listings(select=select)
     
-    if noise_ids:
-        print(f"Moving {len(noise_ids)} items to Noise status...")
-        for i in range(0, len(noise_ids), 100):
-            batch = noise_ids[i:i+100]
-            endpoint = f"{db.url}/rest/v1/meli_listings?id=in.({','.join([str(id) for id in batch])})"
-            try:
-                requests.patch(endpoint, json={"item_status": "noise"}, headers=db.headers)
-            except Exception as e:
-                print(f"Error updating noise items: {e}")
-                
-    if active_ids:
-        print(f"Marking {len(active_ids)} items as Active (Audited)...")
-        for i in range(0, len(active_ids), 100):
-            batch = active_ids[i:i+100]
-            endpoint = f"{db.url}/rest/v1/meli_listings?id=in.({','.join([str(id) for id in batch])})"
-            try:
-                requests.patch(endpoint, json={"item_status": "active"}, headers=db.headers)
-            except Exception as e:
-                print(f"Error updating active items: {e}")
+    # 2. Re-run identification and apply Audit + Listing Status in chunks (Postgres RPC)
+    print("Re-calculating fraud scores with precision thresholds...")
+    summary = {}
+    chunk = []
+    total = 0
+    success = True
     
-    # 4. Batch Update Audit Table
-    if audit_records:
-        print(f"Syncing {len(audit_records)} updated audit results to Supabase (FORCED UPSERT)...")
-        # Use centralized upsert method in SupabaseLite
-        # This correctly handles the conflict on 'listing_id' and applies 'resolution=merge-duplicates'
-        success = db.upsert_compliance_audit(audit_records)
-        
+    for record in build_audit_records(engine, listings, summary):
+        chunk.append(record)
+        if len(chunk) >= AUDIT_CHUNK_SIZE:
+            success = db.apply_audit_batch(chunk) and success
+            total += len(chunk)
+            print(f"  - Applied {total} audit results so far...")
+            chunk = []
+    if chunk:
+        success = db.apply_audit_batch(chunk) and success
+        total += len(chunk)
+    
+    print(f"Total listings audited: {total}")
+    
+    if total:
         if success:
             # Calculate Summary for the user to compare with Dashboard
-            high = len([a for a in audit_records if a["match_level"] == 1])
-            mid = len([a for a in audit_records if a["match_level"] == 2])
-            low = len([a for a in audit_records if a["match_level"] == 3])
-            noise = len(noise_ids)
+            high = summary.get(1, 0)
+            mid = summary.get(2, 0)
+            low = summary.get(3, 0)
+            noise = summary.get(0, 0)
             
             print("\n" + "="*40)
             print("📊 AUDIT SUMMARY")
@@ -112,10 +89,17 @@ async def refresh_audit():
             print(f"📈 Total Active: {high + mid + low}")
             print("="*40)
             print("[OK] Audit refresh complete. New scores are now live in the Dashboard.")
+            if sync:
+                sync.commit()
         else:
             print("[ERROR] Audit Sync failed. Check logs for details.")
     else:
         print("No listings found to audit.")
 
 if __name__ == "__main__":
-    asyncio.run(refresh_audit())
+    import argparse
+    parser = argparse.ArgumentParser(description="Compliance Audit Refresh")
+    parser.add_argument("--delta", action="store_true", help="Only re-audit listings changed since the last delta run")
+    args = parser.parse_args()
+
+    asyncio.run(refresh_audit(delta=args.delta))
@@ -0,0 +1,265 @@
+import asyncio
+import os
+import shutil
+import time
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+
+from scrapers.resource_blocking import apply_blocking
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+LAUNCH_ARGS = ["--disable-blink-features=AutomationControlled", "--no-sandbox"]
+DEFAULT_HEADERS = {"Accept-Language": "es-419,es;q=0.9"}
+
+# Persistent profiles live in user_data/profiles/<name> and are reused run after run (warm
+# cache and cookies). 'session' is the profile where the operator logs in by hand.
+PROFILES_DIR = "profiles"
+PROFILE_DIRS = {"session": "manual_session_hotspot"}
+# Per-run profile directories created by earlier versions of the enricher / discovery
+STALE_PREFIXES = ("temp_enrich_", "discovery_session_")
+
+
+def user_data_root():
+    return os.path.join(os.getcwd(), "user_data")
+
+
+def profile_dir(name):
+    return os.path.join(user_data_root(), PROFILE_DIRS.get(name) or os.path.join(PROFILES_DIR, name))
+
+
+def cleanup_stale_profiles(root=None, max_age_hours=12):
+    """Deletes leftover per-run profile directories older than max_age_hours. Returns their names."""
+    root = root or user_data_root()
+    if not os.path.isdir(root):
+        return []
+    cutoff = time.time() - max_age_hours * 3600
+    removed = []
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if name.startswith(STALE_PREFIXES) and os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(name)
+    return removed
+
+
+class _Slot:
+    """One browser context (persistent profile or isolated context) and its single working page."""
+
+    def __init__(self, profile, options):
+        self.profile = profile
+        self.options = options
+        self.context = None
+        self.page = None
+        self.navigations = 0
+        self.crashed = False
+        self.storage_state = None
+        self.blocking = None
+        self.lock = asyncio.Lock()
+
+    @property
+    def persistent(self):
+        return self.profile is not None
+
+    def needs_reopen(self, max_navigations):
+        return self.context is None or self.crashed or self.navigations >= max_navigations
+
+
+class Lease:
+    """
+    A context/page lent by the pool. Call page() before each navigation: it returns the
+    current page, after transparently recycling the context when it reached the navigation
+    limit or crashed.
+    """
+
+    def __init__(self, pool, slot):
+        self.pool = pool
+        self.slot = slot
+
+    async def page(self):
+        slot = self.slot
+        if slot.needs_reopen(self.pool.max_navigations):
+            if slot.context is not None:
+                self.pool.recycled += 1
+                await self.pool._close(slot)
+            await self.pool._open(slot)
+        return slot.page
+
+    @property
+    def context(self):
+        return self.slot.context
+
+    @property
+    def blocking(self):
+        """Counters of the resource blocking profile of the current context (None without one)."""
+        return self.slot.blocking
+
+
+class BrowserPool:
+    """
+    Owns the browsers of a process and lends contexts to the flows:
+
+        async with BrowserPool() as pool:
+            async with pool.lease(profile="enricher", headless=False, blocking="enricher") as lease:
+                page = await lease.page()
+
+    lease(profile=None) gives an isolated context from a shared browser (one browser per
+    channel/headless mode); released contexts are kept warm and handed to the next lease, and
+    cookies survive a recycle (storage_state). lease(profile='name') opens the persistent
+    profile user_data/profiles/<name> once and keeps it for the whole run; one holder at a time.
+    Contexts are recycled after max_navigations main-frame navigations or when the page crashes.
+    Leftover per-run profile directories are cleaned up on start.
+    """
+
+    def __init__(self, max_navigations=200, headless=True, channel="chrome", cleanup=True):
+        self.max_navigations = max_navigations
+        self.headless = headless
+        self.channel = channel
+        self.cleanup = cleanup
+        self.launched = 0
+        self.recycled = 0
+        self.crashes = 0
+        self.blocked = {"type": 0, "tracker": 0}
+        self._playwright = None
+        self._browsers = {}
+        self._persistent = {}
+        self._idle = []
+        self._slots = []
+
+    async def __aenter__(self):
+        if self.cleanup:
+            removed = cleanup_stale_profiles()
+            if removed:
+                print(f"Browser pool: removed {len(removed)} stale profile dir(s)")
+        self._playwright = await async_playwright().start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _launch_options(self, options):
+        channel = options.get("channel", self.channel)
+        return {
+            "headless": options.get("headless", self.headless),
+            # 'chromium' = the browser bundled with Playwright
+            "channel": None if channel in (None, "chromium") else channel,
+            "args": LAUNCH_ARGS,
+            "ignore_default_args": ["--enable-automation"],
+        }
+
+    def _context_options(self, options):
+        return {
+            "viewport": options.get("viewport", {"width": 1280, "height": 800}),
+            "user_agent": options.get("user_agent", USER_AGENT),
+        }
+
+    async def _browser(self, options):
+        launch = self._launch_options(options)
+        key = (launch["channel"], launch["headless"])
+        browser = self._browsers.get(key)
+        if browser is None or not browser.is_connected():
+            browser = await self._playwright.chromium.launch(**launch)
+            self._browsers[key] = browser
+            self.launched += 1
+        return browser
+
+    async def _open(self, slot):
+        if slot.persistent:
+            path = profile_dir(slot.profile)
+            os.makedirs(path, exist_ok=True)
+            slot.context = await self._playwright.chromium.launch_persistent_context(
+                path, **self._launch_options(slot.options), **self._context_options(slot.options))
+            self.launched += 1
+        else:
+            browser = await self._browser(slot.options)
+            slot.context = await browser.new_context(storage_state=slot.storage_state, **self._context_options(slot.options))
+
+        await slot.context.set_extra_http_headers(slot.options.get("headers") or DEFAULT_HEADERS)
+        if slot.options.get("blocking"):
+            slot.blocking = await apply_blocking(slot.context, slot.options["blocking"], slot.options.get("allow"))
+        slot.page = slot.context.pages[0] if slot.context.pages else await slot.context.new_page()
+        slot.navigations = 0
+        slot.crashed = False
+        page = slot.page
+
+        def on_request(request):
+            if request.is_navigation_request() and request.frame == page.main_frame:
+                slot.navigations += 1
+
+        def on_crash(_):
+            slot.crashed = True
+            self.crashes += 1
+            print(f"Browser pool: page crashed ({slot.profile or 'isolated context'}), it will be reopened")
+
+        page.on("request", on_request)
+        page.on("crash", on_crash)
+        slot.context.on("close", lambda _: setattr(slot, "crashed", True))
+
+    async def _close(self, slot):
+        if slot.context is None:
+            return
+        if not slot.persistent and not slot.crashed:
+            try:
+                slot.storage_state = await slot.context.storage_state()
+            except Exception:
+                pass
+        if slot.blocking:
+            for reason, n in slot.blocking["blocked"].items():
+                self.blocked[reason] += n
+            slot.blocking = None
+        try:
+            await slot.context.close()
+        except Exception:
+            pass
+        slot.context = slot.page = None
+
+    @asynccontextmanager
+    async def lease(self, profile=None, fresh=False, **options):
+        """
+        Lends a context. options: headless, channel ('chrome' / 'chromium'), viewport, user_agent,
+        headers, blocking (a scrapers.resource_blocking profile) and allow.
+        fresh=True gives a cold isolated context that is closed on release (benchmarks).
+        """
+        if profile is not None:
+            slot = self._persistent.get(profile)
+            if slot is None:
+                slot = self._persistent[profile] = _Slot(profile, options)
+                self._slots.append(slot)
+        else:
+            slot = None if fresh else next((s for s in self._idle if s.options == options), None)
+            if slot is not None:
+                self._idle.remove(slot)
+            else:
+                slot = _Slot(None, options)
+                self._slots.append(slot)
+
+        async with slot.lock:
+            lease = Lease(self, slot)
+            await lease.page()
+            try:
+                yield lease
+            finally:
+                if fresh:
+                    await self._close(slot)
+                    self._slots.remove(slot)
+                elif profile is None:
+                    self._idle.append(slot)
+
+    def stats(self):
+        return {"launched": self.launched, "recycled": self.recycled, "crashes": self.crashes,
+                "open_contexts": sum(1 for s in self._slots if s.context is not None), "blocked": dict(self.blocked)}
+
+    async def close(self):
+        for slot in self._slots:
+            await self._close(slot)
+        for browser in self._browsers.values():
+            try:
+                await browser.close()
+            except Exception:
+                pass
+        self._browsers.clear()
+        self._idle.clear()
+        self._slots.clear()
+        self._persistent.clear()
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
@@ -3,131 +3,112 @@ import os
 import json
 import re
 import random
-from playwright.async_api import async_playwright
+
+from scrapers.search_urls import search_page_url
+from scrapers.search_state import READ_STATE_JS, extract_listings
+from scrapers.page_readiness import goto_ready, search_signals, home_signals, ReadinessStats
+from scrapers.browser_pool import BrowserPool, profile_dir
+
+# DOM fallback when the page has no usable __PRELOADED_STATE__ (see scrapers/search_state.py)
+DOM_RESULTS_JS = r"""
+    (categoryName) => {
+        const items = document.querySelectorAll('.ui-search-layout__item, .ui-search-result');
+        return Array.from(items).map(item => {
+            const titleEl = item.querySelector('.ui-search-item__title, .poly-component__title, h2');
+            const priceEl = item.querySelector('.andes-money-amount__fraction');
+            const linkEl = item.querySelector('a.ui-search-link, a.poly-component__title, a');
+            const imgEl = item.querySelector('img.ui-search-result-image__element, .poly-component__picture img, img');
+            let priceText = priceEl ? priceEl.innerText.replace(/\D/g, '') : '0';
+            const attributes = {};
+            const attributeSelectors = ['.ui-search-item__group__element--attributes', '.poly-attributes-list__item', '.ui-search-card-attributes__item', '.poly-component__attributes-list-item'];
+            for (const selector of attributeSelectors) {
+                const tagEls = item.querySelectorAll(selector);
+                if (tagEls.length > 0) {
+                    tagEls.forEach(el => {
+                        const text = el.innerText.trim();
+                        const lowerText = text.toLowerCase();
+                        if (lowerText.includes('marca')) attributes.brand = text.split(':').length > 1 ? text.split(':')[1].trim() : text.replace(/marca/i, '').trim();
+                        if (lowerText.includes('neto') || lowerText.includes('peso') || lowerText.includes('gr') || lowerText.includes('ml')) attributes.weight = text;
+                    });
+                    if (Object.keys(attributes).length > 0) break;
+                }
+            }
+            return {
+                title: titleEl ? titleEl.innerText : 'N/A',
+                price_str: priceText,
+                url: linkEl ? linkEl.href : 'N/A',
+                thumbnail: imgEl ? imgEl.src : null,
+                seller_id: 'N/A',
+                seller_name: 'N/A',
+                is_official_store: false,
+                official_store_id: null,
+                seller_reputation: 'N/A',
+                category_name: categoryName,
+                raw_attributes: attributes,
+                meli_id: linkEl ? (linkEl.href.match(/MLA-?(\d+)/) || [null, 'N/A'])[1] : 'N/A'
+            };
+        });
+    }
+"""
 
 class MeliAPIScraper:
     """
     Refactored to Hybrid/Web only due to API blocks (PolicyAgent 403).
     Acts as a drop-in replacement for the API scraper but uses Playwright for everything.
-    Includes pagination to scale to 10,000+ items.
+    Includes pagination to scale to 10,000+ items: result pages are opened directly by URL
+    (with retries) and a query stops at the first page that brings no new meli_id.
     """
     def __init__(self, search_items):
         self.search_items = search_items
         self.results = []
         self.access_token = os.getenv("MELI_ACCESS_TOKEN")
+        self.readiness = ReadinessStats()
+        self.extracted = {"state": 0, "dom": 0}
 
     async def scrape(self):
         print("Starting Scalable Web Scrape (Paginating to 10k items)...")
         
-        async with async_playwright() as p:
-            user_data_dir = os.path.join(os.getcwd(), "user_data", "manual_session_hotspot")
-            os.makedirs(user_data_dir, exist_ok=True)
-            
-            print(f"Launching persistent context in {user_data_dir} (HEADED MODE)...")
-            context = await p.chromium.launch_persistent_context(
-                user_data_dir,
-                channel="chrome", 
-                headless=False,
-                args=["--disable-blink-features=AutomationControlled", "--no-sandbox"],
-                viewport={"width": 1280, "height": 800},
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
-            )
-            page = context.pages[0] if context.pages else await context.new_page()
-            
-            await page.set_extra_http_headers({"Accept-Language": "es-419,es;q=0.9"})
+        print(f"Launching persistent context in {profile_dir('session')} (HEADED MODE)...")
+        async with BrowserPool(headless=False) as pool, pool.lease(profile="session", blocking="api_scraper") as lease:
+            page = await lease.page()
             
             try:
                 print("Navigating to home page to establish session...")
-                await page.goto("https://www.mercadolibre.com.ar", wait_until="networkidle", timeout=60000)
-                await asyncio.sleep(2)
+                await goto_ready(page, "https://www.mercadolibre.com.ar", home_signals(), self.readiness, attempts=1, timeout=60000)
             except Exception:
                 pass
 
+            seen_ids = set()
             for item in self.search_items:
                 query = item.get("product_name", "").replace("Brand: ", "")
                 print(f"Searching for: {query}")
                 
                 try:
-                    search_input = await page.wait_for_selector("input.nav-search-input")
-                    await search_input.fill("")
-                    await search_input.fill(query)
-                    await asyncio.sleep(1)
-                    await page.keyboard.press("Enter")
-                    
                     # Pagination Loop (per brand)
                     pages_to_scrape = 10 # 10 pages * ~50 items = ~500 items per brand
                     for page_num in range(pages_to_scrape):
                         print(f"  Scraping page {page_num + 1} for {query}...")
-                        await page.wait_for_load_state("networkidle", timeout=60000)
-                        await asyncio.sleep(2)
-                        
-                        try:
-                            await page.wait_for_selector(".ui-search-layout__item, .ui-search-item__title", timeout=15000)
-                        except:
+                        page = await lease.page()  # recycled by the pool after N navigations / a crash
+                        response, ready = await goto_ready(page, search_page_url(query, page_num + 1), search_signals(), self.readiness, timeout=60000)
+                        if response is None:
+                            break
+                        if ready is None:
+                            # Timed out or walled: the next page may still load
+                            print(f"    Page {page_num + 1} never became ready, skipping it.")
+                            await asyncio.sleep(random.uniform(2, 4))
+                            continue
+                        if ready == "no_results":
                             print(f"    No results or end of list reached.")
                             break
                         
-                        # Extract data from current page
-                        page_results = await page.evaluate(r"""
-                            (categoryName) => {
-                                const items = document.querySelectorAll('.ui-search-layout__item, .ui-search-result');
-                                let preloadedState = {};
-                                try {
-                                    const script = Array.from(document.querySelectorAll('script'))
-                                        .find(s => s.innerText.includes('window.__PRELOADED_STATE__'));
-                                    if (script) {
-                                        preloadedState = JSON.parse(script.innerText.split('window.__PRELOADED_STATE__ = ')[1].split(';')[0]);
-                                    }
-                                } catch(e) {}
-                                const stateResults = (preloadedState.results || []);
-                                
-                                return Array.from(items).map((item, index) => {
-                                    const titleEl = item.querySelector('.ui-search-item__title, .poly-component__title, h2');
-                                    const priceEl = item.querySelector('.andes-money-amount__fraction');
-                                    const linkEl = item.querySelector('a.ui-search-link, a.poly-component__title, a');
-                                    const imgEl = item.querySelector('img.ui-search-result-image__element, .poly-component__picture img, img');
-                                    const stateItem = stateResults[index] || {};
-                                    let mainCategory = categoryName; 
-                                    try {
-                                        const categoryFilter = (preloadedState.filters || []).find(f => f.id === 'category');
-                                        if (categoryFilter && categoryFilter.values && categoryFilter.values.length > 0) {
-                                            mainCategory = categoryFilter.values[categoryFilter.values.length - 1].name;
-                                        }
-                                    } catch(e) {}
-                                    let priceText = priceEl ? priceEl.innerText.replace(/\D/g, '') : (stateItem.price ? String(stateItem.price) : '0');
-                                    const attributes = {};
-                                    const attributeSelectors = ['.ui-search-item__group__element--attributes', '.poly-attributes-list__item', '.ui-search-card-attributes__item', '.poly-component__attributes-list-item'];
-                                    for (const selector of attributeSelectors) {
-                                        const tagEls = item.querySelectorAll(selector);
-                                        if (tagEls.length > 0) {
-                                            tagEls.forEach(el => {
-                                                const text = el.innerText.trim();
-                                                const lowerText = text.toLowerCase();
-                                                if (lowerText.includes('marca')) attributes.brand = text.split(':').length > 1 ? text.split(':')[1].trim() : text.replace(/marca/i, '').trim();
-                                                if (lowerText.includes('neto') || lowerText.includes('peso') || lowerText.includes('gr') || lowerText.includes('ml')) attributes.weight = text;
-                                            });
-                                            if (Object.keys(attributes).length > 0) break;
-                                        }
-                                    }
-                                    const seller = stateItem.seller || {};
-                                    const reputation = seller.seller_reputation || {};
-                                    return {
-                                        title: titleEl ? titleEl.innerText : (stateItem.title || 'N/A'),
-                                        price_str: priceText,
-                                        url: linkEl ? linkEl.href : (stateItem.permalink || 'N/A'),
-                                        thumbnail: imgEl ? imgEl.src : (stateItem.thumbnail || null),
-                                        seller_id: seller.id || 'N/A',
-                                        seller_name: seller.nickname || 'N/A',
-                                        is_official_store: !!seller.official_store_id,
-                                        official_store_id: seller.official_store_id || null,
-                                        seller_reputation: reputation.level_id || 'N/A',
-                                        category: mainCategory,
-                                        raw_attributes: attributes,
-                                        meli_id: stateItem.id || (linkEl ? (linkEl.href.match(/MLA-?(\d+)/) || [null, 'N/A'])[1] : 'N/A')
-                                    };
-                                });
-                            }
-                        """, item.get("category", "Uncategorized"))
+                        # Extract data from current page (state first, DOM fallback)
+                        page_results = await self.extract_page(page, item.get("category", "Uncategorized"))
+                        
+                        page_ids = {str(res["meli_id"]) for res in page_results} - {"N/A"}
+                        if not page_ids - seen_ids:
+                            print(f"    No new listings on this page, stopping '{query}'.")
+                            break
+                        seen_ids |= page_ids
                         
                         for res in page_results:
                             norm_attrs = self.normalize_attributes(res["title"], res["raw_attributes"])
@@ -141,7 +122,7 @@ class MeliAPIScraper:
                                 "price": float(res["price_str"]) if res["price_str"] else 0.0,
                                 "url": clean_url,
                                 "thumbnail": res["thumbnail"],
-                                "category": res["category"],
+                                "category": res.get("category_name") or item.get("category", "Uncategorized"),
                                 "seller_id": str(res["seller_id"]),
                                 "seller_name": res["seller_name"],
                                 "is_official_store": res["is_official_store"],
@@ -153,27 +134,27 @@ class MeliAPIScraper:
                                 "official_product_id": item.get("official_id")
                             })
 
-                        # Pagination: Click "Siguiente"
+                        # Pause between pages (same pacing as the old "Siguiente" click)
                         if page_num < pages_to_scrape - 1:
-                            try:
-                                next_button = await page.query_selector('a.andes-pagination__link[title="Siguiente"], .andes-pagination__button--next a')
-                                if next_button:
-                                    await next_button.click()
-                                    await asyncio.sleep(random.uniform(2, 4))
-                                else:
-                                    break
-                            except:
-                                break
+                            await asyncio.sleep(random.uniform(2, 4))
                     
                 except Exception as e:
                     print(f"  Error scraping {query}: {e}")
 
-            await self.enrich_with_stock(context)
-            await context.close()
+            await self.enrich_with_stock(lease.context)
             
-        print(f"Total results collected: {len(self.results)}")
+        print(f"Total results collected: {len(self.results)} | Page readiness: {self.readiness.summary()} | Pages from state/DOM: {self.extracted}")
         return self.results
 
+    async def extract_page(self, page, category_name):
+        """Result records parsed in Python from the page state, or read from the DOM when it is missing."""
+        records = extract_listings(await page.evaluate(READ_STATE_JS))
+        if records is not None:
+            self.extracted["state"] += 1
+            return records
+        self.extracted["dom"] += 1
+        return await page.evaluate(DOM_RESULTS_JS, category_name)
+
     async def enrich_with_stock(self, context):
         print("Enriching items with stock data via ML API...")
         unique_clean_ids = set()
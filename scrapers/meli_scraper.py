@@ -2,7 +2,9 @@ import asyncio
 import json
 import os
 import re
-from playwright.async_api import async_playwright
+
+from scrapers.browser_pool import BrowserPool
+from scrapers.page_readiness import goto_ready, wait_ready, search_signals, home_signals, ReadinessStats
 
 class MeliScraper:
     def __init__(self, search_items):
@@ -15,39 +17,27 @@ class MeliScraper:
         """
         self.search_items = search_items
         self.results = []
+        self.readiness = ReadinessStats()
 
     async def scrape(self):
         print("Initializing Playwright...")
-        async with async_playwright() as p:
-            print("Launching browser with persistent context...")
-            user_data_dir = os.path.join(os.getcwd(), "user_data")
-            # Create user data dir if it doesn't exist
-            os.makedirs(user_data_dir, exist_ok=True)
-            
-            context = await p.chromium.launch_persistent_context(
-                user_data_dir,
-                channel="chrome", # Try using real Chrome to bypass bot detection
-                headless=True,
-                viewport={"width": 1280, "height": 800},
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
-                args=["--disable-blink-features=AutomationControlled"] 
-            )
-            
-            page = context.pages[0] if context.pages else await context.new_page()
-
-            # Anti-detection basic header - context already sets UA, but let's be safe
-            await page.set_extra_http_headers({
-                "Accept-Language": "es-419,es;q=0.9",
-                "Referer": "https://www.google.com/"
-            })
+        print("Launching browser with persistent context...")
+        # Real Chrome (channel) to bypass bot detection; warm profile in user_data/profiles/scraper
+        headers = {"Accept-Language": "es-419,es;q=0.9", "Referer": "https://www.google.com/"}
+        # Search box + pagination flow stays on one page: no recycling mid-run
+        async with BrowserPool(headless=True, max_navigations=float("inf")) as pool, \
+                pool.lease(profile="scraper", headers=headers, blocking="scraper") as lease:
+            page = await lease.page()
+            context = lease.context
 
             print(f"Starting to scrape {len(self.search_items)} items...")
             
             # Navigate to home page first to establish session
             try:
                 print("Navigating to home page...")
-                await page.goto("https://www.mercadolibre.com.ar", wait_until="networkidle", timeout=60000)
-                await asyncio.sleep(2) # mimic user pause
+                response, _ = await goto_ready(page, "https://www.mercadolibre.com.ar", home_signals(), self.readiness, attempts=1, timeout=60000)
+                if response is None:
+                    raise RuntimeError("home page did not load")
             except Exception as e:
                 print(f"Error loading home page: {e}")
                 return []
@@ -66,7 +56,7 @@ class MeliScraper:
                     await page.keyboard.press("Enter")
                     
                     # Wait for results or 'no results'
-                    await page.wait_for_load_state("networkidle")
+                    await wait_ready(page, search_signals(), self.readiness)
                 except Exception as e:
                     print(f"Error performing search for {query}: {e}")
                     # DEBUG: detailed failure analysis
@@ -233,14 +223,14 @@ class MeliScraper:
                         next_url = await next_button.get_attribute("href")
                         if next_url and next_url.startswith("http"):
                             # print(f"Moving to next page: {next_url}")
-                            await page.goto(next_url, wait_until="networkidle")
+                            await goto_ready(page, next_url, search_signals(), self.readiness)
                         else:
                             break
                     else:
                         break
             
             await self.enrich_with_stock(context)
-            await browser.close()
+            print(f"Page readiness: {self.readiness.summary()}")
             return self.results
 
     async def enrich_with_stock(self, context):
@@ -0,0 +1,152 @@
+import asyncio
+import time
+
+from scrapers.search_urls import goto_with_retries
+
+# Signals the flows read from (see EXTRACT_RESULTS_JS and the enricher DOM/state reader)
+SEARCH_LAST_RESULT = ".ui-search-layout__item:last-child"
+SEARCH_NO_RESULTS = ".ui-search-rescue, .ui-search-search-result--empty"
+ITEM_SPECS = ".ui-pdp-specs, .ui-vpp-highlighted-specs, .ui-pdp-description"
+ITEM_NOT_FOUND = "text=Parece que esta página no existe"
+HOME_SEARCH_BOX = "input.nav-search-input"
+
+
+# A card or spec row that is attached while the document is still streaming may not be the last one
+DATA_COMPLETE_JS = """
+(css) => document.readyState !== 'loading' && (
+    !!window.__PRELOADED_STATE__ || !!document.getElementById('__PRELOADED_STATE__') || !!document.querySelector(css)
+)
+"""
+
+
+class Signal:
+    """
+    One thing a page can be "ready" on, with its own timeout (ms):
+      kind='selector'  -> an element matching 'target' is attached to the DOM
+      kind='state'     -> window.__PRELOADED_STATE__ has been assigned by its inline script
+      kind='complete'  -> the document is parsed and its data is in: the state script is present
+                          or an element matching 'target' (the last card, the specs) is attached
+      kind='response'  -> a response whose URL contains 'target' (XHR/fetch) has arrived
+    Response signals are armed before navigating; DOM signals once the document is loaded.
+    """
+
+    def __init__(self, name, kind, target=None, timeout=15000):
+        self.name = name
+        self.kind = kind
+        self.target = target
+        self.timeout = timeout
+
+    async def wait(self, page):
+        if self.kind == "selector":
+            await page.wait_for_selector(self.target, state="attached", timeout=self.timeout)
+        elif self.kind == "state":
+            await page.wait_for_function("() => !!window.__PRELOADED_STATE__", timeout=self.timeout)
+        elif self.kind == "complete":
+            await page.wait_for_function(DATA_COMPLETE_JS, arg=self.target, timeout=self.timeout)
+        elif self.kind == "response":
+            await page.wait_for_event("response", predicate=lambda r: self.target in r.url, timeout=self.timeout)
+        else:
+            raise ValueError(f"unknown signal kind: {self.kind}")
+
+
+def selector(css, name=None, timeout=15000):
+    return Signal(name or css, "selector", css, timeout)
+
+def preloaded_state(timeout=10000):
+    return Signal("preloaded_state", "state", None, timeout)
+
+def data_complete(css, name=None, timeout=15000):
+    return Signal(name or css, "complete", css, timeout)
+
+def xhr(url_fragment, name=None, timeout=15000):
+    return Signal(name or url_fragment, "response", url_fragment, timeout)
+
+# Ready-made signal sets per page type
+def search_signals(timeout=15000):
+    return [data_complete(SEARCH_LAST_RESULT, "results", timeout), selector(SEARCH_NO_RESULTS, "no_results", timeout)]
+
+def item_signals(timeout=15000):
+    return [data_complete(ITEM_SPECS, "item", timeout), selector(ITEM_NOT_FOUND, "not_found", timeout)]
+
+def home_signals(timeout=15000):
+    return [selector(HOME_SEARCH_BOX, "home", timeout)]
+
+
+class ReadinessStats:
+    """Per-signal wait durations of a run (ms), to see what each page actually waited for."""
+
+    def __init__(self):
+        self.waits = {}
+        self.timeouts = 0
+
+    def record(self, name, elapsed_ms):
+        self.waits.setdefault(name, []).append(elapsed_ms)
+
+    def summary(self):
+        out = {}
+        for name, values in self.waits.items():
+            ordered = sorted(values)
+            out[name] = {"n": len(values), "p50_ms": ordered[len(ordered) // 2], "max_ms": ordered[-1]}
+        out["timeouts"] = self.timeouts
+        return out
+
+
+async def _race(page, armed, signals, started):
+    """Returns the name of the first signal met (None if all time out) and its elapsed ms."""
+    tasks = dict(armed)
+    for signal in signals:
+        tasks[asyncio.ensure_future(signal.wait(page))] = signal
+    winner = None
+    try:
+        pending = set(tasks)
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None and winner is None:
+                    winner = tasks[task].name
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        # Retrieve cancelled/failed waits so they are not reported as never-retrieved
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return winner, round((time.monotonic() - started) * 1000)
+
+
+async def wait_ready(page, signals, stats=None):
+    """
+    Waits until the first of 'signals' holds on the current page (no navigation) and returns
+    its name, or None when every signal timed out. The wait is recorded in 'stats'.
+    """
+    started = time.monotonic()
+    winner, elapsed = await _race(page, {}, signals, started)
+    _record(stats, winner, elapsed)
+    return winner
+
+
+async def goto_ready(page, url, signals, stats=None, budget=None, attempts=3, timeout=30000, limiter=None):
+    """
+    Navigates (with goto_with_retries) until the document is parsed (domcontentloaded, not
+    load/networkidle), then waits for the first of 'signals'. Returns (response, signal name or None).
+    """
+    started = time.monotonic()
+    armed = {asyncio.ensure_future(s.wait(page)): s for s in signals if s.kind == "response"}
+    response = await goto_with_retries(page, url, attempts=attempts, timeout=timeout, wait_until="domcontentloaded", budget=budget, limiter=limiter)
+    if response is None:
+        for task in armed:
+            task.cancel()
+        await asyncio.gather(*armed, return_exceptions=True)
+        return None, None
+    winner, elapsed = await _race(page, armed, [s for s in signals if s.kind != "response"], started)
+    _record(stats, winner, elapsed)
+    return response, winner
+
+
+def _record(stats, winner, elapsed):
+    if stats is None:
+        return
+    if winner is None:
+        stats.timeouts += 1
+        stats.record("timeout", elapsed)
+    else:
+        stats.record(winner, elapsed)
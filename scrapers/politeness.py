@@ -0,0 +1,51 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+
+class HostBudget:
+    """
+    Politeness budget shared by every browser context of a run.
+
+    Per host, at most 'max_concurrent' navigations are in flight and consecutive navigation
+    starts are spaced by at least 'min_interval' seconds, whatever the number of workers.
+    Request pacing is not done here: scrapers/rate_limiter.py spaces requests per target across
+    all workers and processes. The budget only caps this run's concurrency and start spacing
+    against one host.
+    """
+
+    def __init__(self, max_concurrent=4, min_interval=0.5):
+        self.max_concurrent = max_concurrent
+        self.min_interval = min_interval
+        self._hosts = {}
+
+    def _host(self, url):
+        host = urlparse(url).netloc or url
+        if host not in self._hosts:
+            self._hosts[host] = {
+                "semaphore": asyncio.Semaphore(self.max_concurrent),
+                "lock": asyncio.Lock(),
+                "next_start": 0.0,
+                "requests": 0,
+                "waited": 0.0,
+            }
+        return self._hosts[host]
+
+    @asynccontextmanager
+    async def slot(self, url):
+        """Holds a navigation slot for the host of 'url'."""
+        state = self._host(url)
+        started = time.monotonic()
+        async with state["semaphore"]:
+            async with state["lock"]:
+                delay = state["next_start"] - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                state["next_start"] = time.monotonic() + self.min_interval
+            state["requests"] += 1
+            state["waited"] += time.monotonic() - started
+            yield
+
+    def stats(self):
+        return {host: {"requests": s["requests"], "waited_s": round(s["waited"], 2)} for host, s in self._hosts.items()}
@@ -0,0 +1,246 @@
+import os
+import time
+import random
+import asyncio
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from scrapers.search_html import BOT_WALL_URL_MARKERS
+
+DEFAULT_PATH = os.environ.get("BPP_RATE_STATE", os.path.join("user_data", "rate_limits.db"))
+# Seconds a reservation waits for another process' write lock (each transaction takes ~1 ms)
+BUSY_TIMEOUT = 5.0
+
+# Requests per second per target. 'rate' is only the starting point of a target that has no
+# state yet; after that every process continues from the rate the last one settled on.
+#   increase: added to the rate after each healthy response (additive increase)
+#   decrease: factor applied on a throttling response (multiplicative decrease), at most once
+#             per 'cooldown' seconds, during which nobody sends to the target
+#   burst: requests that may start back to back after an idle period
+#   jitter: random extra wait, as a fraction of the interval (pages fetched like a person would)
+#   throttle_statuses: statuses that mean "slow down" (the API answers 403 for items it does
+#             not share, so only 429 counts there)
+# Rates are per target for ALL workers and processes together, not per worker: 'web_search'
+# (0.4 req/s to start, 2.0 at most) caps discovery at 24-120 result pages a minute whatever
+# --workers is. More workers only help while a page takes longer to load than one slot lasts;
+# to go faster, raise the target's rate/max_rate here (it is MercadoLibre's budget, not ours).
+TARGETS = {
+    "api": {"rate": 2.0, "min_rate": 0.2, "max_rate": 10.0, "increase": 0.05, "decrease": 0.5,
+            "cooldown": 10.0, "burst": 4, "jitter": 0.0, "throttle_statuses": (429,)},
+    "web_search": {"rate": 0.4, "min_rate": 0.05, "max_rate": 2.0, "increase": 0.01, "decrease": 0.5,
+                   "cooldown": 60.0, "burst": 1, "jitter": 0.5, "throttle_statuses": (403, 429)},
+    "web_item": {"rate": 0.1, "min_rate": 0.02, "max_rate": 0.5, "increase": 0.005, "decrease": 0.5,
+                 "cooldown": 60.0, "burst": 1, "jitter": 0.4, "throttle_statuses": (403, 429)},
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limits (
+    target TEXT PRIMARY KEY,
+    rate REAL NOT NULL,
+    next_at REAL NOT NULL DEFAULT 0,
+    requests INTEGER NOT NULL DEFAULT 0,
+    throttled INTEGER NOT NULL DEFAULT 0,
+    last_decrease_at REAL NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS rate_limit_runs (
+    target TEXT NOT NULL,
+    flow TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT NOT NULL,
+    requests INTEGER NOT NULL,
+    throttled INTEGER NOT NULL,
+    waited_s REAL NOT NULL,
+    final_rate REAL NOT NULL,
+    effective_rate REAL NOT NULL
+);
+"""
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class RateLimiter:
+    """
+    Adaptive request rate per target (TARGETS: 'api' = api.mercadolibre.com, 'web_search' =
+    search result pages, 'web_item' = item pages), shared by every worker and every process.
+
+    Scheduling is a token bucket kept as a virtual clock in a local SQLite file: each request
+    reserves the next free slot of its target in one IMMEDIATE transaction, so discovery, the
+    enrichers and update_stock running at the same time share one budget per target instead
+    of each applying its own sleeps. The rate follows AIMD: it grows slowly while responses are
+    healthy and halves on 429 / 403 / bot-wall redirects, and the rate it settled on is what the
+    next run starts from. close() records the run in 'rate_limit_runs' (requests, throttles,
+    time waited and effective rate).
+
+        limiter = RateLimiter("meli_api_enricher")
+        limiter.wait("api")                  # or: await limiter.acquire("api")
+        response = requests.get(...)
+        limiter.feedback("api", response.status_code)
+        limiter.close()
+    """
+
+    def __init__(self, flow, path=DEFAULT_PATH, targets=None, clock=time.time):
+        self.flow = flow
+        self.path = path
+        self.targets = targets or TARGETS
+        self.clock = clock
+        self.started_at = _now_iso()
+        self.lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+        self.runs = {}  # target -> this process' counters
+
+    def _transaction(self, target, update):
+        """Runs update(row, config, now) -> (sql assignments, params, result) under a write lock."""
+        config = self.targets[target]
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = self.clock()
+                row = self.conn.execute("SELECT * FROM rate_limits WHERE target = ?", (target,)).fetchone()
+                if row is None:
+                    self.conn.execute("INSERT INTO rate_limits (target, rate, updated_at) VALUES (?, ?, ?)",
+                                      (target, config["rate"], _now_iso()))
+                    row = self.conn.execute("SELECT * FROM rate_limits WHERE target = ?", (target,)).fetchone()
+                assignments, params, result = update(dict(row), config, now)
+                self.conn.execute(f"UPDATE rate_limits SET {assignments}, updated_at = ? WHERE target = ?",
+                                  (*params, _now_iso(), target))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return result
+
+    def _run(self, target):
+        return self.runs.setdefault(target, {"requests": 0, "throttled": 0, "waited": 0.0,
+                                             "first": None, "last": None, "rate": None})
+
+    def reserve(self, target):
+        """Reserves the next slot of 'target'; returns the seconds to wait before sending."""
+        def update(row, config, now):
+            rate = min(max(row["rate"], config["min_rate"]), config["max_rate"])
+            interval = 1.0 / rate
+            slot = max(row["next_at"], now)
+            delay = max(0.0, slot - (config["burst"] - 1) * interval - now)
+            if config["jitter"]:
+                delay += random.uniform(0, config["jitter"] * interval)
+            return "next_at = ?, requests = requests + 1", (slot + interval,), (delay, rate)
+
+        delay, rate = self._transaction(target, update)
+        run = self._run(target)
+        run["requests"] += 1
+        run["waited"] += delay
+        run["rate"] = rate
+        started = self.clock() + delay
+        run["first"] = run["first"] or started
+        run["last"] = started
+        return delay
+
+    def wait(self, target):
+        """Blocking wait for a slot (requests-based code)."""
+        delay = self.reserve(target)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire(self, target):
+        """Async wait for a slot; the SQLite reservation runs in a thread, off the event loop."""
+        delay = await asyncio.to_thread(self.reserve, target)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def is_throttled(self, target, status=None, url=None):
+        if status in self.targets[target]["throttle_statuses"]:
+            return True
+        return bool(url) and any(m in str(url) for m in BOT_WALL_URL_MARKERS)
+
+    def feedback(self, target, status=None, url=None):
+        """
+        Adjusts the rate from one response: throttled -> decrease, 2xx/3xx/404 -> increase,
+        anything else (5xx, timeouts: status None) leaves it unchanged. Returns True if throttled.
+        """
+        if self.is_throttled(target, status, url):
+            self.throttle(target, f"HTTP {status}" if status in self.targets[target]["throttle_statuses"] else "bot wall")
+            return True
+        if status is not None and (status < 400 or status == 404):
+            def update(row, config, now):
+                rate = min(config["max_rate"], row["rate"] + config["increase"])
+                return "rate = ?", (rate,), rate
+            self._run(target)["rate"] = self._transaction(target, update)
+        return False
+
+    def throttle(self, target, reason="throttled"):
+        """Multiplicative decrease plus a pause of the whole target (once per cooldown)."""
+        def update(row, config, now):
+            if now - row["last_decrease_at"] < config["cooldown"]:
+                # Other in-flight requests of the same burst: already backed off
+                return "throttled = throttled + 1", (), (row["rate"], False)
+            rate = max(config["min_rate"], row["rate"] * config["decrease"])
+            return ("rate = ?, next_at = ?, last_decrease_at = ?, throttled = throttled + 1",
+                    (rate, max(row["next_at"], now + config["cooldown"]), now), (rate, True))
+
+        rate, decreased = self._transaction(target, update)
+        run = self._run(target)
+        run["throttled"] += 1
+        run["rate"] = rate
+        if decreased:
+            print(f"    [RATE] {target}: {reason}, backing off to {rate:.2f} req/s "
+                  f"(pause {self.targets[target]['cooldown']:.0f}s)")
+
+    def target(self, target):
+        """This limiter bound to one target (what the navigation helpers take)."""
+        return TargetLimiter(self, target)
+
+    def summary(self):
+        summary = {}
+        for target, run in self.runs.items():
+            elapsed = (run["last"] or 0) - (run["first"] or 0)
+            effective = (run["requests"] - 1) / elapsed if run["requests"] > 1 and elapsed > 0 else 0.0
+            summary[target] = {
+                "requests": run["requests"],
+                "throttled": run["throttled"],
+                "waited_s": round(run["waited"], 1),
+                "rate": round(run["rate"] or 0.0, 3),
+                "effective_rate": round(effective, 3),
+            }
+        return summary
+
+    def close(self):
+        """Records the rate each target settled on during this run and closes the state file."""
+        finished = _now_iso()
+        rows = [(target, self.flow, self.started_at, finished, s["requests"], s["throttled"],
+                 s["waited_s"], s["rate"], s["effective_rate"])
+                for target, s in self.summary().items() if s["requests"]]
+        with self.lock:
+            if rows:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.conn.executemany("INSERT INTO rate_limit_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                self.conn.execute("COMMIT")
+            self.conn.close()
+
+
+class TargetLimiter:
+    """RateLimiter bound to one target."""
+
+    def __init__(self, limiter, target):
+        self.limiter = limiter
+        self.name = target
+
+    async def acquire(self):
+        await self.limiter.acquire(self.name)
+
+    def wait(self):
+        self.limiter.wait(self.name)
+
+    def feedback(self, status=None, url=None):
+        return self.limiter.feedback(self.name, status, url)
+
+    def throttle(self, reason="throttled"):
+        self.limiter.throttle(self.name, reason)
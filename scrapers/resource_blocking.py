@@ -0,0 +1,163 @@
+import asyncio
+import os
+import time
+from urllib.parse import urlparse
+
+# Resource types no flow reads: listing data comes from the DOM text and __PRELOADED_STATE__,
+# and thumbnails are taken from the <img src> attribute, which does not need the image bytes.
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+
+# Analytics / ads / session-replay hosts loaded by MercadoLibre pages (matched by suffix)
+TRACKER_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googleadservices.com",
+    "googlesyndication.com",
+    "doubleclick.net",
+    "facebook.net",
+    "facebook.com",
+    "hotjar.com",
+    "clarity.ms",
+    "criteo.com",
+    "criteo.net",
+    "mercadoclics.com",
+    "nr-data.net",
+    "newrelic.com",
+    "datadoghq.com",
+    "browser-intake-datadoghq.com",
+    "scorecardresearch.com",
+    "tiktok.com",
+    "bing.com",
+)
+# First-party tracking endpoints (path fragments on MercadoLibre hosts)
+TRACKER_PATHS = ("/melidata", "/tracks", "/clicks", "/ads/", "/jms/lgz/")
+
+# Per-flow overrides: resource types / hosts a flow needs even though the default would block them
+PROFILES = {
+    "discovery": {"allow_types": set(), "allow_hosts": ()},
+    "api_scraper": {"allow_types": set(), "allow_hosts": ()},
+    "scraper": {"allow_types": set(), "allow_hosts": ()},
+    "enricher": {"allow_types": set(), "allow_hosts": ()},
+    # Deep inspection saves a full-page screenshot, so it keeps images and fonts
+    "inspect": {"allow_types": {"image", "font"}, "allow_hosts": ()},
+}
+
+
+def blocking_enabled():
+    """Kill switch: BPP_RESOURCE_BLOCKING=0 loads every resource (e.g. to debug a layout change)."""
+    return os.getenv("BPP_RESOURCE_BLOCKING", "1").lower() not in ("0", "false", "no")
+
+
+def _host_matches(host, suffixes):
+    return any(host == s or host.endswith("." + s) for s in suffixes)
+
+
+def should_block(resource_type, url, profile="discovery", allow=None):
+    """
+    Decides whether a request is aborted. Returns the reason ('type' / 'tracker') or None.
+    'allow' adds resource types or hosts to the profile allowlist for a single call site.
+    """
+    rules = PROFILES[profile]
+    allow = set(allow or ())
+    host = (urlparse(url).hostname or "").lower()
+
+    if _host_matches(host, tuple(rules["allow_hosts"]) + tuple(a for a in allow if "." in a)):
+        return None
+    if resource_type in BLOCKED_RESOURCE_TYPES and resource_type not in rules["allow_types"] | allow:
+        return "type"
+    if _host_matches(host, TRACKER_HOSTS):
+        return "tracker"
+    if "mercadoli" in host and any(p in urlparse(url).path for p in TRACKER_PATHS):
+        return "tracker"
+    return None
+
+
+async def apply_blocking(target, profile="discovery", allow=None):
+    """
+    Installs the interception profile on a Playwright page or context (target.route) and returns
+    the counters it fills: {'blocked': {'type': n, 'tracker': n}, 'allowed': n}.
+    Does nothing (empty counters) when blocking is disabled.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"profile must be one of {', '.join(PROFILES)}")
+    counters = {"blocked": {"type": 0, "tracker": 0}, "allowed": 0}
+    if not blocking_enabled():
+        return counters
+
+    async def handle(route):
+        request = route.request
+        reason = should_block(request.resource_type, request.url, profile, allow)
+        if reason:
+            counters["blocked"][reason] += 1
+            await route.abort()
+        else:
+            counters["allowed"] += 1
+            await route.continue_()
+
+    await target.route("**/*", handle)
+    return counters
+
+
+class TrafficMeter:
+    """
+    Measures what a page actually downloads: bytes (headers + body, as reported by
+    request.sizes()) and request count per resource type, plus time to a ready signal.
+    Attach before navigating, call mark_ready() once the data is readable, then settle()
+    before reading the totals so pending size lookups are included.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.bytes = 0
+        self.requests = 0
+        self.failed = 0
+        self.by_type = {}
+        self.started = time.monotonic()
+        self.ready_ms = None
+        self._pending = set()
+        page.on("requestfinished", self._on_finished)
+        page.on("requestfailed", self._on_failed)
+
+    def _on_finished(self, request):
+        # sizes() is a round trip to the browser; event handlers run on the loop, so schedule it
+        task = asyncio.ensure_future(self._record(request))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _on_failed(self, request):
+        # Includes requests aborted by apply_blocking
+        self.failed += 1
+
+    async def _record(self, request):
+        try:
+            sizes = await request.sizes()
+            size = sizes["requestHeadersSize"] + sizes["requestBodySize"] + sizes["responseHeadersSize"] + sizes["responseBodySize"]
+        except Exception:
+            size = 0
+        self.bytes += size
+        self.requests += 1
+        kind = self.by_type.setdefault(request.resource_type, {"requests": 0, "bytes": 0})
+        kind["requests"] += 1
+        kind["bytes"] += size
+
+    def restart(self):
+        """Resets the ready clock (e.g. right before page.goto)."""
+        self.started = time.monotonic()
+        self.ready_ms = None
+
+    def mark_ready(self):
+        self.ready_ms = round((time.monotonic() - self.started) * 1000)
+        return self.ready_ms
+
+    async def settle(self):
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    def summary(self):
+        return {
+            "bytes": self.bytes,
+            "requests": self.requests,
+            "failed": self.failed,
+            "ready_ms": self.ready_ms,
+            "by_type": self.by_type,
+        }
@@ -0,0 +1,146 @@
+"""
+Browserless reading of search result pages (discover_listings.py --mode http).
+
+The results are embedded in the HTML as the __PRELOADED_STATE__ JSON, so a page is parsed
+by slicing that script out of the raw text (no DOM build) and handing it to
+scrapers/search_state.py. Pages without state are read from the result cards with
+selectolax, or lxml when selectolax is not installed; the records have the same keys as
+the browser extractors. Bot walls / login redirects are detected so the caller can retry
+those pages with Playwright.
+"""
+import re
+
+from scrapers.search_state import extract_listings, clean_seller_name
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:  # optional dependency (see requirements.txt)
+    try:
+        from selectolax.parser import HTMLParser  # selectolax < 1.0
+    except ImportError:
+        HTMLParser = None
+
+try:
+    import lxml.html as lxml_html
+    import cssselect  # noqa: F401 (lxml's .cssselect() needs it)
+except ImportError:
+    lxml_html = None
+
+# <script id="__PRELOADED_STATE__" type="application/json">{...}</script> or an inline assignment
+_STATE_TAG = re.compile(r'<script[^>]*id="__PRELOADED_STATE__"[^>]*>(.*?)</script>', re.DOTALL)
+_STATE_INLINE = re.compile(r'<script[^>]*>([^<]*?__PRELOADED_STATE__\s*=.*?)</script>', re.DOTALL)
+
+# Outer result containers; a .poly-card sits inside a .ui-search-layout__item, so the first
+# selector that matches anything is used (one record per result)
+CARD_SELECTORS = (".ui-search-layout__item", ".ui-search-result", ".poly-card")
+BOT_WALL_URL_MARKERS = ("account-verification", "negative_traffic", "login", "auth", "captcha")
+BOT_WALL_TEXT_MARKERS = ("negative_traffic", "account-verification", "g-recaptcha", "hcaptcha", "Ingresá a tu cuenta")
+# Same elements as the browser's "no_results" signal (scrapers/page_readiness.SEARCH_NO_RESULTS)
+NO_RESULTS_MARKERS = ("ui-search-rescue", "ui-search-search-result--empty")
+
+
+def state_text(html):
+    """Raw __PRELOADED_STATE__ text of a page, or None."""
+    match = _STATE_TAG.search(html) or _STATE_INLINE.search(html)
+    return match.group(1) if match else None
+
+
+def is_bot_wall(status, url, html):
+    """True when the response is a block / login / captcha page rather than search results."""
+    if status in (403, 429):
+        return True
+    if any(m in (url or "") for m in BOT_WALL_URL_MARKERS):
+        return True
+    head = html[:20000]
+    return "__PRELOADED_STATE__" not in head and any(m in head for m in BOT_WALL_TEXT_MARKERS)
+
+
+def _record(title, price, href, img, seller, sales, shipping, official):
+    meli_id = re.search(r"MLA-?(\d+)", href or "")
+    return {
+        "title": title or "N/A",
+        "price_str": re.sub(r"\D", "", price or "") or "0",
+        "url": href or "N/A",
+        "thumbnail": img,
+        "meli_id": meli_id.group(1) if meli_id else "N/A",
+        "category_id": "N/A",
+        "seller_name": clean_seller_name(seller),
+        "sold_quantity_str": sales,
+        "is_full": "FULL" in (shipping or ""),
+        "is_official_store": official,
+    }
+
+
+def _cards_selectolax(html):
+    def text(node, selector):
+        found = node.css_first(selector)
+        return found.text(strip=True) if found else None
+
+    tree = HTMLParser(html)
+    cards = next((found for found in (tree.css(sel) for sel in CARD_SELECTORS) if found), [])
+    records = []
+    for card in cards:
+        link = card.css_first("a.ui-search-link, a.poly-component__title, a")
+        img = card.css_first("img.ui-search-result-image__element, .poly-component__picture img, img")
+        records.append(_record(
+            text(card, ".ui-search-item__title, .poly-component__title, h2"),
+            text(card, ".andes-money-amount__fraction"),
+            link.attributes.get("href") if link else None,
+            (img.attributes.get("data-src") or img.attributes.get("src")) if img else None,
+            text(card, ".poly-component__seller, .ui-search-official-store-label"),
+            text(card, ".poly-component__sales, .poly-sales, .ui-search-item__group__element--shipping"),
+            text(card, ".ui-search-item__fulfillment, .poly-component__shipping"),
+            card.css_first(".ui-search-official-store-label, .poly-component__seller") is not None,
+        ))
+    return records
+
+
+def _cards_lxml(html):
+    def text(node, selector):
+        found = node.cssselect(selector)
+        return found[0].text_content().strip() if found else None
+
+    root = lxml_html.fromstring(html)
+    cards = next((found for found in (root.cssselect(sel) for sel in CARD_SELECTORS) if found), [])
+    records = []
+    for card in cards:
+        link = card.cssselect("a.ui-search-link, a.poly-component__title, a")
+        img = card.cssselect("img.ui-search-result-image__element, .poly-component__picture img, img")
+        records.append(_record(
+            text(card, ".ui-search-item__title, .poly-component__title, h2"),
+            text(card, ".andes-money-amount__fraction"),
+            link[0].get("href") if link else None,
+            (img[0].get("data-src") or img[0].get("src")) if img else None,
+            text(card, ".poly-component__seller, .ui-search-official-store-label"),
+            text(card, ".poly-component__sales, .poly-sales, .ui-search-item__group__element--shipping"),
+            text(card, ".ui-search-item__fulfillment, .poly-component__shipping"),
+            bool(card.cssselect(".ui-search-official-store-label, .poly-component__seller")),
+        ))
+    return records
+
+
+def parse_cards(html):
+    """Result cards read from the HTML (None when no HTML parser is installed)."""
+    if HTMLParser is not None:
+        return _cards_selectolax(html)
+    if lxml_html is not None:
+        return _cards_lxml(html)
+    return None
+
+
+def parse_search_html(html):
+    """
+    Returns (records, source) for a search page. source is 'state' or 'dom' when results were
+    read, 'empty' for a page that says it has no results (end of the listing), and 'unreadable'
+    otherwise: result cards that could not be parsed here (no HTML parser installed) or a page
+    that is neither results nor "no results". Those pages need the browser.
+    """
+    records = extract_listings(state_text(html))
+    if records is not None:
+        return records, "state"
+    cards = parse_cards(html)
+    if cards:
+        return cards, "dom"
+    if not cards and any(marker in html for marker in NO_RESULTS_MARKERS):
+        return [], "empty"
+    return [], "unreadable"
@@ -0,0 +1,222 @@
+"""
+Python-side reader of the search page state (window.__PRELOADED_STATE__).
+
+The page hands over the raw JSON text once (READ_STATE_JS, a single string across CDP) and
+it is decoded here with orjson (json if orjson is not installed). Each search result is
+mapped to a listing record with the same keys the DOM extractors return, so callers can
+use either source interchangeably:
+
+    meli_id            'MLA1234567890' (no dash)
+    title              str
+    price_str          price as a plain number string ('25999' / '25999.5'), '0' if unknown
+    url                permalink without query string / fragment
+    thumbnail          image URL or None
+    seller_id          str or 'N/A'
+    seller_name        str or 'N/A'
+    seller_reputation  level_id ('5_green', ...) or 'N/A'
+    is_official_store  bool
+    official_store_id  int or None
+    sold_quantity_str  e.g. '+100 vendidos' or None
+    is_full            bool (fulfillment / FULL shipping)
+    category_id        last breadcrumb category id or 'N/A'
+    category_name      last breadcrumb / category filter name or None
+    raw_attributes     {'brand': ..., 'weight': ...} when the result carries them
+
+Two result shapes are understood: the 'polycard' cards of the current search layout
+(metadata + typed components) and the older flat items (id/title/price/seller/permalink).
+extract_listings() returns None when there is no usable state so the caller can fall back
+to DOM selectors.
+"""
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # optional dependency (see requirements.txt)
+    orjson = None
+
+STATE_MARKER = "__PRELOADED_STATE__"
+PICTURE_URL = "https://http2.mlstatic.com/D_NQ_NP_{}-O.webp"
+
+# Returns the raw state text: the JSON <script id="__PRELOADED_STATE__"> or the inline assignment
+READ_STATE_JS = r"""
+    () => {
+        const tag = document.getElementById('__PRELOADED_STATE__');
+        if (tag && tag.textContent) return tag.textContent;
+        const script = Array.from(document.scripts).find(s => s.text.includes('__PRELOADED_STATE__'));
+        return script ? script.text : null;
+    }
+"""
+
+_PLACEHOLDER = re.compile(r"\{[a-z_]+\}")
+_SELLER_PREFIX = re.compile(r"^(por|vendido por|ofrecido por|tienda oficial)\s+", re.IGNORECASE)
+
+
+def _loads(text):
+    return orjson.loads(text) if orjson else json.loads(text)
+
+
+def parse_state(raw):
+    """Decodes the text returned by READ_STATE_JS into a dict (None if missing or invalid)."""
+    if not raw:
+        return None
+    text = raw.strip()
+    if not text.startswith("{"):
+        # Inline form: window.__PRELOADED_STATE__ = {...}; possibly followed by more statements
+        marker = text.find(STATE_MARKER)
+        start = text.find("{", marker) if marker >= 0 else -1
+        if start < 0:
+            return None
+        text = text[start:]
+    try:
+        state = _loads(text.rstrip().rstrip(";"))
+    except ValueError:
+        try:
+            state, _ = json.JSONDecoder().raw_decode(text)
+        except ValueError:
+            return None
+    return state if isinstance(state, dict) else None
+
+
+def _dig(data, *path):
+    for key in path:
+        if isinstance(data, dict):
+            data = data.get(key)
+        elif isinstance(data, list) and isinstance(key, int) and -len(data) <= key < len(data):
+            data = data[key]
+        else:
+            return None
+    return data
+
+
+def _initial_state(state):
+    return _dig(state, "pageState", "initialState") or state.get("initialState") or state
+
+
+def find_results(state):
+    results = _dig(_initial_state(state), "results")
+    if results is None:
+        results = state.get("results")
+    return results if isinstance(results, list) else []
+
+
+def category_of(state):
+    """(category_id, category_name) from the breadcrumb, or the category filter name."""
+    initial = _initial_state(state)
+    crumb = _dig(initial, "components", "breadcrumb", "categories", -1) or {}
+    name = crumb.get("name")
+    if not name:
+        filters = initial.get("filters") or state.get("filters") or []
+        category = next((f for f in filters if isinstance(f, dict) and f.get("id") == "category"), None)
+        name = _dig(category, "values", -1, "name")
+    return crumb.get("id") or "N/A", name
+
+
+def _clean_url(url):
+    if not url:
+        return "N/A"
+    if not url.startswith("http"):
+        url = "https://" + url.lstrip("/")
+    return re.split(r"[?#]", url, maxsplit=1)[0]
+
+
+def _price_str(value):
+    if value is None:
+        return "0"
+    value = float(value)
+    return str(int(value)) if value.is_integer() else str(value)
+
+
+def _clean_id(raw_id):
+    return str(raw_id).replace("-", "").upper() if raw_id else "N/A"
+
+
+def clean_seller_name(text):
+    """'Por {icon}FARMA SUR' -> 'FARMA SUR' ('N/A' when empty)."""
+    text = _PLACEHOLDER.sub("", text or "").strip()
+    return _SELLER_PREFIX.sub("", text).strip() or "N/A"
+
+
+def _from_polycard(card):
+    meta = card.get("metadata") or {}
+    components = {}
+    for comp in card.get("components") or []:
+        kind = comp.get("type")
+        if kind:
+            components[kind] = comp.get(kind) or {}
+
+    shipping = components.get("shipping") or {}
+    shipping_ids = {v.get("key") or v.get("id") for v in shipping.get("values") or [] if isinstance(v, dict)}
+    seller = components.get("seller") or {}
+    picture_id = _dig(card, "pictures", "pictures", 0, "id")
+    sold = _dig(components, "reviews", "alt_text") or _dig(components, "highlight", "text")
+
+    return {
+        "meli_id": _clean_id(meta.get("id")),
+        "title": _dig(components, "title", "text") or "N/A",
+        "price_str": _price_str(_dig(components, "price", "current_price", "value")),
+        "url": _clean_url(meta.get("url")),
+        "thumbnail": PICTURE_URL.format(picture_id) if picture_id else None,
+        "seller_id": "N/A",
+        "seller_name": clean_seller_name(seller.get("text")),
+        "seller_reputation": "N/A",
+        "is_official_store": bool(meta.get("official_store_id")) or "official_store" in (seller.get("text") or ""),
+        "official_store_id": meta.get("official_store_id"),
+        "sold_quantity_str": sold if sold and "vendido" in sold.lower() else None,
+        "is_full": "full" in " ".join(str(i).lower() for i in shipping_ids if i) or "full" in (shipping.get("text") or "").lower(),
+        "raw_attributes": {},
+    }
+
+
+def _from_item(item):
+    seller = item.get("seller") or {}
+    price = item.get("price")
+    if isinstance(price, dict):
+        price = price.get("amount") or price.get("value")
+    attributes = {}
+    for attr in item.get("attributes") or []:
+        if attr.get("id") == "BRAND":
+            attributes["brand"] = attr.get("value_name")
+        elif attr.get("id") in ("NET_WEIGHT", "NET_VOLUME", "WEIGHT"):
+            attributes["weight"] = attr.get("value_name")
+    sold = item.get("sold_quantity")
+
+    return {
+        "meli_id": _clean_id(item.get("id")),
+        "title": item.get("title") or "N/A",
+        "price_str": _price_str(price),
+        "url": _clean_url(item.get("permalink")),
+        "thumbnail": item.get("thumbnail"),
+        "seller_id": str(seller["id"]) if seller.get("id") else "N/A",
+        "seller_name": seller.get("nickname") or "N/A",
+        "seller_reputation": _dig(seller, "seller_reputation", "level_id") or "N/A",
+        "is_official_store": bool(item.get("official_store_id") or seller.get("official_store_id")),
+        "official_store_id": item.get("official_store_id") or seller.get("official_store_id"),
+        "sold_quantity_str": f"+{sold} vendidos" if sold else None,
+        "is_full": _dig(item, "shipping", "logistic_type") == "fulfillment",
+        "raw_attributes": attributes,
+    }
+
+
+def to_record(result, category=("N/A", None)):
+    """Maps one state result (polycard or flat item) to a listing record."""
+    record = _from_polycard(result["polycard"]) if isinstance(result.get("polycard"), dict) else _from_item(result)
+    record["category_id"], record["category_name"] = category
+    return record
+
+
+def extract_listings(raw):
+    """
+    Listing records from the raw state text, or None when the state is missing or has no
+    results in a known shape (caller falls back to the DOM extractor).
+    """
+    state = parse_state(raw)
+    if state is None:
+        return None
+    results = [r for r in find_results(state) if isinstance(r, dict)]
+    if not results:
+        return None
+    category = category_of(state)
+    records = [to_record(r, category) for r in results]
+    records = [r for r in records if r["meli_id"] != "N/A"]
+    return records or None
@@ -0,0 +1,124 @@
+import asyncio
+import random
+import re
+import unicodedata
+from urllib.parse import quote
+
+SEARCH_BASE_URL = "https://listado.mercadolibre.com.ar"
+RESULTS_PER_PAGE = 50
+
+# Path fragments understood by listado.mercadolibre.com.ar
+SORTS = {
+    "relevance": "",
+    "price_asc": "_OrderId_PRICE",
+    "price_desc": "_OrderId_PRICE*DESC",
+}
+CONDITIONS = {
+    "new": "_ITEM*CONDITION_2230284",
+    "used": "_ITEM*CONDITION_2230581",
+}
+
+
+def slugify(query):
+    """'Nutrilon Profutura 3' -> 'nutrilon-profutura-3' (accents removed, as the site does)."""
+    text = unicodedata.normalize("NFKD", query).encode("ascii", "ignore").decode("ascii")
+    text = re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+    return quote(text)
+
+
+def search_page_url(query, page=1, sort="relevance", category_path=None, condition=None,
+                    price_range=None, no_index=True):
+    """
+    Builds the URL of one results page so pages can be fetched directly and in parallel:
+        page 1 -> listado.mercadolibre.com.ar/nutrilon
+        page 3 -> listado.mercadolibre.com.ar/nutrilon_Desde_101_NoIndex_True
+    category_path: category slug(s) as they appear on the site, e.g. 'bebes/alimentacion-bebe'
+    price_range:   (min, max) in ARS, either end may be None
+    """
+    if page < 1:
+        raise ValueError("page starts at 1")
+    if sort not in SORTS:
+        raise ValueError(f"sort must be one of {', '.join(SORTS)}")
+    if condition and condition not in CONDITIONS:
+        raise ValueError(f"condition must be one of {', '.join(CONDITIONS)}")
+
+    path = slugify(query)
+    if page > 1:
+        path += f"_Desde_{(page - 1) * RESULTS_PER_PAGE + 1}"
+    path += SORTS[sort]
+    if condition:
+        path += CONDITIONS[condition]
+    if price_range:
+        low, high = price_range
+        path += f"_PriceRange_{int(low) if low else 0}-{int(high) if high else 0}"
+    if no_index and page > 1:
+        path += "_NoIndex_True"
+
+    prefix = f"{SEARCH_BASE_URL}/{category_path.strip('/')}" if category_path else SEARCH_BASE_URL
+    return f"{prefix}/{path}"
+
+
+def search_page_urls(query, pages, **filters):
+    """URLs for pages 1..pages of a query."""
+    return [search_page_url(query, page, **filters) for page in range(1, pages + 1)]
+
+
+async def goto_with_retries(page, url, attempts=3, timeout=30000, wait_until="domcontentloaded", budget=None, limiter=None):
+    """
+    Navigates to 'url', retrying timeouts, 429 and 5xx with jittered exponential backoff.
+    Returns the final response (None if every attempt failed). 'budget' is an optional
+    scrapers.politeness.HostBudget held for each attempt; 'limiter' an optional
+    scrapers.rate_limiter.TargetLimiter that paces each attempt and gets its response.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            if limiter:
+                await limiter.acquire()
+            if budget:
+                async with budget.slot(url):
+                    response = await page.goto(url, wait_until=wait_until, timeout=timeout)
+            else:
+                response = await page.goto(url, wait_until=wait_until, timeout=timeout)
+            if limiter and response is not None:
+                limiter.feedback(response.status, response.url)
+            if response is None or (response.status != 429 and response.status < 500):
+                return response
+            reason = f"HTTP {response.status}"
+        except Exception as e:
+            reason = str(e).splitlines()[0]
+        await _backoff(url, attempt, attempts, reason)
+    return None
+
+
+async def get_with_retries(client, url, attempts=3, budget=None, limiter=None):
+    """
+    Browserless counterpart of goto_with_retries: GET 'url' with an httpx.AsyncClient, same
+    retry policy. 403 is returned as-is (bot wall, the caller decides what to do with it).
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            if limiter:
+                await limiter.acquire()
+            if budget:
+                async with budget.slot(url):
+                    response = await client.get(url)
+            else:
+                response = await client.get(url)
+            if limiter:
+                limiter.feedback(response.status_code, response.url)
+            if response.status_code != 429 and response.status_code < 500:
+                return response
+            reason = f"HTTP {response.status_code}"
+        except Exception as e:
+            reason = str(e).splitlines()[0] if str(e) else type(e).__name__
+        await _backoff(url, attempt, attempts, reason)
+    return None
+
+
+async def _backoff(url, attempt, attempts, reason):
+    if attempt < attempts:
+        delay = 2 ** attempt + random.uniform(0, 1)
+        print(f"    Retry {attempt}/{attempts - 1} for {url} in {delay:.1f}s ({reason})")
+        await asyncio.sleep(delay)
+    else:
+        print(f"    Giving up on {url} ({reason})")
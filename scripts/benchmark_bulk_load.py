@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+import argparse
+import requests
+
+# Add project root to path so we can import 'logic'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from logic.supabase_lite import SupabaseLite
+
+# Synthetic listings are tagged so they can be removed after each run
+BENCH_PREFIX = "BENCH"
+
+def synthetic_listings(count, run):
+    for i in range(count):
+        yield {
+            "meli_id": f"{BENCH_PREFIX}{run}-{i:07d}",
+            "title": f"Nutrilon Profutura 3 800 Gr Pack x{i % 6 + 1}",
+            "price": 25000.0 + (i % 500),
+            "url": f"https://articulo.mercadolibre.com.ar/{BENCH_PREFIX}-{i}",
+            "thumbnail": None,
+            "search_keyword": "nutrilon",
+            "seller_name": f"SELLER_{i % 1000}",
+            "sold_quantity_str": "+100 vendidos",
+            "is_full": i % 3 == 0,
+            "is_official_store": i % 10 == 0,
+            "category_id": "MLA1648",
+        }
+
+def legacy_json(db, rows, batch_size=100):
+    """Baseline: sequential JSON batches of 100 (previous ingest behaviour)."""
+    endpoint = f"{db.url}/rest/v1/meli_listings?on_conflict=meli_id"
+    headers = {**db.headers, "Prefer": "resolution=merge-duplicates,return=minimal"}
+    for i in range(0, len(rows), batch_size):
+        requests.post(endpoint, json=rows[i:i + batch_size], headers=headers).raise_for_status()
+    return True
+
+def cleanup(db):
+    requests.delete(f"{db.url}/rest/v1/meli_listings?meli_id=like.{BENCH_PREFIX}*", headers=db.headers).raise_for_status()
+
+def benchmark(sizes, batch_size, in_flight):
+    db = SupabaseLite()
+    print(f"Bulk load benchmark against {db.url} (batch={batch_size}, in-flight={in_flight})")
+
+    results = []
+    for size in sizes:
+        methods = [
+            ("json x100 sequential", lambda rows: legacy_json(db, rows)),
+            ("json bulk concurrent", lambda rows: db.bulk_load("meli_listings", [{**r, "attributes": {}} for r in rows],
+                                                               on_conflict="meli_id", batch_size=batch_size, max_in_flight=in_flight)),
+            ("csv bulk concurrent", lambda rows: db.bulk_load("meli_listings", rows, on_conflict="meli_id",
+                                                              batch_size=batch_size, max_in_flight=in_flight)),
+        ]
+        for run, (name, load) in enumerate(methods):
+            rows = list(synthetic_listings(size, run))
+            cleanup(db)
+            started = time.perf_counter()
+            ok = load(rows)
+            elapsed = time.perf_counter() - started
+            results.append((size, name, elapsed, size / elapsed if elapsed else 0, ok))
+        cleanup(db)
+
+    print("\n" + "=" * 70)
+    print(f"{'rows':>8}  {'method':<24}{'seconds':>10}{'rows/s':>12}{'ok':>6}")
+    print("-" * 70)
+    for size, name, elapsed, rate, ok in results:
+        print(f"{size:>8}  {name:<24}{elapsed:>10.2f}{rate:>12,.0f}{'yes' if ok else 'NO':>6}")
+    print("=" * 70)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CSV vs JSON bulk load throughput (use a LOCAL PostgREST, e.g. `supabase start`)")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000], help="Load sizes to compare")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--in-flight", type=int, default=4)
+    args = parser.parse_args()
+
+    benchmark(args.rows, args.batch_size, args.in_flight)
@@ -0,0 +1,101 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+import requests
+
+# Add project root to path so we can import 'logic'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from logic.supabase_lite import SupabaseLite
+from logic.sqlite_storage import SQLiteStorage
+from logic.projections import PROJECTIONS
+
+def fetch_pages(db, select, pages, page_size):
+    """Reads 'pages' keyset pages of meli_listings and returns (bytes, seconds, rows)."""
+    total_bytes, rows, last_id = 0, 0, None
+    started = time.perf_counter()
+    for _ in range(pages):
+        filters = {"id": f"gt.{last_id}"} if last_id else None
+        query = db._query_string(select if "id" in select.split(",") or select == "*" else f"{select},id", filters, "id.asc")
+        res = requests.get(f"{db.url}/rest/v1/meli_listings?{query}&limit={page_size}", headers=db.headers)
+        res.raise_for_status()
+        batch = res.json()
+        total_bytes += len(res.content)
+        rows += len(batch)
+        if len(batch) < page_size:
+            break
+        last_id = batch[-1]["id"]
+    return total_bytes, time.perf_counter() - started, rows
+
+def synthetic_listings(count):
+    """Enriched-looking rows: ~30 specs, a long description and variations, as product_enricher stores them."""
+    rng = random.Random(7)
+    rows = []
+    for i in range(count):
+        attributes = {f"Spec {n}": f"valor {rng.randint(1, 10 ** 6)}" for n in range(30)}
+        attributes.update({
+            "net_content": "800g", "units": 1,
+            "description_long": " ".join(rng.choice(("Leche", "infantil", "etapa", "nutrición", "fórmula", "800", "gr"))
+                                         for _ in range(rng.randint(300, 700))),
+            "variations_breakdown": [{"id": rng.randint(10 ** 9, 10 ** 10), "stock": rng.randint(0, 50), "price": 95000,
+                                      "attributes": {"Sabor": "Original", "Formato": "Lata"}} for _ in range(rng.randint(0, 6))],
+            "meta_seller_name": f"SELLER_{i % 300}", "meta_seller_id": 100000 + i % 300, "meta_sold_quantity": rng.randint(0, 500),
+            "_last_enrichment_attempt": "2024-07-10T10:00:00",
+        })
+        rows.append({
+            "meli_id": f"MLA{1400000000 + i}", "title": f"Nutrilon Profutura 2 Lata 800 Gr {i}", "price": 95000.0,
+            "url": f"https://articulo.mercadolibre.com.ar/MLA-{1400000000 + i}-nutrilon-profutura-2-lata-800-gr-_JM",
+            "thumbnail": f"https://http2.mlstatic.com/D_{i}-I.jpg", "seller_name": f"SELLER_{i % 300}",
+            "seller_id": str(100000 + i % 300), "available_quantity": rng.randint(0, 50), "search_keyword": "nutrilon",
+            "last_scraped_at": "2024-07-10T10:00:00+00:00", "attributes": attributes,
+        })
+    return rows
+
+def fetch_local(db, select, pages, page_size):
+    """Same measure on the embedded backend: bytes of the JSON body PostgREST would send back."""
+    started = time.perf_counter()
+    rows = db.get_meli_listings(select=select, order="id.asc", limit=pages * page_size)
+    body = json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return len(body), time.perf_counter() - started, len(rows)
+
+def benchmark(pages, page_size, repeat, local=False):
+    if local:
+        db = SQLiteStorage(":memory:")
+        db.bulk_load("meli_listings", synthetic_listings(pages * page_size), on_conflict="meli_id")
+        fetch = fetch_local
+    else:
+        db = SupabaseLite()
+        fetch = fetch_pages
+    profiles = [("select=*", "*")] + [(name, select) for name, select in PROJECTIONS.items()]
+
+    print(f"Benchmarking meli_listings projections ({pages} pages x {page_size} rows, median of {repeat} runs"
+          f"{', local synthetic rows' if local else ''})")
+    print("=" * 78)
+    print(f"{'profile':<22}{'rows':>8}{'bytes':>14}{'bytes/row':>12}{'latency':>12}{'vs *':>10}")
+    print("-" * 78)
+
+    baseline = None
+    for name, select in profiles:
+        runs = [fetch(db, select, pages, page_size) for _ in range(repeat)]
+        size, rows = runs[0][0], runs[0][2]
+        latency = statistics.median(r[1] for r in runs)
+        if baseline is None:
+            baseline = size or 1
+        per_row = size / rows if rows else 0
+        print(f"{name:<22}{rows:>8}{size:>14,}{per_row:>12,.0f}{latency * 1000:>10.0f}ms{size / baseline:>10.1%}")
+    print("=" * 78)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Response size / latency of each projection profile vs select=*")
+    parser.add_argument("--pages", type=int, default=5, help="Pages fetched per profile")
+    parser.add_argument("--page-size", type=int, default=1000, help="Rows per page")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per profile (median latency is reported)")
+    parser.add_argument("--local", action="store_true",
+                        help="Measure on an in-memory SQLite backend seeded with synthetic enriched listings (no Supabase)")
+    args = parser.parse_args()
+
+    benchmark(args.pages, args.page_size, args.repeat, local=args.local)
@@ -0,0 +1,72 @@
+import os
+import sys
+import asyncio
+import argparse
+
+# Add project root to path so we can import 'scrapers'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scrapers.browser_pool import BrowserPool
+from scrapers.resource_blocking import TrafficMeter
+from scrapers.search_urls import search_page_url
+from scrapers.page_readiness import wait_ready, search_signals, item_signals
+
+DEFAULT_URLS = [
+    search_page_url("nutrilon"),
+    search_page_url("nutrilon", 2),
+    "https://articulo.mercadolibre.com.ar/MLA-3386240693",
+]
+
+async def measure(pool, url, profile):
+    """Loads 'url' in a fresh context (cold cache) and returns the TrafficMeter summary."""
+    async with pool.lease(fresh=True, blocking=profile) as lease:
+        return await measure_page(await lease.page(), url, lease)
+
+async def measure_page(page, url, lease):
+    meter = TrafficMeter(page)
+    signals = search_signals(30000) if "listado." in url else item_signals(30000)
+    try:
+        meter.restart()
+        await page.goto(url, wait_until="commit", timeout=60000)
+        if await wait_ready(page, signals):
+            meter.mark_ready()
+        # Let late resources (lazy images, beacons) arrive so the byte count is comparable
+        await page.wait_for_timeout(3000)
+    except Exception as e:
+        print(f"  ⚠ {url}: {str(e).splitlines()[0]}")
+    await meter.settle()
+    summary = meter.summary()
+    summary["blocked"] = sum(lease.blocking["blocked"].values()) if lease.blocking else 0
+    return summary
+
+async def benchmark(urls, profile, repeats, headless):
+    async with BrowserPool(headless=headless, channel="chromium") as pool:
+        rows = []
+        for url in urls:
+            for _ in range(repeats):
+                before = await measure(pool, url, None)
+                after = await measure(pool, url, profile)
+                rows.append((url, before, after))
+
+    print("\n" + "=" * 100)
+    print(f"{'url':<52}{'KB before':>11}{'KB after':>10}{'req b/a':>11}{'ready ms b/a':>15}{'blocked':>9}")
+    print("-" * 100)
+    for url, before, after in rows:
+        print(f"{url[-50:]:<52}{before['bytes'] / 1024:>11,.0f}{after['bytes'] / 1024:>10,.0f}"
+              f"{before['requests']:>6}/{after['requests']:<4}{str(before['ready_ms']):>8}/{str(after['ready_ms']):<6}{after['blocked']:>9}")
+    print("-" * 100)
+    total_before = sum(b["bytes"] for _, b, _ in rows)
+    total_after = sum(a["bytes"] for _, _, a in rows)
+    if total_before:
+        print(f"Bytes per listing page: -{(1 - total_after / total_before) * 100:.0f}% with profile '{profile}'")
+    print("=" * 100)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bytes transferred and page-ready time with and without resource blocking")
+    parser.add_argument("urls", nargs="*", default=DEFAULT_URLS, help="Search or item URLs to load")
+    parser.add_argument("--profile", default="discovery", help="Blocking profile from scrapers/resource_blocking.py")
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--headed", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(benchmark(args.urls, args.profile, args.repeats, not args.headed))
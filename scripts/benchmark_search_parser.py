@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+# Add project root to path so we can import 'scrapers'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scrapers.search_html import parse_search_html, parse_cards, HTMLParser, lxml_html
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests", "fixtures")
+
+def load(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+def measure(parse, html, rounds):
+    """Average ms per page and peak traced memory (KB) of one parse."""
+    parse(html)  # warm-up (imports, regex compilation)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        parse(html)
+    elapsed_ms = (time.perf_counter() - started) * 1000 / rounds
+
+    tracemalloc.start()
+    parse(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed_ms, peak / 1024
+
+def benchmark(rounds):
+    state_page = load("search_state.html")
+    dom_page = load("search_dom.html")
+    backend = "selectolax" if HTMLParser else ("lxml" if lxml_html else None)
+    cases = [("state (regex slice + JSON)", parse_search_html, state_page)]
+    if backend:
+        cases.append((f"cards ({backend})", parse_cards, dom_page))
+    else:
+        print("Neither selectolax nor lxml is installed: only the state path is measured.")
+
+    print(f"Offline search page parsing, {rounds} rounds per case (fixtures in tests/fixtures)")
+    print("\n" + "=" * 64)
+    print(f"{'path':<30}{'page KB':>9}{'ms/page':>10}{'peak KB':>10}")
+    print("-" * 64)
+    for name, parse, html in cases:
+        elapsed_ms, peak_kb = measure(parse, html, rounds)
+        print(f"{name:<30}{len(html.encode()) / 1024:>9.0f}{elapsed_ms:>10.2f}{peak_kb:>10.0f}")
+    print("=" * 64)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CPU time and memory of the browserless search page parser")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    benchmark(args.rounds)
@@ -1,12 +1,17 @@
+import os
+import sys
 import asyncio
-from playwright.async_api import async_playwright
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scrapers.browser_pool import BrowserPool
+from scrapers.page_readiness import goto_ready, search_signals
 
 async def debug():
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
+    async with BrowserPool(headless=True, channel="chromium") as pool, pool.lease() as lease:
+        page = await lease.page()
         print("Navigating...")
-        await page.goto("https://listado.mercadolibre.com.ar/infatrini", wait_until="networkidle")
+        await goto_ready(page, "https://listado.mercadolibre.com.ar/infatrini", search_signals())
         
         # Get the HTML of the first 3 items
         items = await page.evaluate(r'''
@@ -20,8 +25,6 @@ async def debug():
             with open(f"./scripts/item_{i}.html", "w", encoding="utf-8") as f:
                 f.write(html)
             print(f"Saved ./scripts/item_{i}.html")
-            
-        await browser.close()
 
 if __name__ == "__main__":
     asyncio.run(debug())
@@ -1,43 +1,46 @@
 import asyncio
-from playwright.async_api import async_playwright
 import json
 import os
+import sys
+from pathlib import Path
+
+project_root = str(Path(__file__).resolve().parent.parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from scrapers.browser_pool import BrowserPool, profile_dir
+from scrapers.page_readiness import goto_ready, wait_ready, selector, item_signals
 
 async def deep_inspect():
-    user_data_dir = os.path.abspath("user_data/manual_session_hotspot")
+    user_data_dir = profile_dir("session")
     test_url = "https://articulo.mercadolibre.com.ar/MLA-3386240693"
     
     print(f"🚀 Launching browser with session: {user_data_dir}")
     
-    async with async_playwright() as p:
-        # Launch persistent context to use the user's login
-        context = await p.chromium.launch_persistent_context(
-            user_data_dir=user_data_dir,
-            headless=False,
-            viewport={'width': 1920, 'height': 1080},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-            ignore_default_args=["--enable-automation"],
-            args=["--disable-blink-features=AutomationControlled"]
-        )
-        
-        page = await context.new_page()
+    # Persistent 'session' profile to use the user's login. The inspect blocking profile keeps
+    # images/fonts for the screenshot and drops trackers and media.
+    async with BrowserPool(headless=False, channel="chromium") as pool, \
+            pool.lease(profile="session", viewport={'width': 1920, 'height': 1080}, blocking="inspect") as lease:
+        page = await lease.page()
         print(f"🔍 Navigating to: {test_url}")
         
         try:
-            await page.goto(test_url, wait_until="load", timeout=90000)
+            await goto_ready(page, test_url, item_signals(), attempts=1, timeout=90000)
             
             # Pause for manual login if needed
             if any(p in page.url for p in ["account-verification", "negative_traffic", "login", "auth"]):
                 print("\n" + "!"*80 + "\n🛑 BLOQUEO/LOGIN: Por favor, LOGUEATE en la ventana de Chrome y luego presiona ENTER aquí...")
                 await asyncio.get_event_loop().run_in_executor(None, input, "Presiona ENTER para reanudar...")
-                await page.goto(test_url, wait_until="load", timeout=90000)
+                await goto_ready(page, test_url, item_signals(), attempts=1, timeout=90000)
             
-            await asyncio.sleep(5) # Extra wait for JS
+            # Seller block is rendered client-side; wait for it instead of a fixed pause
+            await wait_ready(page, [selector(".ui-pdp-seller__link-container, .ui-pdp-seller__header__title", "seller", timeout=10000)])
             
             final_url = page.url
             print(f"📍 Final URL: {final_url}")
             
-            # Take a screenshot for visual proof
+            # Take a screenshot for visual proof (the only step that needs images fully loaded)
+            await page.wait_for_load_state("load")
             screenshot_path = "deep_inspect_screenshot.png"
             await page.screenshot(path=screenshot_path, full_page=True)
             print(f"📸 Screenshot saved to: {screenshot_path}")
@@ -77,7 +80,6 @@ async def deep_inspect():
         finally:
             # Keep browser open for a bit for the user to see
             await asyncio.sleep(5)
-            await context.close()
 
 if __name__ == "__main__":
     asyncio.run(deep_inspect())
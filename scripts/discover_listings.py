@@ -1,12 +1,12 @@
 import os
 import sys
 import asyncio
-import random
 import re
 import json
+import time
+import httpx
 from datetime import datetime
 from pathlib import Path
-from playwright.async_api import async_playwright
 from dotenv import load_dotenv
 
 # Add project root to sys.path to find 'logic' package
@@ -14,24 +14,136 @@ project_root = str(Path(__file__).resolve().parent.parent)
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-from logic.supabase_lite import SupabaseLite
+from logic.storage import get_storage
 from logic.constants import NUTRICIA_BRANDS
+from logic.listing_sink import ListingSink
+from logic.query_planner import QueryPlanner
+from logic.known_ids import KnownIds
+from logic.checkpoints import Checkpoint
+from logic.identification_engine import IdentificationEngine
+from scrapers.politeness import HostBudget
+from scrapers.rate_limiter import RateLimiter
+from scrapers.browser_pool import BrowserPool, USER_AGENT
+from scrapers.search_urls import search_page_url, get_with_retries
+from scrapers.search_html import parse_search_html, is_bot_wall
+from scrapers.search_state import READ_STATE_JS, extract_listings
+from scrapers.page_readiness import goto_ready, search_signals, home_signals, ReadinessStats
 
 # Load environment variables
 load_dotenv()
 
+# DOM fallback when the page has no usable __PRELOADED_STATE__ (see scrapers/search_state.py)
+EXTRACT_RESULTS_JS = r"""
+    () => {
+        // 1. Try to find Category ID from the page state
+        let categoryId = 'N/A';
+        try {
+            if (window.__PRELOADED_STATE__) {
+                categoryId = window.__PRELOADED_STATE__.initialState?.components?.breadcrumb?.categories?.[window.__PRELOADED_STATE__.initialState.components.breadcrumb.categories.length - 1]?.id || 'N/A';
+            }
+        } catch (e) {}
+
+        const els = document.querySelectorAll('.ui-search-layout__item, .ui-search-result, .poly-card');
+        return Array.from(els).map(el => {
+            const titleEl = el.querySelector('.ui-search-item__title, .poly-component__title, h2');
+            const priceEl = el.querySelector('.andes-money-amount__fraction');
+            const linkEl = el.querySelector('a.ui-search-link, a.poly-component__title, a');
+            const imgEl = el.querySelector('img.ui-search-result-image__element, .poly-component__picture img, img');
+            
+            // New fields
+            const sellerEl = el.querySelector('.poly-component__seller, .ui-search-official-store-label');
+            const salesEl = el.querySelector('.poly-component__sales, .poly-sales, .ui-search-item__group__element--shipping'); // Sometimes sales are near shipping
+            const fullEl = el.querySelector('.ui-search-item__fulfillment, .poly-component__shipping');
+            
+            return {
+                title: titleEl ? titleEl.innerText : 'N/A',
+                price_str: priceEl ? priceEl.innerText.replace(/\D/g, '') : '0',
+                url: linkEl ? linkEl.href : 'N/A',
+                thumbnail: imgEl ? imgEl.src : null,
+                meli_id: linkEl ? (linkEl.href.match(/MLA-?(\d+)/) || [null, 'N/A'])[1] : 'N/A',
+                
+                // Super Scraper fields
+                category_id: categoryId,
+                seller_name: sellerEl ? sellerEl.innerText : 'N/A',
+                sold_quantity_str: salesEl ? salesEl.innerText : null,
+                is_full: !!(fullEl && fullEl.innerText.includes('FULL')),
+                is_official_store: !!el.querySelector('.ui-search-official-store-label, .poly-component__seller') // Simple heuristic
+            };
+        });
+    }
+"""
+
+HOME_URL = "https://www.mercadolibre.com.ar"
+
+def page_key(job):
+    return f"page|{job['page']}|{job['query']}"
+
+def stop_key(query):
+    return f"stop|{query}"
+
 class MeliBrowserDiscovery:
     """
     Discovery of MercadoLibre listings using Playwright (Browser-Based)
     to bypass API limits and mimic user behavior.
+
+    Result pages are fetched directly by URL (scrapers/search_urls.py), with retries, and read
+    as soon as the result cards (or the no-results block) are in the DOM (scrapers/page_readiness.py).
+    With workers > 1, N isolated browser contexts pull (query, page) jobs from a shared queue.
+    Page requests are paced by the shared adaptive rate limiter (scrapers/rate_limiter.py,
+    target 'web_search'), a HostBudget caps the concurrent navigations per host, and results go
+    to a write-behind ListingSink. A query stops early at the first page that
+    brings no meli_id unseen in this run (end of results or overlap with another query).
+
+    With plan=True the queries go through logic/query_planner.py first: overlapping queries are
+    pruned, the rest ordered by historical yield and given their own page budget (pages_per_query
+    is then the budget for queries without history, max_pages the ceiling). Per-query counters
+    are recorded at the end of the run for the next plan.
+
+    incremental=True is meant for frequent runs: listings already stored (logic/known_ids.py)
+    are not rewritten, and a query stops paging at the first page where at least
+    known_threshold of the results are known. The site has no newest-first sort, but relevance
+    order is stable between runs, so known listings fill the first pages and the few new ones
+    show up among them.
+
+    With reject_noise=True every result goes through IdentificationEngine.classify_noise (hard
+    exclusions, no master product candidate) and obvious noise is dropped before the write; the
+    audit would only have marked it as noise. Rejected counts are kept per query, and incremental
+    runs remember rejected ids in the known-ids filter so they are not classified again.
+
+    Every run is checkpointed (logic/checkpoints.py): a (query, page) is marked done once its
+    listings are written, and early stops are kept too, so resume=<run_id> (or 'last') skips
+    the finished pages of a crashed, blocked or stopped run.
+
+    mode='http' skips the browser: pages are fetched with one pooled httpx client and parsed
+    in Python (scrapers/search_html.py); only pages that hit a bot wall go to Playwright.
     """
     
-    def __init__(self, pages_per_query=2):
-        self.db = SupabaseLite()
+    def __init__(self, pages_per_query=2, workers=1, host_min_interval=0.5, sort="relevance", category_path=None, extract="state",
+                 mode="browser", plan=True, max_pages=None, incremental=False, known_threshold=0.9,
+                 reject_noise=True, resume=None):
+        self.db = get_storage()
         self.pages_per_query = pages_per_query
-        import time
-        self.user_data_dir = os.path.join(os.getcwd(), "user_data", f"discovery_session_{int(time.time())}")
-        os.makedirs(self.user_data_dir, exist_ok=True)
+        self.workers = max(1, workers)
+        self.budget = HostBudget(max_concurrent=self.workers, min_interval=host_min_interval)
+        self.sink = None
+        self.readiness = ReadinessStats()
+        self.extract = extract
+        self.mode = mode
+        self.blocked = {"type": 0, "tracker": 0}
+        self.url_filters = {"sort": sort, "category_path": category_path}
+        self.exhausted = {}  # query -> last page worth fetching
+        self.planner = QueryPlanner(self.db, base_pages=pages_per_query, max_pages=max_pages) if plan else None
+        self.runs = {}  # query -> page budget and counters of this run (see QueryPlanner.record_run)
+        self.incremental = incremental
+        self.known_threshold = known_threshold
+        self.known = None
+        self.reject_noise = reject_noise
+        self.noise = None
+        self.rejected = set()  # meli_ids dropped as noise in this run
+        self.resume = resume
+        self.checkpoint = None
+        self.limiter = None
+        self.search_rate = None
         
         # Extended keywords from nomenclature exceptions
         self.extra_keywords = [
@@ -50,163 +162,354 @@ class MeliBrowserDiscovery:
             # Fallback if DB fetch fails
             return sorted(set(NUTRICIA_BRANDS + self.extra_keywords))
 
-    async def run_discovery(self):
-        queries = await self.get_search_queries()
-        print(f"Starting Browser Discovery for {len(queries)} queries...")
-        
-        async with async_playwright() as p:
-            context = await p.chromium.launch_persistent_context(
-                self.user_data_dir,
-                channel="chrome",
-                headless=True, # Improved stability for background automation
-                viewport={"width": 1280, "height": 800},
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-                args=["--disable-blink-features=AutomationControlled", "--no-sandbox"]
-            )
+    def to_listings(self, items_data, query):
+        """Maps extracted cards to 'meli_listings' rows (deduplicated by meli_id)."""
+        listings = {}
+        for res in items_data:
+            raw_id = str(res["meli_id"]).strip()
+            if raw_id == "N/A" or not raw_id: continue
+            
+            clean_id = f"MLA{raw_id}" if not raw_id.upper().startswith('MLA') else raw_id.upper()
+            if clean_id in listings: continue
             
-            page = context.pages[0] if context.pages else await context.new_page()
-            await page.set_extra_http_headers({"Accept-Language": "es-419,es;q=0.9"})
+            listings[clean_id] = {
+                "meli_id": clean_id,
+                "title": res["title"].strip(),
+                "price": float(res["price_str"]) if res["price_str"] else 0.0,
+                "url": res["url"].split('?')[0],
+                "thumbnail": res["thumbnail"],
+                "search_keyword": query,
+                "last_scraped_at": datetime.now().isoformat(),
+                
+                # Super Scraper fields
+                "category_id": res["category_id"],
+                "category_name": res.get("category_name") or res["category_id"], # State records carry the name
+                "seller_name": res["seller_name"].strip() if res["seller_name"] else "N/A",
+                "sold_quantity_str": res["sold_quantity_str"],
+                "is_full": res["is_full"],
+                "is_official_store": res["is_official_store"]
+            }
+            # Only state records carry the seller id/reputation; a DOM card must not blank stored ones
+            for field in ("seller_id", "seller_reputation"):
+                if res.get(field) not in (None, "", "N/A"):
+                    listings[clean_id][field] = str(res[field])
+        return list(listings.values())
+
+    async def worker(self, worker_id, lease, queue, stats):
+        # Initial home navigation (establishes the session of this context)
+        try:
+            await goto_ready(await lease.page(), HOME_URL, home_signals(), self.readiness, budget=self.budget,
+                             attempts=1, timeout=60000, limiter=self.search_rate)
+        except Exception:
+            pass
+
+        while True:
+            job = await queue.get()
+            if job is None:
+                queue.task_done()
+                break
             
-            # Initial home navigation
+            query, page_num = job["query"], job["page"]
+            if page_num > self.exhausted.get(query, self.pages_per_query):
+                stats["skipped"] += 1
+                queue.task_done()
+                continue
             try:
-                await page.goto("https://www.mercadolibre.com.ar", wait_until="networkidle", timeout=60000)
-                await asyncio.sleep(2)
-            except Exception:
-                pass
-
-            total_upserted = 0
-            for i, query in enumerate(queries):
-                print(f"[{i+1}/{len(queries)}] Searching: '{query}'...")
+                self.announce(worker_id, job, stats)
                 
-                try:
-                    # Perform search via search bar
-                    search_input = await page.wait_for_selector("input.nav-search-input")
-                    await search_input.fill("")
-                    await search_input.fill(query)
-                    await asyncio.sleep(1)
-                    await page.keyboard.press("Enter")
-                    
-                    # Pagination Loop
-                    for page_num in range(self.pages_per_query):
-                        await page.wait_for_load_state("networkidle", timeout=30000)
-                        await asyncio.sleep(2)
-                        
-                        try:
-                            await page.wait_for_selector(".ui-search-layout__item, .ui-search-item__title", timeout=15000)
-                        except:
-                            print(f"    No results for page {page_num + 1}")
-                            break
-                        
-                        # Extract data
-                        items_data = await page.evaluate(r"""
-                            () => {
-                                // 1. Try to find Category ID from the page state
-                                let categoryId = 'N/A';
-                                try {
-                                    if (window.__PRELOADED_STATE__) {
-                                        categoryId = window.__PRELOADED_STATE__.initialState?.components?.breadcrumb?.categories?.[window.__PRELOADED_STATE__.initialState.components.breadcrumb.categories.length - 1]?.id || 'N/A';
-                                    }
-                                } catch (e) {}
-
-                                const els = document.querySelectorAll('.ui-search-layout__item, .ui-search-result, .poly-card');
-                                return Array.from(els).map(el => {
-                                    const titleEl = el.querySelector('.ui-search-item__title, .poly-component__title, h2');
-                                    const priceEl = el.querySelector('.andes-money-amount__fraction');
-                                    const linkEl = el.querySelector('a.ui-search-link, a.poly-component__title, a');
-                                    const imgEl = el.querySelector('img.ui-search-result-image__element, .poly-component__picture img, img');
-                                    
-                                    // New fields
-                                    const sellerEl = el.querySelector('.poly-component__seller, .ui-search-official-store-label');
-                                    const salesEl = el.querySelector('.poly-component__sales, .poly-sales, .ui-search-item__group__element--shipping'); // Sometimes sales are near shipping
-                                    const fullEl = el.querySelector('.ui-search-item__fulfillment, .poly-component__shipping');
-                                    
-                                    return {
-                                        title: titleEl ? titleEl.innerText : 'N/A',
-                                        price_str: priceEl ? priceEl.innerText.replace(/\D/g, '') : '0',
-                                        url: linkEl ? linkEl.href : 'N/A',
-                                        thumbnail: imgEl ? imgEl.src : null,
-                                        meli_id: linkEl ? (linkEl.href.match(/MLA-?(\d+)/) || [null, 'N/A'])[1] : 'N/A',
-                                        
-                                        // Super Scraper fields
-                                        category_id: categoryId,
-                                        seller_name: sellerEl ? sellerEl.innerText : 'N/A',
-                                        sold_quantity_str: salesEl ? salesEl.innerText : null,
-                                        is_full: !!(fullEl && fullEl.innerText.includes('FULL')),
-                                        is_official_store: !!el.querySelector('.ui-search-official-store-label, .poly-component__seller') // Simple heuristic
-                                    };
-                                });
-                            }
-                        """)
-                        
-                        listings = []
-                        for res in items_data:
-                            raw_id = str(res["meli_id"]).strip()
-                            if raw_id == "N/A" or not raw_id: continue
-                            
-                            clean_id = f"MLA{raw_id}" if not raw_id.upper().startswith('MLA') else raw_id.upper()
-                            
-                            listings.append({
-                                "meli_id": clean_id,
-                                "title": res["title"].strip(),
-                                "price": float(res["price_str"]) if res["price_str"] else 0.0,
-                                "url": res["url"].split('?')[0],
-                                "thumbnail": res["thumbnail"],
-                                "search_keyword": query,
-                                "last_scraped_at": datetime.now().isoformat(),
-                                
-                                # Super Scraper fields
-                                "category_id": res["category_id"],
-                                "category_name": res["category_id"], # Placeholder for now
-                                "seller_name": res["seller_name"].strip() if res["seller_name"] else "N/A",
-                                "sold_quantity_str": res["sold_quantity_str"],
-                                "is_full": res["is_full"],
-                                "is_official_store": res["is_official_store"]
-                            })
-                            
-                        if listings:
-                            # Final absolute deduplication before upsert
-                            seen_ids = set()
-                            final_listings = []
-                            for l in listings:
-                                if l['meli_id'] not in seen_ids:
-                                    final_listings.append(l)
-                                    seen_ids.add(l['meli_id'])
-                            
-                            success = self.db.upsert_meli_listings(final_listings)
-                            if success:
-                                total_upserted += len(final_listings)
-                                print(f"    - Page {page_num + 1} - Upserted {len(final_listings)} items")
-                            else:
-                                print(f"    - Page {page_num + 1} - FAILED upsert")
-                        
-                        # Next Page Click
-                        if page_num < self.pages_per_query - 1:
-                            next_btn = await page.query_selector('a.andes-pagination__link[title="Siguiente"], .andes-pagination__button--next a')
-                            if next_btn:
-                                await next_btn.click()
-                                await asyncio.sleep(random.uniform(2, 4))
-                            else:
-                                break
-                                
-                except Exception as e:
-                    print(f"    - Error searching '{query}': {e}")
+                # The pool may hand back a new page (context recycled after N navigations or a crash)
+                page = await lease.page()
+                response, ready = await goto_ready(page, job["url"], search_signals(), self.readiness, budget=self.budget,
+                                                   limiter=self.search_rate)
+                if response is None:
+                    stats["failed"] += 1
+                    continue
+                if ready is None:
+                    # Every signal timed out: slow page or a captcha/login wall, not an empty result set
+                    print(f"    [w{worker_id}] '{query}' page {page_num} never became ready, counted as failed")
+                    stats["failed"] += 1
+                    self.search_rate.throttle("search page never became ready")
+                    continue
+                if ready == "no_results":
+                    # Only a real end of the listing is checkpointed and stops the query
+                    print(f"    [w{worker_id}] No results for '{query}' page {page_num}")
+                    self.track(job)
+                    self.checkpoint.mark(page_key(job))
+                    self.stop_query(query, page_num - 1)
+                    continue
                 
-                # Cooldown between queries
-                await asyncio.sleep(random.uniform(3, 6))
+                await self.record_page(worker_id, job, await self.extract_page(page, stats), stats)
+            except Exception as e:
+                print(f"    [w{worker_id}] Error searching '{query}' page {page_num}: {e}")
+            finally:
+                queue.task_done()
+
+    async def http_worker(self, worker_id, client, queue, stats, walled):
+        """Browserless worker: GET + Python parsing; bot-walled pages are set aside for the browser."""
+        while True:
+            job = await queue.get()
+            if job is None:
+                queue.task_done()
+                break
             
-            await context.close()
-            print("\n" + "="*50)
-            print(f"Discovery Complete! Total results: {total_upserted}")
-            print("="*50)
+            query, page_num = job["query"], job["page"]
+            if page_num > self.exhausted.get(query, self.pages_per_query):
+                stats["skipped"] += 1
+                queue.task_done()
+                continue
+            try:
+                self.announce(worker_id, job, stats)
+                
+                response = await get_with_retries(client, job["url"], budget=self.budget, limiter=self.search_rate)
+                if response is None:
+                    stats["failed"] += 1
+                    continue
+                html = response.text
+                if is_bot_wall(response.status_code, str(response.url), html):
+                    if not self.limiter.is_throttled("web_search", response.status_code, response.url):
+                        # Captcha/login page served with 200: only the body tells
+                        self.search_rate.throttle("bot wall page")
+                    print(f"    [w{worker_id}] Bot wall on '{query}' page {page_num}, deferred to the browser")
+                    walled.append(job)
+                    continue
+                
+                records, source = parse_search_html(html)
+                if source == "unreadable":
+                    walled.append(job)
+                    continue
+                if source == "empty":
+                    print(f"    [w{worker_id}] No results for '{query}' page {page_num}")
+                    self.track(job)
+                    self.checkpoint.mark(page_key(job))
+                    self.stop_query(query, page_num - 1)
+                    continue
+                stats[f"{source}_pages"] += 1
+                await self.record_page(worker_id, job, records, stats)
+            except Exception as e:
+                print(f"    [w{worker_id}] Error fetching '{query}' page {page_num}: {e}")
+            finally:
+                queue.task_done()
+
+    def announce(self, worker_id, job, stats):
+        # Pacing is the rate limiter's job (goto_ready / get_with_retries acquire a slot)
+        if job["page"] == 1:
+            stats["queries"] += 1
+            print(f"[w{worker_id}] [{stats['queries']}/{stats['total_queries']}] Searching: '{job['query']}'...")
+
+    async def record_page(self, worker_id, job, records, stats):
+        query, page_num = job["query"], job["page"]
+        listings = self.to_listings(records, query)
+        unknown = listings
+        if self.known is not None:
+            # Incremental run: listings already stored are not rewritten (nor re-audited)
+            unknown = [l for l in listings if l["meli_id"] not in self.known]
+        known = len(listings) - len(unknown)
+        kept, rejected = unknown, 0
+        if self.noise is not None:
+            # Obvious noise never reaches the database (the audit would only mark it as noise)
+            kept = []
+            for listing in unknown:
+                if not self.noise.classify_noise(listing):
+                    kept.append(listing)
+                elif listing["meli_id"] not in self.rejected:
+                    self.rejected.add(listing["meli_id"])
+                    rejected += 1
+        # The page is checkpointed once its rows are stored (ListingSink on_flush)
+        new = await self.sink.add(kept, mark=page_key(job))
+        stats["pages"] += 1
+        stats["known"] += known
+        stats["rejected"] += len(unknown) - len(kept)
+        self.track(job, len(listings), new, rejected)
+        print(f"    [w{worker_id}] '{query}' page {page_num} - {len(listings)} items ({new} new"
+              f"{f', {len(unknown) - len(kept)} noise' if self.noise is not None else ''}"
+              f"{f', {known} known' if self.known is not None else ''})")
+        if new + rejected == 0:
+            # Nothing unseen: later pages of this query are not worth a request
+            self.stop_query(query, page_num)
+        elif self.known is not None and known >= self.known_threshold * len(listings):
+            print(f"    [w{worker_id}] '{query}' page {page_num} is {known}/{len(listings)} known, not paging further")
+            self.stop_query(query, page_num)
+
+    async def extract_page(self, page, stats):
+        """Result records from the page state (parsed in Python), or from the DOM when it is missing."""
+        if self.extract == "state":
+            records = extract_listings(await page.evaluate(READ_STATE_JS))
+            if records is not None:
+                stats["state_pages"] += 1
+                return records
+        stats["dom_pages"] += 1
+        return await page.evaluate(EXTRACT_RESULTS_JS)
+
+    def track(self, job, seen=0, new=0, rejected=0):
+        run = self.runs.get(job["query"])
+        if run is None:
+            return
+        run["pages"] += 1
+        run["seen"] += seen
+        run["new"] += new
+        run["rejected"] += rejected
+        if new:
+            run["productive"] = max(run["productive"], job["page"])
+
+    def stop_query(self, query, last_page):
+        self.exhausted[query] = min(self.exhausted.get(query, self.pages_per_query), last_page)
+        self.checkpoint.mark(stop_key(query), value=self.exhausted[query])
+
+    async def plan_queries(self):
+        """Ordered [{'query', 'pages', 'reason'}] for this run (fixed budget when planning is off)."""
+        queries = await self.get_search_queries()
+        if self.planner is None:
+            return [{"query": q, "pages": self.pages_per_query, "reason": "fixed"} for q in queries]
+        planned, pruned = self.planner.plan(queries)
+        naive = len(queries) * self.pages_per_query
+        print(f"Query plan: {len(planned)} of {len(queries)} queries, {sum(p['pages'] for p in planned)} page(s) "
+              f"(fixed budget: {naive})")
+        for p in pruned:
+            print(f"  - pruned '{p['query']}' (covered by '{p['by']}')")
+        return planned
+
+    async def run_discovery(self, plan_only=False):
+        planned = await self.plan_queries()
+        if plan_only:
+            for p in planned:
+                print(f"  {p['pages']} page(s)  {p['query']:<30} {p['reason']}")
+            return
+        print(f"Starting {'HTTP' if self.mode == 'http' else 'Browser'} Discovery for {len(planned)} queries with {self.workers} worker(s)...")
+        self.checkpoint = Checkpoint.open("discovery", resume=self.resume, params={"mode": self.mode, "pages": self.pages_per_query})
+        self.exhausted = {p["query"]: p["pages"] for p in planned}
+        for query in self.exhausted:
+            if self.checkpoint.is_done(stop_key(query)):
+                self.exhausted[query] = min(self.exhausted[query], self.checkpoint.done[stop_key(query)])
+        self.runs = {p["query"]: {"budget": p["pages"], "pages": 0, "seen": 0, "new": 0, "productive": 0, "rejected": 0}
+                     for p in planned}
+        if self.incremental:
+            self.known = await asyncio.to_thread(KnownIds(self.db).load)
+            self.known.save()
+        if self.reject_noise:
+            self.noise = IdentificationEngine(self.db)
+            if not self.noise.master_products:
+                # Without a catalog every listing would look like noise
+                print("Master catalog is empty: noise rejection disabled for this run")
+                self.noise = None
+        
+        # Page-major order: every page 1 first, so early stops are known before deeper pages run
+        jobs = [
+            {"query": p["query"], "page": page_num, "url": search_page_url(p["query"], page_num, **self.url_filters)}
+            for page_num in range(1, max((p["pages"] for p in planned), default=0) + 1)
+            for p in planned if page_num <= self.exhausted[p["query"]]
+        ]
+        if self.checkpoint.resumed:
+            pending = [job for job in jobs if not self.checkpoint.is_done(page_key(job))]
+            print(f"{len(jobs) - len(pending)} page(s) already done in run {self.checkpoint.run_id}")
+            jobs = pending
+        stats = {"queries": 0, "pages": 0, "skipped": 0, "failed": 0, "state_pages": 0, "dom_pages": 0, "walled": 0, "known": 0, "rejected": 0,
+                 "total_queries": len(planned)}
+        self.sink = ListingSink(self.db, on_flush=lambda marks: self.checkpoint.mark(*marks))
+        self.limiter = RateLimiter("discovery")
+        self.search_rate = self.limiter.target("web_search")
+        started = time.monotonic()
+        
+        try:
+            if self.mode == "http":
+                walled = await self.run_http(jobs, stats)
+                stats["walled"] = len(walled)
+                if walled:
+                    # Only the blocked pages pay for a browser
+                    print(f"{len(walled)} page(s) need a browser, retrying them with Playwright...")
+                    await self.run_browser(walled, stats)
+            else:
+                await self.run_browser(jobs, stats)
+        finally:
+            rates = self.limiter.summary()
+            self.limiter.close()
+        
+        ok = await self.sink.close()
+        # Failed pages keep the run resumable
+        self.checkpoint.finish("completed" if ok and not stats["failed"] else "partial")
+        # Incremental and resumed runs only cover part of the pages: their counts would skew the budgets
+        partial = self.incremental or self.checkpoint.resumed
+        recorded = self.planner.record_run(self.runs) if self.planner and not partial else 0
+        print("\n" + "="*50)
+        print(f"Discovery Complete! Pages: {stats['pages']} (skipped {stats['skipped']}, failed {stats['failed']}, browser fallback {stats['walled']}) | "
+              f"Unique listings: {len(self.sink.seen)} | Written: {self.sink.written}{'' if ok else f' | FAILED: {self.sink.failed}'}")
+        print(f"Wall time: {time.monotonic() - started:.0f}s | Host budget: {self.budget.stats()} | Blocked requests: {self.blocked}")
+        print(f"Page readiness: {self.readiness.summary()} | Extracted from state: {stats['state_pages']}, DOM: {stats['dom_pages']}")
+        print(f"Request rate: {rates}")
+        if recorded:
+            print(f"Query stats recorded for {recorded} queries")
+        if self.noise is not None:
+            print(f"Rejected as noise before writing: {stats['rejected']}")
+        if self.known is not None:
+            print(f"Incremental: {stats['known']} known listing(s) skipped")
+            self.known.add(self.rejected)
+            self.known.save()
+        print("="*50)
+
+    def job_queue(self, jobs):
+        queue = asyncio.Queue()
+        for job in jobs:
+            queue.put_nowait(job)
+        return queue
+
+    async def run_http(self, jobs, stats):
+        """Fetches every job over one pooled HTTP client; returns the jobs that need a browser."""
+        queue = self.job_queue(jobs)
+        walled = []
+        limits = httpx.Limits(max_connections=self.workers, max_keepalive_connections=self.workers)
+        headers = {"User-Agent": USER_AGENT, "Accept-Language": "es-419,es;q=0.9",
+                   "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"}
+        async with httpx.AsyncClient(headers=headers, limits=limits, timeout=30, follow_redirects=True) as client:
+            # Home request first: session cookies, as the browser contexts do
+            await get_with_retries(client, HOME_URL, attempts=1, budget=self.budget, limiter=self.search_rate)
+            tasks = [asyncio.create_task(self.http_worker(i + 1, client, queue, stats, walled)) for i in range(self.workers)]
+            await queue.join()
+            for _ in tasks:
+                queue.put_nowait(None)
+            await asyncio.gather(*tasks)
+        return walled
+
+    async def run_browser(self, jobs, stats):
+        queue = self.job_queue(jobs)
+        # Headless for background automation; images, media, fonts and trackers are aborted
+        async with BrowserPool(headless=True) as pool:
+            async def run_worker(worker_id):
+                # Isolated context per worker: separate cookies/cache
+                async with pool.lease(blocking="discovery") as lease:
+                    await self.worker(worker_id, lease, queue, stats)
+
+            tasks = [asyncio.create_task(run_worker(i + 1)) for i in range(self.workers)]
+            await queue.join()
+            for _ in tasks:
+                queue.put_nowait(None)
+            await asyncio.gather(*tasks)
+            print(f"Browser pool: {pool.stats()}")
+        self.blocked = pool.blocked
 
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="Meli Browser Discovery")
     parser.add_argument("--queries", type=str, help="Comma separated queries to search")
-    parser.add_argument("--pages", type=int, default=2, help="Pages per query")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per query (planned runs: budget for queries without history)")
+    parser.add_argument("--max-pages", type=int, help="Largest page budget the planner may give a query (default: --pages + 2)")
+    parser.add_argument("--no-plan", action="store_true", help="Run every query with the same --pages budget, no pruning")
+    parser.add_argument("--incremental", action="store_true", help="Skip stored listings and stop a query once a page is mostly known")
+    parser.add_argument("--known-threshold", type=float, default=0.9, help="Share of known listings on a page that stops the query (--incremental)")
+    parser.add_argument("--keep-noise", action="store_true", help="Write every result, also those the identification engine rejects as noise")
+    parser.add_argument("--resume", type=str, metavar="RUN_ID", help="Continue a previous run, skipping its finished pages ('last' = latest unfinished run)")
+    parser.add_argument("--plan-only", action="store_true", help="Print the query plan and exit without fetching")
+    parser.add_argument("--workers", type=int, default=1, help="Concurrent browser contexts sharing the job queue (and the 'web_search' rate, see scrapers/rate_limiter.py)")
+    parser.add_argument("--host-interval", type=float, default=0.5, help="Minimum seconds between navigations to one host (all contexts, on top of the adaptive rate)")
+    parser.add_argument("--sort", choices=["relevance", "price_asc", "price_desc"], default="relevance")
+    parser.add_argument("--category-path", type=str, help="Restrict results to a category slug path, e.g. 'bebes'")
+    parser.add_argument("--mode", choices=["browser", "http"], default="browser", help="'http' fetches pages without a browser; bot-walled pages fall back to Playwright")
+    parser.add_argument("--extract", choices=["state", "dom"], default="state", help="Read results from __PRELOADED_STATE__ (DOM fallback) or always from the DOM")
     args = parser.parse_args()
     
-    discovery = MeliBrowserDiscovery(pages_per_query=args.pages)
+    discovery = MeliBrowserDiscovery(pages_per_query=args.pages, workers=args.workers, host_min_interval=args.host_interval,
+                                     sort=args.sort, category_path=args.category_path, extract=args.extract,
+                                     mode=args.mode, plan=not args.no_plan, max_pages=args.max_pages,
+                                     incremental=args.incremental, known_threshold=args.known_threshold,
+                                     reject_noise=not args.keep_noise, resume=args.resume)
     
     if args.queries:
         targeted_queries = [q.strip() for q in args.queries.split(",")]
@@ -215,4 +518,4 @@ if __name__ == "__main__":
             return targeted_queries
         discovery.get_search_queries = get_targeted_queries
         
-    asyncio.run(discovery.run_discovery())
+    asyncio.run(discovery.run_discovery(plan_only=args.plan_only))
@@ -2,6 +2,7 @@
 import asyncio
 from logic.supabase_handler import SupabaseHandler
 from logic.identification_engine import IdentificationEngine
+from logic.projections import projection
 
 async def fix_levels():
     print("🔄 Fixing Match Levels...")
@@ -17,7 +18,7 @@ async def fix_levels():
     for i in range(0, len(listing_ids), 100):
         chunk_ids = listing_ids[i:i+100]
         # Fetch listing data
-        l_res = db.supabase.table("meli_listings").select("*").in_("id", chunk_ids).execute()
+        l_res = db.supabase.table("meli_listings").select(projection("audit_input")).in_("id", chunk_ids).execute()
         listings = l_res.data
         
         updates = []
@@ -2,6 +2,7 @@
 import asyncio
 from logic.supabase_handler import SupabaseHandler
 from logic.identification_engine import IdentificationEngine
+from logic.projections import projection
 
 async def global_reaudit():
     print("🔄 Starting Global Re-Audit (Brand Detection Base)...")
@@ -15,7 +16,7 @@ async def global_reaudit():
     
     # 2. Re-identify in chunks of 500
     for i in range(0, total, 500):
-        l_res = db.supabase.table("meli_listings").select("*").offset(i).limit(500).execute()
+        l_res = db.supabase.table("meli_listings").select(projection("audit_input")).offset(i).limit(500).execute()
         listings = l_res.data
         
         updates = []
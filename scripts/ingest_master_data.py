@@ -1,11 +1,10 @@
 import pandas as pd
 import os
 from dotenv import load_dotenv
-from logic.supabase_lite import SupabaseLite
-import requests
+from logic.storage import get_storage
 
-# SupabaseLite handles the URL/KEY from .env itself
-db = SupabaseLite()
+# The backend (BPP_STORAGE_BACKEND) handles its own configuration from .env
+db = get_storage()
 
 def clean_boolean(val):
     if pd.isna(val):
@@ -67,33 +66,18 @@ def ingest_data(file_path):
     
     # Probe the table to see which columns exist
     try:
-        endpoint = f"{db.url}/rest/v1/master_products?select=*&limit=1"
-        res_probe = requests.get(endpoint, headers=db.headers)
-        res_probe.raise_for_status()
-        sample_data = res_probe.json()
+        sample_data = db.get_master_products()[:1]
         existing_cols = set(sample_data[0].keys()) if sample_data else set()
         print(f"Detected columns in DB: {existing_cols}")
     except Exception as e:
         print(f"Probe failed: {e}")
         existing_cols = None
 
-    # Batch insert to avoid timeouts
-    batch_size = 100
-    for i in range(0, len(records), batch_size):
-        batch = records[i:i + batch_size]
-        
-        if existing_cols:
-            batch = [{k: v for k, v in r.items() if k in existing_cols} for r in batch]
+    if existing_cols:
+        records = [{k: v for k, v in r.items() if k in existing_cols} for r in records]
 
-        try:
-            endpoint = f"{db.url}/rest/v1/master_products?on_conflict=ean"
-            headers = db.headers.copy()
-            headers["Prefer"] = "resolution=merge-duplicates"
-            res_upsert = requests.post(endpoint, json=batch, headers=headers)
-            res_upsert.raise_for_status()
-            print(f"Upserted batch {i // batch_size + 1}")
-        except Exception as e:
-            print(f"Error inserting batch: {e}")
+    # Bulk upsert (on 'ean'): flat rows go as CSV in large concurrent batches
+    db.bulk_load("master_products", records, on_conflict="ean")
 
 if __name__ == "__main__":
     file_path = "BPP master data skus.xlsx"
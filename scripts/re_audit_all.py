@@ -8,6 +8,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from logic.supabase_handler import SupabaseHandler
 from logic.identification_engine import IdentificationEngine
+from logic.projections import projection
 
 async def re_audit():
     print(f"[{datetime.now().strftime('%H:%M:%S')}] Starting Full Database Re-Audit...")
@@ -15,7 +16,7 @@ async def re_audit():
     engine = IdentificationEngine()
     
     # Fetch all listings from DB
-    response = db.supabase.table("meli_listings").select("*").execute()
+    response = db.supabase.table("meli_listings").select(projection("audit_input")).execute()
     listings = response.data
     print(f"Processing {len(listings)} listings...")
     
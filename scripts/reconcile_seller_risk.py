@@ -0,0 +1,48 @@
+import os
+import sys
+import argparse
+import requests
+
+# Add project root to path so we can import 'logic'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from logic.supabase_lite import SupabaseLite
+
+def reconcile(top=10):
+    """
+    Nightly job: recomputes 'seller_risk' from meli_listings + compliance_audit and repairs any
+    counters the triggers let drift (e.g. listings deleted without deleting their audits first).
+    """
+    db = SupabaseLite()
+    print("🔄 Reconciling 'seller_risk' against the base tables...")
+    res = requests.post(f"{db.url}/rest/v1/rpc/reconcile_seller_risk", json={}, headers=db.headers)
+    if res.status_code >= 400:
+        print(f"❌ Reconciliation failed: {res.status_code} {res.text}")
+        return False
+
+    fixed = res.json()
+    if fixed:
+        print(f"⚠️  {fixed} seller rows were out of date and have been corrected.")
+    else:
+        print("✅ No drift: incremental counters match the base tables.")
+
+    if top:
+        ranking = requests.get(
+            f"{db.url}/rest/v1/seller_risk?select=seller_name,seller_id,total_listings,total_violations,avg_fraud_score,risk_level"
+            f"&order=total_violations.desc,avg_fraud_score.desc&limit={top}",
+            headers=db.headers
+        )
+        ranking.raise_for_status()
+        print(f"\nTop {top} sellers by violations:")
+        for row in ranking.json():
+            avg = float(row.get("avg_fraud_score") or 0)
+            print(f"  {row.get('seller_name') or row.get('seller_id') or 'N/A':<40} "
+                  f"{row['total_violations']:>5} / {row['total_listings']:<5} avg {avg:5.1f}  {row['risk_level']}")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Repair drift in the incrementally maintained seller_risk table")
+    parser.add_argument("--top", type=int, default=10, help="Print the N worst sellers afterwards (0 = skip)")
+    args = parser.parse_args()
+
+    sys.exit(0 if reconcile(args.top) else 1)
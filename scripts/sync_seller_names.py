@@ -5,40 +5,57 @@ import sys
 # Add project root to path so we can import 'logic'
 sys.path.append(os.getcwd())
 
-from logic.supabase_handler import SupabaseHandler
+from logic.storage import get_storage
+from logic.delta_sync import DeltaSync
+from logic.projections import projection
+from logic.seller_cache import SellerCache, DEFAULT_TTL_DAYS
+from scrapers.rate_limiter import RateLimiter
 
-async def sync_enriched_data():
+# What the enrichers wrote when they had a seller id but no nickname
+PLACEHOLDER_NAMES = ("N/A", "Unknown", "API_UNKNOWN")
+
+def is_placeholder(name):
+    return not name or name in PLACEHOLDER_NAMES or str(name).startswith("ID: ")
+
+async def sync_enriched_data(full=False, ttl_days=DEFAULT_TTL_DAYS):
     print("🔄 Starting Retroactive Enriched Data Sync...")
-    db = SupabaseHandler()
+    db = get_storage()
     
-    # 1. Fetch all listings from DB (handling pagination)
+    # 1. Fetch listings enriched since the last sync (or all of them with --full)
     print("Fetching listings from 'meli_listings'...")
-    listings = []
-    batch_size = 1000
-    offset = 0
-    
-    while True:
-        res = db.supabase.table("meli_listings").select("*").range(offset, offset + batch_size - 1).execute()
-        batch = res.data
-        listings.extend(batch)
-        if len(batch) < batch_size:
-            break
-        offset += batch_size
+    sync = None if full else DeltaSync(db, "sync_seller_names", columns=("last_enriched_at",))
+    # Only the seller columns and the attributes->meta_* keys are fetched, not the full JSONB
+    select = projection("seller_sync")
+    listings = sync.fetch(select=select) if sync else db.get_meli_listings(select=select)
     
     print(f"Total listings loaded: {len(listings)}")
     
-    # 2. Identify updates needed
+    # 2. Placeholder names ("ID: 123") are resolved through the seller cache, batched /users lookups
+    def seller_id_of(l):
+        return str(l.get("meta_seller_id") or l.get("seller_id") or "")
+    
+    unresolved = [seller_id_of(l) for l in listings
+                  if seller_id_of(l) and is_placeholder(l.get("meta_seller_name") or l.get("seller_name"))]
+    limiter = RateLimiter("sync_seller_names")
+    sellers = SellerCache(db=db, ttl_days=ttl_days, limiter=limiter)
+    profiles = sellers.get_many(unresolved) if unresolved else {}
+    sellers.close()
+    limiter.close()
+    if unresolved:
+        print(f"Seller profiles for {len(set(unresolved))} placeholder seller(s): {len(profiles)} resolved ({sellers.stats})")
+    
+    # 3. Identify updates needed
     updates = []
     for l in listings:
-        attrs = l.get("attributes", {})
-        meta_seller = attrs.get("meta_seller_name")
-        meta_id = attrs.get("meta_seller_id")
-        meta_official = attrs.get("meta_is_official_store")
-        meta_sold = attrs.get("meta_sold_quantity")
-        meta_cond = attrs.get("meta_condition")
+        meta_seller = l.get("meta_seller_name")
+        meta_id = l.get("meta_seller_id")
+        meta_official = l.get("meta_is_official_store")
+        meta_sold = l.get("meta_sold_quantity")
+        meta_cond = l.get("meta_condition")
+        profile = profiles.get(seller_id_of(l))
         
         # Identify updates needed
-        if meta_seller or meta_sold is not None or meta_official is not None:
+        if meta_seller or meta_sold is not None or meta_official is not None or profile:
             update_item = {
                 "id": l["id"],
                 "meli_id": l["meli_id"], # Required for Not Null
@@ -48,27 +65,47 @@ async def sync_enriched_data():
                 "is_official_store": meta_official if meta_official is not None else l.get("is_official_store"),
                 "sold_quantity": meta_sold if meta_sold is not None else l.get("sold_quantity", 0),
                 "condition": meta_cond if meta_cond else l.get("condition"),
-                "last_enriched_at": l.get("last_enriched_at") or attrs.get("_last_enrichment_attempt")
+                "seller_reputation": l.get("seller_reputation"),
+                "last_enriched_at": l.get("last_enriched_at") or l.get("_last_enrichment_attempt")
             }
+            if profile:
+                if is_placeholder(update_item["seller_name"]) and profile.get("nickname"):
+                    update_item["seller_name"] = profile["nickname"]
+                update_item["is_official_store"] = bool(update_item["is_official_store"] or profile.get("is_official_store"))
+                if profile.get("reputation_level"):
+                    update_item["seller_reputation"] = profile["reputation_level"]
             updates.append(update_item)
             
     if not updates:
         print("✅ No listings need seller sync.")
+        if sync:
+            sync.commit()
         return
 
     print(f"Syncing {len(updates)} listings with missing top-level seller names...")
     
-    # 3. Batch Update (Supabase upsert with ID)
+    # 4. Batch Update (upsert with ID)
+    failed = False
     for i in range(0, len(updates), 100):
         batch = updates[i:i+100]
         try:
             print(f"  Sample Update: {batch[0]['seller_name']} (ID: {batch[0]['id']})")
-            db.supabase.table("meli_listings").upsert(batch, on_conflict="id").execute()
+            if not db.upsert_meli_listings(batch, on_conflict="id"):
+                failed = True
             print(f"  Synced {i + len(batch)}/{len(updates)}...")
         except Exception as e:
             print(f"  Error syncing batch: {e}")
+            failed = True
             
+    if sync and not failed:
+        sync.commit()
     print("✅ Enriched data sync complete. The dashboard metrics are now fully populated.")
 
 if __name__ == "__main__":
-    asyncio.run(sync_enriched_data())
+    import argparse
+    parser = argparse.ArgumentParser(description="Sync enriched seller metadata to top-level columns")
+    parser.add_argument("--full", action="store_true", help="Ignore the watermark and scan every listing")
+    parser.add_argument("--ttl-days", type=float, default=DEFAULT_TTL_DAYS, help="Refresh cached seller profiles older than this")
+    args = parser.parse_args()
+
+    asyncio.run(sync_enriched_data(full=args.full, ttl_days=args.ttl_days))
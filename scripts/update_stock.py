@@ -12,6 +12,8 @@ sys.path.append(os.getcwd())
 # Load environment variables
 load_dotenv()
 
+from scrapers.rate_limiter import RateLimiter
+
 def extract_meli_id(url):
     """Prioritize 'wid' (Listing ID) over Product ID."""
     wid_match = re.search(r'wid=MLA(\d+)', url)
@@ -26,16 +28,20 @@ async def update_stock():
     input_file = "user_data/raw_listings.json"
     listings = []
     
-    from logic.supabase_handler import SupabaseHandler
-    db = SupabaseHandler()
+    from logic.storage import get_storage
+    from logic.projections import projection
+    db = get_storage()
 
-    if os.path.exists(input_file) and os.path.getsize(input_file) > 10:
+    # Only full rows (the scraper's file) are written back to it; rows read from the database are
+    # a 'stock_sync' projection, which analyze_noise.py and the next run would take for full listings
+    from_file = os.path.exists(input_file) and os.path.getsize(input_file) > 10
+    if from_file:
         print(f"Loading listings from local file {input_file}...")
         with open(input_file, "r", encoding="utf-8") as f:
             listings = json.load(f)
     else:
         print(f"Local file empty or missing. Fetching listings from Supabase...")
-        listings = db.get_meli_listings()
+        listings = db.get_meli_listings(select=projection("stock_sync"))
 
     if not listings:
         print("Error: No listings found in local file or Supabase.")
@@ -57,6 +63,8 @@ async def update_stock():
     item_ids = list(unique_items.keys())
     batch_size = 20
     
+    # Shared adaptive pacing of api.mercadolibre.com (replaces a fixed 0.3 s pause per batch)
+    limiter = RateLimiter("update_stock")
     updated_count = 0
     forbidden_count = 0
     not_found_count = 0
@@ -71,7 +79,9 @@ async def update_stock():
         
         try:
             url = f"https://api.mercadolibre.com/items?ids={ids_str}"
+            await limiter.acquire("api")
             response = requests.get(url, headers=headers)
+            limiter.feedback("api", response.status_code)
             
             if response.status_code == 200:
                 results = response.json()
@@ -103,16 +113,17 @@ async def update_stock():
                 print(f"Codes: {codes}")
         except Exception as e:
             print(f"Error: {e}")
-        await asyncio.sleep(0.3)
+    rates = limiter.summary()
+    limiter.close()
 
     # Sync back to Supabase
     print(f"\nSyncing {len(listings)} updated listings to Supabase...")
-    db.upsert_meli_listings(listings)
+    db.bulk_load("meli_listings", listings, on_conflict="meli_id")
 
     # Save to local file as backup
-    os.makedirs("user_data", exist_ok=True)
-    with open(input_file, "w", encoding="utf-8") as f:
-        json.dump(listings, f, indent=4, ensure_ascii=False)
+    if from_file:
+        with open(input_file, "w", encoding="utf-8") as f:
+            json.dump(listings, f, indent=4, ensure_ascii=False)
 
     print(f"\nUpdate Complete!")
     print(f"  Total IDs Processed: {len(item_ids)}")
@@ -120,6 +131,7 @@ async def update_stock():
     print(f"  Forbidden (403): {forbidden_count}")
     print(f"  Not Found (404): {not_found_count}")
     print(f"  Others: {other_error_count}")
+    print(f"  Request rate: {rates}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,230 @@
+-- SQLite mirror of the schema built by supabase/migrations (used by logic/sqlite_storage.py).
+-- Keep in sync when adding migrations. Type mapping:
+--   UUID / TEXT / TIMESTAMPTZ -> TEXT (ISO-8601), JSONB -> TEXT (JSON), BOOLEAN -> INTEGER (0/1)
+
+CREATE TABLE IF NOT EXISTS master_products (
+    id TEXT PRIMARY KEY,
+    sap_code TEXT,
+    ean TEXT UNIQUE,
+    brand TEXT,
+    product_name TEXT,
+    format TEXT,
+    fc_net REAL,
+    is_publishable INTEGER DEFAULT 1,
+    list_price REAL,
+    status TEXT,
+    units_per_pack INTEGER,
+    discount_allowed INTEGER DEFAULT 1,
+    stage TEXT,
+    substance TEXT,
+    therapeutic_area TEXT,
+    business_unit TEXT,
+    fc_dry REAL,
+    distributor TEXT,
+    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS meli_listings (
+    id TEXT PRIMARY KEY,
+    meli_id TEXT UNIQUE NOT NULL,
+    seller_id TEXT,
+    seller_name TEXT,
+    seller_location TEXT,
+    title TEXT NOT NULL,
+    brand_detected TEXT,
+    ean_published TEXT,
+    price REAL,
+    url TEXT,
+    thumbnail TEXT,
+    status_publicacion TEXT,
+    category TEXT,
+    attributes TEXT,
+    last_scraped_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    is_official_store INTEGER DEFAULT 0,
+    sold_quantity INTEGER DEFAULT 0,
+    condition TEXT,
+    last_enriched_at TEXT,
+    item_status TEXT DEFAULT 'active',
+    status_description TEXT,
+    search_keyword TEXT,
+    category_id TEXT,
+    category_name TEXT,
+    sold_quantity_str TEXT,
+    is_full INTEGER DEFAULT 0,
+    available_quantity INTEGER,
+    seller_reputation TEXT,
+    official_store_id TEXT,
+    official_product_id TEXT,
+    enriched_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS compliance_audit (
+    id TEXT PRIMARY KEY,
+    listing_id TEXT UNIQUE REFERENCES meli_listings(id) ON DELETE CASCADE,
+    master_product_id TEXT REFERENCES master_products(id) ON DELETE SET NULL,
+    match_level INTEGER,
+    is_brand_correct INTEGER DEFAULT 1,
+    is_price_ok INTEGER DEFAULT 1,
+    is_publishable_ok INTEGER DEFAULT 1,
+    fraud_score INTEGER DEFAULT 0,
+    risk_level TEXT,
+    violation_details TEXT,
+    status TEXT DEFAULT 'PENDING',
+    noise_reason TEXT,
+    bpp_status TEXT DEFAULT 'pending',
+    bpp_complaint_id TEXT,
+    bpp_reason_id TEXT,
+    processed_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_master_ean ON master_products(ean);
+CREATE INDEX IF NOT EXISTS idx_listings_official ON meli_listings(is_official_store);
+CREATE INDEX IF NOT EXISTS idx_listings_sold ON meli_listings(sold_quantity);
+CREATE INDEX IF NOT EXISTS idx_listings_status ON meli_listings(item_status);
+CREATE INDEX IF NOT EXISTS idx_audit_risk ON compliance_audit(risk_level);
+
+-- 20240714_sync_watermarks.sql
+CREATE TABLE IF NOT EXISTS sync_watermarks (
+    consumer TEXT PRIMARY KEY,
+    last_scraped_at TEXT,
+    last_enriched_at TEXT,
+    processed_at TEXT,
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_listings_last_scraped ON meli_listings(last_scraped_at);
+CREATE INDEX IF NOT EXISTS idx_listings_last_enriched ON meli_listings(last_enriched_at);
+CREATE INDEX IF NOT EXISTS idx_audit_processed_at ON compliance_audit(processed_at);
+
+-- 20240717_audit_feed_view.sql
+CREATE VIEW IF NOT EXISTS audit_feed AS
+SELECT
+    a.id, a.listing_id, a.master_product_id, a.match_level, a.fraud_score, a.risk_level, a.status,
+    a.processed_at, a.noise_reason, a.violation_details, a.is_price_ok, a.is_brand_correct, a.is_publishable_ok,
+    l.meli_id, l.title, l.seller_name, l.seller_location, l.price, l.thumbnail, l.url, l.available_quantity,
+    l.search_keyword, l.item_status, l.category_id, l.category_name, l.is_official_store, l.sold_quantity_str,
+    l.is_full, l.ean_published, l.brand_detected, l.status_publicacion,
+    mp.product_name AS master_product_name, mp.brand AS master_brand, mp.ean AS master_ean,
+    mp.list_price AS master_list_price, mp.fc_net AS master_fc_net, mp.units_per_pack AS master_units_per_pack
+FROM compliance_audit a
+JOIN meli_listings l ON l.id = a.listing_id
+LEFT JOIN master_products mp ON mp.id = a.master_product_id;
+
+CREATE INDEX IF NOT EXISTS idx_audit_feed_processed ON compliance_audit(processed_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_audit_feed_fraud ON compliance_audit(fraud_score DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_audit_match_level ON compliance_audit(match_level);
+CREATE INDEX IF NOT EXISTS idx_audit_master_product ON compliance_audit(master_product_id);
+CREATE INDEX IF NOT EXISTS idx_audit_price_violations ON compliance_audit(processed_at DESC) WHERE is_price_ok = 0;
+CREATE INDEX IF NOT EXISTS idx_listings_seller_name ON meli_listings(seller_name);
+CREATE INDEX IF NOT EXISTS idx_master_brand ON master_products(brand);
+
+-- 20240718_hot_query_indexes.sql (GIN and text_pattern_ops indexes have no SQLite equivalent)
+CREATE INDEX IF NOT EXISTS idx_listings_enrichment_queue ON meli_listings(id)
+    WHERE item_status <> 'noise' AND item_status <> 'noise_manual'
+      AND (ean_published IS NULL OR brand_detected IS NULL OR seller_name IS NULL);
+CREATE INDEX IF NOT EXISTS idx_listings_enrichment_queue_delta ON meli_listings(last_scraped_at, id)
+    WHERE item_status <> 'noise' AND item_status <> 'noise_manual'
+      AND (ean_published IS NULL OR brand_detected IS NULL OR seller_name IS NULL);
+CREATE INDEX IF NOT EXISTS idx_audit_identified_recent ON compliance_audit(processed_at DESC, id DESC) WHERE match_level > 0;
+CREATE INDEX IF NOT EXISTS idx_audit_matched_listing ON compliance_audit(listing_id, master_product_id) WHERE master_product_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_listings_active ON meli_listings(id) WHERE item_status = 'active';
+CREATE INDEX IF NOT EXISTS idx_audit_format_fraud ON compliance_audit(listing_id, fraud_score)
+    WHERE json_extract(violation_details, '$.volumetric_mismatch') IS NOT NULL;
+
+-- 20240719_audit_history.sql (no partitioning in SQLite: run_month is a plain indexed column)
+CREATE TABLE IF NOT EXISTS compliance_audit_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_month TEXT NOT NULL,
+    recorded_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    change_kind TEXT NOT NULL,
+    audit_id TEXT,
+    listing_id TEXT,
+    meli_id TEXT,
+    master_product_id TEXT,
+    match_level INTEGER,
+    fraud_score INTEGER,
+    risk_level TEXT,
+    is_price_ok INTEGER,
+    is_brand_correct INTEGER,
+    is_publishable_ok INTEGER,
+    violation_details TEXT,
+    processed_at TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_audit_history_month ON compliance_audit_history(run_month);
+CREATE INDEX IF NOT EXISTS idx_audit_history_meli ON compliance_audit_history(meli_id, recorded_at DESC);
+CREATE INDEX IF NOT EXISTS idx_audit_history_listing ON compliance_audit_history(listing_id, recorded_at DESC);
+
+CREATE TRIGGER IF NOT EXISTS audit_history_insert AFTER INSERT ON compliance_audit
+BEGIN
+    INSERT INTO compliance_audit_history (
+        run_month, change_kind, audit_id, listing_id, meli_id, master_product_id, match_level,
+        fraud_score, risk_level, is_price_ok, is_brand_correct, is_publishable_ok, violation_details, processed_at
+    )
+    VALUES (
+        strftime('%Y-%m-01', 'now'), 'new', NEW.id, NEW.listing_id,
+        (SELECT meli_id FROM meli_listings WHERE id = NEW.listing_id), NEW.master_product_id, NEW.match_level,
+        NEW.fraud_score, NEW.risk_level, NEW.is_price_ok, NEW.is_brand_correct, NEW.is_publishable_ok,
+        NEW.violation_details, NEW.processed_at
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS audit_history_update AFTER UPDATE ON compliance_audit
+WHEN OLD.master_product_id IS NOT NEW.master_product_id OR OLD.match_level IS NOT NEW.match_level
+  OR OLD.fraud_score IS NOT NEW.fraud_score OR OLD.risk_level IS NOT NEW.risk_level
+  OR OLD.is_price_ok IS NOT NEW.is_price_ok OR OLD.is_brand_correct IS NOT NEW.is_brand_correct
+  OR OLD.is_publishable_ok IS NOT NEW.is_publishable_ok OR OLD.violation_details IS NOT NEW.violation_details
+BEGIN
+    INSERT INTO compliance_audit_history (
+        run_month, change_kind, audit_id, listing_id, meli_id, master_product_id, match_level,
+        fraud_score, risk_level, is_price_ok, is_brand_correct, is_publishable_ok, violation_details, processed_at
+    )
+    VALUES (
+        strftime('%Y-%m-01', 'now'), 'changed', NEW.id, NEW.listing_id,
+        (SELECT meli_id FROM meli_listings WHERE id = NEW.listing_id), NEW.master_product_id, NEW.match_level,
+        NEW.fraud_score, NEW.risk_level, NEW.is_price_ok, NEW.is_brand_correct, NEW.is_publishable_ok,
+        NEW.violation_details, NEW.processed_at
+    );
+END;
+
+-- 20240721_discovery_query_stats.sql (+ 20240722_discovery_rejected_counts.sql columns)
+CREATE TABLE IF NOT EXISTS discovery_query_stats (
+    query TEXT PRIMARY KEY,
+    runs INTEGER NOT NULL DEFAULT 0,
+    pages_fetched INTEGER NOT NULL DEFAULT 0,
+    listings_seen INTEGER NOT NULL DEFAULT 0,
+    new_listings INTEGER NOT NULL DEFAULT 0,
+    last_pages_budget INTEGER,
+    last_pages_fetched INTEGER,
+    last_productive_pages INTEGER,
+    last_new_listings INTEGER,
+    rejected_listings INTEGER NOT NULL DEFAULT 0,
+    last_rejected_listings INTEGER,
+    last_run_at TEXT,
+    updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE VIEW IF NOT EXISTS discovery_query_yield AS
+SELECT
+    l.search_keyword AS query,
+    COUNT(l.id) AS listings,
+    COUNT(CASE WHEN a.match_level > 0 THEN a.id END) AS identified,
+    COUNT(CASE WHEN l.item_status LIKE 'noise%' OR a.match_level = 0 THEN l.id END) AS noise
+FROM meli_listings l
+LEFT JOIN compliance_audit a ON a.listing_id = l.id
+WHERE l.search_keyword IS NOT NULL
+GROUP BY l.search_keyword;
+
+CREATE INDEX IF NOT EXISTS idx_listings_search_keyword ON meli_listings(search_keyword);
+
+-- 20240723_seller_profiles.sql
+CREATE TABLE IF NOT EXISTS seller_profiles (
+    seller_id TEXT PRIMARY KEY,
+    nickname TEXT,
+    reputation_level TEXT,
+    power_seller_status TEXT,
+    is_official_store INTEGER NOT NULL DEFAULT 0,
+    fetched_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_seller_profiles_fetched_at ON seller_profiles(fetched_at);
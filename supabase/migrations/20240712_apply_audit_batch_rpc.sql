@@ -0,0 +1,72 @@
+-- Migration: Server-side bulk apply of audit results
+-- Purpose: Upserts compliance_audit and syncs meli_listings.item_status in ONE transaction.
+-- Exposed through PostgREST as POST /rest/v1/rpc/apply_audit_batch {"audits": [...]}
+
+CREATE OR REPLACE FUNCTION public.apply_audit_batch(audits JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    audit_count INTEGER := 0;
+    status_count INTEGER := 0;
+BEGIN
+    -- 1. Decode the payload once (last record wins if a listing appears twice in the batch)
+    CREATE TEMP TABLE _incoming_audits ON COMMIT DROP AS
+    SELECT DISTINCT ON (r.listing_id) r.*
+    FROM jsonb_to_recordset(audits) WITH ORDINALITY AS r(
+        listing_id UUID,
+        master_product_id UUID,
+        match_level INTEGER,
+        is_brand_correct BOOLEAN,
+        is_price_ok BOOLEAN,
+        is_publishable_ok BOOLEAN,
+        fraud_score INTEGER,
+        risk_level TEXT,
+        violation_details JSONB,
+        item_status TEXT,
+        ord BIGINT
+    )
+    WHERE r.listing_id IS NOT NULL
+    ORDER BY r.listing_id, r.ord DESC;
+
+    -- 2. Upsert audit results (same conflict key as the REST upsert)
+    INSERT INTO public.compliance_audit (
+        listing_id, master_product_id, match_level, is_brand_correct, is_price_ok,
+        is_publishable_ok, fraud_score, risk_level, violation_details, processed_at
+    )
+    SELECT
+        listing_id, master_product_id, match_level,
+        COALESCE(is_brand_correct, true), COALESCE(is_price_ok, true), COALESCE(is_publishable_ok, true),
+        COALESCE(fraud_score, 0), risk_level, violation_details, NOW()
+    FROM _incoming_audits
+    ON CONFLICT (listing_id) DO UPDATE SET
+        master_product_id = EXCLUDED.master_product_id,
+        match_level = EXCLUDED.match_level,
+        is_brand_correct = EXCLUDED.is_brand_correct,
+        is_price_ok = EXCLUDED.is_price_ok,
+        is_publishable_ok = EXCLUDED.is_publishable_ok,
+        fraud_score = EXCLUDED.fraud_score,
+        risk_level = EXCLUDED.risk_level,
+        violation_details = EXCLUDED.violation_details,
+        processed_at = EXCLUDED.processed_at;
+    GET DIAGNOSTICS audit_count = ROW_COUNT;
+
+    -- 3. Sync listing status (noise / active), skipping rows that are already correct
+    UPDATE public.meli_listings l
+    SET item_status = i.item_status
+    FROM _incoming_audits i
+    WHERE l.id = i.listing_id
+      AND i.item_status IS NOT NULL
+      AND l.item_status IS DISTINCT FROM i.item_status;
+    GET DIAGNOSTICS status_count = ROW_COUNT;
+
+    RETURN jsonb_build_object('audits', audit_count, 'status_updates', status_count);
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.apply_audit_batch(JSONB) TO anon, authenticated, service_role;
+
+COMMENT ON FUNCTION public.apply_audit_batch(JSONB) IS 'Bulk upsert of compliance_audit + meli_listings.item_status sync in a single transaction.';
+
+-- Make PostgREST pick up the new function without a restart
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,17 @@
+-- Migration: Declare columns written by scrapers/enrichers/dashboard that were added ad-hoc
+-- Purpose: Keeps supabase/migrations the single source of truth (the local SQLite backend mirrors it).
+
+ALTER TABLE public.meli_listings
+    ADD COLUMN IF NOT EXISTS search_keyword TEXT,
+    ADD COLUMN IF NOT EXISTS category_id TEXT,
+    ADD COLUMN IF NOT EXISTS category_name TEXT,
+    ADD COLUMN IF NOT EXISTS sold_quantity_str TEXT,
+    ADD COLUMN IF NOT EXISTS is_full BOOLEAN DEFAULT false,
+    ADD COLUMN IF NOT EXISTS available_quantity INTEGER,
+    ADD COLUMN IF NOT EXISTS seller_reputation TEXT,
+    ADD COLUMN IF NOT EXISTS official_store_id TEXT,
+    ADD COLUMN IF NOT EXISTS official_product_id UUID,
+    ADD COLUMN IF NOT EXISTS enriched_at TIMESTAMP WITH TIME ZONE;
+
+ALTER TABLE public.compliance_audit
+    ADD COLUMN IF NOT EXISTS noise_reason TEXT;
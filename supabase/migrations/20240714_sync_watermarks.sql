@@ -0,0 +1,18 @@
+-- Migration: Delta sync watermarks
+-- Purpose: Each consumer (refresh_audit, enrichers, sync scripts) records the highest timestamp it
+-- has processed, so scheduled jobs only fetch rows changed since their last run.
+
+CREATE TABLE IF NOT EXISTS public.sync_watermarks (
+    consumer TEXT PRIMARY KEY,
+    last_scraped_at TIMESTAMP WITH TIME ZONE,
+    last_enriched_at TIMESTAMP WITH TIME ZONE,
+    processed_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+COMMENT ON TABLE public.sync_watermarks IS 'Per-consumer high-water marks for delta fetches of meli_listings / compliance_audit.';
+
+-- Range scans for "changed since" queries
+CREATE INDEX IF NOT EXISTS idx_listings_last_scraped ON public.meli_listings(last_scraped_at);
+CREATE INDEX IF NOT EXISTS idx_listings_last_enriched ON public.meli_listings(last_enriched_at);
+CREATE INDEX IF NOT EXISTS idx_audit_processed_at ON public.compliance_audit(processed_at);
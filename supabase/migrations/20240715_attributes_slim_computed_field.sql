@@ -0,0 +1,20 @@
+-- Migration: Slim attributes projection
+-- Purpose: 'attributes' carries the browser enrichment payload (description_long, variations_breakdown),
+-- which most consumers never read. This computed field exposes the same JSONB without those keys, so
+-- projections in logic/projections.py can request it instead of the full column:
+--   GET /rest/v1/meli_listings?select=id,title,attributes:attributes_slim
+
+CREATE OR REPLACE FUNCTION public.attributes_slim(public.meli_listings)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT $1.attributes - 'description_long' - 'variations_breakdown';
+$$;
+
+GRANT EXECUTE ON FUNCTION public.attributes_slim(public.meli_listings) TO anon, authenticated, service_role;
+
+COMMENT ON FUNCTION public.attributes_slim(public.meli_listings) IS 'meli_listings.attributes without description_long / variations_breakdown (PostgREST computed field).';
+
+-- Make PostgREST pick up the new computed field without a restart
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,302 @@
+-- Migration: Precomputed dashboard aggregates
+-- Purpose: The dashboard headline numbers used to be computed on every load with five count=exact
+-- queries plus a full scan of compliance_audit. These tables hold the same numbers and are kept
+-- current by statement-level triggers (one pass over the changed rows per INSERT/UPDATE/DELETE
+-- statement), so the dashboard reads a single small row regardless of table size.
+-- public.refresh_dashboard_stats() rebuilds everything from scratch (backfill / drift repair).
+
+-- 1. Aggregate tables
+CREATE TABLE IF NOT EXISTS public.dashboard_stats (
+    id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    total_listings BIGINT NOT NULL DEFAULT 0,
+    noise_listings BIGINT NOT NULL DEFAULT 0,
+    noise_manual_listings BIGINT NOT NULL DEFAULT 0,
+    audited BIGINT NOT NULL DEFAULT 0,
+    identified BIGINT NOT NULL DEFAULT 0,
+    unidentified BIGINT NOT NULL DEFAULT 0,
+    high_risk BIGINT NOT NULL DEFAULT 0,
+    medium_risk BIGINT NOT NULL DEFAULT 0,
+    low_risk BIGINT NOT NULL DEFAULT 0,
+    price_violations BIGINT NOT NULL DEFAULT 0,
+    brand_violations BIGINT NOT NULL DEFAULT 0,
+    last_audit_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS public.dashboard_brand_stats (
+    brand TEXT PRIMARY KEY,
+    audited BIGINT NOT NULL DEFAULT 0,
+    identified BIGINT NOT NULL DEFAULT 0,
+    high_risk BIGINT NOT NULL DEFAULT 0,
+    medium_risk BIGINT NOT NULL DEFAULT 0,
+    low_risk BIGINT NOT NULL DEFAULT 0,
+    price_violations BIGINT NOT NULL DEFAULT 0,
+    fraud_score_sum BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS public.dashboard_risk_stats (
+    risk_level TEXT PRIMARY KEY,
+    audited BIGINT NOT NULL DEFAULT 0,
+    identified BIGINT NOT NULL DEFAULT 0,
+    fraud_score_sum BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+COMMENT ON TABLE public.dashboard_stats IS 'Single-row headline numbers for the dashboard, maintained by triggers on meli_listings / compliance_audit.';
+COMMENT ON TABLE public.dashboard_brand_stats IS 'Audit counts per master brand (Sin identificar = no master match), maintained by triggers.';
+COMMENT ON TABLE public.dashboard_risk_stats IS 'Audit counts per risk level, maintained by triggers.';
+
+INSERT INTO public.dashboard_stats (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
+
+-- 2. Signed audit deltas: -1 for each old row version, +1 for each new one
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'dashboard_audit_delta') THEN
+        CREATE TYPE public.dashboard_audit_delta AS (
+            sign INTEGER,
+            master_product_id UUID,
+            match_level INTEGER,
+            risk_level TEXT,
+            fraud_score INTEGER,
+            is_price_ok BOOLEAN,
+            is_brand_correct BOOLEAN,
+            processed_at TIMESTAMP WITH TIME ZONE
+        );
+    END IF;
+END $$;
+
+CREATE OR REPLACE FUNCTION public.dashboard_apply_audit_changes(deltas public.dashboard_audit_delta[])
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF COALESCE(array_length(deltas, 1), 0) = 0 THEN
+        RETURN;
+    END IF;
+
+    UPDATE public.dashboard_stats s SET
+        audited = s.audited + d.audited,
+        identified = s.identified + d.identified,
+        unidentified = s.unidentified + d.unidentified,
+        high_risk = s.high_risk + d.high_risk,
+        medium_risk = s.medium_risk + d.medium_risk,
+        low_risk = s.low_risk + d.low_risk,
+        price_violations = s.price_violations + d.price_violations,
+        brand_violations = s.brand_violations + d.brand_violations,
+        last_audit_at = GREATEST(s.last_audit_at, d.last_audit_at),
+        updated_at = NOW()
+    FROM (
+        SELECT
+            SUM(x.sign) AS audited,
+            COALESCE(SUM(x.sign) FILTER (WHERE x.match_level > 0), 0) AS identified,
+            COALESCE(SUM(x.sign) FILTER (WHERE COALESCE(x.match_level, 0) = 0), 0) AS unidentified,
+            COALESCE(SUM(x.sign) FILTER (WHERE x.match_level > 0 AND x.risk_level = 'Alto'), 0) AS high_risk,
+            COALESCE(SUM(x.sign) FILTER (WHERE x.match_level > 0 AND x.risk_level = 'Medio'), 0) AS medium_risk,
+            COALESCE(SUM(x.sign) FILTER (WHERE x.match_level > 0 AND x.risk_level = 'Bajo'), 0) AS low_risk,
+            COALESCE(SUM(x.sign) FILTER (WHERE x.match_level > 0 AND x.is_price_ok = false), 0) AS price_violations,
+            COALESCE(SUM(x.sign) FILTER (WHERE x.match_level > 0 AND x.is_brand_correct = false), 0) AS brand_violations,
+            MAX(x.processed_at) FILTER (WHERE x.sign = 1) AS last_audit_at
+        FROM unnest(deltas) x
+    ) d
+    WHERE s.id = 1;
+
+    -- Sorted keys keep concurrent writers from deadlocking on the same brand / risk rows
+    INSERT INTO public.dashboard_brand_stats AS b (brand, audited, identified, high_risk, medium_risk, low_risk, price_violations, fraud_score_sum)
+    SELECT
+        COALESCE(mp.brand, 'Sin identificar') AS brand,
+        SUM(x.sign),
+        COALESCE(SUM(x.sign) FILTER (WHERE x.match_level > 0), 0),
+        COALESCE(SUM(x.sign) FILTER (WHERE x.match_level > 0 AND x.risk_level = 'Alto'), 0),
+        COALESCE(SUM(x.sign) FILTER (WHERE x.match_level > 0 AND x.risk_level = 'Medio'), 0),
+        COALESCE(SUM(x.sign) FILTER (WHERE x.match_level > 0 AND x.risk_level = 'Bajo'), 0),
+        COALESCE(SUM(x.sign) FILTER (WHERE x.match_level > 0 AND x.is_price_ok = false), 0),
+        COALESCE(SUM(x.sign * x.fraud_score), 0)
+    FROM unnest(deltas) x
+    LEFT JOIN public.master_products mp ON mp.id = x.master_product_id
+    GROUP BY 1
+    ORDER BY 1
+    ON CONFLICT (brand) DO UPDATE SET
+        audited = b.audited + EXCLUDED.audited,
+        identified = b.identified + EXCLUDED.identified,
+        high_risk = b.high_risk + EXCLUDED.high_risk,
+        medium_risk = b.medium_risk + EXCLUDED.medium_risk,
+        low_risk = b.low_risk + EXCLUDED.low_risk,
+        price_violations = b.price_violations + EXCLUDED.price_violations,
+        fraud_score_sum = b.fraud_score_sum + EXCLUDED.fraud_score_sum,
+        updated_at = NOW();
+
+    INSERT INTO public.dashboard_risk_stats AS r (risk_level, audited, identified, fraud_score_sum)
+    SELECT
+        COALESCE(x.risk_level, 'Bajo') AS risk_level,
+        SUM(x.sign),
+        COALESCE(SUM(x.sign) FILTER (WHERE x.match_level > 0), 0),
+        COALESCE(SUM(x.sign * x.fraud_score), 0)
+    FROM unnest(deltas) x
+    GROUP BY 1
+    ORDER BY 1
+    ON CONFLICT (risk_level) DO UPDATE SET
+        audited = r.audited + EXCLUDED.audited,
+        identified = r.identified + EXCLUDED.identified,
+        fraud_score_sum = r.fraud_score_sum + EXCLUDED.fraud_score_sum,
+        updated_at = NOW();
+END;
+$$;
+
+-- 3. Statement-level triggers (transition tables need one trigger per event)
+CREATE OR REPLACE FUNCTION public.trg_dashboard_audit_stats()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    deltas public.dashboard_audit_delta[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        deltas := ARRAY(
+            SELECT ROW(1, n.master_product_id, n.match_level, n.risk_level, n.fraud_score,
+                       n.is_price_ok, n.is_brand_correct, n.processed_at)::public.dashboard_audit_delta
+            FROM new_rows n
+        );
+    ELSIF TG_OP = 'UPDATE' THEN
+        -- Only rows whose aggregated fields changed (bpp_status / noise_reason edits are skipped)
+        deltas := ARRAY(
+            SELECT v.d
+            FROM old_rows o
+            JOIN new_rows n ON n.id = o.id
+            CROSS JOIN LATERAL (VALUES
+                (ROW(-1, o.master_product_id, o.match_level, o.risk_level, o.fraud_score,
+                     o.is_price_ok, o.is_brand_correct, o.processed_at)::public.dashboard_audit_delta),
+                (ROW(1, n.master_product_id, n.match_level, n.risk_level, n.fraud_score,
+                     n.is_price_ok, n.is_brand_correct, n.processed_at)::public.dashboard_audit_delta)
+            ) v(d)
+            WHERE (o.master_product_id, o.match_level, o.risk_level, o.fraud_score, o.is_price_ok, o.is_brand_correct, o.processed_at)
+                IS DISTINCT FROM
+                  (n.master_product_id, n.match_level, n.risk_level, n.fraud_score, n.is_price_ok, n.is_brand_correct, n.processed_at)
+        );
+    ELSE
+        deltas := ARRAY(
+            SELECT ROW(-1, o.master_product_id, o.match_level, o.risk_level, o.fraud_score,
+                       o.is_price_ok, o.is_brand_correct, o.processed_at)::public.dashboard_audit_delta
+            FROM old_rows o
+        );
+    END IF;
+
+    PERFORM public.dashboard_apply_audit_changes(deltas);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS dashboard_audit_insert ON public.compliance_audit;
+CREATE TRIGGER dashboard_audit_insert AFTER INSERT ON public.compliance_audit
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_dashboard_audit_stats();
+
+DROP TRIGGER IF EXISTS dashboard_audit_update ON public.compliance_audit;
+CREATE TRIGGER dashboard_audit_update AFTER UPDATE ON public.compliance_audit
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_dashboard_audit_stats();
+
+DROP TRIGGER IF EXISTS dashboard_audit_delete ON public.compliance_audit;
+CREATE TRIGGER dashboard_audit_delete AFTER DELETE ON public.compliance_audit
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_dashboard_audit_stats();
+
+CREATE OR REPLACE FUNCTION public.trg_dashboard_listing_stats()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    d_total BIGINT := 0;
+    d_noise BIGINT := 0;
+    d_manual BIGINT := 0;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT
+            CASE WHEN TG_OP = 'INSERT' THEN COUNT(*) ELSE 0 END,
+            COUNT(*) FILTER (WHERE item_status = 'noise'),
+            COUNT(*) FILTER (WHERE item_status = 'noise_manual')
+        INTO d_total, d_noise, d_manual
+        FROM new_rows;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT
+            d_total - CASE WHEN TG_OP = 'DELETE' THEN COUNT(*) ELSE 0 END,
+            d_noise - COUNT(*) FILTER (WHERE item_status = 'noise'),
+            d_manual - COUNT(*) FILTER (WHERE item_status = 'noise_manual')
+        INTO d_total, d_noise, d_manual
+        FROM old_rows;
+    END IF;
+
+    IF d_total <> 0 OR d_noise <> 0 OR d_manual <> 0 THEN
+        UPDATE public.dashboard_stats SET
+            total_listings = total_listings + d_total,
+            noise_listings = noise_listings + d_noise,
+            noise_manual_listings = noise_manual_listings + d_manual,
+            updated_at = NOW()
+        WHERE id = 1;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS dashboard_listing_insert ON public.meli_listings;
+CREATE TRIGGER dashboard_listing_insert AFTER INSERT ON public.meli_listings
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_dashboard_listing_stats();
+
+DROP TRIGGER IF EXISTS dashboard_listing_update ON public.meli_listings;
+CREATE TRIGGER dashboard_listing_update AFTER UPDATE ON public.meli_listings
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_dashboard_listing_stats();
+
+DROP TRIGGER IF EXISTS dashboard_listing_delete ON public.meli_listings;
+CREATE TRIGGER dashboard_listing_delete AFTER DELETE ON public.meli_listings
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_dashboard_listing_stats();
+
+-- 4. Full rebuild (initial backfill, or repair after bulk SQL edits / master brand renames)
+CREATE OR REPLACE FUNCTION public.refresh_dashboard_stats()
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    LOCK TABLE public.dashboard_stats, public.dashboard_brand_stats, public.dashboard_risk_stats IN EXCLUSIVE MODE;
+
+    DELETE FROM public.dashboard_brand_stats;
+    DELETE FROM public.dashboard_risk_stats;
+    UPDATE public.dashboard_stats SET
+        total_listings = l.total, noise_listings = l.noise, noise_manual_listings = l.manual,
+        audited = 0, identified = 0, unidentified = 0, high_risk = 0, medium_risk = 0, low_risk = 0,
+        price_violations = 0, brand_violations = 0, last_audit_at = NULL, updated_at = NOW()
+    FROM (
+        SELECT
+            COUNT(*) AS total,
+            COUNT(*) FILTER (WHERE item_status = 'noise') AS noise,
+            COUNT(*) FILTER (WHERE item_status = 'noise_manual') AS manual
+        FROM public.meli_listings
+    ) l
+    WHERE id = 1;
+
+    PERFORM public.dashboard_apply_audit_changes(ARRAY(
+        SELECT ROW(1, a.master_product_id, a.match_level, a.risk_level, a.fraud_score,
+                   a.is_price_ok, a.is_brand_correct, a.processed_at)::public.dashboard_audit_delta
+        FROM public.compliance_audit a
+    ));
+END;
+$$;
+
+GRANT SELECT ON public.dashboard_stats, public.dashboard_brand_stats, public.dashboard_risk_stats TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.refresh_dashboard_stats() TO service_role;
+
+SELECT public.refresh_dashboard_stats();
+
+-- Make PostgREST pick up the new tables without a restart
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,64 @@
+-- Migration: Audit feed for the paginated /audits endpoint (api_bridge.py)
+-- Purpose: Flattens compliance_audit + meli_listings + master_products into one relation so every
+-- filter and keyset cursor is a plain top-level column, and adds the indexes behind each filter/sort.
+
+CREATE OR REPLACE VIEW public.audit_feed AS
+SELECT
+    a.id,
+    a.listing_id,
+    a.master_product_id,
+    a.match_level,
+    a.fraud_score,
+    a.risk_level,
+    a.status,
+    a.processed_at,
+    a.noise_reason,
+    a.violation_details,
+    a.is_price_ok,
+    a.is_brand_correct,
+    a.is_publishable_ok,
+    l.meli_id,
+    l.title,
+    l.seller_name,
+    l.seller_location,
+    l.price,
+    l.thumbnail,
+    l.url,
+    l.available_quantity,
+    l.search_keyword,
+    l.item_status,
+    l.category_id,
+    l.category_name,
+    l.is_official_store,
+    l.sold_quantity_str,
+    l.is_full,
+    l.ean_published,
+    l.brand_detected,
+    l.status_publicacion,
+    mp.product_name AS master_product_name,
+    mp.brand AS master_brand,
+    mp.ean AS master_ean,
+    mp.list_price AS master_list_price,
+    mp.fc_net AS master_fc_net,
+    mp.units_per_pack AS master_units_per_pack
+FROM public.compliance_audit a
+JOIN public.meli_listings l ON l.id = a.listing_id
+LEFT JOIN public.master_products mp ON mp.id = a.master_product_id;
+
+COMMENT ON VIEW public.audit_feed IS 'Flattened audit rows for the dashboard feed (GET /audits with keyset cursors).';
+
+GRANT SELECT ON public.audit_feed TO anon, authenticated, service_role;
+
+-- Keyset sorts: (sort column, id) in both supported orders
+CREATE INDEX IF NOT EXISTS idx_audit_feed_processed ON public.compliance_audit(processed_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_audit_feed_fraud ON public.compliance_audit(fraud_score DESC, id DESC);
+
+-- Filters
+CREATE INDEX IF NOT EXISTS idx_audit_match_level ON public.compliance_audit(match_level);
+CREATE INDEX IF NOT EXISTS idx_audit_master_product ON public.compliance_audit(master_product_id);
+CREATE INDEX IF NOT EXISTS idx_audit_price_violations ON public.compliance_audit(processed_at DESC) WHERE is_price_ok = false;
+CREATE INDEX IF NOT EXISTS idx_listings_seller_name ON public.meli_listings(seller_name);
+CREATE INDEX IF NOT EXISTS idx_master_brand ON public.master_products(brand);
+
+-- Make PostgREST pick up the new view without a restart
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,63 @@
+-- Migration: Index pack for the hot audit / enrichment queries
+-- Purpose: Composite and partial indexes matching the access paths the pipeline and dashboard
+-- actually run, plus JSONB indexes for the violation_details keys that are filtered on.
+-- Plans before/after can be compared with scripts/explain_hot_queries.py against a local Postgres.
+--
+-- Already covered elsewhere (not repeated here):
+--   compliance_audit(listing_id)          unique_listing_audit (20240709), used by every listing join
+--   compliance_audit(processed_at, id)    idx_audit_feed_processed (20240717)
+--   meli_listings(seller_name)            idx_listings_seller_name (20240717)
+
+-- 1. MeliAPIEnricher queue (enrichers/meli_api_enricher.py):
+--    item_status <> 'noise' AND item_status <> 'noise_manual'
+--    AND (ean_published IS NULL OR brand_detected IS NULL OR seller_name IS NULL)
+--    ORDER BY id, optionally AND last_scraped_at > <watermark>.
+--    The predicate is written exactly as PostgREST renders the filters so the planner can prove it.
+CREATE INDEX IF NOT EXISTS idx_listings_enrichment_queue
+    ON public.meli_listings(id)
+    WHERE item_status <> 'noise' AND item_status <> 'noise_manual'
+      AND (ean_published IS NULL OR brand_detected IS NULL OR seller_name IS NULL);
+
+CREATE INDEX IF NOT EXISTS idx_listings_enrichment_queue_delta
+    ON public.meli_listings(last_scraped_at, id)
+    WHERE item_status <> 'noise' AND item_status <> 'noise_manual'
+      AND (ean_published IS NULL OR brand_detected IS NULL OR seller_name IS NULL);
+
+-- 2. Dashboard / audit feed over identified rows: match_level > 0 ordered by processed_at.
+--    Replaces "scan every recent audit and discard the noise" with an index walk over matches only.
+CREATE INDEX IF NOT EXISTS idx_audit_identified_recent
+    ON public.compliance_audit(processed_at DESC, id DESC)
+    WHERE match_level > 0;
+
+-- 3. Matched listings (get_matched_listings / ProductEnricher): audits with a master product
+--    joined to active listings. Covering the join key keeps it an index-only probe.
+CREATE INDEX IF NOT EXISTS idx_audit_matched_listing
+    ON public.compliance_audit(listing_id)
+    INCLUDE (master_product_id)
+    WHERE master_product_id IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_listings_active
+    ON public.meli_listings(id)
+    WHERE item_status = 'active';
+
+-- 4. Noise views: item_status LIKE 'noise%' needs a pattern-ops btree under non-C collations.
+CREATE INDEX IF NOT EXISTS idx_listings_status_pattern
+    ON public.meli_listings(item_status text_pattern_ops);
+
+-- 5. seller_risk_summary: format fraud counts filter violation_details->>'volumetric_mismatch'
+--    on high-score audits. Partial expression index on exactly that predicate.
+CREATE INDEX IF NOT EXISTS idx_audit_format_fraud
+    ON public.compliance_audit(listing_id, fraud_score)
+    WHERE (violation_details->>'volumetric_mismatch') IS NOT NULL;
+
+-- 6. Ad-hoc investigation by violation type (violation_details ? 'brand_mismatch',
+--    violation_details @> '{"restricted_sku_violation": true}'). Default jsonb_ops supports both
+--    key existence and containment; jsonb_path_ops would only serve @>.
+CREATE INDEX IF NOT EXISTS idx_audit_violation_details
+    ON public.compliance_audit USING GIN (violation_details);
+
+-- Refresh planner statistics so the new indexes are considered immediately
+ANALYZE public.meli_listings;
+ANALYZE public.compliance_audit;
+
+NOTIFY pgrst, 'reload schema';
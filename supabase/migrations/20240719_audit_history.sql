@@ -0,0 +1,153 @@
+-- Migration: Append-only audit history partitioned by run month
+-- Purpose: compliance_audit stays the thin "current state" table (one row per listing, upserted on
+-- listing_id). Every insert or outcome change is appended to compliance_audit_history, so trends
+-- survive re-audits and monthly resets. Unchanged re-audits add nothing.
+-- Partitions are monthly (RANGE on run_month): reads filtered by run_month prune to the months they
+-- need, and old months can be detached (audit_history_detach_before) and archived or dropped.
+
+CREATE TABLE IF NOT EXISTS public.compliance_audit_history (
+    id BIGINT GENERATED ALWAYS AS IDENTITY,
+    run_month DATE NOT NULL,
+    recorded_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    change_kind TEXT NOT NULL,  -- 'new' | 'changed' | 'baseline'
+    audit_id UUID,
+    listing_id UUID,            -- no FK: history outlives the listing (fresh starts recreate listings)
+    meli_id TEXT,               -- stable identifier across resets
+    master_product_id UUID,
+    match_level INTEGER,
+    fraud_score INTEGER,
+    risk_level TEXT,
+    is_price_ok BOOLEAN,
+    is_brand_correct BOOLEAN,
+    is_publishable_ok BOOLEAN,
+    violation_details JSONB,
+    processed_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (run_month, id)
+) PARTITION BY RANGE (run_month);
+
+-- The JSONB payload dominates the row size; lz4 is cheaper than the default pglz
+ALTER TABLE public.compliance_audit_history ALTER COLUMN violation_details SET COMPRESSION lz4;
+
+CREATE INDEX IF NOT EXISTS idx_audit_history_meli ON public.compliance_audit_history(meli_id, recorded_at DESC);
+CREATE INDEX IF NOT EXISTS idx_audit_history_listing ON public.compliance_audit_history(listing_id, recorded_at DESC);
+
+COMMENT ON TABLE public.compliance_audit_history IS 'Append-only log of audit outcome changes, partitioned by run month.';
+
+-- 1. Partition management
+CREATE OR REPLACE FUNCTION public.audit_history_ensure_partition(month DATE)
+RETURNS TEXT
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    start_month DATE := date_trunc('month', month)::DATE;
+    partition_name TEXT := format('compliance_audit_history_%s', to_char(start_month, 'YYYY_MM'));
+BEGIN
+    IF to_regclass('public.' || partition_name) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE public.%I PARTITION OF public.compliance_audit_history FOR VALUES FROM (%L) TO (%L)',
+            partition_name, start_month, (start_month + INTERVAL '1 month')::DATE
+        );
+    END IF;
+    RETURN partition_name;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.audit_history_detach_before(cutoff DATE)
+RETURNS SETOF TEXT
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    part RECORD;
+BEGIN
+    -- Detached partitions become plain tables: archive them (pg_dump -t) and DROP, or keep for ad-hoc reads
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'public.compliance_audit_history'::regclass
+          AND c.relname ~ '^compliance_audit_history_\d{4}_\d{2}$'
+          AND to_date(right(c.relname, 7), 'YYYY_MM') < date_trunc('month', cutoff)::DATE
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('ALTER TABLE public.compliance_audit_history DETACH PARTITION public.%I', part.relname);
+        RETURN NEXT part.relname;
+    END LOOP;
+END;
+$$;
+
+-- 2. Append changed outcomes (statement-level, one trigger per event for the transition tables)
+CREATE OR REPLACE FUNCTION public.trg_audit_history()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    PERFORM public.audit_history_ensure_partition(CURRENT_DATE);
+
+    -- old_rows only exists for UPDATE, so each event reads its own transition tables
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO public.compliance_audit_history (
+            run_month, change_kind, audit_id, listing_id, meli_id, master_product_id, match_level,
+            fraud_score, risk_level, is_price_ok, is_brand_correct, is_publishable_ok, violation_details, processed_at
+        )
+        SELECT
+            date_trunc('month', CURRENT_DATE)::DATE, 'new', n.id, n.listing_id, l.meli_id, n.master_product_id, n.match_level,
+            n.fraud_score, n.risk_level, n.is_price_ok, n.is_brand_correct, n.is_publishable_ok, n.violation_details, n.processed_at
+        FROM new_rows n
+        LEFT JOIN public.meli_listings l ON l.id = n.listing_id;
+    ELSE
+        INSERT INTO public.compliance_audit_history (
+            run_month, change_kind, audit_id, listing_id, meli_id, master_product_id, match_level,
+            fraud_score, risk_level, is_price_ok, is_brand_correct, is_publishable_ok, violation_details, processed_at
+        )
+        SELECT
+            date_trunc('month', CURRENT_DATE)::DATE, 'changed', n.id, n.listing_id, l.meli_id, n.master_product_id, n.match_level,
+            n.fraud_score, n.risk_level, n.is_price_ok, n.is_brand_correct, n.is_publishable_ok, n.violation_details, n.processed_at
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        LEFT JOIN public.meli_listings l ON l.id = n.listing_id
+        -- Only outcome changes; processed_at / bpp_status / noise_reason edits are not history
+        WHERE (o.master_product_id, o.match_level, o.fraud_score, o.risk_level,
+               o.is_price_ok, o.is_brand_correct, o.is_publishable_ok, o.violation_details)
+              IS DISTINCT FROM
+              (n.master_product_id, n.match_level, n.fraud_score, n.risk_level,
+               n.is_price_ok, n.is_brand_correct, n.is_publishable_ok, n.violation_details);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS audit_history_insert ON public.compliance_audit;
+CREATE TRIGGER audit_history_insert AFTER INSERT ON public.compliance_audit
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_audit_history();
+
+DROP TRIGGER IF EXISTS audit_history_update ON public.compliance_audit;
+CREATE TRIGGER audit_history_update AFTER UPDATE ON public.compliance_audit
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_audit_history();
+
+-- 3. Baseline: the current state becomes the first history entry of this month
+SELECT public.audit_history_ensure_partition(CURRENT_DATE);
+SELECT public.audit_history_ensure_partition((CURRENT_DATE + INTERVAL '1 month')::DATE);
+
+INSERT INTO public.compliance_audit_history (
+    run_month, change_kind, audit_id, listing_id, meli_id, master_product_id, match_level,
+    fraud_score, risk_level, is_price_ok, is_brand_correct, is_publishable_ok, violation_details, processed_at
+)
+SELECT
+    date_trunc('month', CURRENT_DATE)::DATE, 'baseline', a.id, a.listing_id, l.meli_id, a.master_product_id, a.match_level,
+    a.fraud_score, a.risk_level, a.is_price_ok, a.is_brand_correct, a.is_publishable_ok, a.violation_details, a.processed_at
+FROM public.compliance_audit a
+LEFT JOIN public.meli_listings l ON l.id = a.listing_id;
+
+GRANT SELECT ON public.compliance_audit_history TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.audit_history_ensure_partition(DATE) TO service_role;
+GRANT EXECUTE ON FUNCTION public.audit_history_detach_before(DATE) TO service_role;
+
+NOTIFY pgrst, 'reload schema';
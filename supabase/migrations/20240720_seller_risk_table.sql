@@ -0,0 +1,342 @@
+-- Migration: Incrementally maintained seller risk table
+-- Purpose: seller_risk_summary used to join and group every listing with its audit on each query.
+-- public.seller_risk holds the same counters per seller, updated by statement-level triggers on
+-- compliance_audit and meli_listings, so seller rankings are index scans over one row per seller.
+-- Sellers are keyed by seller_id (stable); listings not yet enriched with a seller_id are grouped
+-- under 'name:<seller_name>' and move to their seller_id row as soon as enrichment sets it.
+-- public.reconcile_seller_risk() recomputes everything and repairs drift (run nightly).
+
+-- 1. Seller key
+CREATE OR REPLACE FUNCTION public.seller_risk_key(seller_id TEXT, seller_name TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT COALESCE(NULLIF(seller_id, ''), 'name:' || COALESCE(seller_name, ''));
+$$;
+
+-- 2. Counters table (derived metrics are generated columns so they can be indexed)
+CREATE TABLE IF NOT EXISTS public.seller_risk (
+    seller_key TEXT PRIMARY KEY,
+    seller_id TEXT,
+    seller_name TEXT,
+    total_listings BIGINT NOT NULL DEFAULT 0,
+    audited BIGINT NOT NULL DEFAULT 0,
+    total_violations BIGINT NOT NULL DEFAULT 0,
+    price_violations BIGINT NOT NULL DEFAULT 0,
+    brand_risk_violations BIGINT NOT NULL DEFAULT 0,
+    format_fraud_violations BIGINT NOT NULL DEFAULT 0,
+    fraud_score_sum BIGINT NOT NULL DEFAULT 0,
+    last_violation_at TIMESTAMP WITH TIME ZONE,
+    avg_fraud_score NUMERIC GENERATED ALWAYS AS (fraud_score_sum::NUMERIC / NULLIF(audited, 0)) STORED,
+    violation_rate_pct DOUBLE PRECISION GENERATED ALWAYS AS (total_violations::FLOAT / NULLIF(total_listings, 0) * 100) STORED,
+    risk_level TEXT GENERATED ALWAYS AS (
+        CASE
+            WHEN total_violations > 5 OR fraud_score_sum > 50 * audited THEN 'Alto'
+            WHEN total_violations > 2 THEN 'Medio'
+            ELSE 'Bajo'
+        END
+    ) STORED,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+COMMENT ON TABLE public.seller_risk IS 'Per-seller violation counters (keyed by seller_id), maintained by triggers on compliance_audit / meli_listings.';
+
+-- Rankings: worst offenders first, optionally within a risk level
+CREATE INDEX IF NOT EXISTS idx_seller_risk_rank ON public.seller_risk(total_violations DESC, avg_fraud_score DESC);
+CREATE INDEX IF NOT EXISTS idx_seller_risk_level_rank ON public.seller_risk(risk_level, total_violations DESC);
+CREATE INDEX IF NOT EXISTS idx_seller_risk_name ON public.seller_risk(seller_name);
+
+-- 3. Signed per-listing contributions: -1 for each old version, +1 for each new one
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'seller_risk_delta') THEN
+        CREATE TYPE public.seller_risk_delta AS (
+            sign INTEGER,
+            seller_key TEXT,
+            seller_id TEXT,
+            seller_name TEXT,
+            listings INTEGER,      -- 1 when the delta carries the listing itself
+            audited INTEGER,       -- 1 when the delta carries an audit
+            fraud_score INTEGER,
+            is_price_ok BOOLEAN,
+            is_brand_correct BOOLEAN,
+            format_fraud BOOLEAN,  -- violation_details ? 'volumetric_mismatch'
+            processed_at TIMESTAMP WITH TIME ZONE
+        );
+    END IF;
+END $$;
+
+CREATE OR REPLACE FUNCTION public.seller_risk_apply_changes(deltas public.seller_risk_delta[])
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF COALESCE(array_length(deltas, 1), 0) = 0 THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO public.seller_risk AS s (
+        seller_key, seller_id, seller_name, total_listings, audited, total_violations, price_violations,
+        brand_risk_violations, format_fraud_violations, fraud_score_sum, last_violation_at
+    )
+    SELECT
+        d.seller_key,
+        MAX(d.seller_id) FILTER (WHERE d.sign > 0),
+        MAX(d.seller_name) FILTER (WHERE d.sign > 0),
+        SUM(d.sign * d.listings),
+        SUM(d.sign * d.audited),
+        COALESCE(SUM(d.sign) FILTER (WHERE d.audited = 1 AND d.fraud_score >= 30), 0),
+        COALESCE(SUM(d.sign) FILTER (WHERE d.audited = 1 AND d.is_price_ok = false), 0),
+        COALESCE(SUM(d.sign) FILTER (WHERE d.audited = 1 AND d.fraud_score >= 60 AND d.is_brand_correct = false), 0),
+        COALESCE(SUM(d.sign) FILTER (WHERE d.audited = 1 AND d.fraud_score >= 60 AND d.format_fraud), 0),
+        SUM(d.sign * d.audited * COALESCE(d.fraud_score, 0)),
+        MAX(d.processed_at) FILTER (WHERE d.sign > 0 AND d.audited = 1)
+    FROM unnest(deltas) d
+    GROUP BY d.seller_key
+    ON CONFLICT (seller_key) DO UPDATE SET
+        seller_id = COALESCE(EXCLUDED.seller_id, s.seller_id),
+        seller_name = COALESCE(EXCLUDED.seller_name, s.seller_name),
+        total_listings = s.total_listings + EXCLUDED.total_listings,
+        audited = s.audited + EXCLUDED.audited,
+        total_violations = s.total_violations + EXCLUDED.total_violations,
+        price_violations = s.price_violations + EXCLUDED.price_violations,
+        brand_risk_violations = s.brand_risk_violations + EXCLUDED.brand_risk_violations,
+        format_fraud_violations = s.format_fraud_violations + EXCLUDED.format_fraud_violations,
+        fraud_score_sum = s.fraud_score_sum + EXCLUDED.fraud_score_sum,
+        -- Monotonic: a retracted audit does not roll it back (the nightly reconcile does)
+        last_violation_at = GREATEST(s.last_violation_at, EXCLUDED.last_violation_at),
+        updated_at = NOW();
+
+    DELETE FROM public.seller_risk
+    WHERE seller_key IN (SELECT DISTINCT d.seller_key FROM unnest(deltas) d)
+      AND total_listings <= 0 AND audited <= 0;
+END;
+$$;
+
+-- 4. Triggers. Audit deltas resolve the seller through the listing; a listing whose seller changes
+-- moves both its own contribution and its audit's. Listings deleted by cascade (without deleting
+-- their audits first) cannot be resolved and are left to the nightly reconcile.
+CREATE OR REPLACE FUNCTION public.trg_seller_risk_audit()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    deltas public.seller_risk_delta[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        deltas := ARRAY(
+            SELECT ROW(1, public.seller_risk_key(l.seller_id, l.seller_name), l.seller_id, l.seller_name, 0, 1,
+                       n.fraud_score, n.is_price_ok, n.is_brand_correct,
+                       n.violation_details ? 'volumetric_mismatch', n.processed_at)::public.seller_risk_delta
+            FROM new_rows n
+            JOIN public.meli_listings l ON l.id = n.listing_id
+        );
+    ELSIF TG_OP = 'UPDATE' THEN
+        deltas := ARRAY(
+            SELECT v.d
+            FROM old_rows o
+            JOIN new_rows n ON n.id = o.id
+            JOIN public.meli_listings l ON l.id = n.listing_id
+            CROSS JOIN LATERAL (VALUES
+                (ROW(-1, public.seller_risk_key(l.seller_id, l.seller_name), l.seller_id, l.seller_name, 0, 1,
+                     o.fraud_score, o.is_price_ok, o.is_brand_correct,
+                     o.violation_details ? 'volumetric_mismatch', o.processed_at)::public.seller_risk_delta),
+                (ROW(1, public.seller_risk_key(l.seller_id, l.seller_name), l.seller_id, l.seller_name, 0, 1,
+                     n.fraud_score, n.is_price_ok, n.is_brand_correct,
+                     n.violation_details ? 'volumetric_mismatch', n.processed_at)::public.seller_risk_delta)
+            ) v(d)
+            WHERE (o.fraud_score, o.is_price_ok, o.is_brand_correct, o.violation_details ? 'volumetric_mismatch', o.processed_at)
+                IS DISTINCT FROM
+                  (n.fraud_score, n.is_price_ok, n.is_brand_correct, n.violation_details ? 'volumetric_mismatch', n.processed_at)
+        );
+    ELSE
+        deltas := ARRAY(
+            SELECT ROW(-1, public.seller_risk_key(l.seller_id, l.seller_name), l.seller_id, l.seller_name, 0, 1,
+                       o.fraud_score, o.is_price_ok, o.is_brand_correct,
+                       o.violation_details ? 'volumetric_mismatch', o.processed_at)::public.seller_risk_delta
+            FROM old_rows o
+            JOIN public.meli_listings l ON l.id = o.listing_id
+        );
+    END IF;
+
+    PERFORM public.seller_risk_apply_changes(deltas);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS seller_risk_audit_insert ON public.compliance_audit;
+CREATE TRIGGER seller_risk_audit_insert AFTER INSERT ON public.compliance_audit
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_seller_risk_audit();
+
+DROP TRIGGER IF EXISTS seller_risk_audit_update ON public.compliance_audit;
+CREATE TRIGGER seller_risk_audit_update AFTER UPDATE ON public.compliance_audit
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_seller_risk_audit();
+
+DROP TRIGGER IF EXISTS seller_risk_audit_delete ON public.compliance_audit;
+CREATE TRIGGER seller_risk_audit_delete AFTER DELETE ON public.compliance_audit
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_seller_risk_audit();
+
+CREATE OR REPLACE FUNCTION public.trg_seller_risk_listing()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    deltas public.seller_risk_delta[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        deltas := ARRAY(
+            SELECT ROW(1, public.seller_risk_key(n.seller_id, n.seller_name), n.seller_id, n.seller_name, 1, 0,
+                       NULL, NULL, NULL, NULL, NULL)::public.seller_risk_delta
+            FROM new_rows n
+        );
+    ELSIF TG_OP = 'UPDATE' THEN
+        -- Seller changed (typically enrichment filling seller_id): move listing + audit contributions
+        deltas := ARRAY(
+            SELECT v.d
+            FROM old_rows o
+            JOIN new_rows n ON n.id = o.id
+            LEFT JOIN public.compliance_audit a ON a.listing_id = n.id
+            CROSS JOIN LATERAL (VALUES
+                (ROW(-1, public.seller_risk_key(o.seller_id, o.seller_name), o.seller_id, o.seller_name, 1,
+                     (a.id IS NOT NULL)::INTEGER, a.fraud_score, a.is_price_ok, a.is_brand_correct,
+                     a.violation_details ? 'volumetric_mismatch', a.processed_at)::public.seller_risk_delta),
+                (ROW(1, public.seller_risk_key(n.seller_id, n.seller_name), n.seller_id, n.seller_name, 1,
+                     (a.id IS NOT NULL)::INTEGER, a.fraud_score, a.is_price_ok, a.is_brand_correct,
+                     a.violation_details ? 'volumetric_mismatch', a.processed_at)::public.seller_risk_delta)
+            ) v(d)
+            WHERE (o.seller_id, o.seller_name) IS DISTINCT FROM (n.seller_id, n.seller_name)
+        );
+    ELSE
+        deltas := ARRAY(
+            SELECT ROW(-1, public.seller_risk_key(o.seller_id, o.seller_name), o.seller_id, o.seller_name, 1, 0,
+                       NULL, NULL, NULL, NULL, NULL)::public.seller_risk_delta
+            FROM old_rows o
+        );
+    END IF;
+
+    PERFORM public.seller_risk_apply_changes(deltas);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS seller_risk_listing_insert ON public.meli_listings;
+CREATE TRIGGER seller_risk_listing_insert AFTER INSERT ON public.meli_listings
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_seller_risk_listing();
+
+DROP TRIGGER IF EXISTS seller_risk_listing_update ON public.meli_listings;
+CREATE TRIGGER seller_risk_listing_update AFTER UPDATE ON public.meli_listings
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_seller_risk_listing();
+
+DROP TRIGGER IF EXISTS seller_risk_listing_delete ON public.meli_listings;
+CREATE TRIGGER seller_risk_listing_delete AFTER DELETE ON public.meli_listings
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_seller_risk_listing();
+
+-- 5. Nightly reconciliation: recompute from the base tables and repair any drifted rows.
+-- Returns how many seller rows were corrected (0 means the triggers kept everything exact).
+CREATE OR REPLACE FUNCTION public.reconcile_seller_risk()
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    fixed INTEGER := 0;
+    removed INTEGER := 0;
+BEGIN
+    LOCK TABLE public.seller_risk IN EXCLUSIVE MODE;
+
+    CREATE TEMP TABLE _seller_risk_truth ON COMMIT DROP AS
+    SELECT
+        public.seller_risk_key(l.seller_id, l.seller_name) AS seller_key,
+        MAX(l.seller_id) AS seller_id,
+        MAX(l.seller_name) AS seller_name,
+        COUNT(l.id) AS total_listings,
+        COUNT(a.id) AS audited,
+        COUNT(a.id) FILTER (WHERE a.fraud_score >= 30) AS total_violations,
+        COUNT(a.id) FILTER (WHERE a.is_price_ok = false) AS price_violations,
+        COUNT(a.id) FILTER (WHERE a.fraud_score >= 60 AND a.is_brand_correct = false) AS brand_risk_violations,
+        COUNT(a.id) FILTER (WHERE a.fraud_score >= 60 AND a.violation_details ? 'volumetric_mismatch') AS format_fraud_violations,
+        COALESCE(SUM(a.fraud_score), 0) AS fraud_score_sum,
+        MAX(a.processed_at) AS last_violation_at
+    FROM public.meli_listings l
+    LEFT JOIN public.compliance_audit a ON a.listing_id = l.id
+    GROUP BY 1;
+
+    INSERT INTO public.seller_risk AS s (
+        seller_key, seller_id, seller_name, total_listings, audited, total_violations, price_violations,
+        brand_risk_violations, format_fraud_violations, fraud_score_sum, last_violation_at
+    )
+    SELECT t.* FROM _seller_risk_truth t
+    LEFT JOIN public.seller_risk r ON r.seller_key = t.seller_key
+    WHERE r.seller_key IS NULL
+       OR (r.total_listings, r.audited, r.total_violations, r.price_violations, r.brand_risk_violations,
+           r.format_fraud_violations, r.fraud_score_sum, r.last_violation_at)
+          IS DISTINCT FROM
+          (t.total_listings, t.audited, t.total_violations, t.price_violations, t.brand_risk_violations,
+           t.format_fraud_violations, t.fraud_score_sum, t.last_violation_at)
+    ON CONFLICT (seller_key) DO UPDATE SET
+        seller_id = EXCLUDED.seller_id,
+        seller_name = EXCLUDED.seller_name,
+        total_listings = EXCLUDED.total_listings,
+        audited = EXCLUDED.audited,
+        total_violations = EXCLUDED.total_violations,
+        price_violations = EXCLUDED.price_violations,
+        brand_risk_violations = EXCLUDED.brand_risk_violations,
+        format_fraud_violations = EXCLUDED.format_fraud_violations,
+        fraud_score_sum = EXCLUDED.fraud_score_sum,
+        last_violation_at = EXCLUDED.last_violation_at,
+        updated_at = NOW();
+    GET DIAGNOSTICS fixed = ROW_COUNT;
+
+    DELETE FROM public.seller_risk r
+    WHERE NOT EXISTS (SELECT 1 FROM _seller_risk_truth t WHERE t.seller_key = r.seller_key);
+    GET DIAGNOSTICS removed = ROW_COUNT;
+
+    RETURN fixed + removed;
+END;
+$$;
+
+-- 6. Same view name and columns for existing readers, now a plain read of the table
+DROP VIEW IF EXISTS public.seller_risk_summary;
+CREATE VIEW public.seller_risk_summary AS
+SELECT
+    seller_name,
+    total_listings,
+    total_violations,
+    price_violations,
+    brand_risk_violations,
+    format_fraud_violations,
+    avg_fraud_score,
+    last_violation_at,
+    risk_level,
+    violation_rate_pct,
+    seller_id,
+    seller_key
+FROM public.seller_risk
+ORDER BY total_violations DESC, avg_fraud_score DESC;
+
+COMMENT ON VIEW public.seller_risk_summary IS 'Summarizes brand protection compliance risk at the seller level (reads public.seller_risk).';
+
+GRANT SELECT ON public.seller_risk, public.seller_risk_summary TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.reconcile_seller_risk() TO service_role;
+
+-- Schedule with pg_cron where available (otherwise run scripts/reconcile_seller_risk.py from cron):
+-- SELECT cron.schedule('reconcile-seller-risk', '30 3 * * *', 'SELECT public.reconcile_seller_risk()');
+
+-- Backfill
+SELECT public.reconcile_seller_risk();
+
+NOTIFY pgrst, 'reload schema';
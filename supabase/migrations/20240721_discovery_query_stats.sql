@@ -0,0 +1,43 @@
+-- Migration: Discovery query statistics
+-- Purpose: Discovery used to run every brand / keyword with the same page budget. Each run now
+-- records, per search query, how many pages it fetched and how many listings it brought that no
+-- earlier query of the run had found (discovery_query_stats). discovery_query_yield adds what the
+-- audit made of those listings (identified vs noise). logic/query_planner.py reads both to prune
+-- overlapping queries, order them by yield and give each one an adaptive page budget.
+
+CREATE TABLE IF NOT EXISTS public.discovery_query_stats (
+    query TEXT PRIMARY KEY,
+    runs INTEGER NOT NULL DEFAULT 0,
+    pages_fetched INTEGER NOT NULL DEFAULT 0,     -- cumulative over all runs
+    listings_seen INTEGER NOT NULL DEFAULT 0,
+    new_listings INTEGER NOT NULL DEFAULT 0,
+    last_pages_budget INTEGER,                    -- last run only
+    last_pages_fetched INTEGER,
+    last_productive_pages INTEGER,                -- highest page that still brought new listings
+    last_new_listings INTEGER,
+    last_run_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+COMMENT ON TABLE public.discovery_query_stats IS 'Per-query page and new-listing counters written by scripts/discover_listings.py.';
+
+-- Audit outcome of the listings each query brought (search_keyword = query that last found the listing)
+CREATE OR REPLACE VIEW public.discovery_query_yield AS
+SELECT
+    l.search_keyword AS query,
+    COUNT(l.id) AS listings,
+    COUNT(a.id) FILTER (WHERE a.match_level > 0) AS identified,
+    COUNT(l.id) FILTER (WHERE l.item_status LIKE 'noise%' OR a.match_level = 0) AS noise
+FROM public.meli_listings l
+LEFT JOIN public.compliance_audit a ON a.listing_id = l.id
+WHERE l.search_keyword IS NOT NULL
+GROUP BY l.search_keyword;
+
+COMMENT ON VIEW public.discovery_query_yield IS 'Listings, identified and noise counts per discovery query.';
+
+CREATE INDEX IF NOT EXISTS idx_listings_search_keyword ON public.meli_listings(search_keyword);
+
+GRANT SELECT ON public.discovery_query_yield TO anon, authenticated, service_role;
+GRANT SELECT, INSERT, UPDATE ON public.discovery_query_stats TO service_role;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,9 @@
+-- Migration: Per-query rejected listing counts
+-- Purpose: Discovery now drops obvious noise (hard exclusions, no master product candidate) in the
+-- scraper process, before anything is written to meli_listings. Those listings no longer reach
+-- discovery_query_yield, so the rejected counts are kept per query to still tell noisy queries apart.
+
+ALTER TABLE public.discovery_query_stats ADD COLUMN IF NOT EXISTS rejected_listings INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE public.discovery_query_stats ADD COLUMN IF NOT EXISTS last_rejected_listings INTEGER;
+
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,25 @@
+-- Migration: Seller profile cache
+-- Purpose: The enrichers resolved seller nicknames with one /users/{id} call per listing, although a
+-- few hundred sellers account for thousands of listings. logic/seller_cache.py keeps one profile per
+-- seller (nickname, reputation level, official-store flag) with the time it was fetched, refreshes it
+-- after a TTL with batched /users?ids= calls, and shares it here so every machine running the
+-- enrichers or scripts/sync_seller_names.py reuses the same lookups. The table is optional: the
+-- cache also works from its local file alone.
+
+CREATE TABLE IF NOT EXISTS public.seller_profiles (
+    seller_id TEXT PRIMARY KEY,
+    nickname TEXT,
+    reputation_level TEXT,                         -- seller_reputation.level_id ('5_green', ...)
+    power_seller_status TEXT,                      -- 'platinum', 'gold', ... or NULL
+    is_official_store BOOLEAN NOT NULL DEFAULT FALSE,
+    fetched_at TIMESTAMP WITH TIME ZONE NOT NULL   -- TTL reference
+);
+
+COMMENT ON TABLE public.seller_profiles IS 'Seller profiles cached from /users by logic/seller_cache.py.';
+
+CREATE INDEX IF NOT EXISTS idx_seller_profiles_fetched_at ON public.seller_profiles(fetched_at);
+
+GRANT SELECT ON public.seller_profiles TO anon, authenticated, service_role;
+GRANT SELECT, INSERT, UPDATE ON public.seller_profiles TO service_role;
+
+NOTIFY pgrst, 'reload schema';
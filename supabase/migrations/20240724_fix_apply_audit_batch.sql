@@ -0,0 +1,83 @@
+-- Migration: Fix apply_audit_batch payload decoding
+-- Purpose: The first version of apply_audit_batch (20240712) decoded the payload with
+-- "jsonb_to_recordset(...) WITH ORDINALITY AS r(<typed columns>, ord)", which Postgres rejects
+-- (a column definition list cannot be combined with WITH ORDINALITY), so every RPC call failed.
+-- It also failed on a second call inside the same transaction (the ON COMMIT DROP temp table was
+-- still there). 20240712 is left as published; this re-creates the function on top of it.
+-- Same behaviour otherwise: last record wins when a listing appears twice in one batch.
+
+CREATE OR REPLACE FUNCTION public.apply_audit_batch(audits JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    audit_count INTEGER := 0;
+    status_count INTEGER := 0;
+BEGIN
+    -- 1. Decode the payload once (last record wins if a listing appears twice in the batch)
+    -- ON COMMIT DROP only fires at commit: a second call in the same transaction must not collide
+    DROP TABLE IF EXISTS pg_temp._incoming_audits;
+    CREATE TEMP TABLE _incoming_audits ON COMMIT DROP AS
+    SELECT DISTINCT ON (r.listing_id)
+        r.listing_id, r.master_product_id, r.match_level, r.is_brand_correct, r.is_price_ok,
+        r.is_publishable_ok, r.fraud_score, r.risk_level, r.violation_details, r.item_status
+    -- WITH ORDINALITY cannot take a column definition list directly: wrap it in ROWS FROM
+    FROM ROWS FROM (jsonb_to_recordset(audits) AS (
+        listing_id UUID,
+        master_product_id UUID,
+        match_level INTEGER,
+        is_brand_correct BOOLEAN,
+        is_price_ok BOOLEAN,
+        is_publishable_ok BOOLEAN,
+        fraud_score INTEGER,
+        risk_level TEXT,
+        violation_details JSONB,
+        item_status TEXT
+    )) WITH ORDINALITY AS r(
+        listing_id, master_product_id, match_level, is_brand_correct, is_price_ok,
+        is_publishable_ok, fraud_score, risk_level, violation_details, item_status, ord
+    )
+    WHERE r.listing_id IS NOT NULL
+    ORDER BY r.listing_id, r.ord DESC;
+
+    -- 2. Upsert audit results (same conflict key as the REST upsert)
+    INSERT INTO public.compliance_audit (
+        listing_id, master_product_id, match_level, is_brand_correct, is_price_ok,
+        is_publishable_ok, fraud_score, risk_level, violation_details, processed_at
+    )
+    SELECT
+        listing_id, master_product_id, match_level,
+        COALESCE(is_brand_correct, true), COALESCE(is_price_ok, true), COALESCE(is_publishable_ok, true),
+        COALESCE(fraud_score, 0), risk_level, violation_details, NOW()
+    FROM _incoming_audits
+    ON CONFLICT (listing_id) DO UPDATE SET
+        master_product_id = EXCLUDED.master_product_id,
+        match_level = EXCLUDED.match_level,
+        is_brand_correct = EXCLUDED.is_brand_correct,
+        is_price_ok = EXCLUDED.is_price_ok,
+        is_publishable_ok = EXCLUDED.is_publishable_ok,
+        fraud_score = EXCLUDED.fraud_score,
+        risk_level = EXCLUDED.risk_level,
+        violation_details = EXCLUDED.violation_details,
+        processed_at = EXCLUDED.processed_at;
+    GET DIAGNOSTICS audit_count = ROW_COUNT;
+
+    -- 3. Sync listing status (noise / active), skipping rows that are already correct
+    UPDATE public.meli_listings l
+    SET item_status = i.item_status
+    FROM _incoming_audits i
+    WHERE l.id = i.listing_id
+      AND i.item_status IS NOT NULL
+      AND l.item_status IS DISTINCT FROM i.item_status;
+    GET DIAGNOSTICS status_count = ROW_COUNT;
+
+    RETURN jsonb_build_object('audits', audit_count, 'status_updates', status_count);
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.apply_audit_batch(JSONB) TO anon, authenticated, service_role;
+
+COMMENT ON FUNCTION public.apply_audit_batch(JSONB) IS 'Bulk upsert of compliance_audit + meli_listings.item_status sync in a single transaction.';
+
+-- Make PostgREST pick up the new function without a restart
+NOTIFY pgrst, 'reload schema';
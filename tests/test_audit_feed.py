@@ -0,0 +1,89 @@
+import os
+import sys
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.sqlite_storage import SQLiteStorage
+from logic.audit_feed import fetch_audit_page, build_feed_query, encode_cursor
+from logic.constants import STRICT_NOISE_IDS
+
+def _seed():
+    db = SQLiteStorage(":memory:")
+    db.upsert_master_products([{"ean": "1", "brand": "Nutrilon", "product_name": "Nutrilon Profutura 1"}])
+    master_id = db.get_master_products()[0]["id"]
+
+    meli_ids = [f"MLA{i}" for i in range(1, 8)] + [STRICT_NOISE_IDS[0]]
+    db.upsert_meli_listings([{"meli_id": m, "title": f"Listing {m}", "seller_name": "SELLER_A" if i % 2 else "SELLER_B"}
+                             for i, m in enumerate(meli_ids)])
+    listings = {l["meli_id"]: l["id"] for l in db.get_meli_listings()}
+
+    audits = []
+    for i, meli_id in enumerate(meli_ids):
+        noise = meli_id == "MLA7"
+        audits.append({
+            "listing_id": listings[meli_id], "master_product_id": None if noise else master_id,
+            "match_level": 0 if noise else 1, "fraud_score": i * 10, "risk_level": "Alto" if i >= 4 else "Bajo",
+            "is_price_ok": i % 3 != 0, "item_status": "noise" if noise else "active"
+        })
+    db.apply_audit_batch(audits)
+    return db
+
+def test_audit_feed_pages_and_filters():
+    db = _seed()
+
+    # Keyset pagination over the active view walks every row exactly once
+    seen, cursor = [], None
+    while True:
+        params = {"view": "active", "sort": "fraud_score", "limit": "2", "fields": "meli_id,fraud_score"}
+        if cursor:
+            params["cursor"] = cursor
+        page = fetch_audit_page(db, params)
+        if not cursor:
+            assert page["hidden_by_blacklist"] == 1
+        seen.extend(item["meli_id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert seen == ["MLA6", "MLA5", "MLA4", "MLA3", "MLA2", "MLA1"]
+
+    noise = fetch_audit_page(db, {"view": "noise"})["items"]
+    assert [i["meli_id"] for i in noise] == ["MLA7"]
+
+    low_price = fetch_audit_page(db, {"view": "active", "risk_level": "Bajo", "price_violation": "true"})["items"]
+    assert sorted(i["meli_id"] for i in low_price) == ["MLA1", "MLA4"] and low_price[0]["master_brand"] == "Nutrilon"
+
+    seller = fetch_audit_page(db, {"view": "active", "seller": "SELLER_A", "brand": "Nutrilon", "match_level": "1,2"})["items"]
+    assert sorted(i["meli_id"] for i in seller) == ["MLA2", "MLA4", "MLA6"]
+
+def _walk(db, params):
+    seen, cursor = [], None
+    while True:
+        page = fetch_audit_page(db, {**params, **({"cursor": cursor} if cursor else {})})
+        seen.extend(item["meli_id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            return seen
+
+def test_null_sort_values_page_through():
+    db = _seed()
+    # Audits written without a score (legacy rows): NULL sort values, two of them tied
+    nulls = {l["meli_id"]: l["id"] for l in db.get_meli_listings() if l["meli_id"] in ("MLA2", "MLA5")}
+    db.upsert_compliance_audit([{"listing_id": i, "fraud_score": None} for i in nulls.values()])
+    assert "None" not in build_feed_query({"cursor": encode_cursor({"id": "x", "fraud_score": None}, "fraud_score"),
+                                           "sort": "fraud_score"})["filters"]["and"]
+
+    params = {"view": "active", "sort": "fraud_score", "limit": "2", "fields": "meli_id,fraud_score"}
+    desc = _walk(db, {**params, "order": "desc"})
+    asc = _walk(db, {**params, "order": "asc"})
+    # Every row exactly once; NULL counts as the largest value (first in desc, last in asc)
+    assert sorted(desc) == sorted(asc) == ["MLA1", "MLA2", "MLA3", "MLA4", "MLA5", "MLA6"]
+    assert set(desc[:2]) == set(asc[-2:]) == {"MLA2", "MLA5"}
+    assert desc[2:] == ["MLA6", "MLA4", "MLA3", "MLA1"] and asc[:4] == ["MLA1", "MLA3", "MLA4", "MLA6"]
+
+    # Page size 1 so a cursor lands on each NULL row
+    assert sorted(_walk(db, {**params, "limit": "1"})) == sorted(desc)
+
+if __name__ == "__main__":
+    test_audit_feed_pages_and_filters()
+    test_null_sort_values_page_through()
+    print("✅ SUCCESS: audit feed pagination and filters")
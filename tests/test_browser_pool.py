@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+import asyncio
+import tempfile
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.browser_pool import BrowserPool, cleanup_stale_profiles
+
+class FakeRequest:
+    def __init__(self, frame):
+        self.frame = frame
+    def is_navigation_request(self):
+        return True
+
+class FakePage:
+    def __init__(self):
+        self.main_frame = object()
+        self.handlers = {}
+    def on(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+    def emit(self, event, arg):
+        for handler in self.handlers.get(event, []):
+            handler(arg)
+    async def goto(self, url):
+        self.emit("request", FakeRequest(self.main_frame))
+
+class FakeContext:
+    def __init__(self, log):
+        self.pages = []
+        self.log = log
+        self.closed = False
+    def on(self, event, handler):
+        pass
+    async def set_extra_http_headers(self, headers):
+        pass
+    async def route(self, pattern, handler):
+        pass
+    async def new_page(self):
+        page = FakePage()
+        self.pages.append(page)
+        return page
+    async def storage_state(self):
+        return {"cookies": [{"name": "session"}]}
+    async def close(self):
+        self.closed = True
+
+class FakeBrowser:
+    def __init__(self, log):
+        self.log = log
+    def is_connected(self):
+        return True
+    async def new_context(self, storage_state=None, **options):
+        self.log.append(("context", storage_state))
+        return FakeContext(self.log)
+    async def close(self):
+        pass
+
+class FakeChromium:
+    def __init__(self):
+        self.log = []
+    async def launch(self, **options):
+        self.log.append(("launch", options["headless"]))
+        return FakeBrowser(self.log)
+    async def launch_persistent_context(self, path, **options):
+        self.log.append(("persistent", os.path.basename(path)))
+        return FakeContext(self.log)
+
+class FakePlaywright:
+    def __init__(self):
+        self.chromium = FakeChromium()
+    async def stop(self):
+        pass
+
+def make_pool(**kwargs):
+    pool = BrowserPool(cleanup=False, **kwargs)
+    pool._playwright = FakePlaywright()
+    return pool, pool._playwright.chromium.log
+
+def test_contexts_are_reused_and_recycled():
+    async def run():
+        pool, log = make_pool(max_navigations=2)
+        async with pool.lease() as lease:
+            first = await lease.page()
+            await first.goto("a")
+            await first.goto("b")
+            # Navigation limit reached: next page() is a new context with the same cookies
+            second = await lease.page()
+            assert second is not first
+        async with pool.lease() as lease:
+            assert await lease.page() is second  # warm idle context handed back
+        async with pool.lease(blocking="discovery") as lease:
+            assert await lease.page() is not second  # different options, different context
+        stats = pool.stats()
+        await pool.close()
+        return log, stats
+
+    log, stats = asyncio.run(run())
+    assert [e for e in log if e[0] == "launch"] == [("launch", True)]  # one shared browser
+    assert ("context", {"cookies": [{"name": "session"}]}) in log
+    assert stats["recycled"] == 1 and stats["launched"] == 1
+
+def test_persistent_profile_opened_once_and_crash_reopens():
+    async def run():
+        pool, log = make_pool()
+        async with pool.lease(profile="enricher") as lease:
+            page = await lease.page()
+            page.emit("crash", page)
+            assert await lease.page() is not page
+        async with pool.lease(profile="enricher") as lease:
+            await lease.page()
+        stats = pool.stats()
+        await pool.close()
+        return log, stats
+
+    log, stats = asyncio.run(run())
+    assert log.count(("persistent", "enricher")) == 2  # initial open + reopen after the crash
+    assert stats["crashes"] == 1
+
+def test_cleanup_removes_only_old_per_run_profiles():
+    with tempfile.TemporaryDirectory() as root:
+        for name in ("temp_enrich_1700000000", "discovery_session_1700000000", "temp_enrich_new", "manual_session_hotspot"):
+            os.makedirs(os.path.join(root, name))
+        old = time.time() - 48 * 3600
+        for name in ("temp_enrich_1700000000", "discovery_session_1700000000", "manual_session_hotspot"):
+            os.utime(os.path.join(root, name), (old, old))
+        removed = cleanup_stale_profiles(root, max_age_hours=12)
+        assert removed == ["discovery_session_1700000000", "temp_enrich_1700000000"]
+        assert sorted(os.listdir(root)) == ["manual_session_hotspot", "temp_enrich_new"]
+
+if __name__ == "__main__":
+    test_contexts_are_reused_and_recycled()
+    test_persistent_profile_opened_once_and_crash_reopens()
+    test_cleanup_removes_only_old_per_run_profiles()
+    print("✅ SUCCESS: browser pool")
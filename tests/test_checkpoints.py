@@ -0,0 +1,82 @@
+import os
+import sys
+import asyncio
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.checkpoints import Checkpoint
+from logic.listing_sink import ListingSink
+from logic.sqlite_storage import SQLiteStorage
+
+def test_resume_skips_done_items():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "checkpoints.db")
+        run = Checkpoint.open("product_enricher", params={"ids": ["a", "b", "c"]}, path=path)
+        run.mark("a")
+        run.mark("stop|nutrilon", value=1)
+        run.conn.close()  # crash: the run is never finished
+
+        resumed = Checkpoint.open("product_enricher", resume="last", path=path)
+        assert resumed.run_id == run.run_id and resumed.resumed
+        assert resumed.done["stop|nutrilon"] == 1
+        rows = [{"id": "a"}, {"id": "b"}, {"id": "c"}, {"id": "d"}]
+        assert [r["id"] for r in resumed.remaining(rows)] == ["b", "c"]
+
+        resumed.mark("b", "c")
+        resumed.finish()
+        try:
+            Checkpoint.open("product_enricher", resume="last", path=path)
+            assert False, "a completed run is not resumed by 'last'"
+        except ValueError:
+            pass
+        try:
+            Checkpoint.open("discovery", resume=run.run_id, path=path)
+            assert False, "run ids belong to one flow"
+        except ValueError:
+            pass
+        resumed.conn.close()
+
+def test_sink_marks_pages_only_after_their_rows_are_stored():
+    class FailingStorage(SQLiteStorage):
+        fail = False
+
+        def bulk_load(self, table, rows, **kwargs):
+            return False if self.fail else super().bulk_load(table, rows, **kwargs)
+
+    async def run():
+        db = FailingStorage(":memory:")
+        marked = []
+        sink = ListingSink(db, flush_rows=100, on_flush=marked.extend)
+        await sink.add([{"meli_id": "MLA1", "title": "A"}], mark="page|1|nutrilon")
+        await sink.add([], mark="page|2|nutrilon")
+        assert marked == []
+        await sink.flush()
+        assert marked == ["page|1|nutrilon", "page|2|nutrilon"]
+
+        db.fail = True
+        await sink.add([{"meli_id": "MLA2", "title": "B"}], mark="page|1|vital")
+        assert not await sink.close()
+        return marked
+
+    assert asyncio.run(run()) == ["page|1|nutrilon", "page|2|nutrilon"]
+
+def test_marks_from_executor_threads():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "checkpoints.db")
+        run = Checkpoint.open("meli_api_enricher", path=path)
+        # Enricher workers mark listings on the one shared connection
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(run.mark, [f"listing-{i}" for i in range(400)]))
+        run.finish("partial")
+        run.conn.close()
+        resumed = Checkpoint.open("meli_api_enricher", resume=run.run_id, path=path)
+        assert len(resumed.done) == 400
+        resumed.conn.close()
+
+if __name__ == "__main__":
+    test_resume_skips_done_items()
+    test_sink_marks_pages_only_after_their_rows_are_stored()
+    test_marks_from_executor_threads()
+    print("✅ SUCCESS: checkpoints and resume")
@@ -0,0 +1,98 @@
+import os
+import sys
+import json
+import asyncio
+import tempfile
+import pytest
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts import discover_listings
+from scripts.discover_listings import MeliBrowserDiscovery, page_key, stop_key
+from logic.checkpoints import Checkpoint
+from scrapers.rate_limiter import RateLimiter, TARGETS
+from scrapers.search_state import extract_listings
+
+# No real pacing in tests
+FAST = {"web_search": dict(TARGETS["web_search"], rate=1000.0, max_rate=1000.0)}
+
+@pytest.fixture(autouse=True)
+def sqlite_backend(monkeypatch):
+    # MeliBrowserDiscovery opens its storage from the environment
+    monkeypatch.setenv("BPP_STORAGE_BACKEND", "sqlite")
+    monkeypatch.setenv("BPP_SQLITE_PATH", ":memory:")
+
+class FakeLease:
+    async def page(self):
+        return object()
+
+def run_worker(tmp, readiness, monkeypatch):
+    """Runs one browser worker over 'readiness' ({page_num: signal}) for the query 'nutrilon'."""
+    agent = MeliBrowserDiscovery(pages_per_query=3)
+    agent.checkpoint = Checkpoint.open("discovery", path=os.path.join(tmp, "checkpoints.db"))
+    agent.limiter = RateLimiter("discovery", path=os.path.join(tmp, "rate_limits.db"), targets=FAST)
+    agent.search_rate = agent.limiter.target("web_search")
+    recorded = []
+
+    async def goto_ready(page, url, signals, stats=None, **kwargs):
+        return object(), readiness[int(url.split("#page=")[1])]
+
+    async def extract_page(page, stats):
+        return []
+
+    async def record_page(worker_id, job, records, stats):
+        recorded.append(job["page"])
+
+    agent.extract_page = extract_page
+    agent.record_page = record_page
+    monkeypatch.setattr(discover_listings, "goto_ready", goto_ready)
+
+    async def main():
+        queue = asyncio.Queue()
+        for page_num in sorted(readiness):
+            queue.put_nowait({"query": "nutrilon", "page": page_num, "url": f"https://example.test#page={page_num}"})
+        queue.put_nowait(None)
+        stats = {"queries": 0, "total_queries": 1, "skipped": 0, "failed": 0}
+        await agent.worker(1, FakeLease(), queue, stats)
+        return stats
+    return agent, asyncio.run(main()), recorded
+
+def test_unready_page_is_a_failure_not_the_end_of_the_query(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        agent, stats, recorded = run_worker(tmp, {1: None, 2: "results", 3: "results"}, monkeypatch)
+        # The timed-out page is counted and backs the target off; the query keeps going
+        assert stats["failed"] == 1 and stats["skipped"] == 0
+        assert recorded == [2, 3] and "nutrilon" not in agent.exhausted
+        assert agent.limiter.summary()["web_search"]["throttled"] == 1
+        # Nothing is checkpointed for it: --resume fetches the page again
+        job = {"query": "nutrilon", "page": 1}
+        assert not agent.checkpoint.is_done(page_key(job)) and not agent.checkpoint.is_done(stop_key("nutrilon"))
+        agent.limiter.close()
+        agent.checkpoint.conn.close()
+
+def test_real_no_results_stops_the_query(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        agent, stats, recorded = run_worker(tmp, {1: "results", 2: "no_results", 3: "results"}, monkeypatch)
+        assert recorded == [1] and stats["failed"] == 0 and stats["skipped"] == 1
+        assert agent.exhausted["nutrilon"] == 1
+        assert agent.checkpoint.is_done(page_key({"query": "nutrilon", "page": 2}))
+        assert agent.checkpoint.is_done(stop_key("nutrilon"))
+        agent.limiter.close()
+        agent.checkpoint.conn.close()
+
+def test_state_records_keep_the_seller_fields():
+    state = {"results": [{
+        "id": "MLA1400000002", "title": "Vital 3 800g", "price": {"amount": 19999.5},
+        "permalink": "https://articulo.mercadolibre.com.ar/MLA-1400000002-vital_JM",
+        "seller": {"id": 99, "nickname": "SELLER_X", "seller_reputation": {"level_id": "5_green"}},
+    }]}
+    agent = MeliBrowserDiscovery()
+    row = agent.to_listings(extract_listings(json.dumps(state)), "vital")[0]
+    assert (row["seller_id"], row["seller_name"], row["seller_reputation"]) == ("99", "SELLER_X", "5_green")
+    # DOM cards have no seller id: the column is left out rather than blanked
+    dom = dict(extract_listings(json.dumps(state))[0], seller_id="N/A", seller_reputation="N/A")
+    assert "seller_id" not in agent.to_listings([dom], "vital")[0]
+
+if __name__ == "__main__":
+    if pytest.main([__file__, "-q"]) == 0:
+        print("✅ SUCCESS: discovery worker readiness handling")
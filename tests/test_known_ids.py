@@ -0,0 +1,46 @@
+import os
+import sys
+import tempfile
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.sqlite_storage import SQLiteStorage
+from logic.known_ids import BloomFilter, KnownIds
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=5000, error_rate=0.01)
+    ids = [f"MLA{1000000 + i}" for i in range(5000)]
+    for meli_id in ids:
+        bloom.add(meli_id)
+    assert all(meli_id in bloom for meli_id in ids)
+    false_positives = sum(f"MLA{9000000 + i}" in bloom for i in range(5000))
+    assert false_positives < 5000 * 0.03
+    assert len(bloom) > 4900  # ids colliding with earlier ones do not count
+
+def test_known_ids_refresh_only_reads_new_listings():
+    db = SQLiteStorage(":memory:")
+    db.upsert_meli_listings([
+        {"meli_id": "MLA1", "title": "Nutrilon 1", "last_scraped_at": "2024-07-01T10:00:00"},
+        {"meli_id": "MLA2", "title": "Nutrilon 2", "last_scraped_at": "2024-07-01T11:00:00"},
+    ])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "known_ids.bloom")
+        known = KnownIds(db, path=path, capacity=1000).load()
+        assert "MLA1" in known and "MLA2" in known and "MLA3" not in known
+        known.save()
+
+        db.upsert_meli_listings([{"meli_id": "MLA3", "title": "Nutrilon 3", "last_scraped_at": "2024-07-02T09:00:00"}])
+        reloaded = KnownIds(db, path=path, capacity=1000)
+        reloaded.load()
+        assert reloaded.since == "2024-07-02T09:00:00"
+        assert all(f"MLA{i}" in reloaded for i in (1, 2, 3)) and len(reloaded.filter) == 3
+
+        # A corrupt file is rebuilt from a full scan
+        with open(path, "wb") as f:
+            f.write(b"not a filter")
+        assert "MLA1" in KnownIds(db, path=path, capacity=1000).load()
+
+if __name__ == "__main__":
+    test_bloom_filter_has_no_false_negatives()
+    test_known_ids_refresh_only_reads_new_listings()
+    print("✅ SUCCESS: known listing ids")
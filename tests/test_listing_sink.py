@@ -0,0 +1,47 @@
+import os
+import sys
+import time
+import asyncio
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.sqlite_storage import SQLiteStorage
+from logic.listing_sink import ListingSink
+from scrapers.politeness import HostBudget
+
+def test_sink_merges_and_writes_behind():
+    async def run():
+        db = SQLiteStorage(":memory:")
+        sink = ListingSink(db, flush_rows=2)
+        assert await sink.add([{"meli_id": "MLA1", "title": "A", "seller_name": "N/A"}]) == 1
+        # Same listing from another query/page: known id, placeholder seller replaced
+        assert await sink.add([{"meli_id": "MLA1", "title": "A", "seller_name": "SELLER"},
+                               {"meli_id": "MLA2", "title": "B"}]) == 1
+        assert await sink.close()
+        return db, sink
+
+    db, sink = asyncio.run(run())
+    rows = {r["meli_id"]: r for r in db.get_meli_listings()}
+    assert sink.written == 2 and rows["MLA1"]["seller_name"] == "SELLER"
+
+def test_host_budget_spaces_navigations():
+    async def run():
+        budget = HostBudget(max_concurrent=4, min_interval=0.05)
+        starts = []
+
+        async def navigate():
+            async with budget.slot("https://listado.mercadolibre.com.ar/nutrilon"):
+                starts.append(time.monotonic())
+
+        await asyncio.gather(*(navigate() for _ in range(4)))
+        return budget, sorted(starts)
+
+    budget, starts = asyncio.run(run())
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    assert all(g >= 0.045 for g in gaps)
+    assert budget.stats()["listado.mercadolibre.com.ar"]["requests"] == 4
+
+if __name__ == "__main__":
+    test_sink_merges_and_writes_behind()
+    test_host_budget_spaces_navigations()
+    print("✅ SUCCESS: listing sink and host budget")
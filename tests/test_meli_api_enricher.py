@@ -0,0 +1,148 @@
+import os
+import sys
+import tempfile
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enrichers.meli_api_enricher import MeliAPIEnricher, parse_item, MULTIGET_SIZE
+from logic.checkpoints import Checkpoint
+from logic.sqlite_storage import SQLiteStorage
+from logic.seller_cache import SellerCache
+from scrapers.rate_limiter import RateLimiter, TARGETS
+
+# No real pacing in tests
+FAST = {"api": dict(TARGETS["api"], rate=1000.0, max_rate=1000.0)}
+
+ITEM = {
+    "id": "MLA100", "seller_id": 7, "available_quantity": 1, "sold_quantity": 150,
+    "variations": [{"available_quantity": 4}, {"available_quantity": 6}],
+    "attributes": [
+        {"id": "BRAND", "name": "Marca", "value_name": "Nutrilon"},
+        {"id": "GTIN", "name": "Código universal de producto", "value_name": "7790001"},
+        {"id": "UNITS", "name": "Unidades", "value_struct": {"number": 1}},
+    ],
+}
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+class FakeSession:
+    """Multiget knows MLA100, refuses MLA200 with the token, and MLA300 is a catalog product."""
+
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.urls.append(url)
+        if "/items?ids=" in url:
+            ids = url.split("ids=")[1].split("&")[0].split(",")
+            entries = []
+            for item_id in ids:
+                if item_id == "MLA100":
+                    entries.append({"code": 200, "body": ITEM})
+                elif item_id == "MLA200":
+                    entries.append({"code": 200, "body": {"id": "MLA200", "seller_id": 7, "available_quantity": 0}} if not headers
+                                   else {"code": 403, "body": {"id": "MLA200"}})
+                else:
+                    entries.append({"code": 404, "body": {"message": "not found"}})
+            return FakeResponse(200, entries)
+        if url.endswith("/products/MLA300"):
+            return FakeResponse(200, {"id": "MLA300", "main_features": [{"key": "EAN", "value": "7790002"}], "brand": "Vital"})
+        if "/users?ids=" in url:
+            return FakeResponse(200, [{"code": 200, "body": {"id": int(i), "nickname": "FARMACIA_CENTRAL",
+                                                              "seller_reputation": {"level_id": "5_green"}}}
+                                      for i in url.split("ids=")[1].split(",")])
+        return FakeResponse(404, {})
+
+def make_enricher(tmp, delta=False):
+    db = SQLiteStorage(":memory:")
+    enricher = MeliAPIEnricher(delta=delta, db=db, limiter=RateLimiter("test", path=os.path.join(tmp, "rate_limits.db"), targets=FAST),
+                               sellers=SellerCache(path=os.path.join(tmp, "seller_cache.db"), db=db))
+    enricher.sellers.http_get = enricher.api_get
+    enricher.session = FakeSession()
+    enricher.access_token = "token"
+    enricher.status_file = os.path.join(tmp, "enricher_status.json")
+    return enricher
+
+def test_parse_item_reads_every_field_from_the_batch_body():
+    details = parse_item(ITEM)
+    assert details["ean"] == "7790001" and details["brand"] == "Nutrilon"
+    assert details["available_quantity"] == 10 and details["sold_quantity"] == 150
+    assert details["seller_id"] == 7 and details["attributes"]["Unidades"] == 1
+
+def test_one_multiget_call_per_batch():
+    with tempfile.TemporaryDirectory() as tmp:
+        enricher = make_enricher(tmp)
+        found = enricher.fetch_batch(["MLA100", "mla-200", "MLA300", "MLA404"])
+        assert set(found) == {"MLA100", "MLA200", "MLA300"}
+        assert found["MLA100"]["seller_name"] == "FARMACIA_CENTRAL" and found["MLA100"]["seller_reputation"] == "5_green"
+        assert found["MLA300"]["ean"] == "7790002" and found["MLA300"]["brand"] == "Vital"
+        # multiget, multiget without token for the refused id, 2 catalog lookups, 1 seller lookup
+        assert enricher.requests == 5
+        assert [u for u in enricher.session.urls if "/users" in u] == ["https://api.mercadolibre.com/users?ids=7"]
+
+        # A full batch is still one call, and the seller is now cached
+        enricher.session.urls = []
+        enricher.fetch_batch(["MLA100"] * 3 + [f"MLA{n}" for n in range(1000, 1000 + MULTIGET_SIZE - 1)])
+        assert sum("/items?ids=" in u for u in enricher.session.urls) == 1
+        assert not any("/users" in u for u in enricher.session.urls)
+        enricher.limiter.close()
+        enricher.sellers.close()
+
+def test_failed_writes_stay_unchecked_for_resume():
+    with tempfile.TemporaryDirectory() as tmp:
+        enricher = make_enricher(tmp)
+        checkpoint = Checkpoint.open("meli_api_enricher", path=os.path.join(tmp, "checkpoints.db"))
+        enricher.db.update_meli_listing = lambda listing_id, data: (_ for _ in ()).throw(RuntimeError("db down"))
+        enricher.process_product({"id": "a", "meli_id": "MLA100"}, parse_item(ITEM), checkpoint)
+        enricher.process_product({"id": "b", "meli_id": "MLA404"}, None, checkpoint)
+        assert enricher.progress["failed"] == 1 and enricher.progress["processed"] == 2
+        assert not checkpoint.is_done("a") and checkpoint.is_done("b")
+        checkpoint.conn.close()
+        enricher.limiter.close()
+        enricher.sellers.close()
+
+def test_delta_watermark_waits_for_failed_listings():
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)  # checkpoints.db under ./user_data
+        try:
+            enricher = make_enricher(tmp, delta=True)
+            enricher.db.upsert_meli_listings([
+                {"meli_id": "MLA100", "title": "Nutrilon 800 Gr", "last_scraped_at": "2024-07-10T08:00:00Z"},
+                {"meli_id": "MLA404", "title": "Vital 400 Gr", "last_scraped_at": "2024-07-10T09:00:00+00:00"},
+            ])
+            write = enricher.db.update_meli_listing
+            enricher.db.update_meli_listing = lambda listing_id, data: (_ for _ in ()).throw(RuntimeError("db down"))
+            enricher.enrich_products()
+            # MLA100 failed to save: the watermark stays put and the next delta run sees both again
+            assert enricher.progress["failed"] == 1 and enricher.db.get_watermark("meli_api_enricher") == {}
+            assert len(enricher.get_products_to_enrich()) == 2
+            enricher.limiter = RateLimiter("test", path=os.path.join(tmp, "rate_limits.db"), targets=FAST)
+            enricher.sellers = SellerCache(path=os.path.join(tmp, "seller_cache.db"), db=enricher.db)
+
+            enricher.db.update_meli_listing = write
+            enricher.progress["failed"] = 0
+            enricher.enrich_products()
+            assert enricher.db.get_watermark("meli_api_enricher")["last_scraped_at"] == "2024-07-10T09:00:00+00:00"
+            # The write stamps the column consumers of 'last_enriched_at' (sync_seller_names) watch
+            stored = enricher.db.get_meli_listings(select="last_enriched_at", filters={"meli_id": "eq.MLA100"})
+            assert stored[0]["last_enriched_at"]
+        finally:
+            os.chdir(cwd)
+
+if __name__ == "__main__":
+    test_parse_item_reads_every_field_from_the_batch_body()
+    test_one_multiget_call_per_batch()
+    test_failed_writes_stay_unchecked_for_resume()
+    test_delta_watermark_waits_for_failed_listings()
+    print("✅ SUCCESS: multiget API enricher")
@@ -0,0 +1,39 @@
+import os
+import sys
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.sqlite_storage import SQLiteStorage
+from logic.identification_engine import IdentificationEngine
+
+def make_engine():
+    db = SQLiteStorage(":memory:")
+    db.upsert_master_products([
+        {"ean": "7790001", "brand": "Nutrilon", "product_name": "Nutrilon Profutura 1 800 Gr", "fc_net": 0.8},
+        {"ean": "7790002", "brand": "Vital", "product_name": "Vital 1.5 Kcal 200 Ml", "fc_net": 0.2},
+    ])
+    return IdentificationEngine(db)
+
+def test_obvious_noise_is_classified_before_matching():
+    engine = make_engine()
+    book = {"title": "Libro Fortini Poesia Edicion Tapa Blanda", "search_keyword": "fortini", "category_id": "MLA3025"}
+    motor_oil = {"title": "Aceite Motor Castrol 20w50 4 Litros", "search_keyword": "vital", "category_id": "MLA1234"}
+    unrelated = {"title": "Mate De Calabaza Con Bombilla", "search_keyword": "vital"}
+    assert engine.classify_noise(book).startswith("noise_category_id")
+    assert engine.classify_noise(motor_oil) is not None
+    assert engine.classify_noise(unrelated) == "no_candidate"
+
+def test_brand_listings_pass_and_audit_agrees():
+    engine = make_engine()
+    listing = {"title": "Nutrilon Profutura 1 Leche Infantil 800 Gr", "search_keyword": "nutrilon", "category_id": "MLA1234"}
+    assert engine.classify_noise(listing) is None
+    assert engine.identify_product(dict(listing))["match_level"] > 0
+
+    # What classify_noise rejects, the audit marks as noise too
+    unrelated = {"title": "Mate De Calabaza Con Bombilla", "search_keyword": "vital"}
+    assert engine.identify_product(unrelated)["match_level"] == 0
+
+if __name__ == "__main__":
+    test_obvious_noise_is_classified_before_matching()
+    test_brand_listings_pass_and_audit_agrees()
+    print("✅ SUCCESS: scrape-time noise rejection")
@@ -0,0 +1,70 @@
+import os
+import sys
+import asyncio
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers import page_readiness
+from scrapers.page_readiness import wait_ready, goto_ready, selector, preloaded_state, search_signals, ReadinessStats
+
+class FakePage:
+    """Selectors appear after the given delay (s); missing ones never appear."""
+    def __init__(self, appear_after, state_after=None, complete_after=None):
+        self.appear_after = appear_after
+        self.state_after = state_after
+        self.complete_after = complete_after
+
+    async def _wait(self, delay, timeout):
+        if delay is None or delay * 1000 > timeout:
+            await asyncio.sleep(timeout / 1000)
+            raise TimeoutError("timeout")
+        await asyncio.sleep(delay)
+
+    async def wait_for_selector(self, css, state="attached", timeout=30000):
+        await self._wait(self.appear_after.get(css), timeout)
+
+    async def wait_for_function(self, expression, arg=None, timeout=30000):
+        await self._wait(self.complete_after if arg else self.state_after, timeout)
+
+def test_first_signal_wins_and_is_recorded():
+    stats = ReadinessStats()
+    page = FakePage({".results": 0.05}, state_after=0.01)
+    signals = [selector(".results", "results"), preloaded_state(), selector(".empty", "no_results", timeout=200)]
+    assert asyncio.run(wait_ready(page, signals, stats)) == "preloaded_state"
+    # A signal that times out does not win over a later one that holds
+    page = FakePage({".results": 0.05})
+    assert asyncio.run(wait_ready(page, [selector(".results", "results"), selector(".empty", "no_results", timeout=10)], stats)) == "results"
+    summary = stats.summary()
+    assert summary["preloaded_state"]["n"] == 1 and summary["results"]["n"] == 1 and summary["timeouts"] == 0
+
+def test_all_signals_time_out():
+    stats = ReadinessStats()
+    page = FakePage({})
+    assert asyncio.run(wait_ready(page, [selector(".results", timeout=20), preloaded_state(timeout=30)], stats)) is None
+    assert stats.timeouts == 1 and stats.summary()["timeout"]["max_ms"] < 1000
+
+def test_search_results_wait_for_the_parsed_document():
+    calls = []
+
+    async def goto_with_retries(page, url, **kwargs):
+        calls.append(kwargs["wait_until"])
+        return object()
+
+    original = page_readiness.goto_with_retries
+    page_readiness.goto_with_retries = goto_with_retries
+    try:
+        # The first card is attached long before the list (or the state script) is complete
+        page = FakePage({".ui-search-layout__item, .ui-search-item__title": 0.01}, complete_after=0.05)
+        response, ready = asyncio.run(goto_ready(page, "https://listado.test/nutrilon", search_signals(200)))
+        assert ready == "results" and calls == ["domcontentloaded"]
+        # A page whose data never completes is not ready, even with cards attached
+        page = FakePage({".ui-search-layout__item, .ui-search-item__title": 0.01})
+        assert asyncio.run(goto_ready(page, "https://listado.test/nutrilon", search_signals(50)))[1] is None
+    finally:
+        page_readiness.goto_with_retries = original
+
+if __name__ == "__main__":
+    test_first_signal_wins_and_is_recorded()
+    test_all_signals_time_out()
+    test_search_results_wait_for_the_parsed_document()
+    print("✅ SUCCESS: page readiness signals")
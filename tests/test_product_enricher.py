@@ -0,0 +1,38 @@
+import os
+import sys
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enrichers.product_enricher import ProductEnricher
+
+class FailingStorage:
+    def get_meli_listings(self, select="*", filters=None):
+        return [{"attributes": {}}]
+
+    def update_meli_listing(self, listing_id, update_data):
+        raise ConnectionError("PATCH meli_listings: 503")
+
+class Storage(FailingStorage):
+    def __init__(self):
+        self.updates = []
+
+    def update_meli_listing(self, listing_id, update_data):
+        self.updates.append((listing_id, update_data))
+        return True
+
+def enricher(db):
+    agent = ProductEnricher.__new__(ProductEnricher)
+    agent.db = db
+    return agent
+
+def test_update_product_reports_a_failed_write():
+    details = {"ean": "7790000000001", "available_quantity": 3, "specs": {"Marca": "Nutrilon"}}
+    # The caller checkpoints only on True: a failed write is retried by --resume
+    assert enricher(FailingStorage()).update_product("listing-1", details) is False
+    db = Storage()
+    assert enricher(db).update_product("listing-1", details) is True
+    assert db.updates[0][1]["ean_published"] == "7790000000001" and "last_enriched_at" in db.updates[0][1]
+
+if __name__ == "__main__":
+    test_update_product_reports_a_failed_write()
+    print("✅ SUCCESS: product enricher writes")
@@ -0,0 +1,105 @@
+import os
+import sys
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.sqlite_storage import SQLiteStorage
+from logic.query_planner import QueryPlanner, normalize
+
+def run(budget, pages, new, productive, seen=None):
+    return {"budget": budget, "pages": pages, "seen": seen if seen is not None else new, "new": new, "productive": productive}
+
+def test_overlapping_queries_are_pruned():
+    db = SQLiteStorage(":memory:")
+    queries = ["mct", "MCT Oil", "serina", "L'Serina", "Nutrilon", "nutrilon", "Nutrilon Profutura", "Vital"]
+    planned, pruned = QueryPlanner(db).plan(queries)
+    assert normalize("L'Serina") == "l serina"
+    # Never run yet: the covered queries get a one-page probe after the broader ones
+    assert not pruned and len(planned) == 7
+    assert {normalize(p["query"]) for p in planned[:4]} == {"mct", "nutrilon", "serina", "vital"}
+    assert all(p["pages"] == 2 and p["reason"] == "no history" for p in planned[:4])
+    assert {normalize(p["query"]) for p in planned[4:]} == {"mct oil", "l serina", "nutrilon profutura"}
+    assert all(p["pages"] == 1 and p["reason"].startswith("probe") for p in planned[4:])
+
+    # Their probe found nothing the broader queries had not: pruned from now on
+    QueryPlanner(db).record_run({p["query"]: run(p["pages"], p["pages"], 0 if p["pages"] == 1 else 50, 1) for p in planned})
+    planned, pruned = QueryPlanner(db).plan(queries)
+    assert {normalize(p["query"]) for p in planned} == {"mct", "nutrilon", "serina", "vital"}
+    assert {normalize(p["by"]) for p in pruned} == {"mct", "serina", "nutrilon"}
+
+def test_pruning_keeps_coverage():
+    """Simulated runs over fixed result sets: pruning must not lose any listing the full query set finds."""
+    results = {
+        "nutrilon": {f"N{i}" for i in range(60)},
+        "nutrilon profutura": {f"N{i}" for i in range(10)},                 # fully covered by "nutrilon"
+        "mct": {f"M{i}" for i in range(30)},
+        "mct oil": {f"M{i}" for i in range(20)} | {f"OIL{i}" for i in range(5)},  # finds 5 listings "mct" misses
+    }
+    universe = set().union(*results.values())
+    db = SQLiteStorage(":memory:")
+
+    def discover():
+        planner = QueryPlanner(db)
+        planned, pruned = planner.plan(list(results))
+        found, runs = set(), {}
+        for p in planned:  # in plan order, 'new' = not found earlier in the run
+            new = results[p["query"]] - found
+            found |= new
+            runs[p["query"]] = run(p["pages"], 1, len(new), 1 if new else 0)
+        planner.record_run(runs)
+        return found, {p["query"] for p in planned}, {p["query"] for p in pruned}
+
+    for _ in range(3):
+        found, planned, pruned = discover()
+        assert found == universe
+    assert pruned == {"nutrilon profutura"} and "mct oil" in planned
+
+
+def test_specific_query_with_own_yield_is_kept():
+    db = SQLiteStorage(":memory:")
+    planner = QueryPlanner(db)
+    planner.record_run({"mct": run(2, 2, 40, 2), "mct oil": run(2, 2, 8, 1)})
+    planned, pruned = QueryPlanner(db).plan(["mct", "mct oil"])
+    assert [p["query"] for p in planned] == ["mct", "mct oil"] and not pruned
+
+def test_budgets_follow_last_run_yield():
+    db = SQLiteStorage(":memory:")
+    QueryPlanner(db, base_pages=2, max_pages=3).record_run({
+        "nutrilon": run(2, 2, 90, 2),   # every page brought new listings -> one more page
+        "neocate": run(2, 1, 12, 1),    # stopped after page 1 -> 1 page
+        "failed": run(2, 0, 0, 0),      # nothing fetched -> not recorded
+    })
+    planner = QueryPlanner(db, base_pages=2, max_pages=3)
+    budgets = {p["query"]: p["pages"] for p in planner.plan(["nutrilon", "neocate", "pepti"])[0]}
+    assert budgets == {"nutrilon": 3, "neocate": 1, "pepti": 2}
+
+    # Capped at max_pages; counters accumulate across runs
+    planner.record_run({"nutrilon": run(3, 3, 100, 3)})
+    assert QueryPlanner(db, base_pages=2, max_pages=3).plan(["nutrilon"])[0][0]["pages"] == 3
+    stats = {r["query"]: r for r in db.get_query_stats()}
+    assert stats["nutrilon"]["runs"] == 2 and stats["nutrilon"]["pages_fetched"] == 5 and "failed" not in stats
+
+def test_noisy_queries_run_last_with_one_page():
+    db = SQLiteStorage(":memory:")
+    db.upsert_meli_listings(
+        [{"meli_id": f"MLA{i}", "title": f"Kas naranja {i}", "search_keyword": "kas", "item_status": "noise"} for i in range(25)]
+        + [{"meli_id": f"MLA{100 + i}", "title": f"Neocate {i}", "search_keyword": "Neocate"} for i in range(5)]
+    )
+    listing_ids = {r["meli_id"]: r["id"] for r in db.get_meli_listings(select="id,meli_id")}
+    db.upsert_compliance_audit([{"listing_id": listing_ids[f"MLA{100 + i}"], "match_level": 2} for i in range(5)])
+
+    yields = {r["query"]: r for r in db.get_query_yield()}
+    assert yields["kas"]["noise"] == 25 and yields["Neocate"]["identified"] == 5
+
+    # A noisy query does not prune the more specific ones (its single page would not cover them)
+    planned, pruned = QueryPlanner(db).plan(["kas", "kas fresh", "Neocate"])
+    assert not pruned and planned[-1]["query"] == "kas"
+    assert planned[-1]["pages"] == 1 and planned[-1]["reason"].startswith("noisy")
+
+if __name__ == "__main__":
+    test_overlapping_queries_are_pruned()
+    test_pruning_keeps_coverage()
+    test_specific_query_with_own_yield_is_kept()
+    test_budgets_follow_last_run_yield()
+    test_noisy_queries_run_last_with_one_page()
+    print("✅ SUCCESS: discovery query planner")
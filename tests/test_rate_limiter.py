@@ -0,0 +1,99 @@
+import os
+import sys
+import sqlite3
+import asyncio
+import tempfile
+import threading
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.rate_limiter import RateLimiter
+
+TARGETS = {
+    "api": {"rate": 2.0, "min_rate": 0.5, "max_rate": 4.0, "increase": 0.5, "decrease": 0.5,
+            "cooldown": 10.0, "burst": 1, "jitter": 0.0, "throttle_statuses": (429,)},
+    "web_search": {"rate": 1.0, "min_rate": 0.1, "max_rate": 2.0, "increase": 0.1, "decrease": 0.5,
+                   "cooldown": 10.0, "burst": 1, "jitter": 0.0, "throttle_statuses": (403, 429)},
+}
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_processes_share_one_schedule_per_target():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rate_limits.db")
+        clock = Clock()
+        # Two processes (enricher + update_stock) against the same target
+        a = RateLimiter("meli_api_enricher", path=path, targets=TARGETS, clock=clock)
+        b = RateLimiter("update_stock", path=path, targets=TARGETS, clock=clock)
+        delays = [a.reserve("api"), b.reserve("api"), a.reserve("api"), b.reserve("api")]
+        assert delays == [0.0, 0.5, 1.0, 1.5]
+        # Targets are independent
+        assert a.reserve("web_search") == 0.0
+        a.close()
+        b.close()
+
+def test_rate_grows_while_healthy_and_halves_once_per_throttle():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rate_limits.db")
+        clock = Clock()
+        limiter = RateLimiter("discovery", path=path, targets=TARGETS, clock=clock)
+        for status in (200, 404, 200):
+            assert not limiter.feedback("api", status)
+        assert limiter.feedback("api", 500) is False
+        assert limiter.summary() == {"api": {"requests": 0, "throttled": 0, "waited_s": 0.0, "rate": 3.5, "effective_rate": 0.0}}
+
+        # 403 is not throttling for the API, it is for web pages; bot-wall redirects too
+        assert not limiter.feedback("api", 403)
+        assert limiter.feedback("web_search", 200, "https://www.mercadolibre.com.ar/gz/account-verification?go=x")
+
+        # A burst of 429s from in-flight requests backs off once
+        assert limiter.feedback("api", 429) and limiter.feedback("api", 429)
+        assert limiter.summary()["api"]["rate"] == 1.75
+        # ... and pauses the target for the cooldown
+        assert limiter.reserve("api") == 10.0
+        limiter.close()
+
+        # The next run starts from the rate this one settled on, and the run was recorded
+        restarted = RateLimiter("discovery", path=path, targets=TARGETS, clock=clock)
+        clock.now += 60
+        restarted.reserve("api")
+        assert restarted.summary()["api"]["rate"] == 1.75
+        restarted.close()
+        conn = sqlite3.connect(path)
+        runs = conn.execute("SELECT target, requests, throttled, final_rate FROM rate_limit_runs ORDER BY rowid").fetchall()
+        conn.close()
+        assert runs[0] == ("api", 1, 2, 1.75)
+
+def test_acquire_does_not_block_the_event_loop():
+    with tempfile.TemporaryDirectory() as tmp:
+        limiter = RateLimiter("discovery", path=os.path.join(tmp, "rate_limits.db"), targets=TARGETS)
+        # Another worker thread holds the state file for 0.3 s
+        limiter.lock.acquire()
+        threading.Timer(0.3, limiter.lock.release).start()
+
+        async def main():
+            ticks = 0
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+            task = asyncio.create_task(ticker())
+            await limiter.acquire("api")
+            task.cancel()
+            return ticks
+
+        # The loop kept running while the reservation waited for the lock
+        assert asyncio.run(main()) >= 10
+        limiter.close()
+
+if __name__ == "__main__":
+    test_processes_share_one_schedule_per_target()
+    test_rate_grows_while_healthy_and_halves_once_per_throttle()
+    test_acquire_does_not_block_the_event_loop()
+    print("✅ SUCCESS: adaptive shared rate limiter")
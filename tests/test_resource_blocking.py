@@ -0,0 +1,29 @@
+import os
+import sys
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.resource_blocking import should_block
+
+def test_blocks_heavy_types_and_trackers():
+    assert should_block("image", "https://http2.mlstatic.com/D_NQ_NP_1.webp") == "type"
+    assert should_block("font", "https://http2.mlstatic.com/fonts/proxima.woff2") == "type"
+    assert should_block("script", "https://www.googletagmanager.com/gtm.js") == "tracker"
+    assert should_block("xhr", "https://www.mercadolibre.com.ar/melidata/tracks") == "tracker"
+    # What the flows read is never blocked
+    assert should_block("document", "https://listado.mercadolibre.com.ar/nutrilon") is None
+    assert should_block("script", "https://http2.mlstatic.com/frontend-assets/search.js") is None
+    assert should_block("stylesheet", "https://http2.mlstatic.com/ui/search.css") is None
+
+def test_profile_and_call_site_allowlists():
+    # 'inspect' keeps images for its screenshot but still drops trackers
+    assert should_block("image", "https://http2.mlstatic.com/D_NQ_NP_1.webp", "inspect") is None
+    assert should_block("script", "https://static.hotjar.com/c/hotjar.js", "inspect") == "tracker"
+    # Per call allowlist: resource type or host
+    assert should_block("image", "https://http2.mlstatic.com/x.webp", "discovery", allow={"image"}) is None
+    assert should_block("script", "https://www.googletagmanager.com/gtm.js", "discovery", allow={"googletagmanager.com"}) is None
+
+if __name__ == "__main__":
+    test_blocks_heavy_types_and_trackers()
+    test_profile_and_call_site_allowlists()
+    print("✅ SUCCESS: resource blocking profiles")
@@ -0,0 +1,47 @@
+import os
+import sys
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.search_html import parse_search_html, parse_cards, is_bot_wall
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+def test_state_page_is_parsed_without_dom():
+    records, source = parse_search_html(fixture("search_state.html"))
+    assert source == "state" and len(records) == 48
+    first = records[0]
+    assert first["meli_id"] == "MLA1400000000" and first["category_name"] == "Leches Infantiles"
+    assert first["url"].startswith("https://articulo.mercadolibre.com.ar/MLA-1400000000-") and "#" not in first["url"]
+    assert first["is_full"] and not records[1]["is_full"]
+    assert all(r["seller_name"] != "N/A" and not r["seller_name"].startswith("Por") for r in records)
+
+def test_cards_without_state():
+    records, source = parse_search_html(fixture("search_dom.html"))
+    if parse_cards("<html></html>") is None:
+        # Neither selectolax nor lxml installed: the page is handed to the browser
+        assert source == "unreadable" and records == []
+        return
+    assert source == "dom"
+    ids = {r["meli_id"] for r in records}
+    assert "1400000000" in ids and all(r["price_str"].isdigit() for r in records)
+
+def test_empty_page_and_bot_wall():
+    assert parse_search_html(fixture("search_empty.html")) == ([], "empty")
+    # Only an explicit "no results" page ends a query; anything else goes to the browser
+    assert parse_search_html("<html><body><main id=\"root-app\"></main></body></html>") == ([], "unreadable")
+    wall = fixture("bot_wall.html")
+    assert is_bot_wall(200, "https://listado.mercadolibre.com.ar/nutrilon", wall)
+    assert is_bot_wall(200, "https://www.mercadolibre.com.ar/gz/account-verification?go=x", "")
+    assert is_bot_wall(403, "https://listado.mercadolibre.com.ar/nutrilon", "")
+    assert not is_bot_wall(200, "https://listado.mercadolibre.com.ar/nutrilon", fixture("search_state.html"))
+
+if __name__ == "__main__":
+    test_state_page_is_parsed_without_dom()
+    test_cards_without_state()
+    test_empty_page_and_bot_wall()
+    print("✅ SUCCESS: browserless search page parsing")
@@ -0,0 +1,67 @@
+import os
+import sys
+import json
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.search_state import parse_state, extract_listings
+
+POLYCARD_STATE = {
+    "pageState": {"initialState": {
+        "components": {"breadcrumb": {"categories": [{"id": "MLA1384", "name": "Bebés"}, {"id": "MLA1648", "name": "Leches Infantiles"}]}},
+        "results": [
+            {"polycard": {
+                "metadata": {"id": "MLA1400000001", "url": "articulo.mercadolibre.com.ar/MLA-1400000001-nutrilon-3-_JM?searchVariation=1"},
+                "pictures": {"pictures": [{"id": "123-MLA456"}]},
+                "components": [
+                    {"type": "title", "title": {"text": "Nutrilon Profutura 3 800 Gr"}},
+                    {"type": "price", "price": {"current_price": {"value": 25999}}},
+                    {"type": "seller", "seller": {"text": "Por {icon}FARMA SUR"}},
+                    {"type": "shipping", "shipping": {"text": "Envío gratis {full}", "values": [{"key": "full", "type": "icon"}]}},
+                ],
+            }},
+            {"advertising": True},
+        ],
+    }},
+}
+
+ITEM_STATE = {
+    "initialState": {"filters": [{"id": "category", "values": [{"name": "Leches"}]}]},
+    "results": [{
+        "id": "MLA-1400000002", "title": "Vital 3 800g", "price": {"amount": 19999.5},
+        "permalink": "https://articulo.mercadolibre.com.ar/MLA-1400000002-vital_JM#position=2",
+        "seller": {"id": 99, "nickname": "SELLER_X", "official_store_id": 1234, "seller_reputation": {"level_id": "5_green"}},
+        "shipping": {"logistic_type": "fulfillment"}, "sold_quantity": 100,
+        "attributes": [{"id": "BRAND", "value_name": "Vital"}],
+    }],
+}
+
+def test_polycard_results_map_to_records():
+    records = extract_listings(json.dumps(POLYCARD_STATE))
+    assert len(records) == 1
+    r = records[0]
+    assert r["meli_id"] == "MLA1400000001" and r["price_str"] == "25999"
+    assert r["url"] == "https://articulo.mercadolibre.com.ar/MLA-1400000001-nutrilon-3-_JM"
+    assert r["seller_name"] == "FARMA SUR" and r["is_full"]
+    assert r["category_id"] == "MLA1648" and r["category_name"] == "Leches Infantiles"
+    assert r["thumbnail"].endswith("123-MLA456-O.webp")
+
+def test_inline_assignment_and_flat_items():
+    raw = "window.__PRELOADED_STATE__ = " + json.dumps(ITEM_STATE) + ";\nwindow.other = 1;"
+    r = extract_listings(raw)[0]
+    assert r["meli_id"] == "MLA1400000002" and r["price_str"] == "19999.5"
+    assert r["seller_id"] == "99" and r["seller_reputation"] == "5_green" and r["is_official_store"]
+    assert r["is_full"] and r["sold_quantity_str"] == "+100 vendidos" and r["raw_attributes"]["brand"] == "Vital"
+    assert r["category_name"] == "Leches" and r["url"].endswith("vital_JM")
+
+def test_missing_state_means_dom_fallback():
+    assert extract_listings(None) is None
+    assert extract_listings("window.dataLayer = [];") is None
+    assert extract_listings(json.dumps({"pageState": {"initialState": {"results": []}}})) is None
+    assert parse_state("{not json") is None
+
+if __name__ == "__main__":
+    test_polycard_results_map_to_records()
+    test_inline_assignment_and_flat_items()
+    test_missing_state_means_dom_fallback()
+    print("✅ SUCCESS: search state extraction")
@@ -0,0 +1,24 @@
+import os
+import sys
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.search_urls import search_page_url, search_page_urls, slugify
+
+def test_search_page_urls():
+    assert slugify("Nutrilon Profutura 3") == "nutrilon-profutura-3"
+    assert slugify("Leche Maternizada Bagó") == "leche-maternizada-bago"
+
+    assert search_page_url("Nutrilon") == "https://listado.mercadolibre.com.ar/nutrilon"
+    assert search_page_url("Nutrilon", 3) == "https://listado.mercadolibre.com.ar/nutrilon_Desde_101_NoIndex_True"
+    assert search_page_url("Vital 3", 2, sort="price_asc", category_path="/bebes/") == \
+        "https://listado.mercadolibre.com.ar/bebes/vital-3_Desde_51_OrderId_PRICE_NoIndex_True"
+    assert search_page_url("neocate", condition="new", price_range=(1000, None)).endswith(
+        "/neocate_ITEM*CONDITION_2230284_PriceRange_1000-0")
+
+    urls = search_page_urls("ketocal", 4)
+    assert len(urls) == 4 and len(set(urls)) == 4
+
+if __name__ == "__main__":
+    test_search_page_urls()
+    print("✅ SUCCESS: search page URLs")
@@ -0,0 +1,74 @@
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.seller_cache import SellerCache
+from logic.sqlite_storage import SQLiteStorage
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+class FakeUsersApi:
+    def __init__(self):
+        self.calls = []
+        self.down = False
+
+    def __call__(self, url):
+        ids = url.split("ids=")[1].split(",")
+        self.calls.append(ids)
+        if self.down:
+            return FakeResponse(503)
+        return FakeResponse(200, [{"code": 200, "body": {
+            "id": int(i), "nickname": f"SELLER_{i}", "user_type": "brand" if i == "1" else "normal",
+            "seller_reputation": {"level_id": "5_green", "power_seller_status": "platinum"}}} for i in ids])
+
+def test_batched_lookups_and_ttl():
+    with tempfile.TemporaryDirectory() as tmp:
+        api = FakeUsersApi()
+        cache = SellerCache(path=os.path.join(tmp, "sellers.db"), get=api)
+        profiles = cache.get_many([str(i) for i in range(1, 26)] + [1, None, "N/A"])
+        assert len(profiles) == 25 and [len(c) for c in api.calls] == [20, 5]
+        assert profiles["1"]["is_official_store"] and not profiles["2"]["is_official_store"]
+        assert profiles["2"]["nickname"] == "SELLER_2" and profiles["2"]["reputation_level"] == "5_green"
+
+        # Within the TTL nothing is fetched again
+        assert cache.nickname(7) == "SELLER_7" and len(api.calls) == 2
+
+        # Past the TTL the profile is refreshed; if the refresh fails the stale one is kept
+        stale = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
+        cache.conn.execute("UPDATE seller_profiles SET fetched_at = ?", (stale,))
+        api.down = True
+        assert cache.nickname(7) == "SELLER_7" and len(api.calls) == 3
+        api.down = False
+        assert cache.get(7)["fetched_at"] != stale and len(api.calls) == 4
+        cache.close()
+
+def test_profiles_are_shared_through_the_database():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SQLiteStorage(":memory:")
+        api = FakeUsersApi()
+        first = SellerCache(path=os.path.join(tmp, "a.db"), db=db, get=api)
+        first.get_many(["10", "11"])
+        # Another machine (its own local file) reuses the shared profiles
+        second = SellerCache(path=os.path.join(tmp, "b.db"), db=db, get=api)
+        assert second.nickname("11") == "SELLER_11"
+        assert len(api.calls) == 1 and second.stats["db"] == 1
+        first.close()
+        second.close()
+
+if __name__ == "__main__":
+    test_batched_lookups_and_ttl()
+    test_profiles_are_shared_through_the_database()
+    print("✅ SUCCESS: seller profile cache")
@@ -0,0 +1,128 @@
+import os
+import sys
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.sqlite_storage import SQLiteStorage
+from logic.delta_sync import DeltaSync
+from logic.projections import projection
+
+def test_sqlite_storage_roundtrip():
+    db = SQLiteStorage(":memory:")
+
+    db.upsert_meli_listings([
+        {"meli_id": "MLA1", "title": "Nutrilon Profutura 1 800 Gr", "price": 95000, "attributes": {"net_content": "800g"}},
+        {"meli_id": "MLA2", "title": "Hongo Cola De Pavo X30 Gr", "price": 25000, "is_official_store": True}
+    ])
+    listings = db.get_meli_listings(order="meli_id.asc")
+    assert [l["meli_id"] for l in listings] == ["MLA1", "MLA2"]
+    assert listings[0]["attributes"] == {"net_content": "800g"}
+    assert listings[1]["is_official_store"] is True
+
+    # Partial upsert only touches the provided columns (merge-duplicates semantics)
+    db.upsert_meli_listings([{"meli_id": "MLA1", "title": "Nutrilon Profutura 1 800 Gr", "seller_name": "NUTRICIA"}])
+    mla1 = db.get_meli_listings(filters={"meli_id": "eq.MLA1"})[0]
+    assert mla1["seller_name"] == "NUTRICIA" and mla1["price"] == 95000
+
+    # PostgREST-style filters
+    missing_seller = db.get_meli_listings(select="meli_id", filters={"or": "(seller_name.is.null,ean_published.not.is.null)"})
+    assert missing_seller == [{"meli_id": "MLA2"}]
+
+    # Audit + status applied together
+    noise_id = listings[1]["id"]
+    db.apply_audit_batch([{
+        "listing_id": noise_id, "master_product_id": None, "match_level": 0, "fraud_score": 0,
+        "risk_level": "Bajo", "violation_details": {"unidentified": True}, "item_status": "noise"
+    }])
+    assert db.get_meli_listings(select="item_status", filters={"id": f"eq.{noise_id}"})[0]["item_status"] == "noise"
+    assert len(db.get_meli_listings(filters={"item_status": ["neq.noise", "neq.noise_manual"]})) == 1
+
+def test_streamed_listings_and_delta():
+    db = SQLiteStorage(":memory:")
+    db.upsert_meli_listings([
+        {"meli_id": f"MLA{i}", "title": f"Listing {i}", "last_scraped_at": f"2024-07-0{i}T00:00:00+00:00"}
+        for i in range(1, 6)
+    ])
+
+    streamed = list(db.iter_meli_listings(select="meli_id", page_size=2))
+    assert sorted(r["meli_id"] for r in streamed) == [f"MLA{i}" for i in range(1, 6)]
+
+    sync = DeltaSync(db, "test_consumer", ("last_scraped_at",))
+    assert len(list(sync.iter(select="id"))) == 5
+    sync.commit()
+
+    db.upsert_meli_listings([{"meli_id": "MLA6", "title": "Listing 6", "last_scraped_at": "2024-07-09T00:00:00+00:00"}])
+    changed = list(DeltaSync(db, "test_consumer", ("last_scraped_at",)).iter(select="meli_id"))
+    assert [r["meli_id"] for r in changed] == ["MLA6"]
+
+    # Marks compare as timestamps: 'Z' vs '+00:00' offsets, fewer fractional digits, other zones
+    sync = DeltaSync(db, "mixed_offsets", ("last_scraped_at",))
+    sync.observe([{"last_scraped_at": "2024-07-10T10:00:00.5Z"}, {"last_scraped_at": "2024-07-10T10:00:00+00:00"},
+                  {"last_scraped_at": "2024-07-10T09:00:00-03:00"}, {"last_scraped_at": "2024-07-10T11:59:59.999999+00:00"}])
+    assert sync._seen["last_scraped_at"] == "2024-07-10T09:00:00-03:00"
+
+    # Rows fetched with observe=False only move the mark once the consumer observes them
+    sync = DeltaSync(db, "explicit_observe", ("last_scraped_at",))
+    rows = sync.fetch(select="meli_id", observe=False)
+    sync.observe(rows[:2])
+    sync.commit()
+    assert db.get_watermark("explicit_observe")["last_scraped_at"] == "2024-07-02T00:00:00+00:00"
+
+def test_delta_scan_keeps_concurrent_writes():
+    db = SQLiteStorage(":memory:")
+    db.upsert_meli_listings([
+        {"meli_id": f"MLA{i}", "title": f"Listing {i}", "last_scraped_at": f"2024-07-0{i}T00:00:00+00:00"}
+        for i in range(1, 6)
+    ])
+    # A scan never commits past the values that existed when it started: of two rows updated
+    # during it, one behind the cursor (not streamed) and one ahead (streamed), both come back
+    sync = DeltaSync(db, "concurrent_writes", ("last_scraped_at",))
+    listed = list(sync.iter(select="id,meli_id"))
+    by_meli = {r["meli_id"]: r["id"] for r in listed}
+    db.update_meli_listing(by_meli["MLA1"], {"last_scraped_at": "2024-07-20T00:00:00+00:00"})
+    db.update_meli_listing(by_meli["MLA2"], {"last_scraped_at": "2024-07-21T00:00:00+00:00"})
+    sync.observe([{"last_scraped_at": "2024-07-21T00:00:00+00:00"}])
+    sync.commit()
+    assert db.get_watermark("concurrent_writes")["last_scraped_at"] == "2024-07-05T00:00:00+00:00"
+    again = DeltaSync(db, "concurrent_writes", ("last_scraped_at",)).iter(select="meli_id")
+    assert sorted(r["meli_id"] for r in again) == ["MLA1", "MLA2"]
+
+def test_projection_profiles():
+    db = SQLiteStorage(":memory:")
+    db.upsert_meli_listings([{
+        "meli_id": "MLA1", "title": "Nutrilon Profutura 1 800 Gr",
+        "attributes": {"net_content": 0.8, "meta_seller_name": "NUTRICIA", "description_long": "x" * 5000}
+    }])
+
+    row = db.get_meli_listings(select=projection("audit_input"))[0]
+    assert row["attributes"] == {"net_content": 0.8, "meta_seller_name": "NUTRICIA"}
+
+    row = db.get_meli_listings(select=projection("seller_sync"))[0]
+    assert row["meta_seller_name"] == "NUTRICIA" and "attributes" not in row
+
+def test_audit_history_records_changes_only():
+    db = SQLiteStorage(":memory:")
+    db.upsert_meli_listings([{"meli_id": "MLA1", "title": "Listing 1"}])
+    listing_id = db.get_meli_listings()[0]["id"]
+    audit = {"listing_id": listing_id, "match_level": 1, "fraud_score": 10, "risk_level": "Bajo",
+             "violation_details": {"low_price": None}}
+
+    db.apply_audit_batch([audit])
+    db.apply_audit_batch([audit])  # unchanged re-audit: no new history row
+    db.apply_audit_batch([{**audit, "fraud_score": 70, "risk_level": "Alto"}])
+
+    history = db.get_audit_history(select="meli_id,change_kind,fraud_score", order="id.asc")
+    assert [(h["change_kind"], h["fraud_score"]) for h in history] == [("new", 10), ("changed", 70)]
+    assert history[0]["meli_id"] == "MLA1"
+
+    # History survives a fresh start
+    db.clear_all_data()
+    assert len(db.get_audit_history()) == 2
+
+if __name__ == "__main__":
+    test_sqlite_storage_roundtrip()
+    test_streamed_listings_and_delta()
+    test_delta_scan_keeps_concurrent_writes()
+    test_projection_profiles()
+    test_audit_history_records_changes_only()
+    print("✅ SUCCESS: SQLite storage roundtrip")
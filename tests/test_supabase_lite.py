@@ -0,0 +1,101 @@
+import os
+import sys
+import csv
+import io
+from types import SimpleNamespace
+import pytest
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic import supabase_lite
+from logic.supabase_lite import SupabaseLite
+
+class FakePostgrest:
+    """Records request bodies; rejects an upsert that repeats a conflict key, like Postgres does."""
+
+    def __init__(self):
+        self.bodies = []
+
+    def post(self, url, data=None, json=None, headers=None):
+        rows = json if json is not None else list(csv.DictReader(io.StringIO(data.decode("utf-8"))))
+        self.bodies.append(rows)
+        ids = [r["meli_id"] for r in rows]
+        if "on_conflict=meli_id" in url and len(ids) != len(set(ids)):
+            return SimpleNamespace(ok=False, status_code=500, text="ON CONFLICT DO UPDATE command cannot affect row a second time")
+        return SimpleNamespace(ok=True, status_code=201, text="")
+
+@pytest.fixture(autouse=True)
+def supabase_env(monkeypatch):
+    monkeypatch.setenv("SUPABASE_URL", "http://localhost:54321")
+    monkeypatch.setenv("SUPABASE_KEY", "test-key")
+
+@pytest.fixture
+def fake(monkeypatch):
+    fake = FakePostgrest()
+    monkeypatch.setattr(supabase_lite.requests, "post", fake.post)
+    return fake
+
+@pytest.fixture
+def db(fake):
+    return SupabaseLite()
+
+def test_bulk_load_merges_duplicate_conflict_keys(db, fake):
+    # update_stock rewrites meli_id from the URL, so two rows can end up with the same id
+    rows = [
+        {"meli_id": "MLA1", "price": 100, "available_quantity": 3},
+        {"meli_id": "MLA2", "price": 200, "available_quantity": 1},
+        {"meli_id": "MLA1", "price": 110, "available_quantity": 0},
+        {"meli_id": "MLA3", "price": 300, "available_quantity": 5},
+    ]
+    assert db.bulk_load("meli_listings", rows, on_conflict="meli_id")
+    stored = {r["meli_id"]: r for body in fake.bodies for r in body}
+    # Last row wins, each batch carries each key once
+    assert stored["MLA1"]["price"] == "110" and stored["MLA1"]["available_quantity"] == "0"
+    assert all(len({r["meli_id"] for r in body}) == len(body) for body in fake.bodies)
+    assert sorted(stored) == ["MLA1", "MLA2", "MLA3"]
+
+def test_bulk_load_without_conflict_key_keeps_every_row(db, fake):
+    rows = [{"meli_id": "MLA1", "title": "a"}, {"meli_id": "MLA1", "title": "b"}]
+    db.bulk_load("scrape_log", rows)
+    assert [r["title"] for body in fake.bodies for r in body] == ["a", "b"]
+
+def test_master_products_are_paginated(monkeypatch):
+    catalog = [{"id": f"{i:05d}", "ean": str(7790000 + i)} for i in range(2500)]
+    urls = []
+
+    def get(url, headers=None):
+        urls.append(url)
+        offset = int(url.split("offset=")[1].split("&")[0])
+        limit = int(url.split("limit=")[1].split("&")[0])
+        # PostgREST caps every response at 1000 rows whatever the limit
+        page = catalog[offset:offset + min(limit, 1000)]
+        return SimpleNamespace(status_code=200, json=lambda: page, raise_for_status=lambda: None)
+
+    monkeypatch.setattr(supabase_lite.requests, "get", get)
+    products = SupabaseLite().get_master_products()
+    assert len(products) == 2500 and len(urls) == 3
+    assert all("order=id.asc" in u for u in urls)
+
+def test_matched_listings_are_paginated(monkeypatch):
+    audits = [{"id": i, "master_product_id": "mp", "meli_listings": {"id": f"l{i}", "last_enriched_at": f"2024-07-{1 + i % 28:02d}"}}
+              for i in range(1, 2301)]
+    urls = []
+
+    def get(url, headers=None):
+        urls.append(url)
+        after = int(url.split("id=gt.")[1].split("&")[0]) if "id=gt." in url else 0
+        limit = int(url.split("limit=")[1].split("&")[0])
+        page = [a for a in audits if a["id"] > after][:min(limit, 1000)]
+        return SimpleNamespace(status_code=200, json=lambda: page, raise_for_status=lambda: None)
+
+    monkeypatch.setattr(supabase_lite.requests, "get", get)
+    listings = SupabaseLite().get_matched_listings()
+    oldest = SupabaseLite().get_matched_listings(limit=5)
+    assert len(listings) == 2300 and len(urls) == 6
+    assert all("order=id.asc" in u for u in urls)
+    # 'limit' keeps the oldest-enriched listings of the whole set, not of the first page
+    assert [l["last_enriched_at"] for l in oldest] == ["2024-07-01"] * 5
+
+if __name__ == "__main__":
+    if pytest.main([__file__, "-q"]) == 0:
+        print("✅ SUCCESS: SupabaseLite storage backend")